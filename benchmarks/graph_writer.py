@@ -0,0 +1,250 @@
+"""
+Graph writer benchmark
+
+Drives ``graph.GraphWriter`` against an in-process recording driver
+that applies the writer's MERGE/MATCH semantics, records every Cypher
+statement with its row count and parameter size, and sleeps for a
+simulated per-transaction round trip plus per-row server time. Sweeps
+batch size, concurrency and ordering, reporting objects/sec, transaction
+counts and edges lost to missing endpoints.
+
+Orderings:
+
+- ``nodes-first``: the writer's plan; every node batch commits before
+  any edge batch
+- ``interleaved``: node and edge batches alternate (edges whose
+  endpoints are not loaded yet are dropped by the MATCH)
+- ``edges-first``: every edge batch before any node batch
+
+Concurrency 1 with ``nodes-first`` runs ``GraphWriter.write()`` itself;
+other combinations dispatch ``GraphWriter.plan()`` batches through the
+same transaction function over a thread pool, one session per batch,
+with a barrier between the ``nodes-first`` / ``edges-first`` phases.
+The fake driver does not model server-side lock contention, so gains
+from concurrency are an upper bound.
+
+Usage:
+    PYTHONPATH=src python benchmarks/graph_writer.py [BUNDLE]
+        [--batch-sizes 100,1000] [--concurrency 1,4] [--orderings nodes-first]
+        [--tx-latency MS] [--row-latency US]
+
+BUNDLE defaults to the test fixture, replicated to about 50k objects
+(see ``benchmarks/validation.py``). Exits non-zero if a ``nodes-first``
+run loses or duplicates anything.
+"""
+
+import argparse
+import json
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+
+from orbit.graph import GraphBatch, GraphWriter
+from orbit.graph.writer import CONSTRAINT_QUERY, _run_batch
+
+from validation import FIXTURE_PATH, TARGET_OBJECTS, _replicate
+
+ORDERINGS = ("nodes-first", "interleaved", "edges-first")
+
+
+@dataclass(frozen=True)
+class RecordedTransaction:
+    """One committed write: its Cypher, row count and JSON parameter size."""
+
+    query: str
+    rows: int
+    parameter_bytes: int
+
+
+class RecordingDriver:
+    """
+    In-process stand-in for ``neo4j.Driver``.
+
+    Applies the writer's statements to an in-memory graph (nodes MERGE
+    by ``stix_id``; edges MERGE only when both endpoints exist, as with
+    the MATCH) and records each transaction. Each transaction sleeps
+    ``tx_latency + rows * row_latency`` seconds outside the lock, so
+    concurrent sessions overlap their waits as they would against a
+    remote server.
+
+    Args:
+        tx_latency: Seconds per transaction (commit round trip)
+        row_latency: Seconds per row
+        measure_parameters: Serialize parameters to record their size
+            (costs client CPU; off for timing runs)
+    """
+
+    def __init__(self, tx_latency: float = 0.0, row_latency: float = 0.0, measure_parameters: bool = False):
+        self.tx_latency = tx_latency
+        self.row_latency = row_latency
+        self.measure_parameters = measure_parameters
+        self.nodes: set[str] = set()
+        self.edges: set[str] = set()
+        self.node_writes = 0
+        self.edge_writes = 0
+        self.missed_edges = 0
+        self.transactions: list[RecordedTransaction] = []
+        self._lock = threading.Lock()
+
+    def session(self, database=None):
+        return _RecordingSession(self)
+
+    def close(self):
+        pass
+
+    def apply(self, query: str, rows: list[dict]) -> None:
+        if self.tx_latency or self.row_latency:
+            time.sleep(self.tx_latency + len(rows) * self.row_latency)
+        size = len(json.dumps(rows, separators=(",", ":"))) if self.measure_parameters else 0
+        with self._lock:
+            if "MERGE (n:" in query:
+                self.nodes.update(row["stix_id"] for row in rows)
+                self.node_writes += len(rows)
+            else:
+                for row in rows:
+                    if row["source"] in self.nodes and row["target"] in self.nodes:
+                        self.edges.add(row["stix_id"])
+                        self.edge_writes += 1
+                    else:
+                        self.missed_edges += 1
+            self.transactions.append(RecordedTransaction(query, len(rows), size))
+
+
+class _RecordingResult:
+    def consume(self):
+        return None
+
+
+class _RecordingTransaction:
+    def __init__(self, driver: RecordingDriver):
+        self.driver = driver
+
+    def run(self, query, rows=None):
+        self.driver.apply(query, rows)
+        return _RecordingResult()
+
+
+class _RecordingSession:
+    def __init__(self, driver: RecordingDriver):
+        self.driver = driver
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def run(self, query):
+        assert query == CONSTRAINT_QUERY
+        return _RecordingResult()
+
+    def execute_write(self, work, *args):
+        return work(_RecordingTransaction(self.driver), *args)
+
+
+def _is_edge_batch(batch: GraphBatch) -> bool:
+    return "source" in batch.rows[0]
+
+
+def _phases(plan: list[GraphBatch], ordering: str) -> list[list[GraphBatch]]:
+    """Batches grouped into phases; a phase commits fully before the next starts."""
+    nodes = [batch for batch in plan if not _is_edge_batch(batch)]
+    edges = [batch for batch in plan if _is_edge_batch(batch)]
+    if ordering == "nodes-first":
+        return [nodes, edges]
+    if ordering == "edges-first":
+        return [edges, nodes]
+    interleaved = []
+    for i in range(max(len(nodes), len(edges))):
+        interleaved.extend(nodes[i : i + 1] + edges[i : i + 1])
+    return [interleaved]
+
+
+def _dispatch(driver: RecordingDriver, writer: GraphWriter, objects: list[dict], ordering: str, concurrency: int) -> None:
+    def run(batch: GraphBatch) -> None:
+        with driver.session(database=writer.database) as session:
+            session.execute_write(_run_batch, batch)
+
+    with driver.session(database=writer.database) as session:
+        session.run(CONSTRAINT_QUERY).consume()
+    phases = _phases(writer.plan(objects), ordering)
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for phase in phases:
+            list(pool.map(run, phase))
+
+
+def _measure(objects: list[dict], batch_size: int, concurrency: int, ordering: str, args) -> tuple[RecordingDriver, float]:
+    driver = RecordingDriver(args.tx_latency / 1000, args.row_latency / 1e6)
+    writer = GraphWriter(driver, batch_size=batch_size)
+    start = time.perf_counter()
+    if concurrency == 1 and ordering == "nodes-first":
+        writer.write(objects)
+    else:
+        _dispatch(driver, writer, objects, ordering, concurrency)
+    return driver, time.perf_counter() - start
+
+
+def _int_list(text: str) -> list[int]:
+    return [int(part) for part in text.split(",")]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("bundle", nargs="?", type=Path, default=FIXTURE_PATH)
+    parser.add_argument("--batch-sizes", type=_int_list, default=[100, 500, 1000, 5000])
+    parser.add_argument("--concurrency", type=_int_list, default=[1, 2, 4, 8])
+    parser.add_argument("--orderings", type=lambda text: text.split(","), default=list(ORDERINGS[:2]))
+    parser.add_argument("--tx-latency", type=float, default=2.0, help="Milliseconds per transaction")
+    parser.add_argument("--row-latency", type=float, default=5.0, help="Microseconds per row")
+    args = parser.parse_args()
+    for ordering in args.orderings:
+        if ordering not in ORDERINGS:
+            parser.error(f"unknown ordering {ordering!r}; choose from {', '.join(ORDERINGS)}")
+
+    objects = json.loads(args.bundle.read_text(encoding="utf-8"))["objects"]
+    if args.bundle == FIXTURE_PATH:
+        objects = _replicate(objects, TARGET_OBJECTS // len(objects))
+    node_ids = {obj["id"] for obj in objects if obj["type"] != "relationship"}
+    edge_ids = {
+        obj["id"]
+        for obj in objects
+        if obj["type"] == "relationship" and obj["source_ref"] in node_ids and obj["target_ref"] in node_ids
+    }
+
+    # One untimed, fully recorded pass: statement mix and payload sizes
+    profile = RecordingDriver(measure_parameters=True)
+    GraphWriter(profile, batch_size=args.batch_sizes[0]).write(objects)
+    payload = sum(tx.parameter_bytes for tx in profile.transactions)
+    print(
+        f"{len(objects)} objects ({len(node_ids)} nodes, {len(edge_ids)} loadable edges), "
+        f"{len({tx.query for tx in profile.transactions})} distinct statements, "
+        f"{payload / len(objects):.0f} parameter bytes/object, "
+        f"latency {args.tx_latency:g} ms/tx + {args.row_latency:g} us/row"
+    )
+    print(f"  {'ordering':<12} {'batch':>6} {'conc':>5} {'txns':>6} {'objects/s':>10} {'seconds':>8} {'missed':>7}")
+
+    failed = False
+    for ordering in args.orderings:
+        for batch_size in args.batch_sizes:
+            for concurrency in args.concurrency:
+                driver, seconds = _measure(objects, batch_size, concurrency, ordering, args)
+                print(
+                    f"  {ordering:<12} {batch_size:>6} {concurrency:>5} {len(driver.transactions):>6} "
+                    f"{len(objects) / seconds:>10.0f} {seconds:>8.2f} {driver.missed_edges:>7}"
+                )
+                if ordering == "nodes-first" and (
+                    driver.nodes != node_ids
+                    or driver.edges != edge_ids
+                    or driver.node_writes != len(node_ids)
+                    or driver.edge_writes != len(edge_ids)
+                ):
+                    print("    ^ graph does not match the input objects", file=sys.stderr)
+                    failed = True
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
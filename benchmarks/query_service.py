@@ -0,0 +1,181 @@
+"""
+Query service load test
+
+Starts ``orbit serve`` logic (``service.QueryService``) in a child
+process pinned to one CPU, then drives it from client processes over
+keep-alive connections for a fixed duration, reporting throughput and
+latency percentiles with the result cache on and off.
+
+The request mix cycles through every technique ATT&CK ID with each
+route (technique, groups, groups with sub-techniques, mitigations,
+inherited mitigations).
+
+Usage:
+    PYTHONPATH=src python benchmarks/query_service.py [BUNDLE]
+        [--duration S] [--clients N] [--connections N]
+
+BUNDLE defaults to the test fixture, replicated to about 50k objects
+(see ``benchmarks/validation.py``). Clients are pinned to the other
+CPUs when the machine has more than one; on a single CPU they share it
+with the server, which understates server throughput.
+"""
+
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import tempfile
+import time
+from pathlib import Path
+
+from orbit.ingestion.output import write_output
+from orbit.service import QueryService, QuerySnapshot, ResultCache
+
+from validation import FIXTURE_PATH, TARGET_OBJECTS, _replicate
+
+ROUTES = [
+    "/techniques/{}",
+    "/techniques/{}/groups",
+    "/techniques/{}/groups?subtechniques=true",
+    "/techniques/{}/mitigations",
+    "/techniques/{}/mitigations?inherited=true",
+]
+
+
+def _pin(cpu: int) -> None:
+    if hasattr(os, "sched_setaffinity"):
+        os.sched_setaffinity(0, {cpu})
+
+
+def _server(output_dir: Path, cache_size: int, cpu: int, ready, stop) -> None:
+    _pin(cpu)
+
+    async def run() -> None:
+        service = QueryService(
+            output_dir, cache=ResultCache(maxsize=cache_size), reload_interval=None
+        )
+        server = await service.start(port=0)
+        ready.put(server.sockets[0].getsockname()[1])
+        loop = asyncio.get_running_loop()
+        async with server:
+            await loop.run_in_executor(None, stop.wait)
+
+    asyncio.run(run())
+
+
+async def _connection(port: int, targets: list[str], offset: int, deadline: float) -> list[float]:
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    latencies = []
+    i = offset
+    while time.perf_counter() < deadline:
+        target = targets[i % len(targets)]
+        i += 1
+        start = time.perf_counter()
+        writer.write(f"GET {target} HTTP/1.1\r\nHost: bench\r\n\r\n".encode("ascii"))
+        length = 0
+        while True:
+            line = await reader.readline()
+            if line == b"\r\n":
+                break
+            if line.lower().startswith(b"content-length:"):
+                length = int(line.split(b":")[1])
+        await reader.readexactly(length)
+        latencies.append(time.perf_counter() - start)
+    writer.close()
+    return latencies
+
+
+def _client(port: int, targets: list[str], connections: int, duration: float, cpu, results) -> None:
+    if cpu is not None:
+        _pin(cpu)
+
+    async def run() -> list[float]:
+        deadline = time.perf_counter() + duration
+        batches = await asyncio.gather(
+            *(_connection(port, targets, n * 7, deadline) for n in range(connections))
+        )
+        return [latency for batch in batches for latency in batch]
+
+    results.put(asyncio.run(run()))
+
+
+def _percentile(sorted_values: list[float], fraction: float) -> float:
+    return sorted_values[min(len(sorted_values) - 1, int(fraction * len(sorted_values)))]
+
+
+def _measure(output_dir: Path, targets: list[str], cache_size: int, args) -> tuple[float, list[float]]:
+    cpus = sorted(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else [0]
+    ctx = multiprocessing.get_context("spawn")
+    ready, results, stop = ctx.Queue(), ctx.Queue(), ctx.Event()
+    server = ctx.Process(target=_server, args=(output_dir, cache_size, cpus[0], ready, stop))
+    server.start()
+    port = ready.get()
+
+    client_cpus = cpus[1:] or [None]
+    clients = [
+        ctx.Process(
+            target=_client,
+            args=(port, targets, args.connections, args.duration, client_cpus[n % len(client_cpus)], results),
+        )
+        for n in range(args.clients)
+    ]
+    for client in clients:
+        client.start()
+    latencies = [latency for _ in clients for latency in results.get()]
+    for client in clients:
+        client.join()
+    stop.set()
+    server.join()
+    return len(latencies) / args.duration, sorted(latencies)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("bundle", nargs="?", type=Path, default=FIXTURE_PATH)
+    parser.add_argument("--duration", type=float, default=5.0)
+    parser.add_argument("--clients", type=int, default=2)
+    parser.add_argument("--connections", type=int, default=16, help="Connections per client")
+    args = parser.parse_args()
+
+    objects = json.loads(args.bundle.read_text(encoding="utf-8"))["objects"]
+    if args.bundle == FIXTURE_PATH:
+        objects = _replicate(objects, TARGET_OBJECTS // len(objects))
+    objects.sort(key=lambda obj: obj["id"])
+
+    with tempfile.TemporaryDirectory() as tmp:
+        output_dir = Path(tmp)
+        write_output(objects, output_dir)
+
+        start = time.perf_counter()
+        snapshot = QuerySnapshot.load(output_dir)
+        load_seconds = time.perf_counter() - start
+
+        attack_ids = sorted(
+            {
+                ref["external_id"]
+                for obj in objects
+                if obj.get("type") == "attack-pattern"
+                for ref in obj.get("external_references", ())
+                if ref.get("source_name") == "mitre-attack"
+            }
+        )
+        targets = [route.format(attack_id) for attack_id in attack_ids for route in ROUTES]
+
+        print(
+            f"{len(snapshot)} objects, snapshot load {load_seconds:.2f} s, "
+            f"{len(targets)} distinct requests, {args.clients} client(s) x "
+            f"{args.connections} connection(s), {args.duration:g} s per run, "
+            f"{len(os.sched_getaffinity(0)) if hasattr(os, 'sched_getaffinity') else '?'} CPU(s)"
+        )
+        for label, cache_size in (("cached", 4096), ("uncached", 0)):
+            throughput, latencies = _measure(output_dir, targets, cache_size, args)
+            print(
+                f"  {label:<9} {throughput:9.0f} req/s  "
+                f"p50 {_percentile(latencies, 0.50) * 1000:6.2f} ms  "
+                f"p99 {_percentile(latencies, 0.99) * 1000:6.2f} ms"
+            )
+
+
+if __name__ == "__main__":
+    main()
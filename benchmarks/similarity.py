@@ -0,0 +1,160 @@
+"""
+MinHash/LSH similarity benchmark
+
+Builds ``indexes.MinHashIndex`` over synthetic technique profiles
+(optionally on top of the groups and software of a real ATT&CK bundle)
+and compares its answers with exact Jaccard similarity over every
+profile, for several (num_perm, bands) settings.
+
+Synthetic profiles mimic internal clusters: families of related
+activity share a base technique set drawn with Zipf-like technique
+popularity, and each member keeps most of its family's techniques and
+adds a few of its own.
+
+Reported per setting:
+
+- ``recall@k``: share of the exact top-k (Jaccard > 0, ties at the k-th
+  score included) that the LSH top-k returns
+- ``precision``/``recall`` at Jaccard >= t: LSH results with estimated
+  similarity >= t against the exact neighbours with Jaccard >= t
+- ``cand%``: candidates scored per query, as a share of all profiles
+- query and insert times, against a per-query all-pairs Jaccard over
+  Python sets (the current approach)
+
+Usage:
+    PYTHONPATH=src python benchmarks/similarity.py [BUNDLE]
+        [--profiles N] [--queries N] [--k K] [--similarity T]
+        [--settings 128x32,128x16,256x64]
+"""
+
+import argparse
+import json
+import time
+from pathlib import Path
+
+import numpy as np
+
+from orbit.indexes import IncidenceIndex, MinHashIndex
+
+
+def _synthetic_profiles(
+    techniques: list[str], count: int, rng: np.random.Generator
+) -> dict[str, frozenset[str]]:
+    popularity = 1 / np.arange(1, len(techniques) + 1) ** 0.8
+    popularity /= popularity.sum()
+    profiles = {}
+    family_base: list[np.ndarray] = []
+    while len(profiles) < count:
+        if not family_base or rng.random() < 0.1:
+            size = min(int(rng.integers(10, 60)), len(techniques))
+            family_base.append(rng.choice(len(techniques), size, replace=False, p=popularity))
+        base = family_base[int(rng.integers(len(family_base)))]
+        kept = base[rng.random(len(base)) < 0.8]
+        extra = rng.choice(len(techniques), int(rng.integers(0, 6)), p=popularity)
+        profiles[f"cluster-{len(profiles):06d}"] = frozenset(techniques[t] for t in np.concatenate([kept, extra]))
+    return profiles
+
+
+def _exact(profiles: dict[str, frozenset[str]], query: str) -> list[tuple[str, float]]:
+    """All-pairs Jaccard for one profile, best first (the baseline)."""
+    mine = profiles[query]
+    scores = []
+    for key, other in profiles.items():
+        if key != query:
+            union = len(mine | other)
+            score = len(mine & other) / union if union else 0.0
+            if score > 0:
+                scores.append((key, score))
+    scores.sort(key=lambda hit: (-hit[1], hit[0]))
+    return scores
+
+
+def _setting(text: str) -> tuple[int, int]:
+    num_perm, bands = text.split("x")
+    return int(num_perm), int(bands)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("bundle", nargs="?", type=Path)
+    parser.add_argument("--profiles", type=int, default=5000, help="Synthetic profiles to add")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--similarity", type=float, default=0.5, help="Jaccard threshold t")
+    parser.add_argument(
+        "--settings",
+        type=lambda text: [_setting(part) for part in text.split(",")],
+        default=[(64, 16), (128, 32), (128, 16), (256, 64)],
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    rng = np.random.default_rng(args.seed)
+
+    profiles: dict[str, frozenset[str]] = {}
+    if args.bundle is not None:
+        objects = json.loads(args.bundle.read_text(encoding="utf-8"))["objects"]
+        incidence = IncidenceIndex.build(objects)
+        for kind in ("groups", "software"):
+            for stix_id in incidence.rows(kind):
+                profiles[stix_id] = frozenset(incidence.techniques(stix_id))
+        techniques = list(incidence.columns)
+    else:
+        techniques = [f"attack-pattern--{i:05d}" for i in range(700)]
+    rng.shuffle(techniques)  # popularity rank
+    profiles.update(_synthetic_profiles(techniques, args.profiles, rng))
+
+    keys = [key for key, profile in profiles.items() if profile]
+    queries = [keys[i] for i in rng.choice(len(keys), min(args.queries, len(keys)), replace=False)]
+    start = time.perf_counter()
+    truth = {query: _exact(profiles, query) for query in queries}
+    exact_ms = (time.perf_counter() - start) * 1000 / len(queries)
+    sizes = [len(profile) for profile in profiles.values()]
+    print(
+        f"{len(profiles)} profiles over {len(techniques)} techniques "
+        f"(median {int(np.median(sizes))} techniques), {len(queries)} queries, "
+        f"all-pairs Jaccard {exact_ms:.1f} ms/query"
+    )
+    print(
+        f"  {'perm x bands':>12} {'thresh':>6} {'insert us':>9} {'query ms':>8} {'cand%':>6} "
+        f"{f'recall@{args.k}':>9} {f'prec@{args.similarity:g}':>9} {f'rec@{args.similarity:g}':>8}"
+    )
+
+    t = args.similarity
+    for num_perm, bands in args.settings:
+        index = MinHashIndex(num_perm=num_perm, bands=bands)
+        start = time.perf_counter()
+        index.update(profiles.items())
+        insert_us = (time.perf_counter() - start) * 1e6 / len(profiles)
+
+        start = time.perf_counter()
+        results = {query: index.similar(query, k=args.k) for query in queries}
+        query_ms = (time.perf_counter() - start) * 1000 / len(queries)
+        wide = {query: index.similar(query, k=len(profiles), min_similarity=t) for query in queries}
+
+        topk_hits = topk_total = 0
+        true_pos = retrieved = relevant = 0
+        candidates = 0
+        for query in queries:
+            exact = truth[query]
+            if exact:
+                cutoff = exact[min(args.k, len(exact)) - 1][1]
+                expected = {key for key, score in exact if score >= cutoff}
+                topk_hits += len(expected & {key for key, _ in results[query]})
+                topk_total += min(args.k, len(expected))
+            near = {key for key, score in exact if score >= t}
+            found = {key for key, _ in wide[query]}
+            true_pos += len(near & found)
+            retrieved += len(found)
+            relevant += len(near)
+            candidates += len(index._candidates(index._signatures[index._slots[query]])) - 1
+
+        print(
+            f"  {f'{num_perm}x{bands}':>12} {index.threshold:>6.2f} {insert_us:>9.0f} {query_ms:>8.2f} "
+            f"{100 * candidates / len(queries) / len(profiles):>6.1f} "
+            f"{topk_hits / max(topk_total, 1):>9.3f} {true_pos / max(retrieved, 1):>9.3f} "
+            f"{true_pos / max(relevant, 1):>8.3f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""
+Validation benchmark
+
+Compares, over the same objects:
+
+- ``id-only``: ``schemas.validate_stix_object`` (id/type checks only)
+- ``interpreted``: the full-body field specs walked per object
+- ``compiled``: ``schemas.validate_object`` (generated per-type functions)
+
+Usage:
+    PYTHONPATH=src python benchmarks/validation.py [BUNDLE] [--repeat N]
+
+BUNDLE defaults to the test fixture, replicated to about 50k objects
+with fresh IDs per copy (refs remapped accordingly).
+"""
+
+import argparse
+import json
+import time
+import uuid
+from pathlib import Path
+
+from orbit.schemas import validators
+from orbit.schemas.stix import validate_stix_object
+from orbit.schemas.validators import kind_checks, type_specs, validate_object
+
+FIXTURE_PATH = Path(__file__).parent.parent / "tests" / "fixtures" / "attack_sample.json"
+TARGET_OBJECTS = 50_000
+
+
+def _interpreted_validator():
+    """Reference implementation: walk the specs field by field."""
+    specs = type_specs()
+    checks = kind_checks()
+
+    def validate(obj):
+        validate_stix_object(obj)
+        for spec in specs[obj["type"]]:
+            value = obj.get(spec.name)
+            if value is None:
+                if spec.required:
+                    raise ValueError(spec.name)
+            elif not checks[spec.kind](value):
+                raise ValueError(spec.name)
+
+    return validate
+
+
+def _replicate(objects: list[dict], copies: int) -> list[dict]:
+    """Copy a bundle's objects, giving every copy its own STIX IDs."""
+    text = json.dumps(objects)
+    ids = {obj["id"] for obj in objects}
+    replicated = []
+    for copy in range(copies):
+        copy_text = text
+        for stix_id in ids:
+            stix_type = stix_id.split("--")[0]
+            new_id = f"{stix_type}--{uuid.uuid5(uuid.NAMESPACE_URL, f'{copy}/{stix_id}')}"
+            copy_text = copy_text.replace(stix_id, new_id)
+        replicated.extend(json.loads(copy_text))
+    return replicated
+
+
+def _time(validate, objects, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        validators.clear_memos()  # time cold memos, as in a fresh ingest
+        start = time.perf_counter()
+        for obj in objects:
+            validate(obj)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("bundle", nargs="?", type=Path, default=FIXTURE_PATH)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    objects = json.loads(args.bundle.read_text(encoding="utf-8"))["objects"]
+    if args.bundle == FIXTURE_PATH:
+        objects = _replicate(objects, TARGET_OBJECTS // len(objects))
+
+    validate_object(objects[0])  # compile outside the timed region
+    candidates = {
+        "id-only": validate_stix_object,
+        "interpreted": _interpreted_validator(),
+        "compiled": validate_object,
+    }
+    timings = {name: _time(validate, objects, args.repeat) for name, validate in candidates.items()}
+
+    baseline = timings["id-only"]
+    print(f"{len(objects)} objects, best of {args.repeat}")
+    for name, seconds in timings.items():
+        per_object = seconds / len(objects) * 1e6
+        print(f"  {name:<12} {seconds * 1000:8.1f} ms  {per_object:6.2f} us/object  {seconds / baseline:5.2f}x")
+
+
+if __name__ == "__main__":
+    main()
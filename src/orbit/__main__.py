@@ -0,0 +1,5 @@
+"""Allow ``python -m orbit``."""
+
+from .cli import main
+
+raise SystemExit(main())
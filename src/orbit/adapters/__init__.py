@@ -5,13 +5,19 @@ Pluggable adapters for different threat intelligence sources.
 Isolate source-specific logic from core ingestion pipeline.
 """
 
-from .base import SourceAdapter, RawData
+from .base import SourceAdapter, RawData, ObjectFilter
+from .interning import InternPool
+from .projection import CompactObject, Projection, SourceOffsets, STRUCTURE_ONLY
 from .attack import AttackAdapter
 from .d3fend import D3FENDAdapter
+from .csf import CSFAdapter
+from .taxii import TaxiiAdapter
 
 ADAPTERS = {
     "attack": AttackAdapter,
     "d3fend": D3FENDAdapter,
+    "csf": CSFAdapter,
+    "taxii": TaxiiAdapter,
 }
 
 
@@ -20,7 +26,7 @@ def get_adapter(source: str, **kwargs) -> SourceAdapter:
     Get adapter instance for source.
 
     Args:
-        source: Source identifier ('attack', 'd3fend', etc.)
+        source: Source identifier ('attack', 'd3fend', 'csf', 'taxii', etc.)
         **kwargs: Adapter-specific configuration
 
     Returns:
@@ -40,8 +46,16 @@ def get_adapter(source: str, **kwargs) -> SourceAdapter:
 __all__ = [
     "SourceAdapter",
     "RawData",
+    "ObjectFilter",
+    "Projection",
+    "CompactObject",
+    "SourceOffsets",
+    "InternPool",
+    "STRUCTURE_ONLY",
     "AttackAdapter",
     "D3FENDAdapter",
+    "CSFAdapter",
+    "TaxiiAdapter",
     "get_adapter",
     "ADAPTERS",
 ]
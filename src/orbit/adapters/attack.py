@@ -6,7 +6,13 @@ Handles ingestion of MITRE ATT&CK data in STIX format.
 
 import json
 from pathlib import Path
-from typing import Any
+from typing import Any, Iterator
+
+from .base import ObjectFilter
+from .bundle import iter_bundle_spans
+from .interning import InternPool
+from .projection import Projection, SourceOffsets
+from .streams import detect_compression, open_source
 
 
 class AttackAdapter:
@@ -15,27 +21,155 @@ class AttackAdapter:
 
     Loads STIX-formatted ATT&CK data and normalizes to internal
     representation.
+
+    Args:
+        object_filter: Optional predicate applied while parsing; objects
+            it rejects are never retained, normalized or validated
+        projection: Optional per-type field projection applied while
+            parsing; kept objects are stored as compact mappings
+        intern_values: Deduplicate repeated strings and small sub-objects
+            across kept objects (see ``InternPool``); objects are then
+            read-only, as equal sub-objects may be shared
+
+    Attributes:
+        source_offsets: Byte spans of kept objects from the last fetch()
+            when ``projection.lazy`` is set, otherwise None
     """
 
+    def __init__(
+        self,
+        object_filter: ObjectFilter | None = None,
+        projection: Projection | None = None,
+        intern_values: bool = False,
+    ):
+        self.object_filter = object_filter if object_filter and object_filter.is_active else None
+        self.projection = projection
+        self.intern_values = intern_values
+        self.source_offsets: SourceOffsets | None = None
+        # Bundle returned by the last streamed fetch(), already prepared
+        self._prepared: dict[str, Any] | None = None
+
     def fetch(self, data_path: Path) -> dict[str, Any]:
         """
         Load ATT&CK STIX bundle from file.
 
         Args:
-            data_path: Path to STIX bundle JSON file
+            data_path: Path to STIX bundle JSON file, optionally gzip, xz
+                or zstd compressed (see ``streams.open_source``)
 
         Returns:
-            Raw STIX bundle
+            Raw STIX bundle (only matching, projected, interned objects
+            when a filter, projection or interning is configured)
 
         Raises:
             FileNotFoundError: If file doesn't exist
             json.JSONDecodeError: If file is not valid JSON
+            ValueError: If streamed and the bundle has no 'objects' field,
+                or the compression format is unsupported
+        """
+        if not data_path.exists():
+            raise FileNotFoundError(f"ATT&CK data not found: {data_path}")
+
+        self.source_offsets = None
+        self._prepared = None
+        if self.object_filter is None and self.projection is None and not self.intern_values:
+            with open_source(data_path) as f:
+                return json.load(f)
+
+        # Stream objects one at a time: rejected objects are freed
+        # immediately and kept ones are projected and interned before
+        # being retained.
+        pool = InternPool() if self.intern_values else None
+        bundle: dict[str, Any] = {}
+        kept: list[dict[str, Any]] = []
+        dropped_ids: set[str] = set()
+        for obj in self.iter_objects(data_path, dropped_ids, bundle):
+            if pool is not None:
+                obj = pool.intern_object(obj)
+            kept.append(obj)
+
+        if self.object_filter is not None:
+            kept = self.object_filter.finish(kept, dropped_ids)
+        bundle["objects"] = kept
+        self._prepared = bundle
+        return bundle
+
+    def iter_objects(
+        self,
+        data_path: Path,
+        dropped_ids: set[str],
+        envelope: dict[str, Any] | None = None,
+        byte_range: tuple[int, int] | None = None,
+    ) -> Iterator[dict[str, Any]]:
+        """
+        Stream filtered, projected objects without retaining them.
+
+        Relationships are not pruned here, as a relationship can precede
+        the endpoint that gets dropped; callers prune with
+        ``dropped_ids`` once the stream is exhausted (see
+        ``ObjectFilter.finish``). Source offsets are recorded as in
+        ``fetch()``; values are not interned.
+
+        Args:
+            data_path: Path to STIX bundle JSON file, optionally compressed
+            dropped_ids: Receives IDs rejected by the domain and
+                lifecycle predicates
+            envelope: Optional dict receiving the bundle's other members
+            byte_range: Only parse the objects in this ``(start, end)``
+                byte range of the ``objects`` array (see
+                ``bundle.split_bundle``); the envelope is not read
+
+        Yields:
+            STIX objects (unvalidated) in source order
+
+        Raises:
+            FileNotFoundError: If file doesn't exist
+            json.JSONDecodeError: If file (or the range) is not valid JSON
+            ValueError: If the bundle has no 'objects' field, if a byte
+                range is combined with a lazy projection, or if either is
+                used on a compressed file
         """
         if not data_path.exists():
             raise FileNotFoundError(f"ATT&CK data not found: {data_path}")
 
-        with data_path.open(encoding="utf-8") as f:
-            return json.load(f)
+        projection = self.projection
+        offsets = SourceOffsets(data_path) if projection and projection.lazy else None
+        self.source_offsets = None
+
+        if (offsets is not None or byte_range is not None) and detect_compression(data_path):
+            raise ValueError(f"Byte offsets are unavailable in compressed file: {data_path}")
+        if byte_range is not None:
+            if offsets is not None:
+                raise ValueError("Lazy projection cannot be combined with a byte range")
+            start, end = byte_range
+            with data_path.open("rb") as f:
+                f.seek(start)
+                text = f.read(end - start).decode("utf-8")
+            spans = iter_bundle_spans(f'{{"objects":[{text}]}}', envelope)
+            yield from self._admitted(spans, dropped_ids, None)
+            return
+
+        with open_source(data_path, newline="") as f:
+            spans = iter_bundle_spans(f, envelope, byte_offsets=offsets is not None)
+            yield from self._admitted(spans, dropped_ids, offsets)
+
+        self.source_offsets = offsets
+
+    def _admitted(
+        self,
+        spans: Iterator[tuple[dict[str, Any], int, int]],
+        dropped_ids: set[str],
+        offsets: SourceOffsets | None,
+    ) -> Iterator[dict[str, Any]]:
+        object_filter, projection = self.object_filter, self.projection
+        for obj, start, end in spans:
+            if object_filter is not None and not object_filter.admit(obj, dropped_ids):
+                continue
+            if offsets is not None and "id" in obj:
+                offsets.add(obj["id"], start, end)
+            if projection is not None:
+                obj = projection.apply(obj)
+            yield obj
 
     def normalize(self, raw: dict[str, Any]) -> list[dict[str, Any]]:
         """
@@ -61,7 +195,20 @@ class AttackAdapter:
         if "objects" not in raw:
             raise ValueError("Invalid STIX bundle: missing 'objects' field")
 
-        return raw["objects"]
+        objects = raw["objects"]
+        if raw is self._prepared:
+            # Already filtered, projected and interned while streaming
+            self._prepared = None
+            return objects
+
+        if self.object_filter is not None:
+            objects = self.object_filter.apply(objects)
+        if self.projection is not None:
+            objects = [self.projection.apply(obj) for obj in objects]
+        if self.intern_values:
+            pool = InternPool()
+            objects = [pool.intern_object(obj) for obj in objects]
+        return objects
 
     @property
     def source_name(self) -> str:
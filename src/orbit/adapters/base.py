@@ -4,13 +4,122 @@ Base adapter interface
 Defines contract for all source adapters.
 """
 
+from dataclasses import dataclass
 from pathlib import Path
-from typing import Any, Protocol
+from typing import Any, Iterable, Protocol
 
 # Type alias for raw data from source
 RawData = dict[str, Any] | list[dict[str, Any]]
 
 
+@dataclass(frozen=True)
+class ObjectFilter:
+    """
+    Parse-time object predicate pushed down into adapters.
+
+    Adapters apply the filter while parsing, so rejected objects are
+    dropped before they are retained, normalized or validated.
+
+    Attributes:
+        types: Keep only these object types (None = all types)
+        domains: Keep only objects whose ``x_mitre_domains`` intersect
+            these domains; objects without domains (relationships,
+            identities, markings) are kept (None = all domains)
+        exclude_revoked: Drop objects with ``revoked: true``
+        exclude_deprecated: Drop objects with ``x_mitre_deprecated: true``
+
+    Relationships whose source or target was dropped by the domain or
+    lifecycle predicates are dropped as well (see ``prune_relationships``),
+    so those filters never leave dangling edges. The type predicate is
+    explicit and does not prune.
+    """
+
+    types: frozenset[str] | None = None
+    domains: frozenset[str] | None = None
+    exclude_revoked: bool = False
+    exclude_deprecated: bool = False
+
+    @property
+    def is_active(self) -> bool:
+        """Check if the filter can reject anything."""
+        return (
+            self.types is not None
+            or self.domains is not None
+            or self.exclude_revoked
+            or self.exclude_deprecated
+        )
+
+    @property
+    def prunes_relationships(self) -> bool:
+        """Check if dropped endpoints should also drop their relationships."""
+        return self.domains is not None or self.exclude_revoked or self.exclude_deprecated
+
+    def excludes_entity(self, obj: dict[str, Any]) -> bool:
+        """Check the domain and lifecycle predicates (ignoring type)."""
+        if self.exclude_revoked and obj.get("revoked"):
+            return True
+        if self.exclude_deprecated and obj.get("x_mitre_deprecated"):
+            return True
+        if self.domains is not None:
+            obj_domains = obj.get("x_mitre_domains")
+            if obj_domains is not None and self.domains.isdisjoint(obj_domains):
+                return True
+        return False
+
+    def matches(self, obj: dict[str, Any]) -> bool:
+        """Check if an object passes every predicate."""
+        if self.types is not None and obj.get("type") not in self.types:
+            return False
+        return not self.excludes_entity(obj)
+
+    def admit(self, obj: dict[str, Any], dropped_ids: set[str]) -> bool:
+        """
+        Check one object during a parsing loop.
+
+        IDs of objects rejected by the domain or lifecycle predicates are
+        added to ``dropped_ids`` for ``prune_relationships`` afterwards.
+        """
+        if self.excludes_entity(obj):
+            if "id" in obj:
+                dropped_ids.add(obj["id"])
+            return False
+        return self.types is None or obj.get("type") in self.types
+
+    def finish(
+        self, kept: list[dict[str, Any]], dropped_ids: set[str]
+    ) -> list[dict[str, Any]]:
+        """Complete a parsing loop by pruning dangling relationships."""
+        if dropped_ids and self.prunes_relationships:
+            return prune_relationships(kept, dropped_ids)
+        return kept
+
+    def apply(self, objects: Iterable[dict[str, Any]]) -> list[dict[str, Any]]:
+        """
+        Filter a stream of objects in a single pass.
+
+        Args:
+            objects: Objects in source order (may be a lazy iterator)
+
+        Returns:
+            Kept objects, in source order
+        """
+        dropped_ids: set[str] = set()
+        kept = [obj for obj in objects if self.admit(obj, dropped_ids)]
+        return self.finish(kept, dropped_ids)
+
+
+def prune_relationships(
+    objects: list[dict[str, Any]], dropped_ids: set[str]
+) -> list[dict[str, Any]]:
+    """Drop relationships whose source or target ID is in ``dropped_ids``."""
+    return [
+        obj
+        for obj in objects
+        if obj.get("type") != "relationship"
+        or (obj.get("source_ref") not in dropped_ids and obj.get("target_ref") not in dropped_ids)
+    ]
+
+
 class SourceAdapter(Protocol):
     """
     Protocol for source adapters.
@@ -26,6 +135,12 @@ class SourceAdapter(Protocol):
     NOT responsible for:
     - Data validation (handled by schema layer)
     - Persistence (handled by ingestion pipeline)
+
+    Adapters accept optional ``object_filter``, ``projection`` and
+    ``intern_values`` constructor arguments and may expose ``source_offsets`` after
+    ``fetch()`` when lazy projection is supported. Adapters whose
+    ``iter_objects()`` cannot be repeated with the same result (network
+    polls) set ``single_pass = True``.
     """
 
     def fetch(self, data_path: Path) -> RawData:
@@ -0,0 +1,235 @@
+"""
+Incremental STIX bundle parsing
+
+Decodes the top-level ``objects`` array of a STIX bundle one element at
+a time, so callers can filter, project or stream objects without
+materializing the whole bundle. Text streams are read in fixed-size
+chunks; only the unconsumed tail of the current chunk is kept.
+"""
+
+import json
+import re
+from typing import Any, Iterator, TextIO
+
+# Characters read from a text stream per refill
+CHUNK_SIZE = 1 << 20
+
+_WHITESPACE = re.compile(r"[ \t\n\r]*")
+_DECODER = json.JSONDecoder()
+
+
+class _Scanner:
+    """Sliding-window JSON token reader over a string or text stream."""
+
+    def __init__(self, source: str | TextIO, chunk_size: int, track_bytes: bool):
+        if isinstance(source, str):
+            self.buf = source
+            self._read = None
+            self.eof = True
+        else:
+            self.buf = ""
+            self._read = source.read
+            self.eof = False
+        self.chunk_size = chunk_size
+        self.idx = 0
+        self.base = 0  # absolute character offset of buf[0]
+
+        # Monotonic (character, byte) cursor for UTF-8 byte offsets
+        self._track_bytes = track_bytes
+        self._char_pos = 0
+        self._byte_pos = 0
+
+    def _fill(self) -> bool:
+        """Append the next chunk, dropping consumed text. False at EOF."""
+        if self.eof:
+            return False
+        chunk = self._read(self.chunk_size)
+        if not chunk:
+            self.eof = True
+            return False
+        if self.idx:
+            if self._track_bytes:
+                self.byte_offset()
+            self.buf = self.buf[self.idx :]
+            self.base += self.idx
+            self.idx = 0
+        self.buf += chunk
+        return True
+
+    def peek(self) -> str:
+        """Next non-whitespace character, or '' at end of input."""
+        while True:
+            self.idx = _WHITESPACE.match(self.buf, self.idx).end()
+            if self.idx < len(self.buf):
+                return self.buf[self.idx]
+            if not self._fill():
+                return ""
+
+    def expect(self, chars: str) -> str:
+        """Consume the next character, which must be one of ``chars``."""
+        char = self.peek()
+        if not char or char not in chars:
+            expected = " or ".join(repr(c) for c in chars)
+            raise json.JSONDecodeError(f"Expecting {expected}", self.buf, self.idx)
+        self.idx += 1
+        return char
+
+    def value(self) -> Any:
+        """Decode the next complete JSON value."""
+        self.peek()
+        while True:
+            try:
+                value, end = _DECODER.raw_decode(self.buf, self.idx)
+            except json.JSONDecodeError:
+                if self._fill():
+                    continue
+                raise
+            # A value ending exactly at the buffer edge may be truncated
+            # (e.g. a number); retry once more text is available.
+            if end == len(self.buf) and self._fill():
+                continue
+            self.idx = end
+            return value
+
+    def byte_offset(self) -> int:
+        """UTF-8 byte offset of the current position."""
+        pos = self.base + self.idx
+        start = self._char_pos - self.base
+        self._byte_pos += len(self.buf[start : self.idx].encode("utf-8"))
+        self._char_pos = pos
+        return self._byte_pos
+
+    def offset(self) -> int:
+        """Offset of the current position (bytes if tracked, else characters)."""
+        return self.byte_offset() if self._track_bytes else self.base + self.idx
+
+
+def iter_bundle_spans(
+    source: str | TextIO,
+    envelope: dict[str, Any] | None = None,
+    byte_offsets: bool = False,
+    chunk_size: int = CHUNK_SIZE,
+) -> Iterator[tuple[dict[str, Any], int, int]]:
+    """
+    Yield each element of a bundle's ``objects`` array with its span.
+
+    Args:
+        source: Bundle JSON text, or a text stream opened with
+            ``newline=""`` (required for exact byte offsets)
+        envelope: Optional dict receiving the other top-level members
+            (``type``, ``id``, ...) as they are parsed
+        byte_offsets: Report UTF-8 byte offsets instead of character
+            offsets
+        chunk_size: Characters read per refill for streams
+
+    Yields:
+        (object, start, end) with ``source[start:end]`` being the
+        object's JSON text
+
+    Raises:
+        json.JSONDecodeError: If source is not a valid JSON object
+        ValueError: If the bundle has no ``objects`` field
+    """
+    if envelope is None:
+        envelope = {}
+    scanner = _Scanner(source, chunk_size, byte_offsets)
+
+    scanner.expect("{")
+    found = False
+    if scanner.peek() == "}":
+        scanner.idx += 1
+    else:
+        while True:
+            if scanner.peek() != '"':
+                scanner.expect('"')
+            key = scanner.value()
+            scanner.expect(":")
+
+            if key == "objects":
+                found = True
+                scanner.expect("[")
+                if scanner.peek() == "]":
+                    scanner.idx += 1
+                else:
+                    while True:
+                        scanner.peek()
+                        start = scanner.offset()
+                        obj = scanner.value()
+                        end = scanner.offset()
+                        yield obj, start, end
+                        if scanner.expect(",]") == "]":
+                            break
+            else:
+                envelope[key] = scanner.value()
+
+            if scanner.expect(",}") == "}":
+                break
+
+    if scanner.peek():
+        raise json.JSONDecodeError("Extra data", scanner.buf, scanner.idx)
+    if not found:
+        raise ValueError("Invalid STIX bundle: missing 'objects' field")
+
+
+def iter_bundle_objects(
+    source: str | TextIO,
+    envelope: dict[str, Any] | None = None,
+    chunk_size: int = CHUNK_SIZE,
+) -> Iterator[dict[str, Any]]:
+    """
+    Yield the elements of a bundle's ``objects`` array in source order.
+
+    Each element is decoded independently with the C JSON scanner, so at
+    most one not-yet-consumed object is alive at a time.
+
+    Args:
+        source: Bundle JSON text, or a text stream
+        envelope: Optional dict receiving the other top-level members
+        chunk_size: Characters read per refill for streams
+
+    Yields:
+        STIX objects (unvalidated)
+
+    Raises:
+        json.JSONDecodeError: If source is not a valid JSON object
+        ValueError: If the bundle has no ``objects`` field
+    """
+    for obj, _, _ in iter_bundle_spans(source, envelope, chunk_size=chunk_size):
+        yield obj
+
+
+def split_bundle(source: TextIO, shard_bytes: int) -> list[tuple[int, int]]:
+    """
+    Cut a bundle's ``objects`` array into byte ranges of whole objects.
+
+    Each range starts at an object's first byte and ends after another
+    object's last byte, so ``source_bytes[start:end]`` is a run of
+    comma-separated objects (see ``AttackAdapter.iter_objects(..., byte_range)``). Ranges are cut
+    once they would exceed ``shard_bytes``; a single larger object gets
+    a range of its own.
+
+    Args:
+        source: Text stream opened with ``newline=""``
+        shard_bytes: Target bytes per range
+
+    Returns:
+        Consecutive ``(start, end)`` UTF-8 byte offsets, in source order
+
+    Raises:
+        json.JSONDecodeError: If source is not a valid JSON object
+        ValueError: If the bundle has no ``objects`` field
+    """
+    if shard_bytes < 1:
+        raise ValueError("shard_bytes must be positive")
+    ranges = []
+    first = last = None
+    for _, start, end in iter_bundle_spans(source, byte_offsets=True):
+        if first is None:
+            first = start
+        elif end - first > shard_bytes:
+            ranges.append((first, last))
+            first = start
+        last = end
+    if first is not None:
+        ranges.append((first, last))
+    return ranges
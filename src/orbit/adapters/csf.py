@@ -0,0 +1,242 @@
+"""
+NIST CSF 2.0 Adapter
+
+Handles ingestion of the NIST Cybersecurity Framework 2.0 core
+(functions, categories and subcategories) from the JSON export of the
+NIST Cybersecurity and Privacy Reference Tool (CPRT), together with an
+optional crosswalk of subcategories to ATT&CK mitigations and D3FEND
+techniques.
+
+CSF elements become STIX-shaped objects (``csf-function``,
+``csf-category``, ``csf-subcategory``) with deterministic IDs, linked by
+``part-of`` relationships, so they validate, persist and load into the
+graph like every other source.
+"""
+
+import json
+import re
+import uuid
+from pathlib import Path
+from typing import Any
+
+from .base import ObjectFilter
+from .projection import Projection
+from .streams import open_source
+
+CSF_SOURCE_NAME = "nist-csf"
+
+# CSF 2.0 publication date; CPRT exports carry no per-element timestamps
+CSF_RELEASE_TIMESTAMP = "2024-02-26T00:00:00.000Z"
+
+# Namespace for deterministic STIX IDs (uuid5 over the CSF identifier)
+CSF_NAMESPACE = uuid.uuid5(uuid.NAMESPACE_URL, "https://www.nist.gov/cyberframework")
+
+# Crosswalk target sources (``target_source`` in the mappings file) and
+# the subcategory property each one populates
+MAPPING_PROPERTIES = {
+    "mitre-attack": "x_nist_csf_attack_mitigations",
+    "d3fend": "x_nist_csf_d3fend_techniques",
+}
+
+# CPRT element type -> (STIX type, identifier pattern)
+_ELEMENT_TYPES = {
+    "function": ("csf-function", re.compile(r"^[A-Z]{2}$")),
+    "category": ("csf-category", re.compile(r"^[A-Z]{2}\.[A-Z]{2}$")),
+    "subcategory": ("csf-subcategory", re.compile(r"^[A-Z]{2}\.[A-Z]{2}-\d{2}$")),
+}
+
+_WITHDRAWN = re.compile(r"^\s*\[?withdrawn", re.IGNORECASE)
+
+
+def csf_stix_id(stix_type: str, identifier: str) -> str:
+    """Deterministic STIX ID of a CSF element (e.g. ``PR.PS-05``)."""
+    return f"{stix_type}--{uuid.uuid5(CSF_NAMESPACE, f'{stix_type}:{identifier}')}"
+
+
+def csf_parent(identifier: str) -> str | None:
+    """Parent identifier (``PR.PS-05`` -> ``PR.PS`` -> ``PR`` -> None)."""
+    if "-" in identifier:
+        return identifier.rsplit("-", 1)[0]
+    if "." in identifier:
+        return identifier.split(".", 1)[0]
+    return None
+
+
+def _cprt_elements(raw: Any) -> list[dict[str, Any]]:
+    """
+    Element list of a CPRT export.
+
+    Accepts the full download (``{"response": {"elements": {"elements":
+    [...], "relationships": [...]}}}``), its inner parts, or a bare list.
+    """
+    if isinstance(raw, dict):
+        raw = raw.get("response", raw).get("elements")
+        if isinstance(raw, dict):
+            raw = raw.get("elements")
+    if not isinstance(raw, list):
+        raise ValueError("Invalid CSF export: missing 'elements' list")
+    return raw
+
+
+class CSFAdapter:
+    """
+    Adapter for NIST CSF 2.0 (CPRT JSON export).
+
+    Args:
+        object_filter: Optional predicate applied to normalized objects
+        projection: Optional per-type field projection (never lazy:
+            objects are built, not parsed from byte spans)
+        intern_values: Accepted for interface parity; CSF is small
+        mappings_path: Crosswalk file (default: ``config.CSF_MAPPINGS_PATH``
+            if it exists). Format::
+
+                {"mappings": [{"csf_id": "PR.PS-05",
+                               "target_source": "mitre-attack",
+                               "target_id": "M1038"}, ...]}
+
+            ``target_source`` is ``mitre-attack`` (mitigation IDs) or
+            ``d3fend`` (D3FEND technique IDs).
+    """
+
+    def __init__(
+        self,
+        object_filter: ObjectFilter | None = None,
+        projection: Projection | None = None,
+        intern_values: bool = False,
+        mappings_path: Path | None = None,
+    ):
+        self.object_filter = object_filter if object_filter and object_filter.is_active else None
+        self.projection = projection
+        self.intern_values = intern_values
+        self.mappings_path = mappings_path
+        self.source_offsets = None
+
+    def _default_mappings_path(self) -> Path | None:
+        if self.mappings_path is not None:
+            return self.mappings_path
+        from .. import config
+
+        path = Path(config.CSF_MAPPINGS_PATH)
+        return path if path.exists() else None
+
+    def fetch(self, data_path: Path) -> dict[str, Any]:
+        """
+        Load the CSF export and its crosswalk mappings.
+
+        Args:
+            data_path: Path to CPRT CSF 2.0 JSON export (optionally
+                compressed)
+
+        Returns:
+            ``{"elements": [...], "mappings": [...]}``
+
+        Raises:
+            FileNotFoundError: If the export or an explicit mappings file
+                doesn't exist
+            json.JSONDecodeError: If a file is not valid JSON
+            ValueError: If the export has no element list
+        """
+        if not data_path.exists():
+            raise FileNotFoundError(f"CSF data not found: {data_path}")
+        with open_source(data_path) as f:
+            elements = _cprt_elements(json.load(f))
+
+        mappings: list[dict[str, Any]] = []
+        mappings_path = self._default_mappings_path()
+        if mappings_path is not None:
+            if not mappings_path.exists():
+                raise FileNotFoundError(f"CSF mappings not found: {mappings_path}")
+            with mappings_path.open(encoding="utf-8") as f:
+                mappings = json.load(f).get("mappings", [])
+        return {"elements": elements, "mappings": mappings}
+
+    def normalize(self, raw: dict[str, Any]) -> list[dict[str, Any]]:
+        """
+        Build CSF objects and their ``part-of`` relationships.
+
+        Implementation examples and other CPRT element types are skipped.
+        Withdrawn subcategories are kept with ``revoked: true``.
+
+        Args:
+            raw: Data from fetch()
+
+        Returns:
+            List of STIX-shaped objects (unvalidated), ordered by STIX ID
+
+        Raises:
+            ValueError: If an identifier is malformed, or a mapping names
+                an unknown subcategory or target source
+        """
+        objects: dict[str, dict[str, Any]] = {}
+        for element in raw["elements"]:
+            kind = _ELEMENT_TYPES.get(element.get("element_type"))
+            if kind is None:
+                continue
+            stix_type, pattern = kind
+            identifier = element.get("element_identifier", "")
+            if not pattern.match(identifier):
+                raise ValueError(f"Invalid CSF {element['element_type']} identifier: {identifier!r}")
+            text = (element.get("text") or "").strip()
+            obj: dict[str, Any] = {
+                "type": stix_type,
+                "spec_version": "2.1",
+                "id": csf_stix_id(stix_type, identifier),
+                "created": CSF_RELEASE_TIMESTAMP,
+                "modified": CSF_RELEASE_TIMESTAMP,
+                "name": (element.get("title") or "").strip() or identifier,
+                "description": text,
+                "external_references": [
+                    {"source_name": CSF_SOURCE_NAME, "external_id": identifier}
+                ],
+            }
+            if _WITHDRAWN.match(text):
+                obj["revoked"] = True
+            objects[identifier] = obj
+
+        for row in raw.get("mappings", ()):
+            subcategory = objects.get(row.get("csf_id"))
+            if subcategory is None or subcategory["type"] != "csf-subcategory":
+                raise ValueError(f"CSF mapping names unknown subcategory: {row.get('csf_id')!r}")
+            prop = MAPPING_PROPERTIES.get(row.get("target_source"))
+            if prop is None:
+                raise ValueError(
+                    f"Unknown CSF mapping target source: {row.get('target_source')!r}. "
+                    f"Available: {', '.join(sorted(MAPPING_PROPERTIES))}"
+                )
+            targets = subcategory.setdefault(prop, [])
+            if row["target_id"] not in targets:
+                targets.append(row["target_id"])
+
+        relationships = []
+        for identifier, obj in objects.items():
+            for prop in MAPPING_PROPERTIES.values():
+                if prop in obj:
+                    obj[prop].sort()
+            parent = objects.get(csf_parent(identifier) or "")
+            if parent is None:
+                continue
+            relationships.append(
+                {
+                    "type": "relationship",
+                    "spec_version": "2.1",
+                    "id": csf_stix_id("relationship", f"{identifier}|part-of"),
+                    "created": CSF_RELEASE_TIMESTAMP,
+                    "modified": CSF_RELEASE_TIMESTAMP,
+                    "relationship_type": "part-of",
+                    "source_ref": obj["id"],
+                    "target_ref": parent["id"],
+                }
+            )
+
+        result = [*objects.values(), *relationships]
+        result.sort(key=lambda obj: obj["id"])
+
+        if self.object_filter is not None:
+            result = self.object_filter.apply(result)
+        if self.projection is not None:
+            result = [self.projection.apply(obj) for obj in result]
+        return result
+
+    @property
+    def source_name(self) -> str:
+        return "csf"
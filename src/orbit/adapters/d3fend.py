@@ -8,6 +8,9 @@ import json
 from pathlib import Path
 from typing import Any
 
+from .base import ObjectFilter
+from .projection import Projection
+
 
 class D3FENDAdapter:
     """
@@ -16,6 +19,17 @@ class D3FENDAdapter:
     Placeholder for future D3FEND ingestion support.
     """
 
+    def __init__(
+        self,
+        object_filter: ObjectFilter | None = None,
+        projection: Projection | None = None,
+        intern_values: bool = False,
+    ):
+        self.object_filter = object_filter if object_filter and object_filter.is_active else None
+        self.projection = projection
+        self.intern_values = intern_values
+        self.source_offsets = None
+
     def fetch(self, data_path: Path) -> dict[str, Any]:
         """
         Load D3FEND data from file.
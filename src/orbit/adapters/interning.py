@@ -0,0 +1,134 @@
+"""
+Value interning
+
+Deduplicates repeated values across ingested objects: each distinct
+short string is stored once, and identical small sub-objects (marking
+ref lists, domain lists, kill-chain phases, citation entries) are shared
+between the objects that contain them.
+"""
+
+from typing import Any, Hashable, Mapping
+
+from .projection import CompactObject
+
+# Strings longer than this are assumed unique (descriptions) and skipped
+MAX_STRING_LENGTH = 256
+
+# Lists/dicts with more items than this are never shared
+MAX_SHARED_ITEMS = 8
+
+_SCALARS = (int, float, bool, type(None))
+
+
+class InternPool:
+    """
+    Pool of shared strings and small sub-objects.
+
+    Objects interned through the same pool reuse one instance of every
+    equal string (up to ``max_string_length`` characters) and of every
+    equal list/dict of at most ``max_shared_items`` scalar or
+    string items. Shared sub-objects are the same Python object in
+    several places, so ingested objects must be treated as read-only.
+
+    Equality and serialization are unaffected; only identity changes.
+    """
+
+    def __init__(
+        self,
+        max_string_length: int = MAX_STRING_LENGTH,
+        max_shared_items: int = MAX_SHARED_ITEMS,
+    ):
+        self.max_string_length = max_string_length
+        self.max_shared_items = max_shared_items
+        self._strings: dict[str, str] = {}
+        self._shared: dict[Hashable, Any] = {}
+
+    def __len__(self) -> int:
+        """Number of distinct pooled strings and sub-objects."""
+        return len(self._strings) + len(self._shared)
+
+    def string(self, value: str) -> str:
+        """Return the pooled instance of a string."""
+        return self._strings.setdefault(value, value)
+
+    def _intern(self, value: Any) -> tuple[Any, Hashable | None]:
+        """
+        Intern a value recursively.
+
+        Returns:
+            (interned value, share key) where the share key is None if
+            the value (or anything inside it) must not be shared
+        """
+        strings = self._strings
+        max_length = self.max_string_length
+        value_type = type(value)
+        if value_type is str:
+            if len(value) <= max_length:
+                value = strings.setdefault(value, value)
+                return value, value
+            return value, None
+        if value_type in _SCALARS:
+            # Type in key keeps 1, 1.0 and True apart
+            return value, (value_type, value)
+
+        # Strings are by far the most common items; handle them inline
+        shareable = True
+        if value_type is list:
+            items = []
+            keys = []
+            for item in value:
+                if type(item) is str and len(item) <= max_length:
+                    item = key = strings.setdefault(item, item)
+                else:
+                    item, key = self._intern(item)
+                    shareable = shareable and key is not None
+                items.append(item)
+                keys.append(key)
+            share_key = (list, tuple(keys))
+        elif value_type is dict:
+            items = {}
+            keys = []
+            for name, item in value.items():
+                name = strings.setdefault(name, name)
+                if type(item) is str and len(item) <= max_length:
+                    item = key = strings.setdefault(item, item)
+                else:
+                    item, key = self._intern(item)
+                    shareable = shareable and key is not None
+                items[name] = item
+                keys.append((name, key))
+            share_key = (dict, tuple(keys))
+        else:
+            return value, None
+
+        if not shareable or len(items) > self.max_shared_items:
+            return items, None
+        return self._shared.setdefault(share_key, items), share_key
+
+    def intern(self, value: Any) -> Any:
+        """Intern a JSON value (string, number, list, dict) recursively."""
+        return self._intern(value)[0]
+
+    def intern_object(self, obj: Mapping[str, Any]) -> Mapping[str, Any]:
+        """
+        Intern a top-level object's keys and values.
+
+        The object itself is never shared; a new dict (or CompactObject
+        for projected objects) with pooled contents is returned.
+        """
+        if isinstance(obj, CompactObject):
+            # Key tuples are already shared per type by the projection
+            return CompactObject(obj._keys, tuple(self._intern(v)[0] for v in obj._values))
+        return self._intern_fields(obj)
+
+    def _intern_fields(self, obj: Mapping[str, Any]) -> dict[str, Any]:
+        strings = self._strings
+        max_length = self.max_string_length
+        interned = {}
+        for name, value in obj.items():
+            if type(value) is str and len(value) <= max_length:
+                value = strings.setdefault(value, value)
+            elif type(value) in (list, dict):
+                value = self._intern(value)[0]
+            interned[strings.setdefault(name, name)] = value
+        return interned
@@ -0,0 +1,235 @@
+"""
+Field projection
+
+Per-type field selection applied by adapters while parsing, compact
+storage for projected objects, and lazy retrieval of dropped fields
+from the source file.
+"""
+
+import json
+from array import array
+from collections.abc import Mapping
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Iterable, Iterator
+
+# Fields every projected object keeps: identity, lifecycle timestamps and
+# relationship endpoints are needed by schema validation and ordering.
+ALWAYS_KEPT = frozenset(
+    {
+        "id",
+        "type",
+        "created",
+        "modified",
+        "spec_version",
+        "source_ref",
+        "target_ref",
+        "relationship_type",
+    }
+)
+
+# Projection key applying to types without their own entry
+DEFAULT_TYPE = "*"
+
+
+class CompactObject(Mapping):
+    """
+    Read-only mapping storing a projected object as two tuples.
+
+    Objects of the same type and field set share one key tuple, so each
+    object costs a small slotted instance plus a values tuple instead of
+    a full dict. Behaves like a dict for reading (``obj["id"]``,
+    ``obj.get(...)``, ``==`` against dicts); use ``to_dict()`` where a
+    real dict is required.
+    """
+
+    __slots__ = ("_keys", "_values")
+
+    def __init__(self, keys: tuple[str, ...], values: tuple[Any, ...]):
+        self._keys = keys
+        self._values = values
+
+    def __getitem__(self, key: str) -> Any:
+        try:
+            return self._values[self._keys.index(key)]
+        except ValueError:
+            raise KeyError(key) from None
+
+    def get(self, key: str, default: Any = None) -> Any:
+        try:
+            return self._values[self._keys.index(key)]
+        except ValueError:
+            return default
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._keys
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._keys)
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def __repr__(self) -> str:
+        return f"CompactObject({self.to_dict()!r})"
+
+    def __reduce__(self):
+        return (CompactObject, (self._keys, self._values))
+
+    def to_dict(self) -> dict[str, Any]:
+        """Copy into a plain dict."""
+        return dict(zip(self._keys, self._values))
+
+
+@dataclass(frozen=True)
+class Projection:
+    """
+    Per-type field projection pushed down into adapters.
+
+    Attributes:
+        fields: STIX type -> fields to keep. The ``"*"`` entry applies to
+            types without their own entry; types matched by neither are
+            kept whole. ``ALWAYS_KEPT`` fields are always retained.
+        keep_refs: Also keep every ``*_ref`` / ``*_refs`` field
+        lazy: Record source byte offsets so dropped fields can be loaded
+            later by STIX ID (see ``SourceOffsets``)
+
+    Example:
+        Projection({"attack-pattern": frozenset({"name", "kill_chain_phases"})})
+    """
+
+    fields: Mapping[str, frozenset[str]]
+    keep_refs: bool = True
+    lazy: bool = False
+    _key_tuples: dict = field(default_factory=dict, init=False, compare=False, repr=False)
+
+    def apply(self, obj: Mapping[str, Any]) -> Mapping[str, Any]:
+        """
+        Project one object.
+
+        Returns:
+            CompactObject with the kept fields, or ``obj`` unchanged if
+            its type is not projected or it is already compact
+        """
+        if isinstance(obj, CompactObject):
+            return obj
+        kept = self.fields.get(obj.get("type"), self.fields.get(DEFAULT_TYPE))
+        if kept is None:
+            return obj
+
+        keep_refs = self.keep_refs
+        keys = tuple(
+            key
+            for key in obj
+            if key in ALWAYS_KEPT
+            or key in kept
+            or (keep_refs and key.endswith(("_ref", "_refs")))
+        )
+        keys = self._key_tuples.setdefault(keys, keys)
+        return CompactObject(keys, tuple(obj[key] for key in keys))
+
+
+# Graph-structure ingest: identity, names, refs, domains and lifecycle only
+STRUCTURE_ONLY = Projection(
+    fields={
+        DEFAULT_TYPE: frozenset(
+            {"name", "revoked", "x_mitre_deprecated", "x_mitre_domains", "x_mitre_is_subtechnique"}
+        )
+    }
+)
+
+
+class SourceOffsets:
+    """
+    Byte spans of objects in a source file, for lazy field retrieval.
+
+    Built by adapters while parsing (see ``Projection.lazy``). Fields
+    dropped by projection are recovered by re-reading just the object's
+    span from the unchanged source file.
+    """
+
+    def __init__(self, path: Path):
+        stat = path.stat()
+        self.path = path
+        self._size = stat.st_size
+        self._mtime_ns = stat.st_mtime_ns
+        self._index: dict[str, int] = {}
+        self._starts = array("q")
+        self._ends = array("q")
+
+    def add(self, stix_id: str, start: int, end: int) -> None:
+        """Record the byte span of an object."""
+        self._index[stix_id] = len(self._starts)
+        self._starts.append(start)
+        self._ends.append(end)
+
+    def __contains__(self, stix_id: object) -> bool:
+        return stix_id in self._index
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def to_dict(self) -> dict[str, Any]:
+        """JSON-serialisable spans and the source file state they refer to."""
+        return {
+            "path": str(self.path),
+            "size": self._size,
+            "mtime_ns": self._mtime_ns,
+            "spans": {stix_id: [self._starts[i], self._ends[i]] for stix_id, i in self._index.items()},
+        }
+
+    @classmethod
+    def from_dict(cls, payload: dict[str, Any]) -> "SourceOffsets":
+        """
+        Recreate offsets saved by ``to_dict()``.
+
+        The source file is not re-checked here; ``load_many()`` still
+        refuses to read a file that changed since ingestion.
+        """
+        offsets = cls.__new__(cls)
+        offsets.path = Path(payload["path"])
+        offsets._size = payload["size"]
+        offsets._mtime_ns = payload["mtime_ns"]
+        offsets._index = {}
+        offsets._starts = array("q")
+        offsets._ends = array("q")
+        for stix_id, (start, end) in payload["spans"].items():
+            offsets.add(stix_id, start, end)
+        return offsets
+
+    def _check_unchanged(self) -> None:
+        stat = self.path.stat()
+        if stat.st_size != self._size or stat.st_mtime_ns != self._mtime_ns:
+            raise ValueError(f"Source file changed since ingestion: {self.path}")
+
+    def load_many(self, stix_ids: Iterable[str]) -> dict[str, dict[str, Any]]:
+        """
+        Load full source objects, reading spans in file order.
+
+        Raises:
+            KeyError: If an ID was not recorded
+            ValueError: If the source file changed since ingestion
+        """
+        spans = []
+        for stix_id in stix_ids:
+            if stix_id not in self._index:
+                raise KeyError(f"No source offsets for: {stix_id}")
+            i = self._index[stix_id]
+            spans.append((self._starts[i], self._ends[i], stix_id))
+        spans.sort()
+
+        self._check_unchanged()
+        loaded = {}
+        with self.path.open("rb") as f:
+            for start, end, stix_id in spans:
+                f.seek(start)
+                loaded[stix_id] = json.loads(f.read(end - start))
+        return loaded
+
+    def load(self, stix_id: str) -> dict[str, Any]:
+        """Load the full source object for one STIX ID."""
+        return self.load_many([stix_id])[stix_id]
+
+    def get(self, stix_id: str, field_name: str, default: Any = None) -> Any:
+        """Load one (typically dropped) field of an object."""
+        return self.load(stix_id).get(field_name, default)
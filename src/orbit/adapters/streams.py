@@ -0,0 +1,174 @@
+"""
+Source file streams
+
+Opens source files for parsing, transparently decompressing gzip, xz
+and zstd archives. Compression is detected from the file's magic bytes
+(never its extension), and compressed input is decompressed as a
+stream straight into the parser: nothing is written to disk, and only
+one read buffer of compressed data (plus what it decompresses to) is
+held at a time.
+
+zstd needs the ``zstandard`` package (or Python 3.14's
+``compression.zstd``); gzip and xz use the standard library.
+"""
+
+import io
+import lzma
+import sys
+import zlib
+from pathlib import Path
+from typing import Any, BinaryIO, Callable, TextIO
+
+# Compressed bytes read from disk per refill; large reads keep the
+# decompressor busy and suit network storage
+READ_BUFFER_SIZE = 1 << 20
+
+MAGIC_NUMBERS = {
+    "gzip": b"\x1f\x8b",
+    "xz": b"\xfd7zXZ\x00",
+    "zstd": b"\x28\xb5\x2f\xfd",
+}
+
+
+def detect_compression(path: Path) -> str | None:
+    """Compression format of a file (``gzip``, ``xz``, ``zstd``) or None."""
+    with path.open("rb") as f:
+        head = f.read(max(len(magic) for magic in MAGIC_NUMBERS.values()))
+    for name, magic in MAGIC_NUMBERS.items():
+        if head.startswith(magic):
+            return name
+    return None
+
+
+def _zstd_decompressor() -> Any:
+    try:
+        from compression import zstd  # Python 3.14+
+
+        return zstd.ZstdDecompressor()
+    except ImportError:
+        pass
+    try:
+        import zstandard
+    except ImportError:
+        raise ValueError(
+            "zstd-compressed input requires the 'zstandard' package (pip install zstandard)"
+        ) from None
+    return zstandard.ZstdDecompressor().decompressobj()
+
+
+_DECOMPRESSORS: dict[str, Callable[[], Any]] = {
+    "gzip": lambda: zlib.decompressobj(wbits=16 + zlib.MAX_WBITS),
+    "xz": lambda: lzma.LZMADecompressor(format=lzma.FORMAT_XZ),
+    "zstd": _zstd_decompressor,
+}
+
+
+def _decoder_errors() -> tuple[type[BaseException], ...]:
+    """Exceptions raised by the decompressors for corrupt or truncated input."""
+    errors: list[type[BaseException]] = [EOFError, zlib.error, lzma.LZMAError]
+    # zstd implementations are imported by _zstd_decompressor() on first use
+    for module_name in ("compression.zstd", "zstandard"):
+        module = sys.modules.get(module_name)
+        if module is not None and hasattr(module, "ZstdError"):
+            errors.append(module.ZstdError)
+    return tuple(errors)
+
+
+class _DecompressingReader(io.RawIOBase):
+    """
+    Raw stream of the decompressed contents of a file.
+
+    Reads ``READ_BUFFER_SIZE`` compressed bytes at a time and feeds them
+    to a streaming decompressor. Concatenated members/frames (as written
+    by ``cat a.gz b.gz`` or parallel compressors) are decoded in turn.
+    Corrupt or truncated input raises ``ValueError``.
+    """
+
+    def __init__(self, raw: BinaryIO, new_decompressor: Callable[[], Any], path: Path):
+        self._raw = raw
+        self._path = path
+        self._new_decompressor = new_decompressor
+        self._decompressor = new_decompressor()
+        self._pending = memoryview(b"")
+        self._finished = False
+
+    def readable(self) -> bool:
+        return True
+
+    def _refill(self) -> None:
+        try:
+            self._decode()
+        except _decoder_errors() as e:
+            raise ValueError(f"Corrupt or truncated compressed input {self._path}: {e}") from e
+
+    def _decode(self) -> None:
+        while not self._pending and not self._finished:
+            decompressor = self._decompressor
+            if getattr(decompressor, "eof", False):
+                unused = decompressor.unused_data
+                if not unused:
+                    unused = self._raw.read(READ_BUFFER_SIZE)
+                    if not unused:
+                        self._finished = True
+                        return
+                self._decompressor = decompressor = self._new_decompressor()
+                chunk = unused
+            else:
+                chunk = self._raw.read(READ_BUFFER_SIZE)
+                if not chunk:
+                    if not getattr(decompressor, "eof", True):
+                        raise EOFError("Compressed file ended before the end-of-stream marker")
+                    self._finished = True
+                    return
+            self._pending = memoryview(decompressor.decompress(chunk))
+
+    def readall(self) -> bytes:
+        # RawIOBase.readall() would copy out in DEFAULT_BUFFER_SIZE pieces
+        parts = [bytes(self._pending)]
+        self._pending = memoryview(b"")
+        while True:
+            self._refill()
+            if not self._pending:
+                return b"".join(parts)
+            parts.append(self._pending.obj)
+            self._pending = memoryview(b"")
+
+    def readinto(self, buffer: Any) -> int:
+        self._refill()
+        size = min(len(buffer), len(self._pending))
+        buffer[:size] = self._pending[:size]
+        self._pending = self._pending[size:]
+        return size
+
+    def close(self) -> None:
+        if not self.closed:
+            self._raw.close()
+        super().close()
+
+
+def open_source(path: Path, newline: str | None = None) -> TextIO:
+    """
+    Open a UTF-8 source file for reading, decompressing it if needed.
+
+    Args:
+        path: Plain, gzip, xz or zstd file
+        newline: As for ``open()``; pass ``""`` for exact byte offsets
+            with ``bundle.iter_bundle_spans``
+
+    Returns:
+        Text stream; close it (or use it as a context manager) when done
+
+    Raises:
+        FileNotFoundError: If the file doesn't exist
+        ValueError: If the file is zstd-compressed and no zstd
+            implementation is installed (and, while reading, if the
+            compressed data is corrupt or truncated)
+    """
+    compression = detect_compression(path)
+    if compression is None:
+        return path.open(encoding="utf-8", newline=newline)
+    new_decompressor = _DECOMPRESSORS[compression]
+    new_decompressor()  # fail before opening if the codec is unavailable
+    raw = path.open("rb", buffering=0)
+    reader = io.BufferedReader(_DecompressingReader(raw, new_decompressor, path), READ_BUFFER_SIZE)
+    return io.TextIOWrapper(reader, encoding="utf-8", newline=newline)
@@ -0,0 +1,468 @@
+"""
+TAXII 2.1 Adapter
+
+Handles ingestion of STIX objects published through TAXII 2.1
+collections (e.g. MITRE's ATT&CK TAXII server or a partner's intel
+feed) instead of a local bundle file.
+
+The ``data_path`` handed to the adapter is a small JSON descriptor of
+the collections to poll::
+
+    {
+        "collections": [
+            "https://cti-taxii.mitre.org/api/v21/collections/<id>/",
+            ...
+        ],
+        "headers": {"Authorization": "Basic ..."},
+        "page_size": 1000
+    }
+
+Only ``collections`` is required. Each poll asks every collection for
+the objects added after its high-water mark (the ``added_after`` URL
+parameter), so the first poll downloads whole collections and later
+polls only what was published since. Marks come from the
+``X-TAXII-Date-Added-Last`` response header and are kept per collection
+URL and object filter in a state file beside the descriptor
+(``<stem>.state.json``): a filtered poll skips objects, so its marks say
+nothing about what an unfiltered (or differently filtered) poll has
+seen. Marks only advance when ``commit()`` is called, which ``ingest()``
+does once a run has succeeded, so a failed run is simply polled again.
+
+TAXII 2.1 pages with an opaque ``next`` cursor, so the pages of one
+query are inherently sequential. Concurrency comes from running
+independent queries side by side: one per collection, and, when a type
+filter is pushed down, one per type (``match[type]``). Each query runs
+in a worker thread that fetches its next page while earlier pages are
+being parsed, normalized and validated; pages reach the pipeline in
+arrival order.
+
+Pages only stream through the pipeline under a memory budget
+(``IngestConfig.memory_budget``, which uses ``iter_objects()``); without
+one, ``fetch()`` collects the whole poll, as the in-memory result would
+hold it anyway. A poll is never repeated within a run: when a filter
+prunes relationships, the budgeted path spools the one poll to disk and
+reads it back (see ``single_pass``).
+"""
+
+import json
+import os
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Iterator
+from urllib.parse import urlencode
+from urllib.request import Request, urlopen
+
+from .base import ObjectFilter
+from .interning import InternPool
+from .projection import Projection
+
+TAXII_MEDIA_TYPE = "application/taxii+json;version=2.1"
+DATE_ADDED_LAST_HEADER = "X-TAXII-Date-Added-Last"
+
+STATE_FORMAT_NAME = "orbit-taxii-state"
+STATE_FORMAT_VERSION = 2
+
+DEFAULT_PAGE_SIZE = 1000
+DEFAULT_MAX_WORKERS = 4
+DEFAULT_TIMEOUT = 60.0
+
+# Pages buffered per worker ahead of the consumer
+_PREFETCH_PAGES = 2
+
+# urlopen()-compatible: (request, timeout=...) -> response context manager
+Opener = Callable[[Request, float], Any]
+
+
+def default_state_path(data_path: Path) -> Path:
+    """High-water-mark file kept beside a collection descriptor."""
+    return data_path.with_name(data_path.stem + ".state.json")
+
+
+def _parse_timestamp(value: str) -> datetime:
+    return datetime.fromisoformat(value.replace("Z", "+00:00"))
+
+
+def _later(current: str | None, candidate: str | None) -> str | None:
+    """The later of two TAXII timestamps (None counts as earliest)."""
+    if candidate is None:
+        return current
+    if current is None or _parse_timestamp(candidate) > _parse_timestamp(current):
+        return candidate
+    return current
+
+
+def filter_fingerprint(object_filter: ObjectFilter | None) -> str | None:
+    """
+    Canonical JSON form of the filter a poll's marks belong to.
+
+    Returns:
+        None for an unfiltered poll (or a filter that rejects nothing)
+    """
+    if object_filter is None or not object_filter.is_active:
+        return None
+    description = {
+        "types": sorted(object_filter.types) if object_filter.types is not None else None,
+        "domains": sorted(object_filter.domains) if object_filter.domains is not None else None,
+        "exclude_revoked": object_filter.exclude_revoked,
+        "exclude_deprecated": object_filter.exclude_deprecated,
+    }
+    return _fingerprint(description)
+
+
+def _fingerprint(description: dict[str, Any]) -> str:
+    return json.dumps(description, sort_keys=True, separators=(",", ":"))
+
+
+# Committed marks: (collection URL, filter fingerprint) -> added_after
+_Marks = dict[tuple[str, str | None], str]
+
+
+def _read_marks(path: Path) -> _Marks:
+    if not path.exists():
+        return {}
+    state = json.loads(path.read_text(encoding="utf-8"))
+    if state.get("format") == STATE_FORMAT_NAME and state.get("version") == 1:
+        # Version 1 kept one (unfiltered) mark per collection
+        return {(url, None): entry["added_after"] for url, entry in state["collections"].items()}
+    if state.get("format") != STATE_FORMAT_NAME or state.get("version") != STATE_FORMAT_VERSION:
+        raise ValueError(f"Unsupported TAXII state format in {path}")
+    return {
+        (entry["collection"], _fingerprint(entry["filter"]) if entry["filter"] is not None else None):
+        entry["added_after"]
+        for entry in state["marks"]
+    }
+
+
+def _objects_url(collection: str) -> str:
+    return collection.rstrip("/") + "/objects/"
+
+
+class _Query:
+    """One paged ``objects`` query: a collection, optionally narrowed to a type."""
+
+    def __init__(self, collection: str, added_after: str | None, object_type: str | None):
+        self.collection = collection
+        self.added_after = added_after
+        self.object_type = object_type
+        self.date_added_last: str | None = None
+
+    def params(self, page_size: int, cursor: str | None) -> dict[str, Any]:
+        params: dict[str, Any] = {"limit": page_size}
+        if self.added_after is not None:
+            params["added_after"] = self.added_after
+        if self.object_type is not None:
+            params["match[type]"] = self.object_type
+        if cursor is not None:
+            params["next"] = cursor
+        return params
+
+
+class _Done:
+    """End-of-query marker put on the page queue by a worker."""
+
+    def __init__(self, error: BaseException | None = None):
+        self.error = error
+
+
+class TaxiiAdapter:
+    """
+    Adapter for TAXII 2.1 collections.
+
+    Args:
+        object_filter: Optional predicate applied while parsing pages. A
+            type filter that doesn't prune relationships is also pushed
+            down to the server as one ``match[type]`` query per type.
+            Marks are kept per filter (see ``filter_fingerprint``)
+        projection: Optional per-type field projection (never lazy:
+            objects come from the network, not byte spans of a file)
+        intern_values: Deduplicate repeated strings and small sub-objects
+            across kept objects in ``fetch()`` (see ``InternPool``)
+        state_path: High-water-mark file (default: beside the descriptor,
+            see ``default_state_path``)
+        max_workers: Queries fetched concurrently
+        timeout: Socket timeout per request, in seconds
+        opener: ``urlopen``-compatible callable ``(request, timeout)``
+            (e.g. for proxies or client certificates)
+
+    Attributes:
+        single_pass: Tells the pipeline not to call ``iter_objects()``
+            twice in one run, since a second poll may see objects the
+            first didn't
+        pending_marks: High-water marks reached by the last complete poll,
+            per collection URL, written by ``commit()`` under this
+            adapter's filter
+    """
+
+    single_pass = True
+
+    def __init__(
+        self,
+        object_filter: ObjectFilter | None = None,
+        projection: Projection | None = None,
+        intern_values: bool = False,
+        state_path: Path | None = None,
+        max_workers: int = DEFAULT_MAX_WORKERS,
+        timeout: float = DEFAULT_TIMEOUT,
+        opener: Opener | None = None,
+    ):
+        if max_workers <= 0:
+            raise ValueError(f"max_workers must be positive: {max_workers}")
+        self.object_filter = object_filter if object_filter and object_filter.is_active else None
+        self.projection = projection
+        self.intern_values = intern_values
+        self.state_path = state_path
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self.opener = opener or urlopen
+        self.source_offsets = None
+        self.pending_marks: dict[str, str] = {}
+        self._fingerprint = filter_fingerprint(self.object_filter)
+        # Marks this adapter polls from, read once so that repeated
+        # passes (see ingestion.pipeline) download the same objects
+        self._marks: _Marks | None = None
+        self._resolved_state_path: Path | None = None
+
+    # ----- Descriptor and state -----
+
+    @staticmethod
+    def read_descriptor(data_path: Path) -> dict[str, Any]:
+        """
+        Load and check a collection descriptor.
+
+        Raises:
+            FileNotFoundError: If the descriptor doesn't exist
+            json.JSONDecodeError: If it is not valid JSON
+            ValueError: If it lists no collections or has a bad page size
+        """
+        if not data_path.exists():
+            raise FileNotFoundError(f"TAXII collection descriptor not found: {data_path}")
+        descriptor = json.loads(data_path.read_text(encoding="utf-8"))
+        collections = descriptor.get("collections") if isinstance(descriptor, dict) else None
+        if not collections or not all(isinstance(url, str) for url in collections):
+            raise ValueError(f"Invalid TAXII descriptor {data_path}: 'collections' must list URLs")
+        page_size = descriptor.get("page_size", DEFAULT_PAGE_SIZE)
+        if not isinstance(page_size, int) or page_size <= 0:
+            raise ValueError(f"Invalid TAXII descriptor {data_path}: bad page_size {page_size!r}")
+        return {
+            "collections": list(dict.fromkeys(collections)),
+            "headers": dict(descriptor.get("headers", {})),
+            "page_size": page_size,
+        }
+
+    def _state_path(self, data_path: Path) -> Path:
+        return self.state_path if self.state_path is not None else default_state_path(data_path)
+
+    def high_water_marks(self, data_path: Path) -> dict[str, str]:
+        """
+        Committed ``added_after`` marks of this adapter's filter, per collection URL.
+
+        Raises:
+            ValueError: If the state file has an unsupported format
+        """
+        marks = _read_marks(self._state_path(data_path))
+        return {url: mark for (url, fingerprint), mark in marks.items() if fingerprint == self._fingerprint}
+
+    def commit(self) -> None:
+        """
+        Persist the marks reached by the last complete poll.
+
+        Later polls with the same filter (by any adapter using the same
+        state file) then only download objects added after them; polls
+        with another filter, or none, are unaffected. Does nothing before
+        a poll.
+        """
+        if not self.pending_marks or self._resolved_state_path is None:
+            return
+        path = self._resolved_state_path
+        marks = _read_marks(path)  # another poller may have committed since
+        for url, mark in self.pending_marks.items():
+            key = (url, self._fingerprint)
+            marks[key] = _later(marks.get(key), mark)
+        state = {
+            "format": STATE_FORMAT_NAME,
+            "version": STATE_FORMAT_VERSION,
+            "marks": [
+                {
+                    "collection": url,
+                    "filter": json.loads(fingerprint) if fingerprint is not None else None,
+                    "added_after": marks[url, fingerprint],
+                }
+                for url, fingerprint in sorted(marks, key=lambda key: (key[0], key[1] or ""))
+            ],
+        }
+        tmp = path.with_name(path.name + ".tmp")
+        tmp.write_text(json.dumps(state, indent=2, sort_keys=True) + "\n", encoding="utf-8")
+        os.replace(tmp, path)
+        self._marks = marks
+        self.pending_marks = {}
+
+    # ----- Fetching -----
+
+    def fetch(self, data_path: Path) -> dict[str, Any]:
+        """
+        Poll every collection of a descriptor into one bundle.
+
+        Args:
+            data_path: Collection descriptor (see module docstring)
+
+        Returns:
+            ``{"type": "bundle", "objects": [...]}`` with the objects added
+            since each collection's committed mark (only matching,
+            projected, interned objects when configured)
+
+        Raises:
+            FileNotFoundError: If the descriptor doesn't exist
+            OSError: If a request fails (``urllib.error.HTTPError`` and
+                ``URLError`` are OSErrors)
+            ValueError: If the descriptor, state file or a response is
+                malformed
+        """
+        pool = InternPool() if self.intern_values else None
+        dropped_ids: set[str] = set()
+        kept = []
+        for obj in self.iter_objects(data_path, dropped_ids):
+            kept.append(pool.intern_object(obj) if pool is not None else obj)
+        if self.object_filter is not None:
+            kept = self.object_filter.finish(kept, dropped_ids)
+        return {"type": "bundle", "objects": kept}
+
+    def iter_objects(self, data_path: Path, dropped_ids: set[str]) -> Iterator[dict[str, Any]]:
+        """
+        Stream filtered, projected objects as their pages arrive.
+
+        Pages of different queries interleave in arrival order; the same
+        version of an object (same ``id`` and ``modified``) served by
+        several collections is yielded once. Relationships are not
+        pruned here (see ``AttackAdapter.iter_objects``). Once the stream
+        is exhausted, ``pending_marks`` holds the marks to ``commit()``.
+
+        Args:
+            data_path: Collection descriptor
+            dropped_ids: Receives IDs rejected by the domain and
+                lifecycle predicates
+
+        Yields:
+            STIX objects (unvalidated)
+
+        Raises:
+            See ``fetch()``
+        """
+        descriptor = self.read_descriptor(data_path)
+        self._resolved_state_path = self._state_path(data_path)
+        if self._marks is None:
+            self._marks = _read_marks(self._resolved_state_path)
+
+        object_filter, projection = self.object_filter, self.projection
+        types: list[str | None] = [None]
+        if object_filter is not None and object_filter.types is not None and not object_filter.prunes_relationships:
+            types = sorted(object_filter.types)
+        queries = [
+            _Query(url, self._marks.get((url, self._fingerprint)), object_type)
+            for url in descriptor["collections"]
+            for object_type in types
+        ]
+
+        seen: set[tuple[str, str | None]] = set()
+        for query, objects in self._pages(queries, descriptor):
+            for obj in objects:
+                if query.object_type is not None and obj.get("type") != query.object_type:
+                    continue  # server ignored match[type]
+                version = (obj.get("id"), obj.get("modified"))
+                if version in seen:
+                    continue
+                seen.add(version)
+                if object_filter is not None and not object_filter.admit(obj, dropped_ids):
+                    continue
+                yield projection.apply(obj) if projection is not None else obj
+
+        marks: dict[str, str] = {}
+        for query in queries:
+            mark = _later(marks.get(query.collection), query.date_added_last)
+            if mark is not None:
+                marks[query.collection] = mark
+        self.pending_marks = marks
+
+    def _pages(
+        self, queries: list[_Query], descriptor: dict[str, Any]
+    ) -> Iterator[tuple[_Query, list[dict[str, Any]]]]:
+        """Run queries on worker threads, yielding pages as they arrive."""
+        pages: queue.Queue = queue.Queue(maxsize=_PREFETCH_PAGES * len(queries))
+        stop = threading.Event()
+
+        def put(item: Any) -> bool:
+            while not stop.is_set():
+                try:
+                    pages.put(item, timeout=0.1)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+
+        def walk(query: _Query) -> None:
+            try:
+                cursor = None
+                while not stop.is_set():
+                    envelope, date_added_last = self._get(query, descriptor, cursor)
+                    query.date_added_last = _later(query.date_added_last, date_added_last)
+                    if not put((query, envelope.get("objects", []))):
+                        return
+                    cursor = envelope.get("next")
+                    if not envelope.get("more") or not cursor:
+                        break
+                put(_Done())
+            except BaseException as e:
+                put(_Done(e))
+
+        workers = min(self.max_workers, len(queries))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="orbit-taxii") as executor:
+            for query in queries:
+                executor.submit(walk, query)
+            try:
+                remaining = len(queries)
+                while remaining:
+                    item = pages.get()
+                    if isinstance(item, _Done):
+                        if item.error is not None:
+                            raise item.error
+                        remaining -= 1
+                        continue
+                    yield item
+            finally:
+                stop.set()
+
+    def _get(
+        self, query: _Query, descriptor: dict[str, Any], cursor: str | None
+    ) -> tuple[dict[str, Any], str | None]:
+        """Fetch one page: (envelope, X-TAXII-Date-Added-Last or None)."""
+        url = _objects_url(query.collection) + "?" + urlencode(query.params(descriptor["page_size"], cursor))
+        request = Request(url, headers={"Accept": TAXII_MEDIA_TYPE, **descriptor["headers"]})
+        with self.opener(request, timeout=self.timeout) as response:
+            body = response.read()
+            date_added_last = response.headers.get(DATE_ADDED_LAST_HEADER)
+        if not body:
+            return {}, date_added_last  # 204-style empty page
+        envelope = json.loads(body)
+        if not isinstance(envelope, dict) or not isinstance(envelope.get("objects", []), list):
+            raise ValueError(f"Invalid TAXII envelope from {url}")
+        return envelope, date_added_last
+
+    def normalize(self, raw: dict[str, Any]) -> list[dict[str, Any]]:
+        """
+        Extract STIX objects from a polled bundle.
+
+        Args:
+            raw: Bundle from fetch(), already filtered and projected
+
+        Returns:
+            List of STIX objects (unvalidated)
+        """
+        if "objects" not in raw:
+            raise ValueError("Invalid STIX bundle: missing 'objects' field")
+        return raw["objects"]
+
+    @property
+    def source_name(self) -> str:
+        return "taxii"
@@ -0,0 +1,609 @@
+"""
+Command-line interface
+
+Usage:
+    python -m orbit ingest --source attack [--data-path PATH ...]
+        [--output FILE|-] [--output-dir DIR]
+        [--type TYPE ...] [--domain DOMAIN ...]
+        [--exclude-revoked] [--exclude-deprecated] [--structure-only]
+        [--neo4j [--batch-size N]] [--checkpoint-dir DIR] [--memory-budget MIB]
+        [--shard-dir DIR [--workers N] [--shard-size MIB]]
+        [--timings] [--trace-memory [N]] [--profile FILE]
+    python -m orbit shard-worker --shard-dir DIR [--lease SECONDS]
+    python -m orbit serve --output-dir DIR [--host HOST] [--port PORT]
+        [--cache-size N] [--cache-ttl SECONDS] [--reload-interval SECONDS]
+    python -m orbit watch --output-root DIR [--watch SOURCE[=PATH] ...]
+        [--interval SECONDS] [--debounce SECONDS] [--keep N] [--once]
+
+Validated objects are written as NDJSON to ``--output`` (stdout by
+default) once ingestion has succeeded, in STIX ID order; a failed run
+writes nothing. Diagnostics (timings, memory, profile summary, errors)
+go to stderr so they never mix with the NDJSON output.
+
+With ``--checkpoint-dir``, an interrupted ingest (and ``--neo4j`` graph
+load) rerun with the same arguments resumes where it stopped. With
+``--memory-budget``, validated objects beyond the budget are spilled to
+sorted runs on disk instead of being held in memory. The budget covers
+those objects only; see ``ingestion.IngestConfig`` for what is not
+counted. With
+``--shard-dir``, the inputs are split into shards processed by worker
+processes, and by ``shard-worker`` on any host sharing the directory
+(see ``orbit.ingestion.shards``).
+
+``serve`` answers read-only lookups over an ``--output-dir`` written by
+``ingest`` and reloads it when a new ingest lands (see ``orbit.service``).
+
+``watch`` re-ingests each source file when it changes and publishes a
+new snapshot under ``--output-root/<source>/current``, which ``serve``
+can point at (see ``orbit.ingestion.watch``).
+"""
+
+import argparse
+import asyncio
+import cProfile
+import pstats
+import sys
+from contextlib import nullcontext
+from pathlib import Path
+from typing import Iterable, Sequence, TextIO
+
+from .adapters import ADAPTERS, STRUCTURE_ONLY
+from .graph.writer import DEFAULT_BATCH_SIZE
+from .ingestion import IngestConfig, ingest, ingest_sharded
+from .ingestion.instrumentation import (
+    StageMemoryTracer,
+    StageTimer,
+    combine_stage_hooks,
+)
+from .ingestion.output import dump_object
+from .ingestion.shards import DEFAULT_LEASE_SECONDS, DEFAULT_SHARD_BYTES, run_worker
+from .ingestion.watch import (
+    DEFAULT_DEBOUNCE,
+    DEFAULT_KEEP,
+    DEFAULT_POLL_INTERVAL,
+    Publication,
+    Watcher,
+    WatchedSource,
+    default_sources,
+)
+from .schemas import ValidationError
+from .service.server import DEFAULT_HOST, DEFAULT_PORT, DEFAULT_RELOAD_INTERVAL
+
+# Number of functions listed in the --profile summary
+PROFILE_SUMMARY_LINES = 25
+
+
+def _default_data_path(source: str) -> Path:
+    """Configured data path for a source (see orbit.config)."""
+    from . import config
+
+    defaults = {
+        "attack": config.STIX_FILE,
+        "d3fend": config.D3FEND_JSONLD_PATH,
+        "csf": config.CSF_FILE,
+    }
+    if source not in defaults:
+        raise ValueError(f"No default data path for source '{source}'; pass --data-path")
+    return Path(defaults[source])
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """Build the ``orbit`` argument parser."""
+    parser = argparse.ArgumentParser(
+        prog="orbit",
+        description="Deterministic ATT&CK / D3FEND ingestion pipeline",
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    ingest_parser = commands.add_parser(
+        "ingest",
+        help="Ingest and validate a source, writing objects as NDJSON",
+    )
+    ingest_parser.add_argument(
+        "--source",
+        required=True,
+        choices=sorted(ADAPTERS),
+        help="Source identifier",
+    )
+    ingest_parser.add_argument(
+        "--data-path",
+        type=Path,
+        action="append",
+        help="Source data file (default: configured path for the source); "
+        "repeatable with --shard-dir",
+    )
+    ingest_parser.add_argument(
+        "--output",
+        "-o",
+        default="-",
+        help="NDJSON destination file, or '-' for stdout (default: -)",
+    )
+    ingest_parser.add_argument(
+        "--output-dir",
+        type=Path,
+        help="Also persist validated output and indexes to this directory",
+    )
+    ingest_parser.add_argument(
+        "--no-validate",
+        action="store_true",
+        help="Skip schema validation",
+    )
+    ingest_parser.add_argument(
+        "--keep-going",
+        action="store_true",
+        help="Report invalid objects instead of failing the ingest",
+    )
+    ingest_parser.add_argument(
+        "--type",
+        dest="types",
+        action="append",
+        metavar="TYPE",
+        help="Keep only this STIX type (repeatable; filtered while parsing)",
+    )
+    ingest_parser.add_argument(
+        "--domain",
+        dest="domains",
+        action="append",
+        metavar="DOMAIN",
+        help="Keep only objects in this x_mitre_domains value (repeatable)",
+    )
+    ingest_parser.add_argument(
+        "--exclude-revoked",
+        action="store_true",
+        help="Drop revoked objects and their relationships",
+    )
+    ingest_parser.add_argument(
+        "--exclude-deprecated",
+        action="store_true",
+        help="Drop deprecated objects and their relationships",
+    )
+    ingest_parser.add_argument(
+        "--structure-only",
+        action="store_true",
+        help="Keep only ids, types, names, refs, domains and lifecycle fields",
+    )
+    ingest_parser.add_argument(
+        "--neo4j",
+        action="store_true",
+        help="Load validated objects into the configured Neo4j database (idempotent MERGE)",
+    )
+    ingest_parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=DEFAULT_BATCH_SIZE,
+        metavar="N",
+        help=f"Objects per Neo4j write transaction (default: {DEFAULT_BATCH_SIZE})",
+    )
+    ingest_parser.add_argument(
+        "--checkpoint-dir",
+        type=Path,
+        metavar="DIR",
+        help="Record progress here so an interrupted run resumes when rerun",
+    )
+    ingest_parser.add_argument(
+        "--memory-budget",
+        type=int,
+        metavar="MIB",
+        help=(
+            "Hold at most about MIB MiB of validated objects in memory, spilling the rest to disk "
+            "(objects only: --output-dir indexes and per-run ID sets are not counted)"
+        ),
+    )
+    ingest_parser.add_argument(
+        "--spill-dir",
+        type=Path,
+        metavar="DIR",
+        help="Directory for spilled runs (default: system temp directory)",
+    )
+    ingest_parser.add_argument(
+        "--shard-dir",
+        type=Path,
+        metavar="DIR",
+        help="Shard the inputs, coordinating workers through this (shared) directory",
+    )
+    ingest_parser.add_argument(
+        "--workers",
+        type=int,
+        metavar="N",
+        help="Local worker processes besides the coordinator (default: CPUs - 1)",
+    )
+    ingest_parser.add_argument(
+        "--shard-size",
+        type=int,
+        default=DEFAULT_SHARD_BYTES // 2**20,
+        metavar="MIB",
+        help=f"Target MiB per shard (default: {DEFAULT_SHARD_BYTES // 2**20})",
+    )
+    ingest_parser.add_argument(
+        "--timings",
+        action="store_true",
+        help="Print wall-clock time per stage to stderr",
+    )
+    ingest_parser.add_argument(
+        "--trace-memory",
+        type=int,
+        nargs="?",
+        const=10,
+        metavar="N",
+        help="Trace memory with tracemalloc and print top N allocators per stage (default N: 10)",
+    )
+    ingest_parser.add_argument(
+        "--profile",
+        type=Path,
+        metavar="FILE",
+        help="Run under cProfile, dump pstats to FILE and print a summary to stderr",
+    )
+
+    serve_parser = commands.add_parser(
+        "serve",
+        help="Serve read-only lookups over an ingest output directory (HTTP, JSON)",
+    )
+    serve_parser.add_argument(
+        "--output-dir",
+        type=Path,
+        required=True,
+        help="Directory written by `orbit ingest --output-dir`",
+    )
+    serve_parser.add_argument(
+        "--host",
+        default=DEFAULT_HOST,
+        help=f"Bind address (default: {DEFAULT_HOST})",
+    )
+    serve_parser.add_argument(
+        "--port",
+        type=int,
+        default=DEFAULT_PORT,
+        help=f"Port, or 0 for any free port (default: {DEFAULT_PORT})",
+    )
+    serve_parser.add_argument(
+        "--cache-size",
+        type=int,
+        default=4096,
+        metavar="N",
+        help="Cached responses (LRU; 0 disables the cache; default: 4096)",
+    )
+    serve_parser.add_argument(
+        "--cache-ttl",
+        type=float,
+        default=300.0,
+        metavar="SECONDS",
+        help="Seconds a cached response stays valid (default: 300)",
+    )
+    serve_parser.add_argument(
+        "--reload-interval",
+        type=float,
+        metavar="SECONDS",
+        help=f"Seconds between checks for new output; 0 disables reloading "
+        f"(default: {DEFAULT_RELOAD_INTERVAL:g}, or 0 if FORCE_RELOAD_ON_CHANGE is off)",
+    )
+
+    worker_parser = commands.add_parser(
+        "shard-worker",
+        help="Process shards of a sharded ingest until none are left",
+    )
+    worker_parser.add_argument(
+        "--shard-dir",
+        type=Path,
+        required=True,
+        metavar="DIR",
+        help="Directory given to `orbit ingest --shard-dir`",
+    )
+    worker_parser.add_argument(
+        "--lease",
+        type=float,
+        default=DEFAULT_LEASE_SECONDS,
+        metavar="SECONDS",
+        help=f"Take over claims older than this (default: {DEFAULT_LEASE_SECONDS:g})",
+    )
+
+    watch_parser = commands.add_parser(
+        "watch",
+        help="Re-ingest source files when they change, publishing atomic snapshots",
+    )
+    watch_parser.add_argument(
+        "--output-root",
+        type=Path,
+        required=True,
+        metavar="DIR",
+        help="Snapshots go to DIR/<source>/snapshots; DIR/<source>/current is the latest",
+    )
+    watch_parser.add_argument(
+        "--watch",
+        dest="sources",
+        action="append",
+        metavar="SOURCE[=PATH]",
+        help="Source to watch, with its data file (default path: configured for the "
+        "source); repeatable (default: attack at its configured path)",
+    )
+    watch_parser.add_argument(
+        "--interval",
+        type=float,
+        default=DEFAULT_POLL_INTERVAL,
+        metavar="SECONDS",
+        help=f"Seconds between file checks (default: {DEFAULT_POLL_INTERVAL:g})",
+    )
+    watch_parser.add_argument(
+        "--debounce",
+        type=float,
+        default=DEFAULT_DEBOUNCE,
+        metavar="SECONDS",
+        help=f"Seconds a change must be stable before re-ingesting (default: {DEFAULT_DEBOUNCE:g})",
+    )
+    watch_parser.add_argument(
+        "--keep",
+        type=int,
+        default=DEFAULT_KEEP,
+        metavar="N",
+        help=f"Snapshots kept per source, current included (default: {DEFAULT_KEEP})",
+    )
+    watch_parser.add_argument(
+        "--once",
+        action="store_true",
+        help="Ingest changed sources once, without debouncing, and exit",
+    )
+    return parser
+
+
+def _write_ndjson(objects: Iterable[dict], stream: TextIO) -> None:
+    for obj in objects:
+        stream.write(dump_object(obj))
+        stream.write("\n")
+
+
+def run_ingest(args: argparse.Namespace, stdout: TextIO, stderr: TextIO) -> int:
+    """Execute the ``ingest`` command. Returns process exit code."""
+    try:
+        data_paths = args.data_path or [_default_data_path(args.source)]
+    except ValueError as e:
+        print(f"orbit: ingest failed: {e}", file=stderr)
+        return 1
+    if len(data_paths) > 1 and args.shard_dir is None:
+        print("orbit: ingest failed: several --data-path values need --shard-dir", file=stderr)
+        return 1
+    data_path = data_paths[0]
+    config = IngestConfig(
+        source=args.source,
+        data_path=data_path,
+        validate=not args.no_validate,
+        fail_on_invalid=not args.keep_going,
+        output_dir=args.output_dir,
+        types=set(args.types) if args.types else None,
+        domains=set(args.domains) if args.domains else None,
+        exclude_revoked=args.exclude_revoked,
+        exclude_deprecated=args.exclude_deprecated,
+        projection=STRUCTURE_ONLY if args.structure_only else None,
+        checkpoint_dir=args.checkpoint_dir,
+        memory_budget=args.memory_budget * 2**20 if args.memory_budget is not None else None,
+        spill_dir=args.spill_dir,
+        intern_values=True,  # results are only written out, never mutated
+    )
+
+    hooks = []
+    timer = StageTimer() if args.timings else None
+    if timer is not None:
+        hooks.append(timer)
+    tracer = StageMemoryTracer(top=args.trace_memory) if args.trace_memory is not None else None
+    if tracer is not None:
+        hooks.append(tracer)
+    stage_hook = combine_stage_hooks(*hooks) if hooks else None
+
+    profiler = cProfile.Profile() if args.profile is not None else None
+
+    driver = graph = None
+    graph_errors: tuple[type[Exception], ...] = ()
+    if args.neo4j:
+        from neo4j.exceptions import DriverError, Neo4jError
+
+        from . import config as settings
+        from .graph import GraphWriter, connect
+
+        driver = connect()
+        graph = GraphWriter(driver, database=settings.NEO4J_DB, batch_size=args.batch_size)
+        graph_errors = (DriverError, Neo4jError)
+
+    try:
+        if profiler is not None:
+            profiler.enable()
+        try:
+            if args.shard_dir is not None:
+                result = ingest_sharded(
+                    config,
+                    args.shard_dir,
+                    data_paths=data_paths,
+                    workers=args.workers,
+                    shard_bytes=args.shard_size * 2**20,
+                    stage_hook=stage_hook,
+                    graph=graph,
+                )
+            else:
+                result = ingest(config, stage_hook=stage_hook, graph=graph)
+        finally:
+            if profiler is not None:
+                profiler.disable()
+            if tracer is not None:
+                tracer.close()
+            if driver is not None:
+                driver.close()
+    # OSError covers missing files and network failures (urllib's URLError)
+    except (OSError, ValueError, ValidationError, NotImplementedError) as e:
+        print(f"orbit: ingest failed: {e}", file=stderr)
+        return 1
+    except graph_errors as e:
+        hint = "; rerun to resume from the checkpoint" if args.checkpoint_dir else ""
+        print(f"orbit: graph load failed: {e}{hint}", file=stderr)
+        return 1
+
+    if args.output == "-":
+        sink = nullcontext(stdout)
+    else:
+        sink = open(args.output, "w", encoding="utf-8", newline="\n")
+    with sink as stream:
+        _write_ndjson(result.objects, stream)
+
+    for error in result.errors:
+        print(f"orbit: invalid object: {error}", file=stderr)
+    print(
+        f"orbit: ingested {result.object_count} object(s) from {result.metadata['source']} "
+        f"({len(result.errors)} error(s))",
+        file=stderr,
+    )
+    if "shards" in result.metadata:
+        shards = result.metadata["shards"]
+        print(
+            f"orbit: merged {shards['count']} shard(s) ({shards['processed_here']} processed here, "
+            f"{shards['duplicates']} duplicate(s) dropped)",
+            file=stderr,
+        )
+    if "graph" in result.metadata:
+        loaded = result.metadata["graph"]
+        print(
+            f"orbit: loaded {loaded['batches_written']} batch(es) into Neo4j "
+            f"({loaded['batches_skipped']} already loaded before resuming)",
+            file=stderr,
+        )
+
+    if timer is not None:
+        print(timer.report(), file=stderr)
+    if tracer is not None:
+        print(tracer.report(), file=stderr)
+    if profiler is not None:
+        profiler.dump_stats(args.profile)
+        stats = pstats.Stats(profiler, stream=stderr)
+        stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(PROFILE_SUMMARY_LINES)
+
+    return 0
+
+
+def run_shard_worker(args: argparse.Namespace, stderr: TextIO) -> int:
+    """Execute the ``shard-worker`` command. Returns process exit code."""
+    try:
+        processed = run_worker(args.shard_dir, lease_seconds=args.lease)
+    except (FileNotFoundError, ValueError, ValidationError) as e:
+        print(f"orbit: shard worker failed: {e}", file=stderr)
+        return 1
+    print(f"orbit: processed {len(processed)} shard(s)", file=stderr)
+    return 0
+
+
+def _watched_source(spec: str) -> WatchedSource:
+    source, sep, path = spec.partition("=")
+    if source not in ADAPTERS:
+        raise ValueError(f"Unknown source '{source}'; choose from {', '.join(sorted(ADAPTERS))}")
+    return WatchedSource(source, Path(path) if sep else _default_data_path(source))
+
+
+def run_watch(args: argparse.Namespace, stderr: TextIO) -> int:
+    """Execute the ``watch`` command until interrupted. Returns process exit code."""
+    try:
+        sources = [_watched_source(spec) for spec in args.sources] if args.sources else default_sources()
+    except ValueError as e:
+        print(f"orbit: watch failed: {e}", file=stderr)
+        return 2
+
+    def published(publication: Publication) -> None:
+        print(
+            f"orbit: published {publication.source} snapshot {publication.path.name} "
+            f"({publication.object_count} object(s): {len(publication.added)} added, "
+            f"{len(publication.changed)} changed, {len(publication.removed)} removed)",
+            file=stderr,
+            flush=True,
+        )
+
+    def failed(source: str, message: str) -> None:
+        print(f"orbit: {source} ingest failed; previous snapshot kept: {message}", file=stderr, flush=True)
+
+    watcher = Watcher(
+        args.output_root,
+        sources,
+        debounce=0 if args.once else args.debounce,
+        keep=args.keep,
+        ingest_options={"intern_values": True},
+        on_publish=published,
+        on_error=failed,
+    )
+    if args.once:
+        watcher.poll()
+        return 1 if watcher.errors else 0
+
+    print(
+        f"orbit: watching {', '.join(f'{w.source}={w.data_path}' for w in sources)}",
+        file=stderr,
+        flush=True,
+    )
+    try:
+        watcher.run(args.interval)
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+def run_serve(args: argparse.Namespace, stderr: TextIO) -> int:
+    """Execute the ``serve`` command until interrupted. Returns process exit code."""
+    from .service import QueryService, ResultCache
+
+    reload_interval = args.reload_interval
+    if reload_interval is None:
+        from . import config
+
+        reload_interval = DEFAULT_RELOAD_INTERVAL if config.FORCE_RELOAD_ON_CHANGE else 0
+
+    try:
+        service = QueryService(
+            args.output_dir,
+            cache=ResultCache(maxsize=args.cache_size, ttl=args.cache_ttl),
+            reload_interval=reload_interval,
+        )
+    except (FileNotFoundError, ValueError, ValidationError) as e:
+        print(f"orbit: serve failed: {e}", file=stderr)
+        return 1
+
+    async def _serve() -> None:
+        server = await service.start(args.host, args.port)
+        host, port = server.sockets[0].getsockname()[:2]
+        print(
+            f"orbit: serving {len(service.snapshot)} object(s) on http://{host}:{port}",
+            file=stderr,
+            flush=True,
+        )
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            service.close()
+
+    try:
+        asyncio.run(_serve())
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+def main(
+    argv: Sequence[str] | None = None,
+    stdout: TextIO | None = None,
+    stderr: TextIO | None = None,
+) -> int:
+    """
+    ``orbit`` command-line entrypoint.
+
+    Args:
+        argv: Arguments (default: sys.argv[1:])
+        stdout: Stream for NDJSON output (default: sys.stdout)
+        stderr: Stream for diagnostics (default: sys.stderr)
+
+    Returns:
+        Process exit code (0 success, 1 ingest failure, 2 usage error)
+    """
+    args = build_parser().parse_args(argv)
+    stdout = stdout or sys.stdout
+    stderr = stderr or sys.stderr
+
+    if args.command == "ingest":
+        return run_ingest(args, stdout, stderr)
+    if args.command == "serve":
+        return run_serve(args, stderr)
+    if args.command == "shard-worker":
+        return run_shard_worker(args, stderr)
+    if args.command == "watch":
+        return run_watch(args, stderr)
+    return 2
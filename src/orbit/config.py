@@ -15,9 +15,13 @@ class IngestSettings(BaseModel):
     DEFAULT_STIX_URL: ClassVar[str] = "https://github.com/mitre/cti/blob/master/enterprise-attack/enterprise-attack.json"
     DEFAULT_STIX_FILE: ClassVar[Path] = Path("attack-graph/stix-data/enterprise-attack.json")
     DEFAULT_D3FEND_JSONLD: ClassVar[Path] = Path("data/d3fend.json")
+    DEFAULT_CSF_FILE: ClassVar[Path] = Path("data/csf-2.0.json")
+    DEFAULT_CSF_MAPPINGS: ClassVar[Path] = Path("data/csf-2.0-mappings.json")
 
     stix_file: Path = DEFAULT_STIX_FILE
     d3fend_jsonld_path: Path = DEFAULT_D3FEND_JSONLD
+    csf_file: Path = DEFAULT_CSF_FILE
+    csf_mappings_path: Path = DEFAULT_CSF_MAPPINGS
     d3fend_ns: str = "http://d3fend.mitre.org/ontologies/d3fend.owl#"
     d3fend_tactic_names: Set[str] = {"Harden", "Detect", "Isolate", "Deceive", "Evict"}
 
@@ -64,6 +68,12 @@ class IngestSettings(BaseModel):
                 "D3FEND_JSONLD_PATH",
                 default=str(cls.DEFAULT_D3FEND_JSONLD),
             ),
+            csf_file=_fetch("UNIFIED_INGEST_CSF_FILE", "CSF_FILE", default=str(cls.DEFAULT_CSF_FILE)),
+            csf_mappings_path=_fetch(
+                "UNIFIED_INGEST_CSF_MAPPINGS_PATH",
+                "CSF_MAPPINGS_PATH",
+                default=str(cls.DEFAULT_CSF_MAPPINGS),
+            ),
             d3fend_ns=_fetch("UNIFIED_INGEST_D3FEND_NS", "D3FEND_NS", default="http://d3fend.mitre.org/ontologies/d3fend.owl#"),
             d3fend_tactic_names=_fetch(
                 "UNIFIED_INGEST_D3FEND_TACTIC_NAMES",
@@ -90,6 +100,8 @@ settings = IngestSettings.from_env()
 # ========== FILE LOCATIONS ==========
 STIX_FILE = settings.stix_file
 D3FEND_JSONLD_PATH = settings.d3fend_jsonld_path
+CSF_FILE = settings.csf_file
+CSF_MAPPINGS_PATH = settings.csf_mappings_path  # CSF -> ATT&CK / D3FEND crosswalk
 
 # ========== D3FEND ONTOLOGY ==========
 D3FEND_NS = settings.d3fend_ns
@@ -124,6 +136,8 @@ __all__ = [
     "settings",
     "STIX_FILE",
     "D3FEND_JSONLD_PATH",
+    "CSF_FILE",
+    "CSF_MAPPINGS_PATH",
     "D3FEND_NS",
     "D3FEND_ID_IRI",
     "ENABLES_IRI",
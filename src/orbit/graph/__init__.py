@@ -0,0 +1,9 @@
+"""
+Graph Loading
+
+Writes validated objects into Neo4j with idempotent, batched MERGEs.
+"""
+
+from .writer import GraphBatch, GraphWriter, connect, graph_properties
+
+__all__ = ["GraphBatch", "GraphWriter", "connect", "graph_properties"]
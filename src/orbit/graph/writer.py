@@ -0,0 +1,222 @@
+"""
+Neo4j graph writer
+
+Loads validated objects into Neo4j in fixed, deterministic batches.
+Every write is a MERGE keyed on the STIX ID, so replaying a batch
+(e.g. after a crash between commit and checkpoint) leaves the graph
+unchanged; together with the ingestion checkpoint this makes loads
+resumable.
+"""
+
+import json
+import re
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any, Callable, Iterable, Mapping
+
+# Label shared by every loaded node; carries the unique stix_id constraint
+NODE_LABEL = "StixObject"
+
+DEFAULT_BATCH_SIZE = 1000
+
+CONSTRAINT_QUERY = (
+    f"CREATE CONSTRAINT stix_object_id IF NOT EXISTS "
+    f"FOR (n:{NODE_LABEL}) REQUIRE n.stix_id IS UNIQUE"
+)
+
+_NAME_PART = re.compile(r"[A-Za-z0-9]+")
+_SCALARS = (str, int, float, bool)
+
+
+@lru_cache(maxsize=None)
+def node_label(stix_type: str) -> str:
+    """Node label for a STIX type (``attack-pattern`` -> ``AttackPattern``)."""
+    return "".join(part[0].upper() + part[1:] for part in _NAME_PART.findall(stix_type))
+
+
+@lru_cache(maxsize=None)
+def relationship_label(relationship_type: str) -> str:
+    """Relationship type for a STIX relationship (``subtechnique-of`` -> ``SUBTECHNIQUE_OF``)."""
+    return "_".join(part.upper() for part in _NAME_PART.findall(relationship_type))
+
+
+def graph_properties(obj: Mapping[str, Any]) -> dict[str, Any]:
+    """
+    Neo4j properties for an object.
+
+    ``id`` is stored as ``stix_id``. Scalars and lists of scalars are
+    stored as-is; nested values (external references, kill chain
+    phases, ...) are stored as canonical JSON strings.
+    """
+    properties: dict[str, Any] = {}
+    for key, value in obj.items():
+        if value is None:
+            continue
+        if key == "id":
+            key = "stix_id"
+        if isinstance(value, _SCALARS) or (
+            isinstance(value, list) and all(isinstance(item, _SCALARS) for item in value)
+        ):
+            properties[key] = value
+        else:
+            properties[key] = json.dumps(
+                value, sort_keys=True, ensure_ascii=False, separators=(",", ":")
+            )
+    return properties
+
+
+@dataclass(frozen=True)
+class GraphBatch:
+    """One write transaction: a parameterised query and its rows."""
+
+    query: str
+    rows: list[dict[str, Any]]
+
+
+def _node_query(label: str) -> str:
+    return (
+        "UNWIND $rows AS row\n"
+        f"MERGE (n:{NODE_LABEL} {{stix_id: row.stix_id}})\n"
+        f"SET n = row.properties, n:`{label}`"
+    )
+
+
+def _relationship_query(label: str) -> str:
+    return (
+        "UNWIND $rows AS row\n"
+        f"MATCH (s:{NODE_LABEL} {{stix_id: row.source}})\n"
+        f"MATCH (t:{NODE_LABEL} {{stix_id: row.target}})\n"
+        f"MERGE (s)-[r:`{label}` {{stix_id: row.stix_id}}]->(t)\n"
+        "SET r = row.properties"
+    )
+
+
+def _run_batch(tx: Any, batch: GraphBatch) -> None:
+    tx.run(batch.query, rows=batch.rows).consume()
+
+
+class GraphWriter:
+    """
+    Batched, idempotent writer of STIX objects into Neo4j.
+
+    Objects become ``StixObject`` nodes with a per-type label; STIX
+    relationships become edges between them, typed by
+    ``relationship_type``. All nodes are written before any edge, so
+    each edge batch finds its endpoints; edges whose endpoints were not
+    loaded are skipped by the MATCH.
+
+    Example:
+        with connect() as driver:
+            GraphWriter(driver, database=config.NEO4J_DB).write(result.objects)
+
+    Args:
+        driver: ``neo4j.Driver`` (or anything with the same ``session()``
+            / ``execute_write()`` interface)
+        database: Target database (default: the server default)
+        batch_size: Rows per write transaction
+    """
+
+    def __init__(
+        self,
+        driver: Any,
+        database: str | None = None,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+    ):
+        if batch_size < 1:
+            raise ValueError("batch_size must be positive")
+        self.driver = driver
+        self.database = database
+        self.batch_size = batch_size
+
+    def _chunks(
+        self, objects: Iterable[Mapping[str, Any]]
+    ) -> list[tuple[str, list[Mapping[str, Any]]]]:
+        """(query, objects) per batch, without building rows yet."""
+        nodes: dict[str, list[Mapping[str, Any]]] = {}
+        edges: dict[str, list[Mapping[str, Any]]] = {}
+        for obj in objects:
+            if obj["type"] == "relationship":
+                edges.setdefault(relationship_label(obj["relationship_type"]), []).append(obj)
+            else:
+                nodes.setdefault(node_label(obj["type"]), []).append(obj)
+
+        chunks = []
+        for groups, query_for in ((nodes, _node_query), (edges, _relationship_query)):
+            for label in sorted(groups):
+                group = sorted(groups[label], key=lambda obj: obj["id"])
+                query = query_for(label)
+                for start in range(0, len(group), self.batch_size):
+                    chunks.append((query, group[start : start + self.batch_size]))
+        return chunks
+
+    @staticmethod
+    def _batch(query: str, objects: list[Mapping[str, Any]]) -> GraphBatch:
+        if objects[0]["type"] == "relationship":
+            rows = [
+                {
+                    "stix_id": obj["id"],
+                    "source": obj["source_ref"],
+                    "target": obj["target_ref"],
+                    "properties": graph_properties(obj),
+                }
+                for obj in objects
+            ]
+        else:
+            rows = [{"stix_id": obj["id"], "properties": graph_properties(obj)} for obj in objects]
+        return GraphBatch(query, rows)
+
+    def plan(self, objects: Iterable[Mapping[str, Any]]) -> list[GraphBatch]:
+        """
+        Split objects into write batches.
+
+        The plan depends only on the objects and ``batch_size``: nodes
+        grouped by type, then relationships grouped by relationship
+        type, each group sorted by STIX ID. Batch numbers are therefore
+        stable across runs, which is what checkpoints record.
+        """
+        return [self._batch(query, chunk) for query, chunk in self._chunks(objects)]
+
+    def write(
+        self,
+        objects: Iterable[Mapping[str, Any]],
+        skip: int = 0,
+        on_batch: Callable[[int], None] | None = None,
+    ) -> int:
+        """
+        Write objects, one transaction per batch (see ``plan()``).
+
+        Args:
+            objects: Validated objects
+            skip: Number of leading batches already written (from a
+                checkpoint); they are neither built nor sent again
+            on_batch: Called with the number of batches written so far
+                after each batch commits
+
+        Returns:
+            Number of batches written by this call
+        """
+        chunks = self._chunks(objects)
+        with self.driver.session(database=self.database) as session:
+            session.run(CONSTRAINT_QUERY).consume()
+            for number in range(skip, len(chunks)):
+                session.execute_write(_run_batch, self._batch(*chunks[number]))
+                if on_batch is not None:
+                    on_batch(number + 1)
+        return max(len(chunks) - skip, 0)
+
+
+def connect(uri: str | None = None, auth: tuple[str, str] | None = None) -> Any:
+    """
+    Open a Neo4j driver (default: connection settings from ``orbit.config``).
+
+    Returns:
+        ``neo4j.Driver``; close it (or use it as a context manager) when done
+    """
+    from neo4j import GraphDatabase
+
+    from .. import config
+
+    return GraphDatabase.driver(
+        uri or config.NEO4J_URI,
+        auth=auth or (config.NEO4J_USER, config.NEO4J_PASS),
+    )
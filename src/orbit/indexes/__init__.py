@@ -0,0 +1,48 @@
+"""
+Derived Indexes
+
+Read-only lookup structures built once from validated ingestion output.
+Indexes never mutate objects - they only precompute answers to common
+queries.
+"""
+
+from .crosswalk import CoverageReport, Crosswalk
+from .external_ids import ExternalIdIndex
+from .hierarchy import HierarchyIndex
+from .text import TextIndex, tokenize
+
+__all__ = [
+    "CoverageReport",
+    "Crosswalk",
+    "DetectionCoverage",
+    "ExternalIdIndex",
+    "HashingEmbedder",
+    "HierarchyIndex",
+    "Hop",
+    "IncidenceIndex",
+    "MinHashIndex",
+    "PathGraph",
+    "TextIndex",
+    "VectorIndex",
+    "tokenize",
+]
+
+# NumPy/SciPy-backed indexes are imported on first use, so ingestion
+# (which only needs the text index) doesn't pay for their imports
+_LAZY = {
+    "DetectionCoverage": ".detection",
+    "HashingEmbedder": ".vectors",
+    "Hop": ".paths",
+    "IncidenceIndex": ".incidence",
+    "MinHashIndex": ".minhash",
+    "PathGraph": ".paths",
+    "VectorIndex": ".vectors",
+}
+
+
+def __getattr__(name: str):
+    if name in _LAZY:
+        from importlib import import_module
+
+        return getattr(import_module(_LAZY[name], __name__), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
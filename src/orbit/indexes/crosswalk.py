@@ -0,0 +1,326 @@
+"""
+CSF crosswalk index
+
+Precomputed lookup tables between NIST CSF 2.0 subcategories, the
+ATT&CK mitigations and D3FEND techniques they map to (see
+``adapters.csf``), and the ATT&CK techniques those mitigations address.
+
+Subcategories and techniques are numbered by sorted identifier, and
+every many-to-many table is stored as Python-int bitsets in both
+directions, so coverage questions over hundreds of techniques are a
+handful of bitwise ORs and ANDs rather than per-technique traversals.
+
+The tables are built once at ingest and persisted with the output of
+any run that includes CSF subcategories (see ``ingestion.output``).
+"""
+
+import json
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Iterable
+
+from ..adapters.csf import CSF_SOURCE_NAME, MAPPING_PROPERTIES
+from .hierarchy import TECHNIQUE_TYPE, HierarchyIndex, is_inactive
+
+FORMAT_NAME = "orbit-crosswalk"
+FORMAT_VERSION = 1
+
+SUBCATEGORY_TYPE = "csf-subcategory"
+MITIGATION_TYPE = "course-of-action"
+
+_ATTACK_MITIGATIONS = MAPPING_PROPERTIES["mitre-attack"]
+_D3FEND_TECHNIQUES = MAPPING_PROPERTIES["d3fend"]
+
+
+def external_id(obj: dict[str, Any], source_name: str) -> str | None:
+    """First ``external_id`` an object cites from ``source_name``, or None."""
+    for ref in obj.get("external_references") or ():
+        if ref.get("source_name") == source_name and ref.get("external_id"):
+            return ref["external_id"]
+    return None
+
+
+def _bits(mask: int) -> list[int]:
+    """Positions of set bits, ascending."""
+    positions = []
+    while mask:
+        low = mask & -mask
+        positions.append(low.bit_length() - 1)
+        mask ^= low
+    return positions
+
+
+@dataclass
+class CoverageReport:
+    """
+    Which CSF outcomes address a set of techniques.
+
+    Attributes:
+        outcomes: CSF subcategory ID -> STIX IDs of the requested
+            techniques it addresses (both sorted)
+        uncovered: Requested techniques no subcategory addresses
+        unknown: Requested IDs that are not known techniques
+    """
+
+    outcomes: dict[str, list[str]] = field(default_factory=dict)
+    uncovered: list[str] = field(default_factory=list)
+    unknown: list[str] = field(default_factory=list)
+
+
+class Crosswalk:
+    """
+    CSF subcategory <-> ATT&CK mitigation / D3FEND technique crosswalk.
+
+    A subcategory addresses a technique when it maps to a mitigation
+    that mitigates the technique or one of its parent techniques
+    (mitigations are inherited down the sub-technique hierarchy, as in
+    ``HierarchyIndex.roll_down``). Revoked technique IDs are redirected
+    to their replacement; withdrawn subcategories are left out.
+
+    Build with ``Crosswalk.build(csf_objects + attack_objects)``; the
+    ATT&CK objects are only needed for technique coverage.
+
+    Args:
+        subcategories: CSF subcategory IDs, sorted
+        mitigations: ATT&CK mitigation IDs per subcategory
+        d3fend: D3FEND technique IDs per subcategory
+        techniques: Active technique STIX IDs, sorted
+        redirects: Revoked technique STIX ID -> final replacement
+        subcategory_techniques: Technique bitset per subcategory
+    """
+
+    def __init__(
+        self,
+        subcategories: list[str],
+        mitigations: list[tuple[str, ...]],
+        d3fend: list[tuple[str, ...]],
+        techniques: list[str],
+        redirects: dict[str, str],
+        subcategory_techniques: list[int],
+    ):
+        self._subcategories = subcategories
+        self._subcategory_pos = {csf_id: i for i, csf_id in enumerate(subcategories)}
+        self._mitigations = mitigations
+        self._d3fend = d3fend
+        self._techniques = techniques
+        self._technique_pos = {stix_id: i for i, stix_id in enumerate(techniques)}
+        self._redirects = redirects
+
+        # subcategory -> techniques it addresses, and the transpose
+        self._subcategory_techniques = subcategory_techniques
+        technique_subcategories = [0] * len(techniques)
+        for s, mask in enumerate(subcategory_techniques):
+            for t in _bits(mask):
+                technique_subcategories[t] |= 1 << s
+        self._technique_subcategories = technique_subcategories
+        self._covered = 0
+        for mask in subcategory_techniques:
+            self._covered |= mask
+
+        # mapping target -> subcategories
+        self._by_target: dict[str, int] = {}
+        for s, targets in enumerate(zip(mitigations, d3fend)):
+            for target in (*targets[0], *targets[1]):
+                self._by_target[target] = self._by_target.get(target, 0) | (1 << s)
+
+    @classmethod
+    def build(cls, objects: Iterable[dict[str, Any]]) -> "Crosswalk":
+        """
+        Build the crosswalk from validated CSF and ATT&CK objects.
+
+        Args:
+            objects: CSF objects (``csf`` source) and, for technique
+                coverage, ATT&CK objects; other objects are ignored
+
+        Returns:
+            Crosswalk
+        """
+        objects = list(objects)
+        rows: dict[str, tuple[tuple[str, ...], tuple[str, ...]]] = {}
+        mitigation_ids: dict[str, str] = {}  # ATT&CK mitigation ID -> STIX ID
+        for obj in objects:
+            obj_type = obj.get("type")
+            if obj_type == SUBCATEGORY_TYPE and not obj.get("revoked"):
+                csf_id = external_id(obj, CSF_SOURCE_NAME)
+                if csf_id is not None:
+                    rows[csf_id] = (
+                        tuple(sorted(obj.get(_ATTACK_MITIGATIONS) or ())),
+                        tuple(sorted(obj.get(_D3FEND_TECHNIQUES) or ())),
+                    )
+            elif obj_type == MITIGATION_TYPE and not is_inactive(obj):
+                attack_id = external_id(obj, "mitre-attack")
+                if attack_id is not None:
+                    mitigation_ids[attack_id] = obj["id"]
+
+        subcategories = sorted(rows)
+        hierarchy = HierarchyIndex.build(objects)
+        techniques = sorted(
+            obj["id"]
+            for obj in objects
+            if obj.get("type") == TECHNIQUE_TYPE and not hierarchy.is_revoked(obj["id"])
+        )
+        redirects = {
+            obj["id"]: hierarchy.resolve(obj["id"])
+            for obj in objects
+            if obj.get("type") == TECHNIQUE_TYPE and hierarchy.is_revoked(obj["id"])
+        }
+        technique_pos = {stix_id: i for i, stix_id in enumerate(techniques)}
+
+        # Mitigation STIX ID -> technique bitset, inherited downwards
+        mitigated: dict[str, int] = {}
+        for stix_id, t in technique_pos.items():
+            for source in hierarchy.roll_down(stix_id, "mitigates", MITIGATION_TYPE):
+                mitigated[source] = mitigated.get(source, 0) | (1 << t)
+
+        subcategory_techniques = []
+        for csf_id in subcategories:
+            mask = 0
+            for attack_id in rows[csf_id][0]:
+                mask |= mitigated.get(mitigation_ids.get(attack_id, ""), 0)
+            subcategory_techniques.append(mask)
+
+        return cls(
+            subcategories=subcategories,
+            mitigations=[rows[csf_id][0] for csf_id in subcategories],
+            d3fend=[rows[csf_id][1] for csf_id in subcategories],
+            techniques=techniques,
+            redirects=redirects,
+            subcategory_techniques=subcategory_techniques,
+        )
+
+    def __len__(self) -> int:
+        return len(self._subcategories)
+
+    def __contains__(self, csf_id: object) -> bool:
+        return csf_id in self._subcategory_pos
+
+    @property
+    def subcategories(self) -> list[str]:
+        """CSF subcategory IDs, sorted."""
+        return list(self._subcategories)
+
+    def _subcategory(self, csf_id: str) -> int:
+        if csf_id not in self._subcategory_pos:
+            raise KeyError(f"Unknown CSF subcategory: {csf_id}")
+        return self._subcategory_pos[csf_id]
+
+    # ----- Subcategory -> targets -----
+
+    def mitigations(self, csf_id: str) -> list[str]:
+        """ATT&CK mitigation IDs (e.g. ``M1038``) mapped to a subcategory."""
+        return list(self._mitigations[self._subcategory(csf_id)])
+
+    def d3fend_techniques(self, csf_id: str) -> list[str]:
+        """D3FEND technique IDs (e.g. ``D3-EAL``) mapped to a subcategory."""
+        return list(self._d3fend[self._subcategory(csf_id)])
+
+    def techniques(self, csf_id: str) -> list[str]:
+        """STIX IDs of techniques a subcategory addresses, sorted."""
+        mask = self._subcategory_techniques[self._subcategory(csf_id)]
+        return [self._techniques[t] for t in _bits(mask)]
+
+    # ----- Targets -> subcategories -----
+
+    def subcategories_for(self, target_id: str) -> list[str]:
+        """CSF subcategories mapped to an ATT&CK mitigation or D3FEND technique ID."""
+        return [self._subcategories[s] for s in _bits(self._by_target.get(target_id, 0))]
+
+    def _technique_mask(self, technique_ids: Iterable[str]) -> tuple[int, list[str]]:
+        mask = 0
+        unknown = []
+        redirects = self._redirects
+        for stix_id in technique_ids:
+            t = self._technique_pos.get(redirects.get(stix_id, stix_id))
+            if t is None:
+                unknown.append(stix_id)
+            else:
+                mask |= 1 << t
+        return mask, unknown
+
+    def outcomes(self, technique_ids: Iterable[str]) -> list[str]:
+        """
+        CSF subcategories addressing any of the given techniques.
+
+        Args:
+            technique_ids: Technique STIX IDs (revoked IDs are redirected;
+                unknown IDs are ignored)
+
+        Returns:
+            Sorted CSF subcategory IDs
+        """
+        mask, _ = self._technique_mask(technique_ids)
+        subcategories = 0
+        for t in _bits(mask & self._covered):
+            subcategories |= self._technique_subcategories[t]
+        return [self._subcategories[s] for s in _bits(subcategories)]
+
+    def coverage(self, technique_ids: Iterable[str]) -> CoverageReport:
+        """
+        Per-outcome coverage of a set of techniques.
+
+        Args:
+            technique_ids: Technique STIX IDs (revoked IDs are redirected)
+
+        Returns:
+            CoverageReport; outcomes addressing none of the techniques
+            are omitted
+        """
+        mask, unknown = self._technique_mask(technique_ids)
+        report = CoverageReport(unknown=sorted(unknown))
+        for s, addressed in enumerate(self._subcategory_techniques):
+            hits = addressed & mask
+            if hits:
+                report.outcomes[self._subcategories[s]] = [self._techniques[t] for t in _bits(hits)]
+        report.uncovered = [self._techniques[t] for t in _bits(mask & ~self._covered)]
+        return report
+
+    # ----- Persistence -----
+
+    def save(self, path: Path) -> None:
+        """
+        Write the lookup tables to a JSON file.
+
+        Bitsets are stored as hex strings; the transposed tables are
+        rebuilt by ``load()``. Equal crosswalks produce identical bytes.
+        """
+        payload = {
+            "format": FORMAT_NAME,
+            "version": FORMAT_VERSION,
+            "subcategories": [
+                {
+                    "id": csf_id,
+                    "mitigations": list(self._mitigations[s]),
+                    "d3fend": list(self._d3fend[s]),
+                    "techniques": format(self._subcategory_techniques[s], "x"),
+                }
+                for s, csf_id in enumerate(self._subcategories)
+            ],
+            "techniques": self._techniques,
+            "redirects": self._redirects,
+        }
+        with path.open("w", encoding="utf-8", newline="\n") as f:
+            json.dump(payload, f, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+            f.write("\n")
+
+    @classmethod
+    def load(cls, path: Path) -> "Crosswalk":
+        """
+        Read a crosswalk written by ``save()``.
+
+        Raises:
+            FileNotFoundError: If path doesn't exist
+            ValueError: If file has an unsupported format
+        """
+        with path.open(encoding="utf-8") as f:
+            payload = json.load(f)
+        if payload.get("format") != FORMAT_NAME or payload.get("version") != FORMAT_VERSION:
+            raise ValueError(f"Unsupported crosswalk format in {path}")
+        rows = payload["subcategories"]
+        return cls(
+            subcategories=[row["id"] for row in rows],
+            mitigations=[tuple(row["mitigations"]) for row in rows],
+            d3fend=[tuple(row["d3fend"]) for row in rows],
+            techniques=payload["techniques"],
+            redirects=payload["redirects"],
+            subcategory_techniques=[int(row["techniques"], 16) for row in rows],
+        )
@@ -0,0 +1,347 @@
+"""
+Detection coverage
+
+Technique bitsets per ATT&CK data component, built once from validated
+``detects`` relationships. A sensor profile - the data components (or
+whole data sources) a customer collects - covers the union of its
+components' bitsets, so coverage, gaps and "which data component to add
+next" for thousands of profiles are bitwise ORs, AND-NOTs and popcounts
+over packed ``uint64`` words rather than per-profile graph walks.
+"""
+
+from typing import Any, Iterable, Mapping, Sequence
+
+import numpy as np
+
+from .crosswalk import external_id
+from .hierarchy import TECHNIQUE_TYPE, HierarchyIndex, is_inactive
+
+DATA_COMPONENT_TYPE = "x-mitre-data-component"
+DATA_SOURCE_TYPE = "x-mitre-data-source"
+DETECTS = "detects"
+
+# Profiles per block in batch queries (bounds the profiles x components
+# x words intermediate of best_next_many)
+BLOCK_SIZE = 1024
+
+Profile = Iterable[str]
+
+_POPCOUNT8 = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+
+def _popcount(words: np.ndarray) -> np.ndarray:
+    """Set bits per row of a ``uint64`` array (summed over the last axis)."""
+    if hasattr(np, "bitwise_count"):  # NumPy 2.0+
+        return np.bitwise_count(words).sum(axis=-1, dtype=np.int64)
+    as_bytes = words.view(np.uint8).reshape(*words.shape[:-1], -1)
+    return _POPCOUNT8[as_bytes].sum(axis=-1, dtype=np.int64)
+
+
+def _pack(rows: np.ndarray) -> np.ndarray:
+    """Pack a boolean (..., n) array into (..., ceil(n / 64)) ``uint64`` words."""
+    n_words = max(-(-rows.shape[-1] // 64), 1)
+    padded = np.zeros((*rows.shape[:-1], n_words * 64), dtype=bool)
+    padded[..., : rows.shape[-1]] = rows
+    return np.packbits(padded, axis=-1, bitorder="little").view(np.uint64)
+
+
+def _unpack(words: np.ndarray, n: int) -> np.ndarray:
+    """Inverse of ``_pack``."""
+    return np.unpackbits(words.view(np.uint8), axis=-1, bitorder="little")[..., :n].astype(bool)
+
+
+class DetectionCoverage:
+    """
+    Data component x technique detection bitsets.
+
+    Rows are active data components and columns active techniques, both
+    sorted by STIX ID. Revoked techniques are redirected to their
+    replacements; revoked or deprecated components, techniques and
+    relationships are left out.
+
+    Profiles are iterables of data component STIX IDs or labels
+    (``"Command: Command Execution"``), or data source STIX IDs, ATT&CK
+    IDs (``"DS0017"``) or names, which stand for all of the source's
+    components. Matching is case-insensitive.
+
+    Build with ``DetectionCoverage.build(result.objects)``.
+    """
+
+    def __init__(
+        self,
+        components: list[str],
+        techniques: list[str],
+        detects: np.ndarray,
+        labels: list[str],
+        aliases: dict[str, tuple[int, ...]],
+        hierarchy: HierarchyIndex,
+    ):
+        self.components = components
+        self.techniques = techniques
+        self._technique_pos = {stix_id: i for i, stix_id in enumerate(techniques)}
+        self._labels = labels
+        self._aliases = aliases
+        self._hierarchy = hierarchy
+        self._detects = detects  # bool, components x techniques
+        self._bits = _pack(detects)  # uint64, components x words
+
+    @classmethod
+    def build(
+        cls, objects: Iterable[dict[str, Any]], hierarchy: HierarchyIndex | None = None
+    ) -> "DetectionCoverage":
+        """
+        Build detection bitsets from validated STIX objects.
+
+        Args:
+            objects: Validated STIX objects (e.g. ``IngestResult.objects``)
+            hierarchy: Prebuilt hierarchy for the same objects (built if
+                omitted)
+
+        Returns:
+            DetectionCoverage
+        """
+        objects = list(objects)
+        if hierarchy is None:
+            hierarchy = HierarchyIndex.build(objects)
+
+        sources: dict[str, Mapping[str, Any]] = {}
+        components: dict[str, Mapping[str, Any]] = {}
+        technique_ids: set[str] = set()
+        detects: list[tuple[str, str]] = []
+        for obj in objects:
+            obj_type = obj.get("type")
+            if obj_type == "relationship":
+                if obj.get("relationship_type") == DETECTS and not is_inactive(obj):
+                    detects.append((obj["source_ref"], obj["target_ref"]))
+            elif is_inactive(obj):
+                continue
+            elif obj_type == TECHNIQUE_TYPE:
+                technique_ids.add(obj["id"])
+            elif obj_type == DATA_COMPONENT_TYPE:
+                components[obj["id"]] = obj
+            elif obj_type == DATA_SOURCE_TYPE:
+                sources[obj["id"]] = obj
+
+        component_ids = sorted(components)
+        component_pos = {stix_id: i for i, stix_id in enumerate(component_ids)}
+        techniques = sorted(technique_ids)
+        technique_pos = {stix_id: i for i, stix_id in enumerate(techniques)}
+
+        matrix = np.zeros((len(component_ids), len(techniques)), dtype=bool)
+        for source, target in detects:
+            row = component_pos.get(hierarchy.resolve(source))
+            col = technique_pos.get(hierarchy.resolve(target))
+            if row is not None and col is not None:
+                matrix[row, col] = True
+
+        labels = []
+        aliases: dict[str, set[int]] = {}
+
+        def alias(key: str | None, rows: Iterable[int]) -> None:
+            if key:
+                aliases.setdefault(key.casefold(), set()).update(rows)
+
+        by_source: dict[str, list[int]] = {}
+        for i, stix_id in enumerate(component_ids):
+            component = components[stix_id]
+            source = sources.get(hierarchy.resolve(component.get("x_mitre_data_source_ref") or ""))
+            name = component.get("name", stix_id)
+            label = f"{source['name']}: {name}" if source is not None else name
+            labels.append(label)
+            alias(stix_id, [i])
+            alias(label, [i])
+            if source is not None:
+                by_source.setdefault(source["id"], []).append(i)
+        for source_id, rows in by_source.items():
+            source = sources[source_id]
+            for key in (source_id, source.get("name"), external_id(source, "mitre-attack")):
+                alias(key, rows)
+
+        return cls(
+            components=component_ids,
+            techniques=techniques,
+            detects=matrix,
+            labels=labels,
+            aliases={key: tuple(sorted(rows)) for key, rows in aliases.items()},
+            hierarchy=hierarchy,
+        )
+
+    def __len__(self) -> int:
+        return len(self.components)
+
+    # ----- Profiles -----
+
+    def label(self, component_id: str) -> str:
+        """``"Data Source: Data Component"`` label of a component."""
+        rows = self._aliases.get(component_id.casefold())
+        if rows is None or len(rows) != 1 or self.components[rows[0]] != component_id:
+            raise KeyError(f"Unknown data component: {component_id}")
+        return self._labels[rows[0]]
+
+    def profile_mask(self, profile: Profile) -> np.ndarray:
+        """
+        Boolean component mask of a profile.
+
+        Raises:
+            KeyError: If an entry names no known data component or source
+        """
+        mask = np.zeros(len(self.components), dtype=bool)
+        for entry in profile:
+            rows = self._aliases.get(entry.casefold())
+            if rows is None:
+                raise KeyError(f"Unknown data component or data source: {entry}")
+            mask[list(rows)] = True
+        return mask
+
+    def _profile_masks(self, profiles: Sequence[Profile] | np.ndarray) -> np.ndarray:
+        if isinstance(profiles, np.ndarray):
+            if profiles.shape[-1] != len(self.components):
+                raise ValueError("Profile masks must have one column per data component")
+            return profiles.astype(bool, copy=False)
+        masks = np.zeros((len(profiles), len(self.components)), dtype=bool)
+        for i, profile in enumerate(profiles):
+            masks[i] = self.profile_mask(profile)
+        return masks
+
+    def _technique_mask(self, technique_ids: Iterable[str] | None) -> np.ndarray:
+        """Packed target techniques (all techniques if None)."""
+        target = np.zeros(len(self.techniques), dtype=bool)
+        if technique_ids is None:
+            target[:] = True
+        else:
+            for stix_id in technique_ids:
+                t = self._technique_pos.get(self._hierarchy.resolve(stix_id))
+                if t is None:
+                    raise KeyError(f"Unknown technique: {stix_id}")
+                target[t] = True
+        return _pack(target)
+
+    def _covered_words(self, masks: np.ndarray) -> np.ndarray:
+        """Packed covered techniques per profile (profiles x words)."""
+        covered = np.zeros((masks.shape[0], self._bits.shape[1]), dtype=np.uint64)
+        for c in range(len(self.components)):
+            covered[masks[:, c]] |= self._bits[c]
+        return covered
+
+    # ----- Single profile -----
+
+    def detects(self, component_id: str) -> list[str]:
+        """Techniques a data component detects."""
+        self.label(component_id)
+        row = self._aliases[component_id.casefold()][0]
+        return [self.techniques[t] for t in np.flatnonzero(self._detects[row])]
+
+    def covered(self, profile: Profile) -> list[str]:
+        """Techniques detected by any component of a profile, sorted."""
+        words = self._covered_words(self.profile_mask(profile)[None])[0]
+        return [self.techniques[t] for t in np.flatnonzero(_unpack(words, len(self.techniques)))]
+
+    def gaps(self, profile: Profile, technique_ids: Iterable[str] | None = None) -> list[str]:
+        """
+        Techniques no component of a profile detects.
+
+        Args:
+            profile: Data components / sources collected
+            technique_ids: Techniques of interest (default: all; revoked
+                IDs are redirected)
+
+        Returns:
+            Sorted technique STIX IDs
+
+        Raises:
+            KeyError: If a profile entry or technique is unknown
+        """
+        words = self._covered_words(self.profile_mask(profile)[None])[0]
+        missing = self._technique_mask(technique_ids) & ~words
+        return [self.techniques[t] for t in np.flatnonzero(_unpack(missing, len(self.techniques)))]
+
+    def best_next(
+        self,
+        profile: Profile,
+        k: int = 5,
+        technique_ids: Iterable[str] | None = None,
+        weights: Mapping[str, float] | None = None,
+    ) -> list[tuple[str, float]]:
+        """
+        Data components that would close the most gaps if added.
+
+        Args:
+            profile: Data components / sources collected
+            k: Number of components to return
+            technique_ids: Techniques of interest (default: all)
+            weights: Technique STIX ID -> weight (e.g. prevalence from
+                ``IncidenceIndex``); default counts each technique once
+
+        Returns:
+            Up to k (component STIX ID, gain) pairs with positive gain,
+            highest first, ties broken by STIX ID
+        """
+        gains = self._gains(self.profile_mask(profile)[None], technique_ids, weights)[0]
+        order = np.argsort(-gains, kind="stable")[:k]
+        return [(self.components[c], float(gains[c])) for c in order if gains[c] > 0]
+
+    # ----- Batches of profiles -----
+
+    def coverage_matrix(self, profiles: Sequence[Profile] | np.ndarray) -> np.ndarray:
+        """
+        Covered techniques of many profiles.
+
+        Args:
+            profiles: Profiles, or a boolean profiles x components mask
+                (see ``profile_mask``)
+
+        Returns:
+            Boolean profiles x techniques array (columns: ``techniques``)
+        """
+        return _unpack(self._covered_words(self._profile_masks(profiles)), len(self.techniques))
+
+    def coverage_counts(
+        self,
+        profiles: Sequence[Profile] | np.ndarray,
+        technique_ids: Iterable[str] | None = None,
+    ) -> np.ndarray:
+        """
+        Number of covered techniques (of interest) per profile.
+
+        Returns:
+            Integer array, one entry per profile
+        """
+        covered = self._covered_words(self._profile_masks(profiles))
+        return _popcount(covered & self._technique_mask(technique_ids))
+
+    def best_next_many(
+        self,
+        profiles: Sequence[Profile] | np.ndarray,
+        technique_ids: Iterable[str] | None = None,
+        weights: Mapping[str, float] | None = None,
+    ) -> list[tuple[str, float] | None]:
+        """
+        Single best data component to add, for each profile.
+
+        Returns:
+            (component STIX ID, gain) per profile, or None where no
+            component adds anything; ties broken by STIX ID
+        """
+        masks = self._profile_masks(profiles)
+        best: list[tuple[str, float] | None] = []
+        for start in range(0, masks.shape[0], BLOCK_SIZE):
+            gains = self._gains(masks[start : start + BLOCK_SIZE], technique_ids, weights)
+            choice = gains.argmax(axis=1) if gains.size else np.zeros(len(gains), dtype=int)
+            for row, c in enumerate(choice):
+                gain = float(gains[row, c]) if gains.size else 0.0
+                best.append((self.components[c], gain) if gain > 0 else None)
+        return best
+
+    def _gains(
+        self,
+        masks: np.ndarray,
+        technique_ids: Iterable[str] | None,
+        weights: Mapping[str, float] | None,
+    ) -> np.ndarray:
+        """Profiles x components gain of adding each component."""
+        uncovered = ~self._covered_words(masks) & self._technique_mask(technique_ids)
+        if weights is None:
+            return _popcount(self._bits[None, :, :] & uncovered[:, None, :]).astype(float)
+        w = np.array([float(weights.get(stix_id, 0.0)) for stix_id in self.techniques])
+        open_weight = _unpack(uncovered, len(self.techniques)) * w
+        return open_weight @ self._detects.T.astype(float)
@@ -0,0 +1,268 @@
+"""
+External ID index
+
+Reverse lookup from the identifiers other systems use - ATT&CK IDs
+(``T1059.001``, ``G0016``, ``M1036``), CAPEC IDs, CSF identifiers,
+D3FEND IDs and reference URLs - to internal STIX IDs. Those identifiers
+are buried in ``external_references`` (or D3FEND's ``d3fend-id``
+property), so without the index every lookup scans every object.
+
+Keys are case-insensitive, and URLs ignore a trailing slash. Several
+objects can share a key (a revoked technique and its replacement, a
+report cited by many objects); they are kept in resolution order:
+active objects first, then by STIX ID.
+"""
+
+import json
+from bisect import insort
+from pathlib import Path
+from typing import Any, Iterable, Iterator
+
+from .hierarchy import is_inactive
+
+FORMAT_NAME = "orbit-external-id-index"
+FORMAT_VERSION = 1
+
+# Relationships cite the same reports as their endpoints; they are
+# reached through those endpoints rather than by citation URL
+EXCLUDED_TYPES = frozenset({"relationship"})
+
+# Properties holding a D3FEND ID besides config.D3FEND_ID_IRI (the
+# expanded JSON-LD form): compact JSON-LD and STIX-style custom names
+D3FEND_ID_PROPERTIES = ("d3f:d3fend-id", "d3fend-id", "x_d3fend_id")
+
+
+def normalize_key(key: str) -> str:
+    """Canonical form of an external ID or URL, as used for lookups."""
+    key = key.strip().casefold()
+    return key.rstrip("/") if "://" in key else key
+
+
+def _d3fend_id_properties() -> tuple[str, ...]:
+    from .. import config
+
+    return (config.D3FEND_ID_IRI, *D3FEND_ID_PROPERTIES)
+
+
+def _literals(value: Any) -> Iterator[str]:
+    """String values of a STIX or JSON-LD property (``{"@value": ...}``, lists)."""
+    if isinstance(value, str):
+        yield value
+    elif isinstance(value, dict):
+        yield from _literals(value.get("@value"))
+    elif isinstance(value, list):
+        for item in value:
+            yield from _literals(item)
+
+
+def external_keys(obj: dict[str, Any], d3fend_properties: Iterable[str] = ()) -> list[str]:
+    """
+    Normalized lookup keys of one object, sorted.
+
+    Args:
+        obj: Validated object
+        d3fend_properties: Property names holding D3FEND IDs
+    """
+    keys = set()
+    for ref in obj.get("external_references") or ():
+        for field in ("external_id", "url"):
+            if isinstance(ref.get(field), str) and ref[field].strip():
+                keys.add(normalize_key(ref[field]))
+    for prop in d3fend_properties:
+        for value in _literals(obj.get(prop)):
+            if value.strip():
+                keys.add(normalize_key(value))
+    return sorted(keys)
+
+
+class ExternalIdIndex:
+    """
+    O(1) resolution of external IDs and reference URLs to STIX IDs.
+
+    Like ``TextIndex``, ``update()`` re-indexes only objects whose
+    ``modified`` timestamp changed, so a changed source is applied as a
+    delta instead of a rebuild. The persisted form (see ``save()``) is
+    written deterministically.
+    """
+
+    def __init__(self) -> None:
+        self._candidates: dict[str, list[str]] = {}  # key -> STIX IDs, resolution order
+        self._keys: dict[str, tuple[str, ...]] = {}  # STIX ID -> its keys
+        self._modified: dict[str, str | None] = {}
+        self._inactive: set[str] = set()
+        self._d3fend_properties = _d3fend_id_properties()
+
+    @classmethod
+    def build(cls, objects: Iterable[dict[str, Any]]) -> "ExternalIdIndex":
+        """
+        Build index from validated objects.
+
+        Args:
+            objects: Validated objects (may be a stream; read once)
+
+        Returns:
+            ExternalIdIndex
+        """
+        index = cls()
+        for obj in objects:
+            if obj.get("type") not in EXCLUDED_TYPES:
+                index._add_object(obj)
+        return index
+
+    def __len__(self) -> int:
+        return len(self._candidates)
+
+    def __contains__(self, key: object) -> bool:
+        return isinstance(key, str) and normalize_key(key) in self._candidates
+
+    # ----- Mutation -----
+
+    def _rank(self, stix_id: str) -> tuple[bool, str]:
+        return (stix_id in self._inactive, stix_id)
+
+    def _add_object(self, obj: dict[str, Any]) -> None:
+        keys = external_keys(obj, self._d3fend_properties)
+        self._add(obj["id"], obj.get("modified"), is_inactive(obj), keys)
+
+    def _add(self, stix_id: str, modified: str | None, inactive: bool, keys: Iterable[str]) -> None:
+        keys = tuple(keys)
+        self._modified[stix_id] = modified
+        if inactive:
+            self._inactive.add(stix_id)
+        if not keys:
+            return
+        self._keys[stix_id] = keys
+        for key in keys:
+            insort(self._candidates.setdefault(key, []), stix_id, key=self._rank)
+
+    def _remove_one(self, stix_id: str) -> None:
+        for key in self._keys.pop(stix_id, ()):
+            candidates = self._candidates[key]
+            candidates.remove(stix_id)
+            if not candidates:
+                del self._candidates[key]
+        del self._modified[stix_id]
+        self._inactive.discard(stix_id)
+
+    def remove(self, stix_ids: Iterable[str]) -> int:
+        """
+        Remove objects by STIX ID.
+
+        Returns:
+            Number of objects removed (unknown IDs are ignored)
+        """
+        removed = 0
+        for stix_id in stix_ids:
+            if stix_id in self._modified:
+                self._remove_one(stix_id)
+                removed += 1
+        return removed
+
+    def update(self, objects: Iterable[dict[str, Any]]) -> int:
+        """
+        Incrementally index new or changed objects.
+
+        Objects already indexed with the same ``modified`` timestamp are
+        skipped; changed objects are re-indexed in place.
+
+        Returns:
+            Number of objects added or re-indexed
+        """
+        changed = 0
+        for obj in objects:
+            if obj.get("type") in EXCLUDED_TYPES:
+                continue
+            stix_id = obj["id"]
+            if stix_id in self._modified:
+                if self._modified[stix_id] == obj.get("modified"):
+                    continue
+                self._remove_one(stix_id)
+            self._add_object(obj)
+            changed += 1
+        return changed
+
+    # ----- Query -----
+
+    def lookup(self, key: str) -> tuple[str, ...]:
+        """
+        Every STIX ID carrying a key, in resolution order.
+
+        Args:
+            key: External ID (``T1059.001``, ``CAPEC-13``, ``D3-PA``) or
+                reference URL
+
+        Returns:
+            STIX IDs, active objects first, then by STIX ID (empty if unknown)
+        """
+        return tuple(self._candidates.get(normalize_key(key), ()))
+
+    def get(self, key: str, default: str | None = None) -> str | None:
+        """Preferred STIX ID for a key, or ``default``."""
+        candidates = self._candidates.get(normalize_key(key))
+        return candidates[0] if candidates else default
+
+    def resolve(self, key: str) -> str:
+        """
+        Preferred STIX ID for a key (the first of ``lookup()``).
+
+        Raises:
+            KeyError: If no object carries the key
+        """
+        candidates = self._candidates.get(normalize_key(key))
+        if not candidates:
+            raise KeyError(f"Unknown external ID: {key}")
+        return candidates[0]
+
+    def keys_of(self, stix_id: str) -> tuple[str, ...]:
+        """Normalized keys an object is indexed under (empty if none)."""
+        return self._keys.get(stix_id, ())
+
+    # ----- Persistence -----
+
+    def save(self, path: Path) -> None:
+        """
+        Write index to a JSON file.
+
+        Objects are stored with their keys and listed by STIX ID, so
+        equal indexes produce identical bytes regardless of update
+        history; ``load()`` rebuilds the key table without re-reading
+        any object.
+        """
+        objects = {
+            stix_id: [
+                self._modified[stix_id],
+                stix_id in self._inactive,
+                list(self._keys.get(stix_id, ())),
+            ]
+            for stix_id in sorted(self._modified)
+        }
+        payload = {"format": FORMAT_NAME, "version": FORMAT_VERSION, "objects": objects}
+        with path.open("w", encoding="utf-8", newline="\n") as f:
+            json.dump(payload, f, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+            f.write("\n")
+
+    @classmethod
+    def load(cls, path: Path) -> "ExternalIdIndex":
+        """
+        Read index written by ``save()``.
+
+        Raises:
+            FileNotFoundError: If path doesn't exist
+            ValueError: If file has an unsupported format
+        """
+        with path.open(encoding="utf-8") as f:
+            payload = json.load(f)
+        if payload.get("format") != FORMAT_NAME or payload.get("version") != FORMAT_VERSION:
+            raise ValueError(f"Unsupported external ID index format in {path}")
+        index = cls()
+        for stix_id, (modified, inactive, keys) in payload["objects"].items():
+            if inactive:
+                index._inactive.add(stix_id)
+            index._modified[stix_id] = modified
+            if keys:
+                index._keys[stix_id] = tuple(keys)
+                for key in keys:
+                    index._candidates.setdefault(key, []).append(stix_id)
+        for candidates in index._candidates.values():
+            candidates.sort(key=index._rank)
+        return index
@@ -0,0 +1,356 @@
+"""
+Technique hierarchy index
+
+Precomputed sub-technique hierarchy over validated ATT&CK objects.
+
+ATT&CK models sub-techniques as ``subtechnique-of`` relationships and
+lifecycle changes as ``revoked-by`` relationships. This index resolves
+both once, after validation, so that hierarchy and roll-up queries are
+array/set lookups instead of relationship scans.
+"""
+
+from array import array
+from typing import Any, Iterable
+
+from ..schemas import ValidationError
+
+TECHNIQUE_TYPE = "attack-pattern"
+SUBTECHNIQUE_OF = "subtechnique-of"
+REVOKED_BY = "revoked-by"
+
+# Relationship types that shape the hierarchy itself and are never rolled up
+STRUCTURAL_RELATIONSHIPS = {SUBTECHNIQUE_OF, REVOKED_BY}
+
+RollupKey = tuple[str, str | None]
+
+
+def is_inactive(obj: dict[str, Any]) -> bool:
+    """Check if object is revoked or deprecated."""
+    return bool(obj.get("revoked")) or bool(obj.get("x_mitre_deprecated"))
+
+
+def stix_type_of(stix_id: str) -> str:
+    """Extract the STIX type prefix from a STIX ID."""
+    return stix_id.split("--", 1)[0]
+
+
+class HierarchyIndex:
+    """
+    Sub-technique hierarchy with precomputed closures and roll-ups.
+
+    Techniques are numbered by sorted STIX ID. The hierarchy is stored as
+    a parent array plus CSR-style child arrays; ancestor/descendant
+    closure is encoded as pre-order interval labels, so every subtree is
+    a contiguous slice of the pre-order and descendant tests are two
+    integer comparisons.
+
+    Incoming relationships (``uses``, ``mitigates``, ``detects``, ...) are
+    rolled up and down the hierarchy at build time, keyed by
+    (relationship_type, source_type), so questions such as "all groups
+    using any sub-technique of T1059" are a single dictionary lookup.
+
+    Build with ``HierarchyIndex.build(result.objects)``.
+    """
+
+    def __init__(
+        self,
+        ids: list[str],
+        parent: array,
+        child_offsets: array,
+        child_ids: array,
+        order: array,
+        pre: array,
+        end: array,
+        redirects: dict[str, str],
+        deprecated: frozenset[str],
+        up: dict[RollupKey, list[frozenset[str]]],
+        down: dict[RollupKey, list[frozenset[str]]],
+    ):
+        self._ids = ids
+        self._pos = {stix_id: i for i, stix_id in enumerate(ids)}
+        self._parent = parent
+        self._child_offsets = child_offsets
+        self._child_ids = child_ids
+        self._order = order
+        self._pre = pre
+        self._end = end
+        self._redirects = redirects
+        self._deprecated = deprecated
+        self._up = up
+        self._down = down
+
+    @classmethod
+    def build(cls, objects: Iterable[dict[str, Any]]) -> "HierarchyIndex":
+        """
+        Build index from validated STIX objects.
+
+        Args:
+            objects: Validated STIX objects (e.g. ``IngestResult.objects``)
+
+        Returns:
+            HierarchyIndex
+
+        Raises:
+            ValidationError: If a technique has more than one parent, or
+                the sub-technique or revocation graph contains a cycle
+        """
+        technique_ids: list[str] = []
+        deprecated: set[str] = set()
+        revoked_by: dict[str, str] = {}
+        subtechnique_edges: list[tuple[str, str]] = []
+        other_edges: list[dict[str, Any]] = []
+
+        for obj in objects:
+            obj_type = obj.get("type")
+            if obj_type == TECHNIQUE_TYPE:
+                technique_ids.append(obj["id"])
+            if obj.get("x_mitre_deprecated"):
+                deprecated.add(obj["id"])
+            if obj_type != "relationship" or is_inactive(obj):
+                continue
+
+            rel_type = obj.get("relationship_type")
+            if rel_type == REVOKED_BY:
+                if obj["source_ref"] in revoked_by:
+                    raise ValidationError(
+                        f"Object revoked by more than one target: {obj['source_ref']}"
+                    )
+                revoked_by[obj["source_ref"]] = obj["target_ref"]
+            elif rel_type == SUBTECHNIQUE_OF:
+                subtechnique_edges.append((obj["source_ref"], obj["target_ref"]))
+            else:
+                other_edges.append(obj)
+
+        redirects = cls._resolve_redirects(revoked_by)
+
+        ids = sorted(set(technique_ids))
+        pos = {stix_id: i for i, stix_id in enumerate(ids)}
+        n = len(ids)
+
+        # Parent array
+        parent = array("i", [-1]) * n
+        for child, par in subtechnique_edges:
+            if child not in pos or par not in pos:
+                continue
+            c, p = pos[child], pos[par]
+            if parent[c] not in (-1, p):
+                raise ValidationError(
+                    f"Sub-technique has more than one parent: {child}"
+                )
+            parent[c] = p
+
+        # CSR child arrays (children ordered by index, i.e. by STIX ID)
+        counts = [0] * (n + 1)
+        for c in range(n):
+            if parent[c] >= 0:
+                counts[parent[c] + 1] += 1
+        for i in range(n):
+            counts[i + 1] += counts[i]
+        child_offsets = array("i", counts)
+        child_ids = array("i", [0]) * counts[n]
+        fill = counts[:n]
+        for c in range(n):
+            p = parent[c]
+            if p >= 0:
+                child_ids[fill[p]] = c
+                fill[p] += 1
+
+        # Pre-order interval labels: subtree of u is order[pre[u]:end[u]]
+        order = array("i")
+        pre = array("i", [-1]) * n
+        end = array("i", [-1]) * n
+        for root in range(n):
+            if parent[root] >= 0:
+                continue
+            stack = [(root, False)]
+            while stack:
+                node, done = stack.pop()
+                if done:
+                    end[node] = len(order)
+                    continue
+                pre[node] = len(order)
+                order.append(node)
+                stack.append((node, True))
+                for k in range(child_offsets[node + 1] - 1, child_offsets[node] - 1, -1):
+                    stack.append((child_ids[k], False))
+        if len(order) != n:
+            unreachable = sorted(ids[i] for i in range(n) if pre[i] < 0)
+            raise ValidationError(
+                f"Cycle in {SUBTECHNIQUE_OF} relationships: {', '.join(unreachable)}"
+            )
+
+        # Direct incoming relationships per technique, endpoints redirected
+        direct: dict[RollupKey, list[set[str]]] = {}
+        for rel in other_edges:
+            target = redirects.get(rel["target_ref"], rel["target_ref"])
+            if target not in pos:
+                continue
+            source = redirects.get(rel["source_ref"], rel["source_ref"])
+            rel_type = rel["relationship_type"]
+            for key in ((rel_type, stix_type_of(source)), (rel_type, None)):
+                if key not in direct:
+                    direct[key] = [set() for _ in range(n)]
+                direct[key][pos[target]].add(source)
+
+        # Roll up (node + descendants) in reverse pre-order, roll down
+        # (node + ancestors) in pre-order
+        up: dict[RollupKey, list[frozenset[str]]] = {}
+        down: dict[RollupKey, list[frozenset[str]]] = {}
+        for key, sets in direct.items():
+            up_sets = [frozenset(s) for s in sets]
+            for node in reversed(order):
+                p = parent[node]
+                if p >= 0 and up_sets[node]:
+                    up_sets[p] = up_sets[p] | up_sets[node]
+            down_sets = [frozenset(s) for s in sets]
+            for node in order:
+                p = parent[node]
+                if p >= 0 and down_sets[p]:
+                    down_sets[node] = down_sets[node] | down_sets[p]
+            up[key] = up_sets
+            down[key] = down_sets
+
+        return cls(
+            ids=ids,
+            parent=parent,
+            child_offsets=child_offsets,
+            child_ids=child_ids,
+            order=order,
+            pre=pre,
+            end=end,
+            redirects=redirects,
+            deprecated=frozenset(deprecated),
+            up=up,
+            down=down,
+        )
+
+    @staticmethod
+    def _resolve_redirects(revoked_by: dict[str, str]) -> dict[str, str]:
+        """Resolve revoked-by chains to their final (non-revoked) targets."""
+        resolved: dict[str, str] = {}
+        for start in sorted(revoked_by):
+            chain = []
+            current = start
+            while current in revoked_by and current not in resolved:
+                if current in chain:
+                    raise ValidationError(
+                        f"Cycle in {REVOKED_BY} relationships: {' -> '.join(chain + [current])}"
+                    )
+                chain.append(current)
+                current = revoked_by[current]
+            final = resolved.get(current, current)
+            for stix_id in chain:
+                resolved[stix_id] = final
+        return resolved
+
+    # ----- Lifecycle -----
+
+    def resolve(self, stix_id: str) -> str:
+        """
+        Follow revoked-by redirects to the final target.
+
+        Returns:
+            Final STIX ID (``stix_id`` itself if it was never revoked)
+        """
+        return self._redirects.get(stix_id, stix_id)
+
+    def is_revoked(self, stix_id: str) -> bool:
+        """Check if object has been revoked by another object."""
+        return stix_id in self._redirects
+
+    def is_deprecated(self, stix_id: str) -> bool:
+        """Check if object is marked ``x_mitre_deprecated``."""
+        return stix_id in self._deprecated
+
+    # ----- Hierarchy -----
+
+    def _node(self, stix_id: str) -> int:
+        resolved = self.resolve(stix_id)
+        if resolved not in self._pos:
+            raise KeyError(f"Unknown technique: {stix_id}")
+        return self._pos[resolved]
+
+    def __contains__(self, stix_id: object) -> bool:
+        return isinstance(stix_id, str) and self.resolve(stix_id) in self._pos
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def parent(self, stix_id: str) -> str | None:
+        """Parent technique of a sub-technique, or None for top-level techniques."""
+        p = self._parent[self._node(stix_id)]
+        return self._ids[p] if p >= 0 else None
+
+    def children(self, stix_id: str) -> list[str]:
+        """Direct sub-techniques, ordered by STIX ID."""
+        u = self._node(stix_id)
+        start, stop = self._child_offsets[u], self._child_offsets[u + 1]
+        return [self._ids[c] for c in self._child_ids[start:stop]]
+
+    def ancestors(self, stix_id: str) -> list[str]:
+        """Ancestors from nearest to root."""
+        result = []
+        p = self._parent[self._node(stix_id)]
+        while p >= 0:
+            result.append(self._ids[p])
+            p = self._parent[p]
+        return result
+
+    def descendants(self, stix_id: str) -> list[str]:
+        """All descendants in pre-order (a contiguous interval slice)."""
+        u = self._node(stix_id)
+        return [self._ids[v] for v in self._order[self._pre[u] + 1 : self._end[u]]]
+
+    def is_descendant(self, stix_id: str, ancestor_id: str) -> bool:
+        """Check if ``stix_id`` lies strictly below ``ancestor_id``."""
+        u, v = self._node(ancestor_id), self._node(stix_id)
+        return self._pre[u] < self._pre[v] < self._end[u]
+
+    # ----- Roll-ups -----
+
+    def roll_up(
+        self,
+        stix_id: str,
+        relationship_type: str = "uses",
+        source_type: str | None = None,
+    ) -> frozenset[str]:
+        """
+        Sources related to a technique or any of its sub-techniques.
+
+        Example:
+            ``index.roll_up(t1059, "uses", "intrusion-set")`` returns every
+            group using T1059 or any T1059.xxx sub-technique.
+
+        Args:
+            stix_id: Technique STIX ID (revoked IDs are redirected)
+            relationship_type: Relationship type pointing at the technique
+            source_type: Restrict to sources of this STIX type
+
+        Returns:
+            Set of (redirected) source STIX IDs
+        """
+        sets = self._up.get((relationship_type, source_type))
+        return sets[self._node(stix_id)] if sets else frozenset()
+
+    def roll_down(
+        self,
+        stix_id: str,
+        relationship_type: str = "mitigates",
+        source_type: str | None = None,
+    ) -> frozenset[str]:
+        """
+        Sources related to a technique or any of its ancestors.
+
+        Useful for inheritance, e.g. mitigations attached to a parent
+        technique that also apply to each of its sub-techniques.
+
+        Args:
+            stix_id: Technique STIX ID (revoked IDs are redirected)
+            relationship_type: Relationship type pointing at the technique
+            source_type: Restrict to sources of this STIX type
+
+        Returns:
+            Set of (redirected) source STIX IDs
+        """
+        sets = self._down.get((relationship_type, source_type))
+        return sets[self._node(stix_id)] if sets else frozenset()
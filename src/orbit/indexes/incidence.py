@@ -0,0 +1,302 @@
+"""
+Technique incidence matrices
+
+Sparse binary matrices of which groups, software and campaigns use which
+techniques, built once from validated ``uses`` relationships. Analytics
+such as technique co-occurrence, prevalence and similar-group lookups
+become sparse matrix products instead of nested relationship loops.
+"""
+
+from typing import Any, Iterable, Mapping
+
+import numpy as np
+from scipy import sparse
+
+from .hierarchy import TECHNIQUE_TYPE, HierarchyIndex, is_inactive
+
+USES = "uses"
+ATTRIBUTED_TO = "attributed-to"
+
+# Matrix kind -> STIX types of its rows
+ROW_TYPES: dict[str, frozenset[str]] = {
+    "groups": frozenset({"intrusion-set"}),
+    "software": frozenset({"malware", "tool"}),
+    "campaigns": frozenset({"campaign"}),
+}
+
+
+def _top_k(ids: list[str], indices: np.ndarray, scores: np.ndarray, k: int) -> list[tuple[str, float]]:
+    """Highest scores first, ties broken by STIX ID."""
+    ranked = sorted(zip(indices.tolist(), scores.tolist()), key=lambda p: (-p[1], ids[p[0]]))
+    return [(ids[i], score) for i, score in ranked[:k]]
+
+
+class IncidenceIndex:
+    """
+    Rows x techniques incidence matrices in CSR form.
+
+    One binary matrix per kind (``"groups"``, ``"software"``,
+    ``"campaigns"``); all share the same technique columns, sorted by
+    STIX ID. Revoked techniques are redirected to their replacements;
+    revoked or deprecated rows, deprecated techniques and revoked or
+    deprecated relationships are left out.
+
+    Build with ``IncidenceIndex.build(result.objects)``.
+    """
+
+    def __init__(
+        self,
+        columns: list[str],
+        rows: dict[str, list[str]],
+        matrices: dict[str, sparse.csr_matrix],
+        campaign_groups: dict[str, frozenset[str]],
+    ):
+        self.columns = columns
+        self._column_pos = {stix_id: i for i, stix_id in enumerate(columns)}
+        self._rows = rows
+        self._row_pos = {
+            kind: {stix_id: i for i, stix_id in enumerate(ids)} for kind, ids in rows.items()
+        }
+        self._kind_of = {stix_id: kind for kind, ids in rows.items() for stix_id in ids}
+        self._matrices = matrices
+        self._campaign_groups = campaign_groups
+        self._co_occurrence: dict[str, sparse.csr_matrix] = {}
+        self._normalized: dict[str, sparse.csr_matrix] = {}
+
+    @classmethod
+    def build(
+        cls,
+        objects: Iterable[dict[str, Any]],
+        roll_up_subtechniques: bool = False,
+        hierarchy: HierarchyIndex | None = None,
+    ) -> "IncidenceIndex":
+        """
+        Build incidence matrices from validated STIX objects.
+
+        Args:
+            objects: Validated STIX objects (e.g. ``IngestResult.objects``)
+            roll_up_subtechniques: Count use of a sub-technique as use of
+                its parent; columns are then top-level techniques only
+            hierarchy: Prebuilt hierarchy for the same objects (built if
+                omitted)
+
+        Returns:
+            IncidenceIndex
+        """
+        objects = list(objects)
+        if hierarchy is None:
+            hierarchy = HierarchyIndex.build(objects)
+
+        row_kind = {stix_type: kind for kind, types in ROW_TYPES.items() for stix_type in types}
+        technique_ids: set[str] = set()
+        row_ids: dict[str, set[str]] = {kind: set() for kind in ROW_TYPES}
+        uses: list[tuple[str, str]] = []
+        attributions: list[tuple[str, str]] = []
+
+        for obj in objects:
+            obj_type = obj.get("type")
+            if obj_type == "relationship":
+                if is_inactive(obj):
+                    continue
+                rel_type = obj.get("relationship_type")
+                if rel_type == USES:
+                    uses.append((obj["source_ref"], obj["target_ref"]))
+                elif rel_type == ATTRIBUTED_TO:
+                    attributions.append((obj["source_ref"], obj["target_ref"]))
+            elif is_inactive(obj):
+                continue
+            elif obj_type == TECHNIQUE_TYPE:
+                if not roll_up_subtechniques or hierarchy.parent(obj["id"]) is None:
+                    technique_ids.add(obj["id"])
+            elif obj_type in row_kind:
+                row_ids[row_kind[obj_type]].add(obj["id"])
+
+        columns = sorted(technique_ids)
+        column_pos = {stix_id: i for i, stix_id in enumerate(columns)}
+        rows = {kind: sorted(ids) for kind, ids in row_ids.items()}
+        row_pos = {stix_id: (kind, i) for kind, ids in rows.items() for i, stix_id in enumerate(ids)}
+
+        coords: dict[str, tuple[list[int], list[int]]] = {kind: ([], []) for kind in ROW_TYPES}
+        for source, target in uses:
+            target = hierarchy.resolve(target)
+            if roll_up_subtechniques and target in hierarchy:
+                target = (hierarchy.ancestors(target) or [target])[-1]
+            col = column_pos.get(target)
+            row = row_pos.get(hierarchy.resolve(source))
+            if col is None or row is None:
+                continue
+            kind, i = row
+            coords[kind][0].append(i)
+            coords[kind][1].append(col)
+
+        matrices = {}
+        for kind, (row_idx, col_idx) in coords.items():
+            matrix = sparse.csr_matrix(
+                (np.ones(len(row_idx), dtype=np.int32), (row_idx, col_idx)),
+                shape=(len(rows[kind]), len(columns)),
+            )
+            matrix.data[:] = 1  # duplicate relationships collapse to one use
+            matrices[kind] = matrix
+
+        campaign_groups: dict[str, set[str]] = {}
+        for campaign, group in attributions:
+            campaign, group = hierarchy.resolve(campaign), hierarchy.resolve(group)
+            if row_pos.get(campaign, ("",))[0] == "campaigns" and row_pos.get(group, ("",))[0] == "groups":
+                campaign_groups.setdefault(group, set()).add(campaign)
+
+        return cls(
+            columns=columns,
+            rows=rows,
+            matrices=matrices,
+            campaign_groups={group: frozenset(c) for group, c in campaign_groups.items()},
+        )
+
+    # ----- Matrices -----
+
+    def matrix(self, kind: str) -> sparse.csr_matrix:
+        """
+        Binary rows x techniques matrix for a kind.
+
+        Raises:
+            KeyError: If kind is not one of ``ROW_TYPES``
+        """
+        if kind not in self._matrices:
+            raise KeyError(f"Unknown incidence kind: {kind}. Available: {', '.join(ROW_TYPES)}")
+        return self._matrices[kind]
+
+    def rows(self, kind: str) -> list[str]:
+        """Row STIX IDs of a kind's matrix, sorted."""
+        self.matrix(kind)
+        return self._rows[kind]
+
+    def techniques(self, stix_id: str) -> list[str]:
+        """
+        Techniques used by a group, software or campaign.
+
+        Raises:
+            KeyError: If the ID is not a row of any matrix
+        """
+        kind = self._kind(stix_id)
+        matrix = self._matrices[kind]
+        i = self._row_pos[kind][stix_id]
+        return [self.columns[j] for j in matrix.indices[matrix.indptr[i] : matrix.indptr[i + 1]]]
+
+    def _kind(self, stix_id: str) -> str:
+        if stix_id not in self._kind_of:
+            raise KeyError(f"Unknown group, software or campaign: {stix_id}")
+        return self._kind_of[stix_id]
+
+    def _column(self, technique_id: str) -> int:
+        if technique_id not in self._column_pos:
+            raise KeyError(f"Unknown technique: {technique_id}")
+        return self._column_pos[technique_id]
+
+    # ----- Co-occurrence -----
+
+    def co_occurrence(self, kind: str = "groups") -> sparse.csr_matrix:
+        """
+        Techniques x techniques co-occurrence counts (cached).
+
+        Entry (i, j) is the number of rows using both technique i and
+        technique j; the diagonal holds each technique's use count.
+        """
+        if kind not in self._co_occurrence:
+            matrix = self.matrix(kind)
+            self._co_occurrence[kind] = (matrix.T @ matrix).tocsr()
+        return self._co_occurrence[kind]
+
+    def co_occurring(
+        self, technique_id: str, kind: str = "groups", k: int = 10
+    ) -> list[tuple[str, int]]:
+        """
+        Techniques most often used together with a technique.
+
+        Returns:
+            Up to k (technique ID, shared row count) pairs, highest first
+        """
+        col = self._column(technique_id)
+        counts = self.co_occurrence(kind)
+        start, stop = counts.indptr[col], counts.indptr[col + 1]
+        indices, values = counts.indices[start:stop], counts.data[start:stop]
+        keep = indices != col
+        return [
+            (stix_id, int(count))
+            for stix_id, count in _top_k(self.columns, indices[keep], values[keep], k)
+        ]
+
+    # ----- Prevalence -----
+
+    def campaign_counts(self) -> dict[str, int]:
+        """Number of (active) campaigns attributed to each group."""
+        return {group: len(campaigns) for group, campaigns in self._campaign_groups.items()}
+
+    def prevalence(
+        self, kind: str = "groups", weights: Mapping[str, float] | None = None
+    ) -> np.ndarray:
+        """
+        Weighted share of rows using each technique.
+
+        Example:
+            ``index.prevalence("groups", weights=index.campaign_counts())``
+            weights each group by its attributed campaigns.
+
+        Args:
+            kind: Matrix kind
+            weights: Row STIX ID -> weight (default: 1 for every row;
+                rows missing from the mapping weigh 0)
+
+        Returns:
+            Float array aligned with ``columns``, in [0, 1]
+        """
+        matrix = self.matrix(kind)
+        if weights is None:
+            w = np.ones(matrix.shape[0])
+        else:
+            w = np.array([float(weights.get(stix_id, 0.0)) for stix_id in self._rows[kind]])
+        total = w.sum()
+        if total == 0:
+            return np.zeros(len(self.columns))
+        return (matrix.T @ w) / total
+
+    def most_prevalent(
+        self, kind: str = "groups", k: int = 10, weights: Mapping[str, float] | None = None
+    ) -> list[tuple[str, float]]:
+        """Top-k techniques by ``prevalence()``, highest first."""
+        scores = self.prevalence(kind, weights)
+        nonzero = np.flatnonzero(scores)
+        return _top_k(self.columns, nonzero, scores[nonzero], k)
+
+    # ----- Similarity -----
+
+    def _normalized_rows(self, kind: str) -> sparse.csr_matrix:
+        if kind not in self._normalized:
+            matrix = self.matrix(kind).astype(np.float64)
+            norms = np.sqrt(np.asarray(matrix.sum(axis=1)).ravel())
+            norms[norms == 0] = 1.0
+            self._normalized[kind] = (sparse.diags(1.0 / norms) @ matrix).tocsr()
+        return self._normalized[kind]
+
+    def similarity(self, kind: str = "groups") -> sparse.csr_matrix:
+        """All-pairs cosine similarity between rows of a kind (rows x rows)."""
+        normalized = self._normalized_rows(kind)
+        return (normalized @ normalized.T).tocsr()
+
+    def similar(self, stix_id: str, k: int = 10) -> list[tuple[str, float]]:
+        """
+        Rows of the same kind with the most similar technique sets.
+
+        Args:
+            stix_id: Group, software or campaign STIX ID
+            k: Number of results
+
+        Returns:
+            Up to k (STIX ID, cosine similarity) pairs, highest first,
+            excluding ``stix_id`` and rows sharing no technique
+        """
+        kind = self._kind(stix_id)
+        normalized = self._normalized_rows(kind)
+        i = self._row_pos[kind][stix_id]
+        scores = (normalized @ normalized[i].T).tocsc()
+        indices, values = scores.indices, scores.data
+        keep = (indices != i) & (values > 0)
+        return _top_k(self._rows[kind], indices[keep], values[keep], k)
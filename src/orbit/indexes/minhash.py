@@ -0,0 +1,287 @@
+"""
+MinHash similarity index
+
+Approximate Jaccard similarity between technique profiles (the
+techniques a group, piece of software or internal cluster uses). Each
+profile is summarised by a MinHash signature, and signatures are split
+into LSH bands hashed into buckets: profiles sharing any band bucket
+become candidates, and only candidates are scored. Finding similar
+profiles costs roughly the bucket sizes instead of a Jaccard against
+every profile, and new profiles are inserted without a rebuild.
+
+With ``bands`` bands of ``rows`` rows, two profiles with Jaccard
+similarity s become candidates with probability 1 - (1 - s^rows)^bands;
+``threshold`` (about (1/bands)^(1/rows)) is where that S-curve is
+steepest.
+"""
+
+import hashlib
+from typing import Any, Iterable
+
+import numpy as np
+
+from .hierarchy import HierarchyIndex
+
+DEFAULT_PERMUTATIONS = 128
+DEFAULT_BANDS = 32
+
+# Row types indexed by build() (see incidence.ROW_TYPES)
+PROFILE_KINDS = ("groups", "software")
+
+_EMPTY = np.uint32(0xFFFFFFFF)
+
+
+def _is_empty(signature: np.ndarray) -> bool:
+    return bool((signature == _EMPTY).all())
+
+
+def _token_hash(token: str) -> int:
+    """Stable 32-bit hash of a token (Python's hash() is salted per process)."""
+    return int.from_bytes(hashlib.blake2b(token.encode(), digest_size=4).digest(), "little")
+
+
+class MinHashIndex:
+    """
+    MinHash signatures with LSH banding over technique profiles.
+
+    Keys are arbitrary strings: STIX IDs for ATT&CK groups and software,
+    or internal cluster names added with ``add()``.
+
+    Args:
+        num_perm: Signature length (hash functions); more is more accurate
+        bands: LSH bands; must divide ``num_perm``. More bands lower the
+            candidate threshold (higher recall, more candidates)
+        seed: Seed for the hash functions; indexes are only comparable
+            with the same (num_perm, seed)
+
+    Raises:
+        ValueError: If bands doesn't divide num_perm
+    """
+
+    def __init__(self, num_perm: int = DEFAULT_PERMUTATIONS, bands: int = DEFAULT_BANDS, seed: int = 1):
+        if num_perm <= 0 or bands <= 0 or num_perm % bands:
+            raise ValueError(f"bands ({bands}) must divide num_perm ({num_perm})")
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        # Multiply-shift hashing: h(x) = (a * x + b) mod 2^64 >> 32, a odd
+        rng = np.random.default_rng(seed)
+        self._a = rng.integers(0, 2**63, size=(num_perm, 1), dtype=np.uint64) * np.uint64(2) + np.uint64(1)
+        self._b = rng.integers(0, 2**63, size=(num_perm, 1), dtype=np.uint64)
+        self._token_hashes: dict[str, int] = {}
+
+        self._keys: list[str | None] = []  # slot -> key (None: free)
+        self._slots: dict[str, int] = {}
+        self._free: list[int] = []
+        self._signatures = np.zeros((0, num_perm), dtype=np.uint32)
+        self._buckets: list[dict[bytes, set[int]]] = [{} for _ in range(bands)]
+
+    @classmethod
+    def build(
+        cls,
+        objects: Iterable[dict[str, Any]],
+        kinds: Iterable[str] = PROFILE_KINDS,
+        roll_up_subtechniques: bool = False,
+        hierarchy: HierarchyIndex | None = None,
+        **params: Any,
+    ) -> "MinHashIndex":
+        """
+        Index the technique profiles of ATT&CK groups and software.
+
+        Profiles follow ``IncidenceIndex``: active ``uses`` relationships,
+        revoked techniques redirected, inactive rows left out.
+
+        Args:
+            objects: Validated STIX objects
+            kinds: Incidence kinds to index (``"groups"``, ``"software"``,
+                ``"campaigns"``)
+            roll_up_subtechniques: Count sub-technique use toward the
+                parent technique too
+            hierarchy: Prebuilt hierarchy for the same objects
+            **params: ``MinHashIndex()`` arguments
+
+        Returns:
+            MinHashIndex
+        """
+        from .incidence import IncidenceIndex
+
+        incidence = IncidenceIndex.build(
+            objects, roll_up_subtechniques=roll_up_subtechniques, hierarchy=hierarchy
+        )
+        index = cls(**params)
+        for kind in kinds:
+            index.update((stix_id, incidence.techniques(stix_id)) for stix_id in incidence.rows(kind))
+        return index
+
+    def __len__(self) -> int:
+        return len(self._slots)
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._slots
+
+    @property
+    def threshold(self) -> float:
+        """Jaccard similarity at which candidate probability rises fastest."""
+        return (1 / self.bands) ** (1 / self.rows)
+
+    # ----- Signatures -----
+
+    def signature(self, techniques: Iterable[str]) -> np.ndarray:
+        """
+        MinHash signature of a profile.
+
+        Returns:
+            uint32 array of length ``num_perm`` (all 0xFFFFFFFF for an
+            empty profile)
+        """
+        hashes = []
+        for token in set(techniques):
+            h = self._token_hashes.get(token)
+            if h is None:
+                h = self._token_hashes[token] = _token_hash(token)
+            hashes.append(h)
+        if not hashes:
+            return np.full(self.num_perm, _EMPTY, dtype=np.uint32)
+        x = np.array(hashes, dtype=np.uint64)[None, :]
+        return ((self._a * x + self._b) >> np.uint64(32)).min(axis=1).astype(np.uint32)
+
+    def _band_keys(self, signature: np.ndarray) -> list[bytes]:
+        return [band.tobytes() for band in signature.reshape(self.bands, self.rows)]
+
+    # ----- Mutation -----
+
+    def add(self, key: str, techniques: Iterable[str]) -> None:
+        """
+        Insert a profile, replacing any existing profile under the key.
+
+        Empty profiles are stored but never returned as similar.
+        """
+        self.update([(key, techniques)])
+
+    def update(self, profiles: Iterable[tuple[str, Iterable[str]]]) -> int:
+        """
+        Insert or replace many profiles.
+
+        Returns:
+            Number of profiles written
+        """
+        written = 0
+        for key, techniques in profiles:
+            signature = self.signature(techniques)
+            self.remove([key])
+            if self._free:
+                slot = self._free.pop()
+                self._keys[slot] = key
+            else:
+                slot = len(self._keys)
+                self._keys.append(key)
+                if slot == len(self._signatures):
+                    grown = np.zeros((max(2 * slot, 64), self.num_perm), dtype=np.uint32)
+                    grown[:slot] = self._signatures
+                    self._signatures = grown
+            self._slots[key] = slot
+            self._signatures[slot] = signature
+            if not _is_empty(signature):
+                for buckets, band in zip(self._buckets, self._band_keys(signature)):
+                    buckets.setdefault(band, set()).add(slot)
+            written += 1
+        return written
+
+    def remove(self, keys: Iterable[str]) -> int:
+        """
+        Remove profiles.
+
+        Returns:
+            Number of profiles removed (unknown keys are ignored)
+        """
+        removed = 0
+        for key in keys:
+            slot = self._slots.pop(key, None)
+            if slot is None:
+                continue
+            signature = self._signatures[slot]
+            if not _is_empty(signature):
+                for buckets, band in zip(self._buckets, self._band_keys(signature)):
+                    members = buckets[band]
+                    members.discard(slot)
+                    if not members:
+                        del buckets[band]
+            self._keys[slot] = None
+            self._free.append(slot)
+            removed += 1
+        return removed
+
+    # ----- Query -----
+
+    def _candidates(self, signature: np.ndarray) -> set[int]:
+        if _is_empty(signature):
+            return set()
+        slots: set[int] = set()
+        for buckets, band in zip(self._buckets, self._band_keys(signature)):
+            slots.update(buckets.get(band, ()))
+        return slots
+
+    def _rank(
+        self, signature: np.ndarray, exclude: int | None, k: int, min_similarity: float
+    ) -> list[tuple[str, float]]:
+        slots = self._candidates(signature)
+        slots.discard(exclude)
+        if not slots or k <= 0:
+            return []
+        candidates = np.fromiter(slots, dtype=np.int64, count=len(slots))
+        estimates = (self._signatures[candidates] == signature).mean(axis=1)
+        hits = [
+            (self._keys[slot], float(score))
+            for slot, score in zip(candidates.tolist(), estimates.tolist())
+            if score >= min_similarity and score > 0
+        ]
+        hits.sort(key=lambda hit: (-hit[1], hit[0]))
+        return hits[:k]
+
+    def query(
+        self, techniques: Iterable[str], k: int = 10, min_similarity: float = 0.0
+    ) -> list[tuple[str, float]]:
+        """
+        Approximate top-k profiles most similar to a technique set.
+
+        Only LSH candidates (profiles sharing a band bucket with the
+        query) are scored, so profiles well below ``threshold`` are
+        usually missed.
+
+        Args:
+            techniques: Technique STIX IDs
+            k: Maximum number of results
+            min_similarity: Drop results with a lower estimate
+
+        Returns:
+            List of (key, estimated Jaccard similarity), best first; ties
+            broken by key
+        """
+        return self._rank(self.signature(techniques), None, k, min_similarity)
+
+    def similar(self, key: str, k: int = 10, min_similarity: float = 0.0) -> list[tuple[str, float]]:
+        """
+        Approximate top-k profiles most similar to an indexed one (itself excluded).
+
+        Raises:
+            KeyError: If the key is not indexed
+        """
+        if key not in self._slots:
+            raise KeyError(f"Not in MinHash index: {key}")
+        slot = self._slots[key]
+        return self._rank(self._signatures[slot], slot, k, min_similarity)
+
+    def estimate(self, key: str, other: str) -> float:
+        """
+        Estimated Jaccard similarity of two indexed profiles.
+
+        Raises:
+            KeyError: If either key is not indexed
+        """
+        for name in (key, other):
+            if name not in self._slots:
+                raise KeyError(f"Not in MinHash index: {name}")
+        a, b = self._signatures[self._slots[key]], self._signatures[self._slots[other]]
+        if _is_empty(a) or _is_empty(b):
+            return 0.0
+        return float((a == b).mean())
@@ -0,0 +1,480 @@
+"""
+Path graph
+
+The validated object graph in compressed sparse row (CSR) form: nodes
+are integers (STIX IDs in sorted order), edges are typed by relationship
+type, and both directions are stored, so multi-hop questions such as
+technique -> artifact -> countermeasure or group -> software ->
+technique -> mitigation are level-synchronous BFS over NumPy arrays
+rather than walks over dicts of relationships or round trips to Neo4j.
+
+``save()`` writes every array as a ``.npy`` file and ``load()``
+memory-maps them read-only, so worker processes share one copy of the
+graph through the page cache (or through RAM, with the directory on
+``/dev/shm``) instead of each building their own.
+"""
+
+import json
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Iterable, Sequence
+
+import numpy as np
+
+from ..ingestion.output import replace_atomically
+from .hierarchy import HierarchyIndex, is_inactive
+
+FORMAT_NAME = "orbit-path-graph"
+FORMAT_VERSION = 1
+
+METADATA_FILENAME = "graph.json"
+ARRAY_NAMES = (
+    "nodes",
+    "node_types",
+    "out_indptr",
+    "out_indices",
+    "out_types",
+    "in_indptr",
+    "in_indices",
+    "in_types",
+)
+
+# Embedded reference properties loaded as edges (named after the
+# property), alongside relationship objects. Bookkeeping references such
+# as created_by_ref would link everything to one identity and are left out.
+EMBEDDED_EDGES = ("x_mitre_data_source_ref",)
+
+DIRECTIONS = ("out", "in", "both")
+
+UNREACHABLE = -1
+
+
+@dataclass(frozen=True)
+class Hop:
+    """
+    One step of a typed traversal (see ``PathGraph.follow``).
+
+    Attributes:
+        edge_types: Relationship types to follow (None for any)
+        direction: ``"out"`` (source -> target), ``"in"`` (target ->
+            source) or ``"both"``
+        node_types: STIX types the step may land on (None for any)
+    """
+
+    edge_types: frozenset[str] | None = None
+    direction: str = "out"
+    node_types: frozenset[str] | None = None
+
+
+def _csr(sources: np.ndarray, targets: np.ndarray, types: np.ndarray, n: int) -> tuple[np.ndarray, ...]:
+    """CSR arrays of edges grouped by source, each row sorted by (type, target)."""
+    order = np.lexsort((targets, types, sources))
+    indptr = np.zeros(n + 1, dtype=np.int64)
+    np.cumsum(np.bincount(sources, minlength=n), out=indptr[1:])
+    return indptr, targets[order].astype(np.int32), types[order].astype(np.int16)
+
+
+class PathGraph:
+    """
+    Typed directed graph over active objects in CSR form.
+
+    Nodes are active (not revoked or deprecated) non-relationship objects,
+    numbered by sorted STIX ID. Edges come from active relationships
+    (except ``revoked-by``) and ``EMBEDDED_EDGES`` properties; endpoints
+    that were revoked are redirected to their replacements, and edges to
+    objects outside the graph are dropped.
+
+    Build with ``PathGraph.build(result.objects)``, or ``load()`` a saved
+    graph.
+    """
+
+    def __init__(self, arrays: dict[str, np.ndarray], node_types: list[str], edge_types: list[str]):
+        self._nodes = arrays["nodes"]  # sorted fixed-width bytes
+        self._node_type = arrays["node_types"]
+        self._out = (arrays["out_indptr"], arrays["out_indices"], arrays["out_types"])
+        self._in = (arrays["in_indptr"], arrays["in_indices"], arrays["in_types"])
+        self.node_types = node_types
+        self.edge_types = edge_types
+        self._arrays = arrays
+
+    @classmethod
+    def build(
+        cls, objects: Iterable[dict[str, Any]], hierarchy: HierarchyIndex | None = None
+    ) -> "PathGraph":
+        """
+        Build the graph from validated objects.
+
+        Args:
+            objects: Validated objects (e.g. ``IngestResult.objects``;
+                ATT&CK, D3FEND and CSF bundles can be combined)
+            hierarchy: Prebuilt hierarchy for the same objects, used for
+                revocation redirects (built if omitted)
+
+        Returns:
+            PathGraph
+        """
+        objects = list(objects)
+        if hierarchy is None:
+            hierarchy = HierarchyIndex.build(objects)
+
+        types_by_id: dict[str, str] = {}
+        edges: list[tuple[str, str, str]] = []
+        for obj in objects:
+            if is_inactive(obj):
+                continue
+            if obj.get("type") == "relationship":
+                if obj.get("relationship_type") != "revoked-by":
+                    edges.append((obj["source_ref"], obj["relationship_type"], obj["target_ref"]))
+                continue
+            types_by_id[obj["id"]] = obj["type"]
+            for prop in EMBEDDED_EDGES:
+                if obj.get(prop):
+                    edges.append((obj["id"], prop, obj[prop]))
+
+        ids = sorted(types_by_id)
+        pos = {stix_id: i for i, stix_id in enumerate(ids)}
+        node_types = sorted(set(types_by_id.values()))
+        node_type_pos = {node_type: i for i, node_type in enumerate(node_types)}
+        edge_types = sorted({rel_type for _, rel_type, _ in edges})
+        edge_type_pos = {rel_type: i for i, rel_type in enumerate(edge_types)}
+
+        triples = set()
+        for source, rel_type, target in edges:
+            s = pos.get(hierarchy.resolve(source))
+            t = pos.get(hierarchy.resolve(target))
+            if s is not None and t is not None:
+                triples.add((s, edge_type_pos[rel_type], t))
+        edge_array = np.array(sorted(triples), dtype=np.int64).reshape(-1, 3)
+        sources, types, targets = edge_array.T
+
+        n = len(ids)
+        out_indptr, out_indices, out_types = _csr(sources, targets, types, n)
+        in_indptr, in_indices, in_types = _csr(targets, sources, types, n)
+        arrays = {
+            "nodes": np.array(ids, dtype=f"S{max(map(len, ids), default=1)}"),
+            "node_types": np.array([node_type_pos[types_by_id[i]] for i in ids], dtype=np.int16),
+            "out_indptr": out_indptr,
+            "out_indices": out_indices,
+            "out_types": out_types,
+            "in_indptr": in_indptr,
+            "in_indices": in_indices,
+            "in_types": in_types,
+        }
+        return cls(arrays, node_types, edge_types)
+
+    def __len__(self) -> int:
+        return len(self._nodes)
+
+    def __contains__(self, stix_id: object) -> bool:
+        return isinstance(stix_id, str) and self._position(stix_id) is not None
+
+    @property
+    def edge_count(self) -> int:
+        """Number of (source, type, target) edges."""
+        return len(self._out[1])
+
+    # ----- Node lookup -----
+
+    def _position(self, stix_id: str) -> int | None:
+        key = stix_id.encode()
+        i = int(np.searchsorted(self._nodes, key))
+        if i < len(self._nodes) and self._nodes[i] == key:
+            return i
+        return None
+
+    def node(self, stix_id: str) -> int:
+        """
+        Integer ID of a node.
+
+        Raises:
+            KeyError: If the object is not in the graph
+        """
+        i = self._position(stix_id)
+        if i is None:
+            raise KeyError(f"Unknown node: {stix_id}")
+        return i
+
+    def stix_id(self, node: int) -> str:
+        """STIX ID of an integer node ID."""
+        return self._nodes[node].decode()
+
+    def type_of(self, stix_id: str) -> str:
+        """STIX type of a node."""
+        return self.node_types[self._node_type[self.node(stix_id)]]
+
+    def _ids(self, nodes: np.ndarray) -> list[str]:
+        return [stix_id.decode() for stix_id in self._nodes[np.sort(nodes)]]
+
+    def _sources(self, stix_ids: str | Iterable[str]) -> np.ndarray:
+        if isinstance(stix_ids, str):
+            stix_ids = [stix_ids]
+        return np.unique(np.array([self.node(stix_id) for stix_id in stix_ids], dtype=np.int64))
+
+    # ----- Traversal -----
+
+    def _type_mask(self, names: Iterable[str] | None, known: list[str]) -> np.ndarray | None:
+        """Boolean mask over type codes (None: any). Unknown names match nothing."""
+        if names is None:
+            return None
+        names = set(names)
+        return np.array([name in names for name in known], dtype=bool)
+
+    def _expand(
+        self,
+        frontier: np.ndarray,
+        direction: str,
+        edge_mask: np.ndarray | None,
+        node_mask: np.ndarray | None = None,
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Edges leaving a frontier.
+
+        Returns:
+            (neighbor, frontier node) arrays, one entry per edge, in
+            frontier order then CSR row order
+        """
+        if direction not in DIRECTIONS:
+            raise ValueError(f"Unknown direction {direction!r}; expected one of {', '.join(DIRECTIONS)}")
+        csrs = {"out": [self._out], "in": [self._in], "both": [self._out, self._in]}[direction]
+        neighbors, origins = [], []
+        for indptr, indices, types in csrs:
+            starts = indptr[frontier]
+            counts = indptr[frontier + 1] - starts
+            total = int(counts.sum())
+            if not total:
+                continue
+            # Flat positions of every edge in the frontier's rows
+            row_offset = np.repeat(starts - (np.cumsum(counts) - counts), counts)
+            positions = row_offset + np.arange(total)
+            found = np.asarray(indices[positions], dtype=np.int64)
+            origin = np.repeat(frontier, counts)
+            keep = None
+            if edge_mask is not None:
+                keep = edge_mask[types[positions]]
+            if node_mask is not None:
+                on_type = node_mask[self._node_type[found]]
+                keep = on_type if keep is None else keep & on_type
+            if keep is not None:
+                found, origin = found[keep], origin[keep]
+            neighbors.append(found)
+            origins.append(origin)
+        if not neighbors:
+            empty = np.empty(0, dtype=np.int64)
+            return empty, empty
+        return np.concatenate(neighbors), np.concatenate(origins)
+
+    def _bfs(
+        self,
+        sources: np.ndarray,
+        direction: str,
+        edge_types: Iterable[str] | None,
+        max_hops: int | None,
+        target: int | None = None,
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """Hop distances and BFS-tree parents from a set of source nodes."""
+        edge_mask = self._type_mask(edge_types, self.edge_types)
+        distance = np.full(len(self), UNREACHABLE, dtype=np.int32)
+        parent = np.full(len(self), UNREACHABLE, dtype=np.int64)
+        distance[sources] = 0
+        frontier = sources
+        hops = 0
+        while frontier.size and (max_hops is None or hops < max_hops):
+            if target is not None and distance[target] != UNREACHABLE:
+                break
+            hops += 1
+            found, origin = self._expand(frontier, direction, edge_mask)
+            new = distance[found] == UNREACHABLE
+            # np.unique keeps each node's first discovery: lowest-ID parent
+            frontier, first = np.unique(found[new], return_index=True)
+            distance[frontier] = hops
+            parent[frontier] = origin[new][first]
+        return distance, parent
+
+    def distances(
+        self,
+        sources: str | Iterable[str],
+        direction: str = "out",
+        edge_types: Iterable[str] | None = None,
+        max_hops: int | None = None,
+    ) -> np.ndarray:
+        """
+        Hop distance from the nearest source to every node.
+
+        Args:
+            sources: Start STIX ID(s)
+            direction: ``"out"``, ``"in"`` or ``"both"``
+            edge_types: Relationship types to follow (default: all)
+            max_hops: Stop after this many hops
+
+        Returns:
+            int32 array indexed by ``node()``; ``UNREACHABLE`` (-1) for
+            nodes not reached
+
+        Raises:
+            KeyError: If a source is not in the graph
+            ValueError: If direction is unknown
+        """
+        return self._bfs(self._sources(sources), direction, edge_types, max_hops)[0]
+
+    def within(
+        self,
+        sources: str | Iterable[str],
+        k: int,
+        direction: str = "out",
+        edge_types: Iterable[str] | None = None,
+        node_types: Iterable[str] | None = None,
+    ) -> list[str]:
+        """
+        Nodes reachable in 1 to k hops (k-hop neighbourhood).
+
+        Args:
+            sources: Start STIX ID(s); excluded from the result
+            k: Maximum number of hops
+            direction: ``"out"``, ``"in"`` or ``"both"``
+            edge_types: Relationship types to follow (default: all)
+            node_types: Only return nodes of these STIX types (paths may
+                still pass through other types)
+
+        Returns:
+            Sorted STIX IDs
+        """
+        distance = self.distances(sources, direction, edge_types, max_hops=k)
+        reached = distance > 0
+        node_mask = self._type_mask(node_types, self.node_types)
+        if node_mask is not None:
+            reached &= node_mask[self._node_type]
+        return self._ids(np.flatnonzero(reached))
+
+    def shortest_path(
+        self,
+        source: str,
+        target: str,
+        direction: str = "out",
+        edge_types: Iterable[str] | None = None,
+        max_hops: int | None = None,
+    ) -> list[str] | None:
+        """
+        A fewest-hop path between two nodes.
+
+        Among equally short paths, each node's predecessor is the
+        lowest-numbered one, so results are deterministic.
+
+        Returns:
+            STIX IDs from source to target inclusive, or None if target
+            is unreachable
+
+        Raises:
+            KeyError: If source or target is not in the graph
+        """
+        start, goal = self.node(source), self.node(target)
+        distance, parent = self._bfs(np.array([start]), direction, edge_types, max_hops, goal)
+        if distance[goal] == UNREACHABLE:
+            return None
+        path = [goal]
+        while path[-1] != start:
+            path.append(int(parent[path[-1]]))
+        return [self.stix_id(node) for node in reversed(path)]
+
+    def neighbors(
+        self,
+        stix_id: str,
+        direction: str = "out",
+        edge_types: Iterable[str] | None = None,
+    ) -> list[str]:
+        """Adjacent nodes, sorted by STIX ID."""
+        found, _ = self._expand(
+            self._sources(stix_id), direction, self._type_mask(edge_types, self.edge_types)
+        )
+        return self._ids(np.unique(found))
+
+    def follow(self, sources: str | Iterable[str], hops: Sequence[Hop]) -> list[str]:
+        """
+        Nodes at the end of a typed multi-hop pattern.
+
+        Example: mitigations for a group's techniques, directly or through
+        its software::
+
+            graph.follow(group_id, [
+                Hop(frozenset({"uses"}), node_types=frozenset({"malware", "tool"})),
+                Hop(frozenset({"uses"}), node_types=frozenset({"attack-pattern"})),
+                Hop(frozenset({"mitigates"}), direction="in"),
+            ])
+
+        Args:
+            sources: Start STIX ID(s)
+            hops: Steps applied in turn to the whole frontier
+
+        Returns:
+            Sorted STIX IDs reached by the last hop
+        """
+        frontier = self._sources(sources)
+        for hop in hops:
+            found, _ = self._expand(
+                frontier,
+                hop.direction,
+                self._type_mask(hop.edge_types, self.edge_types),
+                self._type_mask(hop.node_types, self.node_types),
+            )
+            frontier = np.unique(found)
+        return self._ids(frontier)
+
+    # ----- Persistence -----
+
+    def save(self, directory: Path) -> None:
+        """
+        Write the graph to a directory (created if missing).
+
+        One ``.npy`` file per array plus ``graph.json`` metadata; each
+        file is replaced atomically.
+        """
+        directory.mkdir(parents=True, exist_ok=True)
+        for name in ARRAY_NAMES:
+
+            def write_array(tmp: Path, array: np.ndarray = self._arrays[name]) -> None:
+                with tmp.open("wb") as f:
+                    np.save(f, np.ascontiguousarray(array))
+
+            replace_atomically(directory / f"{name}.npy", write_array)
+        payload = {
+            "format": FORMAT_NAME,
+            "version": FORMAT_VERSION,
+            "node_types": self.node_types,
+            "edge_types": self.edge_types,
+            "nodes": len(self),
+            "edges": self.edge_count,
+        }
+        replace_atomically(
+            directory / METADATA_FILENAME,
+            lambda tmp: tmp.write_text(
+                json.dumps(payload, sort_keys=True, separators=(",", ":")), encoding="utf-8"
+            ),
+        )
+
+    @classmethod
+    def load(cls, directory: Path, mmap: bool = True) -> "PathGraph":
+        """
+        Read a graph written by ``save()``.
+
+        Args:
+            directory: Directory passed to ``save()``
+            mmap: Memory-map the arrays read-only (shared between
+                processes) instead of reading them into private memory
+
+        Raises:
+            FileNotFoundError: If the graph files don't exist
+            ValueError: If the files are not a supported path graph
+        """
+        payload = json.loads((directory / METADATA_FILENAME).read_text(encoding="utf-8"))
+        if payload.get("format") != FORMAT_NAME or payload.get("version") != FORMAT_VERSION:
+            raise ValueError(f"Unsupported path graph format: {directory}")
+        arrays = {
+            name: np.load(directory / f"{name}.npy", mmap_mode="r" if mmap else None)
+            for name in ARRAY_NAMES
+        }
+        if (
+            len(arrays["nodes"]) != payload["nodes"]
+            or len(arrays["out_indices"]) != payload["edges"]
+            or len(arrays["out_indptr"]) != payload["nodes"] + 1
+        ):
+            raise ValueError(f"Path graph arrays don't match metadata: {directory}")
+        return cls(arrays, payload["node_types"], payload["edge_types"])
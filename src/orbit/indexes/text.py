@@ -0,0 +1,386 @@
+"""
+Full-text index
+
+Inverted index with BM25 ranking over names, aliases and descriptions
+of validated objects.
+"""
+
+import base64
+import json
+import math
+import re
+from array import array
+from bisect import bisect_left
+from heapq import nsmallest
+from pathlib import Path
+from typing import Any, Iterable
+
+# Object types searchable by keyword (techniques, groups, software, ...)
+TEXT_INDEX_TYPES = {
+    "attack-pattern",
+    "campaign",
+    "course-of-action",
+    "intrusion-set",
+    "malware",
+    "tool",
+}
+
+# Name and alias tokens count this many times towards term frequency
+NAME_BOOST = 3
+
+FORMAT_NAME = "orbit-text-index"
+FORMAT_VERSION = 1
+
+_TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+STOPWORDS = frozenset(
+    "a an and are as at be by can for from has have in is it its may of on or "
+    "such that the their this to used was were which with".split()
+)
+
+_MAX_TF = 0xFFFF
+
+
+def tokenize(text: str) -> list[str]:
+    """
+    Split text into lowercase alphanumeric tokens, dropping stopwords.
+
+    Args:
+        text: Free text (name, description, query)
+
+    Returns:
+        List of tokens in document order
+    """
+    return [t for t in _TOKEN_PATTERN.findall(text.lower()) if t not in STOPWORDS]
+
+
+def _document_tokens(obj: dict[str, Any]) -> list[str]:
+    """Tokens for one object, with names and aliases boosted."""
+    names = [obj.get("name") or ""]
+    names.extend(obj.get("aliases") or [])
+    names.extend(obj.get("x_mitre_aliases") or [])
+    name_tokens = tokenize(" ".join(names))
+    return name_tokens * NAME_BOOST + tokenize(obj.get("description") or "")
+
+
+def _encode_varints(values: Iterable[int]) -> str:
+    """Encode non-negative integers as base64 LEB128 varints."""
+    out = bytearray()
+    for value in values:
+        while value >= 0x80:
+            out.append((value & 0x7F) | 0x80)
+            value >>= 7
+        out.append(value)
+    return base64.b64encode(bytes(out)).decode("ascii")
+
+
+def _decode_varints(encoded: str, typecode: str) -> array:
+    """Decode base64 LEB128 varints into an array."""
+    values = array(typecode)
+    value = shift = 0
+    for byte in base64.b64decode(encoded):
+        value |= (byte & 0x7F) << shift
+        if byte & 0x80:
+            shift += 7
+        else:
+            values.append(value)
+            value = shift = 0
+    return values
+
+
+class TextIndex:
+    """
+    BM25-ranked inverted index over object names and descriptions.
+
+    Postings are kept per term as parallel ``array`` buffers of document
+    numbers (sorted) and term frequencies, so memory stays compact and
+    removal is a bisect plus an in-place delete. Documents are keyed by
+    STIX ID; ``update()`` re-indexes only objects whose ``modified``
+    timestamp changed.
+
+    Persisted form is a JSON document with delta + varint encoded
+    postings (see ``save()``), written deterministically.
+    """
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+
+        # Document table (slot -> ...); freed slots hold None
+        self._doc_ids: list[str | None] = []
+        self._doc_types: list[str | None] = []
+        self._doc_modified: list[str | None] = []
+        self._doc_terms: list[array | None] = []
+        self._doc_lens = array("I")
+        self._slots: dict[str, int] = {}
+        self._total_len = 0
+        self._norms: list[float] | None = None  # BM25 length norms, rebuilt lazily
+
+        # Vocabulary and postings (term number -> ...)
+        self._vocab: dict[str, int] = {}
+        self._post_docs: list[array] = []
+        self._post_tfs: list[array] = []
+
+    @classmethod
+    def build(
+        cls,
+        objects: Iterable[dict[str, Any]],
+        types: set[str] | None = None,
+        **kwargs: float,
+    ) -> "TextIndex":
+        """
+        Build index from validated objects.
+
+        Args:
+            objects: Validated STIX objects
+            types: Object types to index (default: TEXT_INDEX_TYPES)
+            **kwargs: BM25 parameters (k1, b)
+
+        Returns:
+            TextIndex
+        """
+        index = cls(**kwargs)
+        wanted = TEXT_INDEX_TYPES if types is None else types
+        # Objects are indexed in input order and not retained, so a
+        # streamed input is never materialised. Slot order is internal:
+        # search ties and save() are both ordered by STIX ID.
+        for obj in objects:
+            if obj.get("type") in wanted:
+                index._add(obj)
+        return index
+
+    def __len__(self) -> int:
+        return len(self._slots)
+
+    def __contains__(self, stix_id: object) -> bool:
+        return stix_id in self._slots
+
+    # ----- Mutation -----
+
+    def _add(self, obj: dict[str, Any]) -> None:
+        slot = len(self._doc_ids)
+        tokens = _document_tokens(obj)
+
+        counts: dict[int, int] = {}
+        for token in tokens:
+            term = self._vocab.get(token)
+            if term is None:
+                term = self._vocab[token] = len(self._post_docs)
+                self._post_docs.append(array("I"))
+                self._post_tfs.append(array("H"))
+            counts[term] = counts.get(term, 0) + 1
+
+        # Slots only grow, so appending keeps postings sorted
+        for term, tf in counts.items():
+            self._post_docs[term].append(slot)
+            self._post_tfs[term].append(min(tf, _MAX_TF))
+
+        self._doc_ids.append(obj["id"])
+        self._doc_types.append(obj.get("type"))
+        self._doc_modified.append(obj.get("modified"))
+        self._doc_terms.append(array("I", sorted(counts)))
+        self._doc_lens.append(len(tokens))
+        self._slots[obj["id"]] = slot
+        self._total_len += len(tokens)
+        self._norms = None
+
+    def _remove_slot(self, slot: int) -> None:
+        for term in self._doc_terms[slot]:
+            docs = self._post_docs[term]
+            i = bisect_left(docs, slot)
+            del docs[i]
+            del self._post_tfs[term][i]
+
+        del self._slots[self._doc_ids[slot]]
+        self._total_len -= self._doc_lens[slot]
+        self._doc_ids[slot] = None
+        self._doc_types[slot] = None
+        self._doc_modified[slot] = None
+        self._doc_terms[slot] = None
+        self._doc_lens[slot] = 0
+        self._norms = None
+
+    def remove(self, stix_ids: Iterable[str]) -> int:
+        """
+        Remove documents by STIX ID.
+
+        Returns:
+            Number of documents removed (unknown IDs are ignored)
+        """
+        removed = 0
+        for stix_id in stix_ids:
+            slot = self._slots.get(stix_id)
+            if slot is not None:
+                self._remove_slot(slot)
+                removed += 1
+        return removed
+
+    def update(
+        self,
+        objects: Iterable[dict[str, Any]],
+        types: set[str] | None = None,
+    ) -> int:
+        """
+        Incrementally index new or changed objects.
+
+        Objects already indexed with the same ``modified`` timestamp are
+        skipped; changed objects are re-indexed in place. An indexed
+        object whose new version is not of a wanted type is removed, so
+        its old document stops matching.
+
+        Args:
+            objects: Validated STIX objects (new or changed)
+            types: Object types to index (default: TEXT_INDEX_TYPES)
+
+        Returns:
+            Number of documents added, re-indexed or removed
+        """
+        wanted = TEXT_INDEX_TYPES if types is None else types
+        changed = 0
+        for obj in sorted(objects, key=lambda obj: obj["id"]):
+            slot = self._slots.get(obj["id"])
+            if obj.get("type") not in wanted:
+                if slot is not None:
+                    self._remove_slot(slot)
+                    changed += 1
+                continue
+            if slot is not None:
+                if self._doc_modified[slot] == obj.get("modified"):
+                    continue
+                self._remove_slot(slot)
+            self._add(obj)
+            changed += 1
+        return changed
+
+    # ----- Query -----
+
+    def _length_norms(self) -> list[float]:
+        """Per-document BM25 length normalisation ``k1 * (1 - b + b * dl / avgdl)``."""
+        if self._norms is None:
+            k1, b = self.k1, self.b
+            avgdl = (self._total_len / len(self._slots)) if self._slots else 1.0
+            avgdl = avgdl or 1.0
+            self._norms = [k1 * (1.0 - b + b * dl / avgdl) for dl in self._doc_lens]
+        return self._norms
+
+    def search(
+        self,
+        query: str,
+        limit: int = 10,
+        types: set[str] | None = None,
+    ) -> list[tuple[str, float]]:
+        """
+        Rank documents against a keyword query with BM25.
+
+        Args:
+            query: Free-text query
+            limit: Maximum number of results
+            types: Restrict results to these object types
+
+        Returns:
+            List of (STIX ID, score), best first; ties broken by STIX ID
+        """
+        n = len(self._slots)
+        if n == 0:
+            return []
+
+        norms = self._length_norms()
+        scores: dict[int, float] = {}
+        get = scores.get
+
+        for token in set(tokenize(query)):
+            term = self._vocab.get(token)
+            if term is None:
+                continue
+            docs = self._post_docs[term]
+            df = len(docs)
+            if df == 0:
+                continue
+            weight = math.log(1.0 + (n - df + 0.5) / (df + 0.5)) * (self.k1 + 1.0)
+            for doc, tf in zip(docs, self._post_tfs[term]):
+                scores[doc] = get(doc, 0.0) + weight * tf / (tf + norms[doc])
+
+        if types is not None:
+            scores = {d: s for d, s in scores.items() if self._doc_types[d] in types}
+
+        ids = self._doc_ids
+        best = nsmallest(limit, scores.items(), key=lambda item: (-item[1], ids[item[0]]))
+        return [(ids[doc], score) for doc, score in best]
+
+    # ----- Persistence -----
+
+    def save(self, path: Path) -> None:
+        """
+        Write index to a JSON file.
+
+        Documents are renumbered densely in STIX ID order and postings
+        are delta + varint encoded, so equal indexes produce identical
+        bytes regardless of update history.
+        """
+        live = sorted(
+            (doc_id, slot) for slot, doc_id in enumerate(self._doc_ids) if doc_id is not None
+        )
+        renumber = {slot: i for i, (_, slot) in enumerate(live)}
+
+        terms: dict[str, list[str]] = {}
+        for token, term in self._vocab.items():
+            pairs = sorted(
+                (renumber[doc], tf)
+                for doc, tf in zip(self._post_docs[term], self._post_tfs[term])
+            )
+            if not pairs:
+                continue
+            deltas = [pairs[0][0]] + [pairs[i][0] - pairs[i - 1][0] for i in range(1, len(pairs))]
+            terms[token] = [_encode_varints(deltas), _encode_varints(tf for _, tf in pairs)]
+
+        payload = {
+            "format": FORMAT_NAME,
+            "version": FORMAT_VERSION,
+            "k1": self.k1,
+            "b": self.b,
+            "docs": [
+                [doc_id, self._doc_types[slot], self._doc_modified[slot], self._doc_lens[slot]]
+                for doc_id, slot in live
+            ],
+            "terms": terms,
+        }
+        path.write_text(json.dumps(payload, sort_keys=True, separators=(",", ":")), encoding="utf-8")
+
+    @classmethod
+    def load(cls, path: Path) -> "TextIndex":
+        """
+        Read index written by ``save()``.
+
+        Raises:
+            FileNotFoundError: If path doesn't exist
+            ValueError: If file is not a supported text index
+        """
+        payload = json.loads(path.read_text(encoding="utf-8"))
+        if payload.get("format") != FORMAT_NAME or payload.get("version") != FORMAT_VERSION:
+            raise ValueError(f"Unsupported text index format: {path}")
+
+        index = cls(k1=payload["k1"], b=payload["b"])
+        doc_terms: list[list[int]] = []
+        for doc_id, doc_type, modified, length in payload["docs"]:
+            index._slots[doc_id] = len(index._doc_ids)
+            index._doc_ids.append(doc_id)
+            index._doc_types.append(doc_type)
+            index._doc_modified.append(modified)
+            index._doc_lens.append(length)
+            index._total_len += length
+            doc_terms.append([])
+
+        for token in sorted(payload["terms"]):
+            encoded_docs, encoded_tfs = payload["terms"][token]
+            term = index._vocab[token] = len(index._post_docs)
+            docs = _decode_varints(encoded_docs, "I")
+            for i in range(1, len(docs)):
+                docs[i] += docs[i - 1]
+            index._post_docs.append(docs)
+            index._post_tfs.append(_decode_varints(encoded_tfs, "H"))
+            for doc in docs:
+                doc_terms[doc].append(term)
+
+        index._doc_terms = [array("I", terms) for terms in doc_terms]
+        return index
+
@@ -0,0 +1,468 @@
+"""
+Vector similarity index
+
+Dense embeddings of technique names and descriptions for candidate
+mapping: internal detections or D3FEND definitions are embedded and
+ranked against every ATT&CK technique by cosine similarity. The default
+embedder hashes token n-grams with TF-IDF weights, so the index is
+built and queried entirely offline.
+"""
+
+import hashlib
+import json
+import math
+from collections import Counter
+from pathlib import Path
+from typing import Any, Iterable, Protocol, Sequence
+
+import numpy as np
+
+from ..ingestion.output import replace_atomically
+from .text import tokenize
+
+# Object types embedded by default (candidate mapping targets techniques)
+VECTOR_INDEX_TYPES = {"attack-pattern"}
+
+FORMAT_NAME = "orbit-vector-index"
+FORMAT_VERSION = 1
+
+METADATA_FILENAME = "index.json"
+VECTORS_FILENAME = "vectors.npy"
+
+# Queries scored per matrix product; bounds the (queries x documents)
+# score matrix to QUERY_BATCH * len(index) floats
+QUERY_BATCH = 256
+
+
+class Embedder(Protocol):
+    """
+    Protocol for text embedders.
+
+    ``name`` is persisted with the index and checked on load, so vectors
+    are never compared against queries from a different model. Embedders
+    may also define ``fit(texts)``; ``VectorIndex.build()`` calls it on
+    the indexed documents.
+    """
+
+    name: str
+    dim: int
+
+    def embed(self, texts: Sequence[str]) -> np.ndarray:
+        """Embed texts as a (len(texts), dim) float array."""
+        ...
+
+
+def document_text(obj: dict[str, Any]) -> str:
+    """Text embedded for an object: name, aliases and description."""
+    parts = [obj.get("name") or ""]
+    parts.extend(obj.get("aliases") or [])
+    parts.extend(obj.get("x_mitre_aliases") or [])
+    parts.append(obj.get("description") or "")
+    return "\n".join(parts)
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    """L2-normalise rows in place (zero rows stay zero)."""
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    vectors /= norms
+    return vectors
+
+
+class HashingEmbedder:
+    """
+    TF-IDF over hashed token n-grams.
+
+    Tokens (see ``indexes.text.tokenize``) and their n-grams are hashed
+    into ``dim`` signed buckets, so there is no vocabulary to store and
+    unseen words still embed. Term frequencies are dampened
+    (1 + log tf) and weighted by per-bucket IDF learned in ``fit()``;
+    before fitting every bucket weighs 1.
+
+    Args:
+        dim: Vector dimension (number of hash buckets)
+        ngrams: Longest token n-gram hashed (1 = words only)
+        idf: Per-bucket IDF weights from an earlier ``fit()``
+    """
+
+    name = "hashing"
+
+    def __init__(self, dim: int = 2048, ngrams: int = 2, idf: Sequence[float] | None = None):
+        if dim < 1 or ngrams < 1:
+            raise ValueError("dim and ngrams must be positive")
+        self.dim = dim
+        self.ngrams = ngrams
+        self.idf = None if idf is None else np.asarray(idf, dtype=np.float32)
+        if self.idf is not None and self.idf.shape != (dim,):
+            raise ValueError(f"Expected {dim} IDF weights, got {self.idf.shape[0]}")
+        self._buckets: dict[str, tuple[int, float]] = {}
+
+    def _features(self, text: str) -> list[str]:
+        tokens = tokenize(text)
+        features = list(tokens)
+        for n in range(2, self.ngrams + 1):
+            features.extend(" ".join(tokens[i : i + n]) for i in range(len(tokens) - n + 1))
+        return features
+
+    def _bucket(self, feature: str) -> tuple[int, float]:
+        """Bucket and sign for a feature (stable across processes, unlike hash())."""
+        bucket = self._buckets.get(feature)
+        if bucket is None:
+            digest = hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest()
+            h = int.from_bytes(digest, "little")
+            bucket = self._buckets[feature] = (h % self.dim, 1.0 if h >> 63 else -1.0)
+        return bucket
+
+    def fit(self, texts: Sequence[str]) -> "HashingEmbedder":
+        """Learn smoothed IDF weights ``log((1 + n) / (1 + df)) + 1`` per bucket."""
+        df = np.zeros(self.dim, dtype=np.float64)
+        cached = self._buckets
+        for text in texts:
+            features = set(self._features(text))
+            buckets = {(cached.get(f) or self._bucket(f))[0] for f in features}
+            df[list(buckets)] += 1
+        self.idf = (np.log((1.0 + len(texts)) / (1.0 + df)) + 1.0).astype(np.float32)
+        return self
+
+    def embed(self, texts: Sequence[str]) -> np.ndarray:
+        """Embed texts as a (len(texts), dim) float32 array (not normalised)."""
+        rows: list[int] = []
+        buckets: list[int] = []
+        weights: list[float] = []
+        cached = self._buckets
+        for row, text in enumerate(texts):
+            for feature, tf in Counter(self._features(text)).items():
+                bucket, sign = cached.get(feature) or self._bucket(feature)
+                rows.append(row)
+                buckets.append(bucket)
+                weights.append(sign * (1.0 + math.log(tf)) if tf > 1 else sign)
+
+        vectors = np.zeros((len(texts), self.dim), dtype=np.float32)
+        np.add.at(vectors, (rows, buckets), np.asarray(weights, dtype=np.float32))
+        if self.idf is not None:
+            vectors *= self.idf
+        return vectors
+
+    def to_dict(self) -> dict[str, Any]:
+        """JSON-serialisable configuration and fitted weights."""
+        return {
+            "name": self.name,
+            "dim": self.dim,
+            "ngrams": self.ngrams,
+            "idf": None if self.idf is None else self.idf.tolist(),
+        }
+
+    @classmethod
+    def from_dict(cls, payload: dict[str, Any]) -> "HashingEmbedder":
+        """Recreate an embedder saved by ``to_dict()``."""
+        return cls(dim=payload["dim"], ngrams=payload["ngrams"], idf=payload["idf"])
+
+
+class VectorIndex:
+    """
+    Normalised float32 embeddings with batched top-k cosine search.
+
+    Vectors are rows of one (documents x dim) array, so a batch of
+    queries is scored with a single matrix product. Documents are keyed
+    by STIX ID; ``update()`` re-embeds only objects whose ``modified``
+    timestamp changed.
+
+    Persisted form is a directory holding ``vectors.npy`` (memory-mapped
+    read-only on load, so the OS shares pages between processes) and
+    ``index.json`` with document metadata and the embedder config.
+    """
+
+    def __init__(self, embedder: Embedder | None = None):
+        self.embedder = embedder if embedder is not None else HashingEmbedder()
+        self._ids: list[str] = []
+        self._types: list[str] = []
+        self._modified: list[str | None] = []
+        self._slots: dict[str, int] = {}
+        self._vectors = np.zeros((0, self.embedder.dim), dtype=np.float32)
+
+    @classmethod
+    def build(
+        cls,
+        objects: Iterable[dict[str, Any]],
+        embedder: Embedder | None = None,
+        types: set[str] | None = None,
+    ) -> "VectorIndex":
+        """
+        Build index from validated objects.
+
+        Embedders defining ``fit()`` are fitted on the indexed documents
+        first; ``update()`` never refits, so later vectors stay comparable.
+
+        Args:
+            objects: Validated STIX objects
+            embedder: Text embedder (default: HashingEmbedder)
+            types: Object types to index (default: VECTOR_INDEX_TYPES)
+
+        Returns:
+            VectorIndex
+        """
+        index = cls(embedder)
+        wanted = VECTOR_INDEX_TYPES if types is None else types
+        selected = sorted(
+            (obj for obj in objects if obj.get("type") in wanted), key=lambda obj: obj["id"]
+        )
+        texts = [document_text(obj) for obj in selected]
+        fit = getattr(index.embedder, "fit", None)
+        if fit is not None:
+            fit(texts)
+
+        index._vectors = index._embed(texts)
+        for obj in selected:
+            index._append_metadata(obj)
+        return index
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def __contains__(self, stix_id: object) -> bool:
+        return stix_id in self._slots
+
+    @property
+    def ids(self) -> list[str]:
+        """STIX IDs in row order."""
+        return self._ids
+
+    def vector(self, stix_id: str) -> np.ndarray:
+        """
+        Normalised embedding of an indexed object.
+
+        Raises:
+            KeyError: If the object is not indexed
+        """
+        if stix_id not in self._slots:
+            raise KeyError(f"Not in vector index: {stix_id}")
+        return self._vectors[self._slots[stix_id]]
+
+    def _embed(self, texts: Sequence[str]) -> np.ndarray:
+        if not texts:
+            return np.zeros((0, self.embedder.dim), dtype=np.float32)
+        vectors = np.asarray(self.embedder.embed(texts), dtype=np.float32)
+        if vectors.shape != (len(texts), self.embedder.dim):
+            raise ValueError(
+                f"Embedder returned shape {vectors.shape}, "
+                f"expected {(len(texts), self.embedder.dim)}"
+            )
+        if not vectors.flags.writeable or not vectors.flags.owndata:
+            vectors = vectors.copy()
+        return _normalize(vectors)
+
+    def _append_metadata(self, obj: dict[str, Any]) -> None:
+        self._slots[obj["id"]] = len(self._ids)
+        self._ids.append(obj["id"])
+        self._types.append(obj.get("type"))
+        self._modified.append(obj.get("modified"))
+
+    # ----- Mutation -----
+
+    def update(
+        self,
+        objects: Iterable[dict[str, Any]],
+        types: set[str] | None = None,
+    ) -> int:
+        """
+        Incrementally embed new or changed objects.
+
+        Objects already indexed with the same ``modified`` timestamp are
+        skipped; changed objects are re-embedded in place and new ones
+        appended, all in one embedder call.
+
+        Args:
+            objects: Validated STIX objects (new or changed)
+            types: Object types to index (default: VECTOR_INDEX_TYPES)
+
+        Returns:
+            Number of documents added or re-embedded
+        """
+        wanted = VECTOR_INDEX_TYPES if types is None else types
+        changed: list[int] = []
+        changed_texts: list[str] = []
+        changed_modified: list[str | None] = []
+        added: list[dict[str, Any]] = []
+        for obj in sorted(objects, key=lambda obj: obj["id"]):
+            if obj.get("type") not in wanted:
+                continue
+            slot = self._slots.get(obj["id"])
+            if slot is None:
+                added.append(obj)
+            elif self._modified[slot] != obj.get("modified"):
+                changed.append(slot)
+                changed_texts.append(document_text(obj))
+                changed_modified.append(obj.get("modified"))
+
+        texts = changed_texts + [document_text(obj) for obj in added]
+        if not texts:
+            return 0
+
+        vectors = self._embed(texts)
+        if not self._vectors.flags.writeable:
+            self._vectors = np.array(self._vectors)  # detach from a read-only memmap
+        self._vectors[changed] = vectors[: len(changed)]
+        # Only now: a failed embedding leaves these objects due for re-embedding
+        for slot, modified in zip(changed, changed_modified):
+            self._modified[slot] = modified
+        if added:
+            self._vectors = np.concatenate([self._vectors, vectors[len(changed) :]])
+            for obj in added:
+                self._append_metadata(obj)
+        return len(texts)
+
+    def remove(self, stix_ids: Iterable[str]) -> int:
+        """
+        Remove documents by STIX ID.
+
+        Returns:
+            Number of documents removed (unknown IDs are ignored)
+        """
+        drop = {self._slots[stix_id] for stix_id in stix_ids if stix_id in self._slots}
+        if not drop:
+            return 0
+        keep = [slot for slot in range(len(self._ids)) if slot not in drop]
+        self._vectors = self._vectors[keep]
+        self._ids = [self._ids[slot] for slot in keep]
+        self._types = [self._types[slot] for slot in keep]
+        self._modified = [self._modified[slot] for slot in keep]
+        self._slots = {stix_id: slot for slot, stix_id in enumerate(self._ids)}
+        return len(drop)
+
+    # ----- Query -----
+
+    def search(
+        self,
+        text: str,
+        k: int = 10,
+        types: set[str] | None = None,
+    ) -> list[tuple[str, float]]:
+        """
+        Rank indexed objects by cosine similarity to a text.
+
+        Args:
+            text: Free text (detection description, D3FEND definition, ...)
+            k: Maximum number of results
+            types: Restrict results to these object types
+
+        Returns:
+            List of (STIX ID, cosine similarity), best first; ties broken
+            by STIX ID. Objects with no positive similarity are omitted.
+        """
+        return self.search_batch([text], k=k, types=types)[0]
+
+    def search_batch(
+        self,
+        texts: Sequence[str],
+        k: int = 10,
+        types: set[str] | None = None,
+    ) -> list[list[tuple[str, float]]]:
+        """
+        Rank indexed objects against many texts at once.
+
+        Queries are embedded in one call and scored ``QUERY_BATCH`` at a
+        time with a matrix product against all vectors; per-query top-k
+        selection uses ``argpartition`` rather than a full sort.
+
+        Returns:
+            One ``search()`` result list per text, in input order
+        """
+        n = len(self._ids)
+        if n == 0 or k <= 0:
+            return [[] for _ in texts]
+
+        queries = self._embed(texts)
+        allowed = None
+        if types is not None:
+            allowed = np.fromiter((t in types for t in self._types), dtype=bool, count=n)
+
+        ids = self._ids
+        results: list[list[tuple[str, float]]] = []
+        for start in range(0, len(queries), QUERY_BATCH):
+            scores = queries[start : start + QUERY_BATCH] @ self._vectors.T
+            if allowed is not None:
+                scores[:, ~allowed] = 0.0
+            top = min(k, n)
+            candidates = np.argpartition(-scores, top - 1, axis=1)[:, :top]
+            for row, columns in zip(scores, candidates):
+                hits = [(ids[col], float(row[col])) for col in columns.tolist() if row[col] > 0]
+                hits.sort(key=lambda hit: (-hit[1], hit[0]))
+                results.append(hits)
+        return results
+
+    # ----- Persistence -----
+
+    def save(self, directory: Path) -> None:
+        """
+        Write index to a directory (created if missing).
+
+        Rows are written in STIX ID order, so equal indexes produce
+        identical files regardless of update history. Each file is
+        replaced atomically.
+        """
+        order = sorted(range(len(self._ids)), key=self._ids.__getitem__)
+        vectors = np.ascontiguousarray(self._vectors[order], dtype=np.float32)
+        to_dict = getattr(self.embedder, "to_dict", None)
+        embedder = to_dict() if to_dict is not None else {"name": self.embedder.name}
+        payload = {
+            "format": FORMAT_NAME,
+            "version": FORMAT_VERSION,
+            "embedder": {**embedder, "dim": self.embedder.dim},
+            "docs": [[self._ids[i], self._types[i], self._modified[i]] for i in order],
+        }
+
+        def write_vectors(tmp: Path) -> None:
+            with tmp.open("wb") as f:
+                np.save(f, vectors)
+
+        directory.mkdir(parents=True, exist_ok=True)
+        replace_atomically(directory / VECTORS_FILENAME, write_vectors)
+        replace_atomically(
+            directory / METADATA_FILENAME,
+            lambda tmp: tmp.write_text(
+                json.dumps(payload, sort_keys=True, separators=(",", ":")), encoding="utf-8"
+            ),
+        )
+
+    @classmethod
+    def load(cls, directory: Path, embedder: Embedder | None = None) -> "VectorIndex":
+        """
+        Read index written by ``save()``, memory-mapping the vectors.
+
+        Args:
+            directory: Directory passed to ``save()``
+            embedder: Embedder the index was built with; may be omitted
+                for the default HashingEmbedder, which is restored from
+                the saved config
+
+        Raises:
+            FileNotFoundError: If the index files don't exist
+            ValueError: If the files are not a supported vector index or
+                the embedder doesn't match the one used to build it
+        """
+        payload = json.loads((directory / METADATA_FILENAME).read_text(encoding="utf-8"))
+        if payload.get("format") != FORMAT_NAME or payload.get("version") != FORMAT_VERSION:
+            raise ValueError(f"Unsupported vector index format: {directory}")
+
+        config = payload["embedder"]
+        if embedder is None:
+            if config["name"] != HashingEmbedder.name:
+                raise ValueError(
+                    f"Vector index was built with embedder {config['name']!r}; pass it to load()"
+                )
+            embedder = HashingEmbedder.from_dict(config)
+        elif embedder.name != config["name"] or embedder.dim != config["dim"]:
+            raise ValueError(
+                f"Embedder mismatch: index built with {config['name']!r} (dim {config['dim']}), "
+                f"got {embedder.name!r} (dim {embedder.dim})"
+            )
+
+        vectors = np.load(directory / VECTORS_FILENAME, mmap_mode="r")
+        if vectors.shape != (len(payload["docs"]), config["dim"]) or vectors.dtype != np.float32:
+            raise ValueError(f"Vector file doesn't match index metadata: {directory}")
+
+        index = cls(embedder)
+        for stix_id, doc_type, modified in payload["docs"]:
+            index._append_metadata({"id": stix_id, "type": doc_type, "modified": modified})
+        index._vectors = vectors
+        return index
@@ -5,6 +5,16 @@ Single entrypoint for all threat intelligence data ingestion.
 Orchestrates adapter → validation → output flow.
 """
 
-from .pipeline import ingest, IngestConfig, IngestResult
+from .pipeline import ingest, IngestConfig, IngestResult, StageHook
+from .shards import ingest_sharded
+from .watch import Watcher, WatchedSource
 
-__all__ = ["ingest", "IngestConfig", "IngestResult"]
+__all__ = [
+    "ingest",
+    "ingest_sharded",
+    "IngestConfig",
+    "IngestResult",
+    "StageHook",
+    "Watcher",
+    "WatchedSource",
+]
@@ -0,0 +1,175 @@
+"""
+Ingestion checkpoints
+
+Durable progress markers that let an interrupted ingest resume instead
+of starting over. A checkpoint directory holds:
+
+    checkpoint_dir/
+    ├── checkpoint.json     # run key, validation result, source offsets,
+    │                       # batches written
+    └── validated.ndjson    # validated objects, once validation finished
+
+Every file is fsynced before it is renamed into place, so a marker
+never refers to data that a crash could lose. A checkpoint only applies
+to the run it was made for: its key covers the input file (path, size,
+mtime) and every option that changes the validated objects or the
+batch plan.
+"""
+
+import hashlib
+import json
+import os
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Iterable, Iterator, Mapping
+
+from ..adapters.projection import SourceOffsets
+from .output import dump_object, read_objects, replace_atomically
+
+FORMAT_NAME = "orbit-checkpoint"
+FORMAT_VERSION = 2  # 2: source offsets of lazy projections
+
+CHECKPOINT_FILENAME = "checkpoint.json"
+VALIDATED_FILENAME = "validated.ndjson"
+
+
+def _replace_durably(path: Path, write) -> None:
+    """Like ``replace_atomically``, but fsync the data before the rename."""
+
+    def _write(tmp: Path) -> None:
+        write(tmp)
+        with tmp.open("rb") as f:
+            os.fsync(f.fileno())
+
+    replace_atomically(path, _write)
+
+
+def checkpoint_key(data_path: Path, options: Mapping[str, Any]) -> str:
+    """
+    Identify a run by its input file and options.
+
+    Args:
+        data_path: Source data file
+        options: JSON-serialisable settings affecting the run's output
+
+    Returns:
+        Hex digest; equal only for the same input file state and options
+    """
+    stat = data_path.stat()
+    identity = {
+        "path": str(data_path.resolve()),
+        "size": stat.st_size,
+        "mtime_ns": stat.st_mtime_ns,
+        "options": options,
+    }
+    return hashlib.sha256(json.dumps(identity, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+@dataclass
+class Checkpoint:
+    """Progress of one ingest run."""
+
+    key: str
+    validated: bool = False  # validated.ndjson holds the run's objects
+    errors: list[str] = field(default_factory=list)
+    # SourceOffsets.to_dict() of a lazily projected run (see adapters.Projection)
+    source_offsets: dict[str, Any] | None = None
+    written_batches: int = 0  # graph batches committed (see graph.GraphWriter.plan)
+
+
+class CheckpointStore:
+    """
+    Reads and writes the checkpoint of a directory.
+
+    Args:
+        directory: Checkpoint directory (created on first save)
+    """
+
+    def __init__(self, directory: Path):
+        self.directory = directory
+
+    @property
+    def _checkpoint_path(self) -> Path:
+        return self.directory / CHECKPOINT_FILENAME
+
+    @property
+    def _validated_path(self) -> Path:
+        return self.directory / VALIDATED_FILENAME
+
+    def load(self, key: str) -> Checkpoint:
+        """
+        Checkpoint for a run, or a fresh one if none matches.
+
+        A checkpoint left by a different run (other input or options) is
+        discarded.
+        """
+        path = self._checkpoint_path
+        if path.exists():
+            payload = json.loads(path.read_text(encoding="utf-8"))
+            if (
+                payload.get("format") == FORMAT_NAME
+                and payload.get("version") == FORMAT_VERSION
+                and payload.get("key") == key
+            ):
+                return Checkpoint(**payload["checkpoint"])
+            self.clear()
+        return Checkpoint(key=key)
+
+    def save(self, checkpoint: Checkpoint) -> None:
+        """Durably record a checkpoint."""
+        payload = {
+            "format": FORMAT_NAME,
+            "version": FORMAT_VERSION,
+            "key": checkpoint.key,
+            "checkpoint": asdict(checkpoint),
+        }
+        self.directory.mkdir(parents=True, exist_ok=True)
+        _replace_durably(
+            self._checkpoint_path,
+            lambda tmp: tmp.write_text(json.dumps(payload, sort_keys=True), encoding="utf-8"),
+        )
+
+    def save_validated(
+        self,
+        checkpoint: Checkpoint,
+        objects: Iterable[Mapping[str, Any]],
+        errors: list[str],
+        source_offsets: SourceOffsets | None = None,
+    ) -> None:
+        """
+        Durably store validated objects, then mark validation done.
+
+        ``source_offsets`` (from a lazy projection) are kept with the
+        checkpoint, so a resumed run can still load dropped fields.
+        """
+
+        def _write(tmp: Path) -> None:
+            with tmp.open("w", encoding="utf-8", newline="\n") as f:
+                for obj in objects:
+                    f.write(dump_object(obj))
+                    f.write("\n")
+
+        self.directory.mkdir(parents=True, exist_ok=True)
+        _replace_durably(self._validated_path, _write)
+        checkpoint.validated = True
+        checkpoint.errors = list(errors)
+        checkpoint.source_offsets = source_offsets.to_dict() if source_offsets is not None else None
+        self.save(checkpoint)
+
+    def validated_objects(self) -> list[dict[str, Any]]:
+        """
+        Objects stored by ``save_validated()``, in their original order.
+
+        Raises:
+            FileNotFoundError: If validation was never checkpointed
+        """
+        return list(self.iter_validated_objects())
+
+    def iter_validated_objects(self) -> Iterator[dict[str, Any]]:
+        """Stream the objects stored by ``save_validated()``."""
+        return read_objects(self._validated_path)
+
+    def clear(self) -> None:
+        """Remove the checkpoint (e.g. once its run completed)."""
+        self._checkpoint_path.unlink(missing_ok=True)
+        self._validated_path.unlink(missing_ok=True)
@@ -0,0 +1,152 @@
+"""
+Ingestion instrumentation
+
+Stage hooks for diagnosing slow or memory-hungry ingests. Each hook is
+passed to ``ingest(config, stage_hook=...)`` and wraps every pipeline
+stage; hooks observe only and never change results.
+"""
+
+import time
+import tracemalloc
+from contextlib import ExitStack, contextmanager
+from dataclasses import dataclass, field
+from typing import Any, Iterator
+
+from .pipeline import StageHook
+
+# Frames from these modules are excluded from allocation reports
+_IGNORED_FRAMES = (
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+    tracemalloc.Filter(False, "<unknown>"),
+)
+
+
+class StageTimer:
+    """
+    Record wall-clock time per stage.
+
+    Example:
+        timer = StageTimer()
+        ingest(config, stage_hook=timer)
+        print(timer.report())
+    """
+
+    def __init__(self) -> None:
+        self.timings: dict[str, float] = {}
+
+    @contextmanager
+    def __call__(self, name: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            self.timings[name] = self.timings.get(name, 0.0) + elapsed
+
+    @property
+    def total(self) -> float:
+        """Total seconds across all recorded stages."""
+        return sum(self.timings.values())
+
+    def report(self) -> str:
+        """Human-readable per-stage timing table."""
+        lines = [f"{'Stage':<12} {'Seconds':>10}", "-" * 23]
+        for name, seconds in self.timings.items():
+            lines.append(f"{name:<12} {seconds:>10.4f}")
+        lines.append(f"{'total':<12} {self.total:>10.4f}")
+        return "\n".join(lines)
+
+
+@dataclass
+class StageMemory:
+    """Memory observed during one stage."""
+
+    peak_bytes: int
+    net_bytes: int
+    top_allocators: list[tracemalloc.StatisticDiff] = field(default_factory=list)
+
+
+class StageMemoryTracer:
+    """
+    Record peak memory and top allocating source lines per stage.
+
+    Starts ``tracemalloc`` on first use if it is not already tracing,
+    and stops it again on ``close()``. Tracing slows ingestion
+    considerably; use for diagnosis only.
+    """
+
+    def __init__(self, top: int = 10, frames: int = 1) -> None:
+        self.top = top
+        self.frames = frames
+        self.stages: dict[str, StageMemory] = {}
+        self._started = False
+
+    @contextmanager
+    def __call__(self, name: str) -> Iterator[None]:
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(self.frames)
+            self._started = True
+
+        before = tracemalloc.take_snapshot().filter_traces(_IGNORED_FRAMES)
+        base, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        try:
+            yield
+        finally:
+            _, peak = tracemalloc.get_traced_memory()
+            after = tracemalloc.take_snapshot().filter_traces(_IGNORED_FRAMES)
+            diffs = after.compare_to(before, "lineno")
+            self.stages[name] = StageMemory(
+                peak_bytes=max(peak - base, 0),
+                net_bytes=sum(d.size_diff for d in diffs),
+                top_allocators=diffs[: self.top],
+            )
+
+    def close(self) -> None:
+        """Stop tracing if this tracer started it."""
+        if self._started:
+            tracemalloc.stop()
+            self._started = False
+
+    def report(self) -> str:
+        """Human-readable per-stage memory report."""
+        lines = []
+        for name, memory in self.stages.items():
+            lines.append(
+                f"[{name}] peak {_format_bytes(memory.peak_bytes)}, "
+                f"net {_format_bytes(memory.net_bytes)}"
+            )
+            for diff in memory.top_allocators:
+                frame = diff.traceback[0]
+                lines.append(
+                    f"  {_format_bytes(diff.size_diff):>10}  "
+                    f"{diff.count_diff:>+8} blocks  {frame.filename}:{frame.lineno}"
+                )
+        return "\n".join(lines)
+
+
+def combine_stage_hooks(*hooks: StageHook) -> StageHook:
+    """
+    Combine several stage hooks into one (entered in the given order).
+    """
+
+    @contextmanager
+    def combined(name: str) -> Iterator[Any]:
+        with ExitStack() as stack:
+            for hook in hooks:
+                stack.enter_context(hook(name))
+            yield
+
+    return combined
+
+
+def _format_bytes(size: int) -> str:
+    """Format a byte count with a binary unit suffix."""
+    value = float(size)
+    for unit in ("B", "KiB", "MiB"):
+        if abs(value) < 1024:
+            return f"{value:.1f} {unit}"
+        value /= 1024
+    return f"{value:.1f} GiB"
@@ -0,0 +1,148 @@
+"""
+Persisted ingestion output
+
+Writes validated objects and their derived indexes to an output
+directory in a deterministic, byte-stable layout.
+"""
+
+import json
+import os
+from pathlib import Path
+from typing import Any, Callable, Iterable, Iterator, Mapping
+
+from ..indexes.crosswalk import SUBCATEGORY_TYPE, Crosswalk
+from ..indexes.external_ids import ExternalIdIndex
+from ..indexes.text import TextIndex
+
+OBJECTS_FILENAME = "objects.ndjson"
+TEXT_INDEX_FILENAME = "text_index.json"
+EXTERNAL_ID_INDEX_FILENAME = "external_ids.json"
+CROSSWALK_FILENAME = "crosswalk.json"
+
+# Identifies one version of a file: replacing it (os.replace) changes the inode
+Signature = tuple[int, int, int]
+
+
+def dump_object(obj: Mapping[str, Any]) -> str:
+    """Serialize one object as a canonical single-line JSON document."""
+    if not isinstance(obj, dict):
+        obj = dict(obj)  # e.g. projected CompactObject
+    return json.dumps(obj, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+
+
+def replace_atomically(path: Path, write: Callable[[Path], Any]) -> None:
+    """
+    Write via a temporary sibling file, then rename over ``path``.
+
+    Readers see either the old file or the complete new one, never a
+    partial write.
+
+    Args:
+        path: Destination file
+        write: Called with the temporary path to write to
+    """
+    tmp = path.with_name(path.name + ".tmp")
+    write(tmp)
+    os.replace(tmp, path)
+
+
+def file_signature(path: Path) -> Signature:
+    """
+    (inode, mtime, size) of a file, for change detection.
+
+    Raises:
+        FileNotFoundError: If path doesn't exist
+    """
+    stat = os.stat(path)
+    return (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+
+
+def write_objects(objects: Iterable[dict[str, Any]], path: Path) -> None:
+    """
+    Write objects as NDJSON (one canonical JSON object per line).
+
+    Args:
+        objects: Validated objects, already in deterministic order
+        path: Destination file (replaced atomically)
+    """
+
+    def _write(tmp: Path) -> None:
+        with tmp.open("w", encoding="utf-8", newline="\n") as f:
+            for obj in objects:
+                f.write(dump_object(obj))
+                f.write("\n")
+
+    replace_atomically(path, _write)
+
+
+def read_objects(path: Path) -> Iterator[dict[str, Any]]:
+    """
+    Stream objects back from an NDJSON file written by ``write_objects()``.
+
+    Raises:
+        FileNotFoundError: If path doesn't exist
+    """
+    with path.open(encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+def write_output(objects: list[dict[str, Any]], output_dir: Path) -> dict[str, Path]:
+    """
+    Persist validated objects and derived indexes.
+
+    Layout::
+
+        output_dir/
+        ├── objects.ndjson     # validated objects, sorted by STIX ID
+        ├── text_index.json    # BM25 full-text index (see indexes.text)
+        ├── external_ids.json  # external ID/URL -> STIX ID (see indexes.external_ids)
+        └── crosswalk.json     # CSF crosswalk tables, if objects include CSF
+                               # subcategories (see indexes.crosswalk)
+
+    Args:
+        objects: Validated objects, already in deterministic order
+        output_dir: Destination directory (created if missing)
+
+    Returns:
+        Mapping of artifact name to written path
+    """
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    # Indexes first: readers (see service.QueryService) reload when
+    # objects.ndjson changes, and must then find matching indexes
+    text_index_path = output_dir / TEXT_INDEX_FILENAME
+    replace_atomically(text_index_path, TextIndex.build(objects).save)
+
+    external_ids_path = output_dir / EXTERNAL_ID_INDEX_FILENAME
+    replace_atomically(external_ids_path, ExternalIdIndex.build(objects).save)
+
+    written = {"text_index": text_index_path, "external_ids": external_ids_path}
+    crosswalk_path = output_dir / CROSSWALK_FILENAME
+    if write_crosswalk(objects, crosswalk_path):
+        written["crosswalk"] = crosswalk_path
+    else:
+        crosswalk_path.unlink(missing_ok=True)  # from an earlier run into this directory
+
+    objects_path = output_dir / OBJECTS_FILENAME
+    write_objects(objects, objects_path)
+
+    return {"objects": objects_path, **written}
+
+
+def write_crosswalk(objects: Iterable[Mapping[str, Any]], path: Path) -> bool:
+    """
+    Build and persist the CSF crosswalk, if objects include CSF subcategories.
+
+    Args:
+        objects: Validated objects (iterated again when they include CSF)
+        path: Destination file (replaced atomically)
+
+    Returns:
+        Whether the crosswalk was written
+    """
+    if not any(obj.get("type") == SUBCATEGORY_TYPE for obj in objects):
+        return False
+    replace_atomically(path, Crosswalk.build(objects).save)
+    return True
@@ -4,29 +4,127 @@ Core ingestion pipeline
 Provides single entrypoint for deterministic data ingestion.
 """
 
+from contextlib import AbstractContextManager, nullcontext
 from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Any
+from typing import TYPE_CHECKING, Any, Callable, Iterable, Iterator
+
+from ..adapters import ObjectFilter, Projection, SourceOffsets, get_adapter
+from ..schemas import ValidationError
+from ..schemas.constraints import (
+    ALLOWED_RELATIONSHIPS,
+    check_relationships,
+    relationship_error,
+    targets_by_source,
+)
+from ..schemas.validators import clear_memos, validate_object
+from .checkpoint import CheckpointStore, checkpoint_key
+from .output import write_output
+from .spill import ObjectSpool, SpilledObjects
+
+if TYPE_CHECKING:
+    from ..graph import GraphWriter
+
+
+# Called with a stage name ("fetch", "normalize", "validate", "stream",
+# "resume", "write", "load");
+# the returned context manager wraps that stage (see ingestion.instrumentation)
+StageHook = Callable[[str], AbstractContextManager[Any]]
+
+
+def _no_stage_hook(name: str) -> AbstractContextManager[Any]:
+    return nullcontext()
 
 
 @dataclass
 class IngestConfig:
-    """Configuration for ingestion operation."""
+    """
+    Configuration for ingestion operation.
+
+    Filter options (``types``, ``domains``, ``exclude_revoked``,
+    ``exclude_deprecated``) and ``projection`` are pushed down into the
+    adapter's parsing loop; see ``adapters.ObjectFilter`` and
+    ``adapters.Projection`` for their exact semantics.
+
+    With ``memory_budget`` set, objects are parsed, validated and
+    accumulated as a stream, spilling sorted runs to disk beyond the
+    budget (see ``ingestion.spill``); results are identical to the
+    in-memory path. The budget covers buffered objects only. Not counted:
+    the ``output_dir`` indexes (text and external-ID indexes are built in
+    memory from every object), the IDs dropped by relationship-pruning
+    filters, collected error messages and the validator memos (see
+    ``schemas.validators``, bounded by ``MEMO_LIMIT`` and cleared after
+    the run).
+    """
 
     source: str
     data_path: Path
     validate: bool = True
     fail_on_invalid: bool = True
+    output_dir: Path | None = None  # Persist validated output + indexes here
+    checkpoint_dir: Path | None = None  # Resume interrupted runs from here
+
+    # Parse-time filters
+    types: set[str] | None = None  # STIX types to keep
+    domains: set[str] | None = None  # x_mitre_domains to keep
+    exclude_revoked: bool = False
+    exclude_deprecated: bool = False
+
+    # Parse-time field projection (e.g. adapters.STRUCTURE_ONLY)
+    projection: Projection | None = None
+
+    # Share repeated strings/sub-objects across objects (see adapters.InternPool).
+    # Opt-in: shared sub-objects make results read-only, since mutating one
+    # object would change others. Ignored under a memory budget, where
+    # objects are held as JSON text
+    intern_values: bool = False
+
+    # Approximate bytes of validated objects held in memory, not counting
+    # indexes or per-run ID sets (None = no limit)
+    memory_budget: int | None = None
+    spill_dir: Path | None = None  # Where spilled runs go (default: system temp)
+
+    def object_filter(self) -> ObjectFilter | None:
+        """Parse-time filter built from the filter options, or None."""
+        object_filter = ObjectFilter(
+            types=frozenset(self.types) if self.types is not None else None,
+            domains=frozenset(self.domains) if self.domains is not None else None,
+            exclude_revoked=self.exclude_revoked,
+            exclude_deprecated=self.exclude_deprecated,
+        )
+        return object_filter if object_filter.is_active else None
+
+    def checkpoint_options(self) -> dict[str, Any]:
+        """Options that change the validated objects, for ``checkpoint_key()``."""
+        projection = self.projection
+        return {
+            "source": self.source,
+            "validate": self.validate,
+            "types": sorted(self.types) if self.types is not None else None,
+            "domains": sorted(self.domains) if self.domains is not None else None,
+            "exclude_revoked": self.exclude_revoked,
+            "exclude_deprecated": self.exclude_deprecated,
+            "projection": None
+            if projection is None
+            else {
+                "fields": {t: sorted(f) for t, f in projection.fields.items()},
+                "keep_refs": projection.keep_refs,
+            },
+        }
 
 
 @dataclass
 class IngestResult:
     """Result of ingestion operation."""
 
+    # A SpilledObjects stream (iterable, sized) under a memory budget
     objects: list[dict[str, Any]]
     errors: list[str] = field(default_factory=list)
     metadata: dict[str, Any] = field(default_factory=dict)
 
+    # Byte spans for loading fields dropped by a lazy projection
+    source_offsets: SourceOffsets | None = None
+
     @property
     def is_valid(self) -> bool:
         """Check if ingestion completed without errors."""
@@ -38,14 +136,176 @@ class IngestResult:
         return len(self.objects)
 
 
-def ingest(config: IngestConfig) -> IngestResult:
+def validate_objects(
+    objects: list[dict[str, Any]],
+) -> tuple[list[dict[str, Any]], list[str]]:
+    """
+    Validate normalized objects against the schema layer.
+
+    Each object's full body is checked by the compiled validator for its
+    type (see ``schemas.validators``).
+
+    Args:
+        objects: Normalized (unvalidated) objects from an adapter
+
+    Returns:
+        Tuple of (valid objects, error messages). Each error message
+        names the offending object ID and the failure reason.
+    """
+    valid: list[dict[str, Any]] = []
+    errors: list[str] = []
+
+    for obj in objects:
+        try:
+            validate_object(obj)
+        except ValidationError as e:
+            errors.append(f"{obj.get('id', '<missing id>')}: {e}")
+            continue
+        valid.append(obj)
+
+    return valid, errors
+
+
+def _is_pruned(obj: dict[str, Any], dropped_ids: set[str]) -> bool:
+    return obj.get("type") == "relationship" and (
+        obj.get("source_ref") in dropped_ids or obj.get("target_ref") in dropped_ids
+    )
+
+
+def _stream_within_budget(
+    config: IngestConfig, adapter: Any
+) -> tuple[SpilledObjects, list[str]]:
+    """
+    Fetch, normalize and validate as one stream under ``config.memory_budget``.
+
+    Produces the same objects and errors, in the same order, as the
+    in-memory path:
+
+    - Filters that prune relationships need every dropped ID before the
+      first relationship is judged, so the source is parsed twice (the
+      first pass only collects dropped IDs). Single-pass adapters (a
+      TAXII poll could return different objects the second time) are
+      read once into an ``ObjectSpool`` that is then replayed instead.
+    - Relationship endpoints are typed by their STIX ID prefix, which
+      validation has already checked against each object's type.
+    - Body errors precede relationship errors, each in source order.
+
+    Adapters without ``iter_objects()`` are fetched and normalized as
+    usual; only their validated objects are budgeted.
+
+    Only the objects added to the returned ``SpilledObjects`` count
+    against the budget; ``dropped_ids``, the error lists and the
+    validator memos grow with the input alongside them.
+    """
+    objects = SpilledObjects(config.memory_budget, config.spill_dir)
+    object_filter = config.object_filter()
+    iter_objects = getattr(adapter, "iter_objects", None)
+
+    dropped_ids: set[str] = set()
+    spool = None
+    if iter_objects is None:
+        stream = adapter.normalize(adapter.fetch(config.data_path))
+    elif object_filter is None or not object_filter.prunes_relationships:
+        stream = iter_objects(config.data_path, set())
+    elif getattr(adapter, "single_pass", False):
+        spool = _spool(iter_objects(config.data_path, dropped_ids), config.spill_dir)
+        stream = _replay(spool, config.projection)
+    else:
+        for _ in iter_objects(config.data_path, dropped_ids):
+            pass
+        stream = iter_objects(config.data_path, set())
+
+    allowed_targets = targets_by_source(ALLOWED_RELATIONSHIPS)
+    errors: list[str] = []
+    relationship_errors: list[str] = []
+    try:
+        for obj in stream:
+            if dropped_ids and _is_pruned(obj, dropped_ids):
+                continue
+            if config.validate:
+                try:
+                    validate_object(obj)
+                except ValidationError as e:
+                    errors.append(f"{obj.get('id', '<missing id>')}: {e}")
+                    continue
+                if obj.get("type") == "relationship":
+                    error = relationship_error(obj, allowed_targets, {})
+                    if error is not None:
+                        relationship_errors.append(error)
+                        continue
+            objects.add(obj)
+    except BaseException:
+        objects.close()
+        raise
+    finally:
+        if spool is not None:
+            spool.close()
+
+    errors.extend(relationship_errors)
+    return objects.finish(), errors
+
+
+def _spool(objects: Iterable[dict[str, Any]], directory: Path | None) -> ObjectSpool:
+    spool = ObjectSpool(directory)
+    try:
+        for obj in objects:
+            spool.add(obj)
+    except BaseException:
+        spool.close()
+        raise
+    return spool.finish()
+
+
+def _replay(spool: ObjectSpool, projection: Projection | None) -> Iterator[dict[str, Any]]:
+    """Spooled objects, re-projected so they validate as they did when fetched."""
+    for obj in spool:
+        yield projection.apply(obj) if projection is not None else obj
+
+
+def _budgeted(objects: Any, config: IngestConfig) -> SpilledObjects:
+    spilled = SpilledObjects(config.memory_budget, config.spill_dir)
+    for obj in objects:
+        spilled.add(obj)
+    return spilled.finish()
+
+
+def ingest(
+    config: IngestConfig,
+    stage_hook: StageHook | None = None,
+    graph: "GraphWriter | None" = None,
+) -> IngestResult:
     """
     Single ingestion entrypoint.
 
-    Orchestrates: adapter fetch → normalize → validate → output
+    Orchestrates: adapter fetch → normalize → validate → output → graph
+
+    Validation checks each object's body, then every relationship's
+    endpoint types against ``schemas.constraints.ALLOWED_RELATIONSHIPS``.
+
+    When ``config.output_dir`` is set, validated objects are written as
+    NDJSON together with derived indexes (see ``ingestion.output``).
+    When ``graph`` is given, they are then loaded into Neo4j.
+
+    When ``config.checkpoint_dir`` is set, progress is recorded there
+    (see ``ingestion.checkpoint``): validated objects once validation
+    finishes, then each graph batch as it commits. Rerunning the same
+    ingest after a crash skips validation and every committed batch;
+    the checkpoint is removed once a run completes.
+
+    Incremental adapters (those with a ``commit()`` method, such as
+    ``adapters.TaxiiAdapter``) are committed only once every other step
+    has succeeded, so their next run starts after this one.
+
+    Validator memos (remembered valid IDs and timestamps, see
+    ``schemas.validators``) only live for the run: they are cleared
+    when it returns, so they do not accumulate across runs in a
+    long-lived process.
 
     Args:
         config: Ingestion configuration
+        stage_hook: Optional instrumentation wrapped around each stage
+            (timing, memory tracing); does not affect results
+        graph: Optional writer loading the validated objects into Neo4j
 
     Returns:
         IngestResult with validated objects or errors
@@ -54,15 +314,135 @@ def ingest(config: IngestConfig) -> IngestResult:
         ValueError: If source is unknown
         ValidationError: If validation fails and fail_on_invalid=True
     """
-    # TODO: Implement full pipeline
-    # 1. Get adapter for source
-    # 2. Fetch raw data
-    # 3. Normalize to internal representation
-    # 4. Validate against schemas
-    # 5. Return deterministic result
+    try:
+        return _ingest(config, stage_hook, graph)
+    finally:
+        clear_memos()
+
+
+def _ingest(
+    config: IngestConfig,
+    stage_hook: StageHook | None,
+    graph: "GraphWriter | None",
+) -> IngestResult:
+    stage = stage_hook or _no_stage_hook
+
+    # 1. Get adapter for source (with filters pushed down into parsing)
+    adapter = get_adapter(
+        config.source,
+        object_filter=config.object_filter(),
+        projection=config.projection,
+        intern_values=config.intern_values,
+    )
+
+    store = checkpoint = None
+    if config.checkpoint_dir is not None:
+        options = config.checkpoint_options()
+        options["batch_size"] = graph.batch_size if graph is not None else None
+        store = CheckpointStore(config.checkpoint_dir)
+        checkpoint = store.load(checkpoint_key(config.data_path, options))
+    resumed = checkpoint is not None and checkpoint.validated
+
+    if resumed:
+        # Steps 2-5 finished in an earlier, interrupted run
+        with stage("resume"):
+            if config.memory_budget is not None:
+                objects = _budgeted(store.iter_validated_objects(), config)
+            else:
+                objects = store.validated_objects()
+            errors = list(checkpoint.errors)
+        if checkpoint.source_offsets is not None:
+            source_offsets = SourceOffsets.from_dict(checkpoint.source_offsets)
+        else:
+            source_offsets = None
+    elif config.memory_budget is not None:
+        # 2-5. Stream, validate and spill sorted runs beyond the budget
+        with stage("stream"):
+            objects, errors = _stream_within_budget(config, adapter)
+            if errors and config.fail_on_invalid:
+                objects.close()
+                raise ValidationError(
+                    f"{len(errors)} invalid object(s) in {config.data_path}:\n"
+                    + "\n".join(errors)
+                )
+            source_offsets = getattr(adapter, "source_offsets", None)
+            if store is not None:
+                store.save_validated(checkpoint, objects, errors, source_offsets)
+    else:
+        # 2. Fetch raw data
+        with stage("fetch"):
+            raw = adapter.fetch(config.data_path)
+
+        # 3. Normalize to internal representation
+        with stage("normalize"):
+            normalized = adapter.normalize(raw)
+
+        # 4. Validate against schemas
+        with stage("validate"):
+            errors: list[str] = []
+            if config.validate:
+                objects, errors = validate_objects(normalized)
+                objects, relationship_errors = check_relationships(objects)
+                errors.extend(relationship_errors)
+            else:
+                objects = list(normalized)
+
+            if errors and config.fail_on_invalid:
+                raise ValidationError(
+                    f"{len(errors)} invalid object(s) in {config.data_path}:\n"
+                    + "\n".join(errors)
+                )
+
+            # 5. Deterministic result (stable ordering by STIX ID)
+            objects.sort(key=lambda obj: obj.get("id", ""))
+
+            source_offsets = getattr(adapter, "source_offsets", None)
+            if store is not None:
+                store.save_validated(checkpoint, objects, errors, source_offsets)
+
+    metadata: dict[str, Any] = {
+        "source": adapter.source_name,
+        "path": str(config.data_path),
+        "object_count": len(objects),
+    }
+    if isinstance(objects, SpilledObjects):
+        metadata["spilled_runs"] = objects.run_count
+
+    # 6. Optionally persist validated output beside its indexes
+    if config.output_dir is not None:
+        with stage("write"):
+            written = write_output(objects, config.output_dir)
+        metadata["outputs"] = {name: str(path) for name, path in written.items()}
+
+    # 7. Optionally load into the graph, checkpointing each batch
+    if graph is not None:
+        skipped = checkpoint.written_batches if checkpoint is not None else 0
+
+        def _batch_committed(written_batches: int) -> None:
+            checkpoint.written_batches = written_batches
+            store.save(checkpoint)
+
+        with stage("load"):
+            loaded = graph.write(
+                objects,
+                skip=skipped,
+                on_batch=_batch_committed if store is not None else None,
+            )
+        metadata["graph"] = {"batches_written": loaded, "batches_skipped": skipped}
+
+    # 8. Let incremental sources advance past what this run ingested
+    # (e.g. TAXII added_after marks); a failed run is fetched again
+    commit = getattr(adapter, "commit", None)
+    if commit is not None:
+        commit()
+
+    if store is not None:
+        metadata["resumed"] = resumed
+        store.clear()
 
     return IngestResult(
-        objects=[],
-        errors=["Pipeline not yet implemented"],
-        metadata={"source": config.source, "path": str(config.data_path)},
+        objects=objects,
+        errors=errors,
+        metadata=metadata,
+        source_offsets=source_offsets,
     )
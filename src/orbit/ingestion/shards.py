@@ -0,0 +1,525 @@
+"""
+Sharded ingestion
+
+Splits one or more STIX bundles into shards of whole objects (by file,
+then by byte range within large files), lets any number of worker
+processes - on this machine or on hosts sharing the directory - parse,
+filter and validate shards independently, and merges their results by
+STIX ID. Coordination needs nothing but a shared directory:
+
+    work_dir/
+    ├── plan.json                 # run key, ingest options, shard list
+    ├── claims/shard-00003.json   # created exclusively by the claiming worker
+    └── results/
+        ├── shard-00003.ndjson    # validated objects, sorted by STIX ID
+        └── shard-00003.json      # errors and dropped IDs; marks completion
+
+A shard result depends only on the shard and the options, so a shard
+processed twice (a stolen claim, a rerun) produces the same files, and
+completed shards are reused when an interrupted run is restarted with
+the same inputs and options.
+
+Merging reproduces the single-process pipeline: objects in (ID, source
+order) order, body errors before relationship errors, relationships to
+filtered-out objects pruned. Objects repeated across inputs (e.g. the
+identity and markings shipped with every ATT&CK domain) are kept once:
+the latest ``modified``, the first seen on ties.
+"""
+
+import heapq
+import json
+import os
+import shutil
+import socket
+import time
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Iterator
+
+from ..adapters import Projection, get_adapter
+from ..adapters.bundle import split_bundle
+from ..adapters.streams import detect_compression
+from ..schemas import ValidationError
+from ..schemas.constraints import ALLOWED_RELATIONSHIPS, relationship_error, targets_by_source
+from ..schemas.validators import clear_memos, validate_object
+from .checkpoint import checkpoint_key
+from .output import dump_object, write_output
+from .pipeline import IngestConfig, IngestResult, StageHook, _no_stage_hook
+
+if TYPE_CHECKING:
+    from ..graph import GraphWriter
+
+FORMAT_NAME = "orbit-shards"
+FORMAT_VERSION = 1
+
+PLAN_FILENAME = "plan.json"
+CLAIMS_DIRNAME = "claims"
+RESULTS_DIRNAME = "results"
+
+DEFAULT_SHARD_BYTES = 64 * 2**20
+
+# Seconds after which another host may take over an unfinished claim
+DEFAULT_LEASE_SECONDS = 900.0
+
+# Seconds between checks for shards still held by other workers
+POLL_INTERVAL = 0.5
+
+
+@dataclass(frozen=True)
+class Shard:
+    """
+    One unit of work: a whole file, or a byte range of its ``objects`` array.
+
+    Attributes:
+        index: Position in the plan; shards are numbered in source order
+        path: Input bundle
+        start: First byte of the range (None = whole file)
+        end: Byte after the range (None = whole file)
+    """
+
+    index: int
+    path: str
+    start: int | None = None
+    end: int | None = None
+
+    @property
+    def name(self) -> str:
+        return f"shard-{self.index:05d}"
+
+    @property
+    def byte_range(self) -> tuple[int, int] | None:
+        return None if self.start is None else (self.start, self.end)
+
+
+@dataclass
+class ShardPlan:
+    """Shards of one run and the ingest options every worker applies."""
+
+    key: str
+    options: dict[str, Any]
+    shards: list[Shard]
+
+    def config(self, data_path: Path) -> IngestConfig:
+        """IngestConfig equivalent to the planned options, for one input."""
+        options = self.options
+        projection = options["projection"]
+        return IngestConfig(
+            source=options["source"],
+            data_path=data_path,
+            validate=options["validate"],
+            types=set(options["types"]) if options["types"] is not None else None,
+            domains=set(options["domains"]) if options["domains"] is not None else None,
+            exclude_revoked=options["exclude_revoked"],
+            exclude_deprecated=options["exclude_deprecated"],
+            projection=None
+            if projection is None
+            else Projection(
+                {t: frozenset(f) for t, f in projection["fields"].items()},
+                keep_refs=projection["keep_refs"],
+            ),
+            intern_values=False,
+        )
+
+    @classmethod
+    def load(cls, work_dir: Path) -> "ShardPlan":
+        """
+        Read the plan of a work directory.
+
+        Raises:
+            FileNotFoundError: If the directory has no plan
+            ValueError: If the plan was written by another format version
+        """
+        payload = json.loads((work_dir / PLAN_FILENAME).read_text(encoding="utf-8"))
+        if payload.get("format") != FORMAT_NAME or payload.get("version") != FORMAT_VERSION:
+            raise ValueError(f"Not an orbit shard plan: {work_dir / PLAN_FILENAME}")
+        return cls(
+            key=payload["key"],
+            options=payload["options"],
+            shards=[Shard(**shard) for shard in payload["shards"]],
+        )
+
+    def save(self, work_dir: Path) -> None:
+        payload = {
+            "format": FORMAT_NAME,
+            "version": FORMAT_VERSION,
+            "key": self.key,
+            "options": self.options,
+            "shards": [asdict(shard) for shard in self.shards],
+        }
+        _publish(work_dir / PLAN_FILENAME, json.dumps(payload, sort_keys=True))
+
+
+def _worker_id() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def _publish(path: Path, text: str) -> None:
+    """Atomically replace ``path``; the temporary name is unique per worker."""
+    tmp = path.with_name(f"{path.name}.{_worker_id().replace(':', '-')}.tmp")
+    tmp.write_text(text, encoding="utf-8", newline="\n")
+    os.replace(tmp, path)
+
+
+def plan_shards(
+    config: IngestConfig,
+    work_dir: Path,
+    data_paths: list[Path] | None = None,
+    shard_bytes: int = DEFAULT_SHARD_BYTES,
+) -> ShardPlan:
+    """
+    Split the inputs into shards and record the plan in ``work_dir``.
+
+    Files up to ``shard_bytes`` and compressed files (which cannot be
+    read from an offset) are one shard each; larger files are cut into
+    byte ranges of whole objects (see ``adapters.bundle.split_bundle``),
+    which takes one parsing pass over them. If ``work_dir`` already
+    holds a plan for the same inputs and options, it is kept along with
+    its completed shards; otherwise the directory is reset.
+
+    Args:
+        config: Ingest options (``data_path`` is the input unless
+            ``data_paths`` is given)
+        work_dir: Shared coordination directory (created if missing)
+        data_paths: Input bundles, in precedence order
+        shard_bytes: Target bytes per shard
+
+    Returns:
+        ShardPlan
+
+    Raises:
+        FileNotFoundError: If an input doesn't exist
+        ValueError: If the source cannot be sharded, or a lazy projection
+            is configured
+    """
+    adapter = get_adapter(config.source)
+    # Incremental sources (commit()) poll a service rather than read a file
+    if not hasattr(adapter, "iter_objects") or hasattr(adapter, "commit"):
+        raise ValueError(f"Source '{config.source}' cannot be sharded (STIX bundles only)")
+    if config.projection is not None and config.projection.lazy:
+        raise ValueError("Sharded ingest does not support lazy projection")
+
+    paths = list(data_paths) if data_paths is not None else [config.data_path]
+    for path in paths:
+        if not path.exists():
+            raise FileNotFoundError(f"Input not found: {path}")
+    options = config.checkpoint_options()
+    key = "+".join(checkpoint_key(path, {**options, "shard_bytes": shard_bytes}) for path in paths)
+
+    plan_path = work_dir / PLAN_FILENAME
+    if plan_path.exists():
+        try:
+            existing = ShardPlan.load(work_dir)
+        except (ValueError, KeyError, json.JSONDecodeError):
+            existing = None
+        if existing is not None and existing.key == key:
+            return existing
+
+    for name in (CLAIMS_DIRNAME, RESULTS_DIRNAME):
+        shutil.rmtree(work_dir / name, ignore_errors=True)
+        (work_dir / name).mkdir(parents=True)
+
+    shards: list[Shard] = []
+    for path in paths:
+        resolved = str(path.resolve())
+        if path.stat().st_size <= shard_bytes or detect_compression(path):
+            shards.append(Shard(len(shards), resolved))
+            continue
+        with path.open(encoding="utf-8", newline="") as f:
+            for start, end in split_bundle(f, shard_bytes):
+                shards.append(Shard(len(shards), resolved, start, end))
+
+    plan = ShardPlan(key=key, options=options, shards=shards)
+    plan.save(work_dir)
+    return plan
+
+
+def _result_paths(work_dir: Path, shard: Shard) -> tuple[Path, Path]:
+    results = work_dir / RESULTS_DIRNAME
+    return results / f"{shard.name}.ndjson", results / f"{shard.name}.json"
+
+
+def _claim(work_dir: Path, shard: Shard, lease_seconds: float) -> bool:
+    """
+    Take a shard for this worker.
+
+    A claim left by a process of this host that has exited, or older
+    than ``lease_seconds``, is taken over.
+    """
+    path = work_dir / CLAIMS_DIRNAME / f"{shard.name}.json"
+    claim = json.dumps({"worker": _worker_id(), "claimed_at": time.time()})
+    try:
+        fd = os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY, 0o644)
+    except FileExistsError:
+        try:
+            holder = json.loads(path.read_text(encoding="utf-8"))
+        except (FileNotFoundError, json.JSONDecodeError):
+            return False  # being written or replaced right now
+        host, _, pid = holder["worker"].rpartition(":")
+        expired = time.time() - holder["claimed_at"] > lease_seconds
+        if not expired and not (host == socket.gethostname() and not _is_alive(int(pid))):
+            return False
+        _publish(path, claim)
+        return True
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        f.write(claim)
+    return True
+
+
+def _is_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _error_record(obj: dict[str, Any], message: str) -> dict[str, Any]:
+    refs = [obj.get("source_ref"), obj.get("target_ref")] if obj.get("type") == "relationship" else []
+    return {"message": message, "refs": refs}
+
+
+def process_shard(plan: ShardPlan, shard: Shard, work_dir: Path) -> int:
+    """
+    Parse, filter and validate one shard and publish its result.
+
+    Relationships are not pruned here, as their dropped endpoints may
+    sit in other shards; the shard's dropped IDs are recorded for the
+    merge instead.
+
+    Returns:
+        Number of objects the shard kept
+    """
+    config = plan.config(Path(shard.path))
+    adapter = get_adapter(config.source, object_filter=config.object_filter(), projection=config.projection)
+    allowed_targets = targets_by_source(ALLOWED_RELATIONSHIPS)
+
+    dropped_ids: set[str] = set()
+    entries: list[tuple[str, int, str]] = []
+    errors: list[dict[str, Any]] = []
+    relationship_errors: list[dict[str, Any]] = []
+    stream = adapter.iter_objects(config.data_path, dropped_ids, byte_range=shard.byte_range)
+    try:
+        for seq, obj in enumerate(stream):
+            if config.validate:
+                try:
+                    validate_object(obj)
+                except ValidationError as e:
+                    errors.append(_error_record(obj, f"{obj.get('id', '<missing id>')}: {e}"))
+                    continue
+                if obj.get("type") == "relationship":
+                    error = relationship_error(obj, allowed_targets, {})
+                    if error is not None:
+                        relationship_errors.append(_error_record(obj, error))
+                        continue
+            entries.append((obj.get("id", ""), seq, dump_object(obj)))
+    finally:
+        clear_memos()  # workers process many shards; memos are per shard
+    entries.sort()
+
+    objects_path, summary_path = _result_paths(work_dir, shard)
+    _publish(objects_path, "".join(f"{line}\n" for _, _, line in entries))
+    summary = {
+        "objects": len(entries),
+        "errors": errors,
+        "relationship_errors": relationship_errors,
+        "dropped_ids": sorted(dropped_ids),
+    }
+    _publish(summary_path, json.dumps(summary, sort_keys=True))  # marks the shard done
+    return len(entries)
+
+
+def pending_shards(work_dir: Path, plan: ShardPlan | None = None) -> list[Shard]:
+    """Shards of the plan without a published result."""
+    plan = plan or ShardPlan.load(work_dir)
+    return [shard for shard in plan.shards if not _result_paths(work_dir, shard)[1].exists()]
+
+
+def run_worker(work_dir: Path, lease_seconds: float = DEFAULT_LEASE_SECONDS) -> list[int]:
+    """
+    Process unclaimed shards of a work directory until none are left.
+
+    Safe to run from any number of processes and hosts sharing
+    ``work_dir``. Returns without waiting for shards other workers hold.
+
+    Args:
+        work_dir: Directory prepared by ``plan_shards()``
+        lease_seconds: Age after which another worker's unfinished claim
+            is taken over
+
+    Returns:
+        Indexes of the shards this call processed
+    """
+    plan = ShardPlan.load(work_dir)
+    processed = []
+    for shard in pending_shards(work_dir, plan):
+        if _result_paths(work_dir, shard)[1].exists() or not _claim(work_dir, shard, lease_seconds):
+            continue
+        process_shard(plan, shard, work_dir)
+        processed.append(shard.index)
+    return processed
+
+
+def _read_shard(path: Path, shard: int) -> Iterator[tuple[str, int, int, dict[str, Any]]]:
+    with path.open(encoding="utf-8") as f:
+        for seq, line in enumerate(f):
+            obj = json.loads(line)
+            yield obj.get("id", ""), shard, seq, obj
+
+
+def merge_shards(work_dir: Path) -> tuple[list[dict[str, Any]], list[str], int]:
+    """
+    Merge every shard result of a completed plan.
+
+    Returns:
+        ``(objects, errors, duplicates)``: objects ordered by STIX ID
+        (one per ID), error messages in pipeline order, and the number
+        of repeated objects dropped
+
+    Raises:
+        ValueError: If shards are still pending
+    """
+    plan = ShardPlan.load(work_dir)
+    pending = pending_shards(work_dir, plan)
+    if pending:
+        raise ValueError(f"{len(pending)} shard(s) not processed yet in {work_dir}")
+
+    summaries = []
+    dropped_ids: set[str] = set()
+    for shard in plan.shards:
+        summary = json.loads(_result_paths(work_dir, shard)[1].read_text(encoding="utf-8"))
+        summaries.append(summary)
+        dropped_ids.update(summary["dropped_ids"])
+
+    # Only the pruning predicates drop IDs (see ObjectFilter.admit)
+    def kept(refs: list[str]) -> bool:
+        return not (refs and (refs[0] in dropped_ids or refs[1] in dropped_ids))
+
+    errors = [
+        error["message"]
+        for key in ("errors", "relationship_errors")
+        for summary in summaries
+        for error in summary[key]
+        if kept(error["refs"])
+    ]
+
+    objects: list[dict[str, Any]] = []
+    duplicates = 0
+    streams = [_read_shard(_result_paths(work_dir, shard)[0], shard.index) for shard in plan.shards]
+    for stix_id, _, _, obj in heapq.merge(*streams, key=lambda entry: entry[:3]):
+        if obj.get("type") == "relationship" and not kept([obj.get("source_ref"), obj.get("target_ref")]):
+            continue
+        if objects and stix_id and objects[-1].get("id") == stix_id:
+            duplicates += 1
+            if obj.get("modified", "") > objects[-1].get("modified", ""):
+                objects[-1] = obj
+            continue
+        objects.append(obj)
+    return objects, errors, duplicates
+
+
+def ingest_sharded(
+    config: IngestConfig,
+    work_dir: Path,
+    data_paths: list[Path] | None = None,
+    workers: int | None = None,
+    shard_bytes: int = DEFAULT_SHARD_BYTES,
+    lease_seconds: float = DEFAULT_LEASE_SECONDS,
+    stage_hook: StageHook | None = None,
+    graph: "GraphWriter | None" = None,
+) -> IngestResult:
+    """
+    Sharded equivalent of ``ingest()`` for one or more STIX bundles.
+
+    Plans shards in ``work_dir``, runs ``workers`` local worker processes
+    and works through shards itself, then waits for shards held by other
+    hosts (``orbit shard-worker``) before merging. Rerunning after an
+    interruption reuses completed shards.
+
+    Args:
+        config: Ingest options; ``checkpoint_dir`` and ``memory_budget``
+            are not supported
+        work_dir: Shared coordination directory
+        data_paths: Input bundles (default: ``config.data_path``)
+        workers: Local worker processes besides this one (default: one
+            per CPU beyond the first)
+        shard_bytes: Target bytes per shard
+        lease_seconds: Age after which an unfinished claim is taken over
+        stage_hook: Optional instrumentation around the "plan", "shards",
+            "merge", "write" and "load" stages
+        graph: Optional writer loading the merged objects into Neo4j
+
+    Returns:
+        IngestResult; ``metadata["shards"]`` reports the shard count,
+        shards processed by this process, and duplicates dropped
+
+    Raises:
+        FileNotFoundError: If an input doesn't exist
+        ValueError: If the source cannot be sharded or an option is
+            unsupported
+        ValidationError: If validation fails and fail_on_invalid=True
+    """
+    if config.checkpoint_dir is not None or config.memory_budget is not None:
+        raise ValueError("Sharded ingest does not support checkpoint_dir or memory_budget")
+    stage = stage_hook or _no_stage_hook
+    if workers is None:
+        workers = max((os.cpu_count() or 1) - 1, 0)
+
+    with stage("plan"):
+        plan = plan_shards(config, work_dir, data_paths, shard_bytes)
+
+    with stage("shards"):
+        processed = _run_local_workers(work_dir, workers, lease_seconds)
+        while pending_shards(work_dir, plan):
+            time.sleep(POLL_INTERVAL)
+            processed += run_worker(work_dir, lease_seconds)
+
+    with stage("merge"):
+        objects, errors, duplicates = merge_shards(work_dir)
+        if errors and config.fail_on_invalid:
+            raise ValidationError(
+                f"{len(errors)} invalid object(s) in {len(plan.shards)} shard(s):\n" + "\n".join(errors)
+            )
+
+    paths = data_paths if data_paths is not None else [config.data_path]
+    metadata: dict[str, Any] = {
+        "source": config.source,
+        "path": str(paths[0]),
+        "paths": [str(path) for path in paths],
+        "object_count": len(objects),
+        "shards": {
+            "count": len(plan.shards),
+            "processed_here": len(processed),
+            "duplicates": duplicates,
+        },
+    }
+    if config.output_dir is not None:
+        with stage("write"):
+            written = write_output(objects, config.output_dir)
+        metadata["outputs"] = {name: str(path) for name, path in written.items()}
+    if graph is not None:
+        with stage("load"):
+            loaded = graph.write(objects)
+        metadata["graph"] = {"batches_written": loaded, "batches_skipped": 0}
+
+    return IngestResult(objects=objects, errors=errors, metadata=metadata)
+
+
+def _run_local_workers(work_dir: Path, workers: int, lease_seconds: float) -> list[int]:
+    """Run ``workers`` worker processes alongside this one; returns shards done here."""
+    import multiprocessing
+
+    processes = [
+        multiprocessing.Process(target=run_worker, args=(work_dir, lease_seconds), daemon=True)
+        for _ in range(workers)
+    ]
+    for process in processes:
+        process.start()
+    try:
+        processed = run_worker(work_dir, lease_seconds)
+    finally:
+        for process in processes:
+            process.join()
+    # Claims of local workers that died are taken over (see _claim)
+    return processed + run_worker(work_dir, lease_seconds)
@@ -0,0 +1,171 @@
+"""
+Memory-budgeted object accumulation
+
+Objects are held as canonical JSON lines (see ``output.dump_object``)
+until their size crosses the budget; the buffer is then sorted by STIX
+ID and spilled to a temporary run file. Iterating merges the runs back
+as one stream in (ID, arrival) order, which is exactly the order of a
+stable in-memory sort by ID.
+
+Run file format, one object per line::
+
+    <JSON-encoded id> TAB <arrival number> TAB <canonical JSON object>
+
+``ObjectSpool`` is the unsorted counterpart: a single-pass source (such
+as a TAXII poll) written to disk once, so it can be read again in
+arrival order without fetching it a second time.
+"""
+
+import heapq
+import json
+import shutil
+import tempfile
+import weakref
+from pathlib import Path
+from typing import Any, Iterator, Mapping
+
+from .output import dump_object
+
+# Approximate per-object bookkeeping beyond the JSON text itself
+# (entry tuple, string headers, list slot)
+ENTRY_OVERHEAD = 160
+
+Entry = tuple[str, int, str]  # (id, arrival number, JSON line)
+
+
+def _read_run(path: Path) -> Iterator[Entry]:
+    with path.open(encoding="utf-8") as f:
+        for record in f:
+            stix_id, seq, line = record.rstrip("\n").split("\t", 2)
+            yield json.loads(stix_id), int(seq), line
+
+
+class SpilledObjects:
+    """
+    Objects accumulated under a memory budget, iterated in ID order.
+
+    Call ``add()`` for each object, then ``finish()``; afterwards the
+    collection can be iterated any number of times, each pass streaming
+    a merge of the spilled runs. Iterated objects are fresh dicts parsed
+    from JSON (equal to, but not the same objects as, those added).
+
+    Temporary files are removed by ``close()`` or when the collection is
+    garbage collected.
+
+    Args:
+        budget: Approximate bytes of objects held in memory before
+            spilling
+        directory: Parent directory for run files (default: system temp)
+    """
+
+    def __init__(self, budget: int, directory: Path | None = None):
+        if budget < 1:
+            raise ValueError("memory budget must be positive")
+        self.budget = budget
+        self._dir = Path(tempfile.mkdtemp(prefix="orbit-spill-", dir=directory))
+        self._cleanup = weakref.finalize(self, shutil.rmtree, self._dir, ignore_errors=True)
+        self._buffer: list[Entry] = []
+        self._buffered_bytes = 0
+        self._runs: list[Path] = []
+        self._count = 0
+        self._finished = False
+
+    def add(self, obj: Mapping[str, Any]) -> None:
+        """Add one object, spilling the buffer if it crossed the budget."""
+        if self._finished:
+            raise ValueError("Cannot add objects after finish()")
+        line = dump_object(obj)
+        self._buffer.append((obj.get("id", ""), self._count, line))
+        self._count += 1
+        self._buffered_bytes += len(line) + ENTRY_OVERHEAD
+        if self._buffered_bytes > self.budget:
+            self._spill()
+
+    def _spill(self) -> None:
+        self._buffer.sort()  # (id, arrival) pairs are unique, so lines are never compared
+        path = self._dir / f"run-{len(self._runs):05d}.tsv"
+        with path.open("w", encoding="utf-8", newline="\n") as f:
+            for stix_id, seq, line in self._buffer:
+                f.write(f"{json.dumps(stix_id)}\t{seq}\t{line}\n")
+        self._runs.append(path)
+        self._buffer = []
+        self._buffered_bytes = 0
+
+    def finish(self) -> "SpilledObjects":
+        """Stop accepting objects; the remaining buffer stays in memory."""
+        self._buffer.sort()
+        self._finished = True
+        return self
+
+    @property
+    def run_count(self) -> int:
+        """Number of runs spilled to disk."""
+        return len(self._runs)
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __iter__(self) -> Iterator[dict[str, Any]]:
+        if not self._finished:
+            raise ValueError("Call finish() before iterating")
+        sources = [_read_run(path) for path in self._runs]
+        sources.append(iter(self._buffer))
+        for _, _, line in heapq.merge(*sources):
+            yield json.loads(line)
+
+    def close(self) -> None:
+        """Remove the spilled runs."""
+        self._cleanup()
+
+
+class ObjectSpool:
+    """
+    Objects written to a temporary NDJSON file, replayed in arrival order.
+
+    Nothing is held in memory beyond the file buffer. As with
+    ``SpilledObjects``, iterated objects are fresh dicts parsed from
+    JSON, and the file is removed by ``close()`` or on garbage
+    collection.
+
+    Args:
+        directory: Parent directory for the spool file (default: system temp)
+    """
+
+    def __init__(self, directory: Path | None = None):
+        self._dir = Path(tempfile.mkdtemp(prefix="orbit-spool-", dir=directory))
+        self._cleanup = weakref.finalize(self, shutil.rmtree, self._dir, ignore_errors=True)
+        self._path = self._dir / "objects.ndjson"
+        self._file = self._path.open("w", encoding="utf-8", newline="\n")
+        self._count = 0
+
+    def add(self, obj: Mapping[str, Any]) -> None:
+        """Append one object."""
+        if self._file is None:
+            raise ValueError("Cannot add objects after finish()")
+        self._file.write(dump_object(obj))
+        self._file.write("\n")
+        self._count += 1
+
+    def finish(self) -> "ObjectSpool":
+        """Stop accepting objects and flush them to disk."""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        return self
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __iter__(self) -> Iterator[dict[str, Any]]:
+        if self._file is not None:
+            raise ValueError("Call finish() before iterating")
+        with self._path.open(encoding="utf-8") as f:
+            for line in f:
+                yield json.loads(line)
+
+    def close(self) -> None:
+        """Remove the spool file."""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        self._cleanup()
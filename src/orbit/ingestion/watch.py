@@ -0,0 +1,427 @@
+"""
+Watch mode
+
+Long-running re-ingest of source files as they change. Each watched
+source file is polled for a new (inode, mtime, size) signature; once a
+change has been stable for the debounce period, that source alone is
+re-ingested and published as a new snapshot directory:
+
+    output_root/<source>/
+    ├── current -> snapshots/000003   # what readers (``orbit serve``) load
+    └── snapshots/
+        ├── 000002/                   # previous snapshot
+        └── 000003/
+            ├── objects.ndjson
+            ├── text_index.json
+            ├── external_ids.json
+            └── snapshot.json         # source file signature, delta counts
+
+Only the delta is applied to derived state: the new validated objects
+are compared with the published ones, and the text and external ID
+indexes are updated for added, changed and removed objects instead of
+being rebuilt. A snapshot is complete on disk before the ``current``
+symlink is atomically swapped to it, so readers only ever see whole
+snapshots, and the previous one keeps serving until the swap (and stays
+on disk for readers still loading it).
+"""
+
+import json
+import os
+import shutil
+import threading
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Iterable, Mapping
+
+from ..indexes.external_ids import ExternalIdIndex
+from ..indexes.text import TextIndex
+from ..schemas import ValidationError
+from .output import (
+    CROSSWALK_FILENAME,
+    EXTERNAL_ID_INDEX_FILENAME,
+    OBJECTS_FILENAME,
+    TEXT_INDEX_FILENAME,
+    Signature,
+    dump_object,
+    file_signature,
+    replace_atomically,
+    write_crosswalk,
+)
+from .pipeline import IngestConfig, ingest
+
+FORMAT_NAME = "orbit-watch-snapshot"
+FORMAT_VERSION = 1
+
+CURRENT_LINK = "current"
+SNAPSHOTS_DIRNAME = "snapshots"
+METADATA_FILENAME = "snapshot.json"
+
+DEFAULT_POLL_INTERVAL = 1.0  # seconds between file checks
+DEFAULT_DEBOUNCE = 2.0  # seconds a change must be stable before re-ingesting
+DEFAULT_KEEP = 2  # snapshots kept on disk, current included
+
+
+@dataclass(frozen=True)
+class WatchedSource:
+    """A source adapter and the file it ingests."""
+
+    source: str
+    data_path: Path
+
+
+def default_sources() -> list[WatchedSource]:
+    """ATT&CK at ``STIX_FILE`` (see orbit.config)."""
+    from .. import config
+
+    # d3fend is left out until its adapter is implemented
+    return [WatchedSource("attack", Path(config.STIX_FILE))]
+
+
+@dataclass
+class Publication:
+    """A snapshot published for one source, and its delta from the previous one."""
+
+    source: str
+    path: Path
+    object_count: int
+    added: list[str] = field(default_factory=list)
+    changed: list[str] = field(default_factory=list)
+    removed: list[str] = field(default_factory=list)
+
+
+class SnapshotPublisher:
+    """
+    Publishes validated objects of one source as snapshot directories.
+
+    Keeps the current snapshot's objects, their canonical lines and its
+    text and external ID indexes in memory (loaded from disk on first
+    use), so a publish serializes and re-indexes only new or changed
+    objects.
+
+    Args:
+        source_dir: ``output_root/<source>``
+        keep: Snapshots kept on disk, current included (at least 1)
+    """
+
+    def __init__(self, source_dir: Path, keep: int = DEFAULT_KEEP):
+        self.source_dir = source_dir
+        self.keep = max(keep, 1)
+        self._lines: dict[str, str] | None = None
+        self._objects: dict[str, Mapping[str, Any]] = {}
+        self._text_index: TextIndex | None = None
+        self._external_ids: ExternalIdIndex | None = None
+
+    @property
+    def current(self) -> Path | None:
+        """Directory of the published snapshot, or None before the first publish."""
+        link = self.source_dir / CURRENT_LINK
+        return link.resolve() if link.is_symlink() else None
+
+    def metadata(self) -> dict[str, Any] | None:
+        """``snapshot.json`` of the current snapshot, or None."""
+        current = self.current
+        if current is None:
+            return None
+        try:
+            return json.loads((current / METADATA_FILENAME).read_text(encoding="utf-8"))
+        except FileNotFoundError:
+            return None
+
+    def signature(self) -> Signature | None:
+        """Source file signature the current snapshot was ingested from."""
+        metadata = self.metadata()
+        if metadata is None or metadata.get("signature") is None:
+            return None
+        return tuple(metadata["signature"])
+
+    def _load_current(self) -> None:
+        self._lines, self._objects = {}, {}
+        self._text_index = self._external_ids = None
+        current = self.current
+        if current is None:
+            return
+        with (current / OBJECTS_FILENAME).open(encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    line = line.rstrip("\n")
+                    obj = json.loads(line)
+                    self._lines[obj["id"]] = line
+                    self._objects[obj["id"]] = obj
+        self._text_index = TextIndex.load(current / TEXT_INDEX_FILENAME)
+        if (current / EXTERNAL_ID_INDEX_FILENAME).exists():  # absent in older snapshots
+            self._external_ids = ExternalIdIndex.load(current / EXTERNAL_ID_INDEX_FILENAME)
+
+    def _write_snapshot(
+        self,
+        objects: list[Mapping[str, Any]],
+        lines: dict[str, str],
+        added: list[str],
+        changed: list[str],
+        removed: list[str],
+        payload: dict[str, Any],
+    ) -> Path:
+        """Write a new snapshot directory, point ``current`` at it and prune old ones."""
+        by_id = {obj["id"]: obj for obj in objects}
+        text_index = self._text_index
+        if text_index is None:
+            text_index = TextIndex.build(objects)
+        else:
+            text_index.remove(changed + removed)
+            text_index.update(by_id[stix_id] for stix_id in added + changed)
+        external_ids = self._external_ids
+        if external_ids is None:
+            external_ids = ExternalIdIndex.build(objects)
+        else:
+            external_ids.remove(changed + removed)
+            external_ids.update(by_id[stix_id] for stix_id in added + changed)
+
+        snapshots = self.source_dir / SNAPSHOTS_DIRNAME
+        snapshots.mkdir(parents=True, exist_ok=True)
+        generations = [int(p.name) for p in snapshots.iterdir() if p.name.isdigit()]
+        target = snapshots / f"{max(generations, default=0) + 1:06d}"
+        target.mkdir()
+
+        def write_objects(tmp: Path) -> None:
+            with tmp.open("w", encoding="utf-8", newline="\n") as f:
+                for stix_id in sorted(lines):
+                    f.write(lines[stix_id])
+                    f.write("\n")
+
+        replace_atomically(target / OBJECTS_FILENAME, write_objects)
+        replace_atomically(target / TEXT_INDEX_FILENAME, text_index.save)
+        replace_atomically(target / EXTERNAL_ID_INDEX_FILENAME, external_ids.save)
+        write_crosswalk(objects, target / CROSSWALK_FILENAME)  # small: rebuilt each time
+        _write_metadata(
+            target, {**payload, "added": len(added), "changed": len(changed), "removed": len(removed)}
+        )
+
+        # Swap readers over in one rename, then drop snapshots beyond `keep`
+        link = self.source_dir / CURRENT_LINK
+        tmp_link = link.with_name(link.name + ".tmp")
+        tmp_link.unlink(missing_ok=True)
+        tmp_link.symlink_to(Path(SNAPSHOTS_DIRNAME) / target.name)
+        os.replace(tmp_link, link)
+        self._lines, self._text_index, self._external_ids = lines, text_index, external_ids
+        self._objects = {obj["id"]: obj for obj in objects}
+        stale = sorted((p for p in snapshots.iterdir() if p.name.isdigit()), key=lambda p: int(p.name))
+        for old in stale[: -self.keep]:
+            shutil.rmtree(old, ignore_errors=True)
+        return target
+
+    def publish(
+        self,
+        objects: Iterable[Mapping[str, Any]],
+        signature: Signature | None = None,
+        metadata: Mapping[str, Any] | None = None,
+    ) -> Publication | None:
+        """
+        Publish objects if they differ from the current snapshot.
+
+        Args:
+            objects: Validated objects, sorted by STIX ID
+            signature: Signature of the source file they came from
+            metadata: Extra ``snapshot.json`` fields (source, data path)
+
+        Returns:
+            Publication, or None if nothing changed (the current
+            snapshot's recorded signature is still updated)
+        """
+        if self._lines is None:
+            self._load_current()
+        objects = list(objects)
+        # Equal objects reuse their published line: only new or changed
+        # objects are serialized
+        previous, previous_objects = self._lines, self._objects
+        lines: dict[str, str] = {}
+        added, changed = [], []
+        for obj in objects:
+            stix_id = obj["id"]
+            if previous_objects.get(stix_id) == obj:
+                lines[stix_id] = previous[stix_id]
+                continue
+            lines[stix_id] = line = dump_object(obj)
+            if stix_id not in previous:
+                added.append(stix_id)
+            elif previous[stix_id] != line:
+                changed.append(stix_id)
+        removed = sorted(stix_id for stix_id in previous if stix_id not in lines)
+
+        payload = {
+            **(metadata or {}),
+            "format": FORMAT_NAME,
+            "version": FORMAT_VERSION,
+            "signature": list(signature) if signature is not None else None,
+            "objects": len(lines),
+        }
+        current = self.current
+        if current is not None and not (added or changed or removed):
+            _write_metadata(current, {**(self.metadata() or {}), **payload})
+            return None
+
+        try:
+            target = self._write_snapshot(objects, lines, added, changed, removed, payload)
+        except BaseException:
+            self._lines = None  # reload from the current snapshot
+            raise
+
+        return Publication(
+            source=str(payload.get("source", self.source_dir.name)),
+            path=target,
+            object_count=len(lines),
+            added=sorted(added),
+            changed=sorted(changed),
+            removed=removed,
+        )
+
+
+def _write_metadata(directory: Path, payload: Mapping[str, Any]) -> None:
+    replace_atomically(
+        directory / METADATA_FILENAME,
+        lambda tmp: tmp.write_text(json.dumps(payload, sort_keys=True, indent=2), encoding="utf-8"),
+    )
+
+
+class Watcher:
+    """
+    Polls source files and re-ingests each one when it changes.
+
+    A source is ingested when its file signature differs from the one
+    its current snapshot was built from (or it has no snapshot yet) and
+    has not changed for ``debounce`` seconds, so a file still being
+    written is not ingested half-way. A failed ingest (invalid or
+    unreadable file) keeps the previous snapshot serving; the error is
+    kept in ``errors`` and the source is retried when its file changes
+    again.
+
+    Args:
+        output_root: Root of the per-source snapshot directories
+        sources: Sources to watch (default: ``default_sources()``)
+        debounce: Seconds a new file signature must be stable
+        keep: Snapshots kept on disk per source, current included
+        reload_on_change: Re-ingest sources whose file changes; when
+            off, only sources without a snapshot are ingested (default:
+            ``FORCE_RELOAD_ON_CHANGE``)
+        refresh: Re-ingest every source once at startup even if its
+            snapshot is up to date (default: ``FORCE_REFRESH_DATA``)
+        ingest_options: Extra ``IngestConfig`` fields (filters etc.)
+        on_publish: Called with each Publication
+        on_error: Called with (source, message) for each failed ingest
+        clock: Monotonic time source
+    """
+
+    def __init__(
+        self,
+        output_root: Path,
+        sources: Iterable[WatchedSource] | None = None,
+        debounce: float = DEFAULT_DEBOUNCE,
+        keep: int = DEFAULT_KEEP,
+        reload_on_change: bool | None = None,
+        refresh: bool | None = None,
+        ingest_options: Mapping[str, Any] | None = None,
+        on_publish: Callable[[Publication], None] | None = None,
+        on_error: Callable[[str, str], None] | None = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        if reload_on_change is None or refresh is None:
+            from .. import config
+
+            if reload_on_change is None:
+                reload_on_change = config.FORCE_RELOAD_ON_CHANGE
+            if refresh is None:
+                refresh = config.FORCE_REFRESH_DATA
+        self.output_root = output_root
+        self.sources = list(sources) if sources is not None else default_sources()
+        self.debounce = debounce
+        self.reload_on_change = reload_on_change
+        self.ingest_options = dict(ingest_options or {})
+        self.on_publish = on_publish
+        self.on_error = on_error
+        self.clock = clock
+        self.errors: dict[str, str] = {}
+
+        self._publishers = {
+            watched.source: SnapshotPublisher(output_root / watched.source, keep) for watched in self.sources
+        }
+        # source -> signature last ingested (successfully or not)
+        self._ingested: dict[str, Signature | None] = {
+            source: None if refresh else publisher.signature()
+            for source, publisher in self._publishers.items()
+        }
+        self._pending: dict[str, tuple[Signature, float]] = {}
+
+    def publisher(self, source: str) -> SnapshotPublisher:
+        """Snapshot publisher of a watched source."""
+        return self._publishers[source]
+
+    def _due(self, watched: WatchedSource) -> Signature | None:
+        """Settled new signature of a source's file, if it should be ingested now."""
+        try:
+            signature = file_signature(watched.data_path)
+        except FileNotFoundError:
+            self._pending.pop(watched.source, None)
+            return None
+        ingested = self._ingested[watched.source]
+        if signature == ingested:
+            self._pending.pop(watched.source, None)
+            return None
+        if ingested is not None and not self.reload_on_change:
+            return None
+
+        now = self.clock()
+        pending = self._pending.get(watched.source)
+        if pending is None or pending[0] != signature:
+            self._pending[watched.source] = (signature, now)
+            pending = self._pending[watched.source]
+        if now - pending[1] < self.debounce:
+            return None
+        del self._pending[watched.source]
+        return signature
+
+    def poll(self) -> list[Publication]:
+        """
+        Check every source once, ingesting those whose change has settled.
+
+        Returns:
+            Snapshots published by this poll
+        """
+        published = []
+        for watched in self.sources:
+            signature = self._due(watched)
+            if signature is None:
+                continue
+            self._ingested[watched.source] = signature
+            try:
+                result = ingest(
+                    IngestConfig(source=watched.source, data_path=watched.data_path, **self.ingest_options)
+                )
+                # The file may have been replaced while it was read; the
+                # next poll then sees a new signature and ingests again
+                publication = self._publishers[watched.source].publish(
+                    result.objects,
+                    signature,
+                    {"source": watched.source, "data_path": str(watched.data_path)},
+                )
+            # A half-written or corrupt compressed file surfaces as ValueError
+            # from open_source(); the current snapshot keeps serving
+            except (OSError, ValueError, ValidationError, NotImplementedError) as e:
+                message = f"{type(e).__name__}: {e}"
+                self.errors[watched.source] = message
+                if self.on_error is not None:
+                    self.on_error(watched.source, message)
+                continue
+            self.errors.pop(watched.source, None)
+            if publication is not None:
+                published.append(publication)
+                if self.on_publish is not None:
+                    self.on_publish(publication)
+        return published
+
+    def run(self, interval: float = DEFAULT_POLL_INTERVAL, stop: threading.Event | None = None) -> None:
+        """
+        Poll every ``interval`` seconds until ``stop`` is set (or forever).
+        """
+        stop = stop or threading.Event()
+        while not stop.is_set():
+            self.poll()
+            stop.wait(interval)
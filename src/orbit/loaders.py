@@ -4,9 +4,11 @@ from typing import Any, Dict, List
 
 from pyld import jsonld
 
+from .adapters.streams import open_source
+
 
 def load_stix_bundle(path: Path) -> list[dict[str, Any]]:
-    with path.open(encoding="utf-8") as f:
+    with open_source(path) as f:
         return json.load(f).get("objects", [])
 
 
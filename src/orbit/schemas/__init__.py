@@ -7,6 +7,13 @@ Schemas are contracts - validation is enforced, not optional.
 
 from .base import BaseNode, BaseEdge, ValidationError
 from .stix import STIXObject, STIXRelationship
+from .constraints import (
+    ALLOWED_RELATIONSHIPS,
+    check_relationships,
+    relationship_error,
+    targets_by_source,
+)
+from .validators import FieldSpec, compile_validator, compile_validators, validate_object
 
 __all__ = [
     "BaseNode",
@@ -14,4 +21,12 @@ __all__ = [
     "ValidationError",
     "STIXObject",
     "STIXRelationship",
+    "FieldSpec",
+    "compile_validator",
+    "compile_validators",
+    "validate_object",
+    "ALLOWED_RELATIONSHIPS",
+    "check_relationships",
+    "relationship_error",
+    "targets_by_source",
 ]
@@ -0,0 +1,168 @@
+"""
+Relationship constraints
+
+Declarative table of allowed (source_type, relationship_type,
+target_type) triples, checked over a whole batch in linear time.
+"""
+
+from typing import Any, Iterable, Mapping
+
+Triple = tuple[str, str, str]
+
+_SOFTWARE = ("malware", "tool")
+
+# Types that can be revoked by a newer object of the same type
+_REVOCABLE_TYPES = (
+    "attack-pattern",
+    "campaign",
+    "course-of-action",
+    "intrusion-set",
+    "malware",
+    "tool",
+    "x-mitre-data-component",
+    "x-mitre-data-source",
+)
+
+# ATT&CK relationships (Enterprise, Mobile and ICS share one model)
+ATTACK_RELATIONSHIPS: frozenset[Triple] = frozenset(
+    [("intrusion-set", "uses", target) for target in ("attack-pattern", *_SOFTWARE)]
+    + [("campaign", "uses", target) for target in ("attack-pattern", *_SOFTWARE)]
+    + [(software, "uses", "attack-pattern") for software in _SOFTWARE]
+    + [
+        ("campaign", "attributed-to", "intrusion-set"),
+        ("course-of-action", "mitigates", "attack-pattern"),
+        ("attack-pattern", "subtechnique-of", "attack-pattern"),
+        ("x-mitre-data-component", "detects", "attack-pattern"),
+        ("x-mitre-detection-strategy", "detects", "attack-pattern"),
+        ("attack-pattern", "targets", "x-mitre-asset"),
+    ]
+    + [(stix_type, "revoked-by", stix_type) for stix_type in _REVOCABLE_TYPES]
+)
+
+# D3FEND relationships, named by the local part of their ontology IRI
+# (see config.ENABLES_IRI, D3FEND_DETECTS_IRI, D3FEND_DEPRIVES_IRI)
+D3FEND_RELATIONSHIPS: frozenset[Triple] = frozenset(
+    {
+        ("d3fend-technique", "enables", "d3fend-tactic"),
+        ("d3fend-technique", "detects", "d3fend-artifact"),
+        ("d3fend-technique", "deprives", "d3fend-artifact"),
+        ("d3fend-technique", "counters", "attack-pattern"),
+        ("attack-pattern", "produces", "d3fend-artifact"),
+        ("attack-pattern", "accesses", "d3fend-artifact"),
+        ("attack-pattern", "modifies", "d3fend-artifact"),
+    }
+)
+
+# NIST CSF 2.0 core hierarchy (see adapters.csf)
+CSF_RELATIONSHIPS: frozenset[Triple] = frozenset(
+    {
+        ("csf-category", "part-of", "csf-function"),
+        ("csf-subcategory", "part-of", "csf-category"),
+    }
+)
+
+ALLOWED_RELATIONSHIPS: frozenset[Triple] = (
+    ATTACK_RELATIONSHIPS | D3FEND_RELATIONSHIPS | CSF_RELATIONSHIPS
+)
+
+
+def _endpoint_type(ref: Any, types_by_id: Mapping[str, str]) -> str | None:
+    """Type of a relationship endpoint: from the batch, else the STIX ID prefix."""
+    endpoint_type = types_by_id.get(ref)
+    if endpoint_type is None and isinstance(ref, str):
+        prefix, sep, _ = ref.partition("--")
+        if sep:
+            endpoint_type = prefix
+    return endpoint_type
+
+
+def targets_by_source(allowed: Iterable[Triple]) -> dict[tuple[str, str], set[str]]:
+    """
+    Index allowed triples for ``relationship_error()``.
+
+    Returns:
+        (source_type, relationship_type) -> allowed target types
+    """
+    allowed_targets: dict[tuple[str, str], set[str]] = {}
+    for source_type, relationship_type, target_type in allowed:
+        allowed_targets.setdefault((source_type, relationship_type), set()).add(target_type)
+    return allowed_targets
+
+
+def relationship_error(
+    rel: Mapping[str, Any],
+    allowed_targets: Mapping[tuple[str, str], set[str]],
+    types_by_id: Mapping[str, str],
+) -> str | None:
+    """
+    Check one relationship's triple.
+
+    Used directly by streaming callers that see relationships one at a
+    time; ``check_relationships()`` does the same for a whole batch.
+
+    Args:
+        rel: Relationship object
+        allowed_targets: From ``targets_by_source()``
+        types_by_id: Known object types by STIX ID; other endpoints are
+            typed by their STIX ID prefix
+
+    Returns:
+        Error message naming the relationship ID and the offending
+        triple, or None if the triple is allowed
+    """
+    source_type = _endpoint_type(rel.get("source_ref"), types_by_id)
+    target_type = _endpoint_type(rel.get("target_ref"), types_by_id)
+    relationship_type = rel.get("relationship_type")
+    targets = allowed_targets.get((source_type, relationship_type))
+    if targets is None or target_type not in targets:
+        return (
+            f"{rel.get('id', '<missing id>')}: Relationship not allowed: "
+            f"{source_type} -[{relationship_type}]-> {target_type}"
+        )
+    return None
+
+
+def check_relationships(
+    objects: Iterable[Mapping[str, Any]],
+    allowed: Iterable[Triple] = ALLOWED_RELATIONSHIPS,
+) -> tuple[list[Mapping[str, Any]], list[str]]:
+    """
+    Check every relationship's endpoint types against the allowed triples.
+
+    Builds an id -> type map in one pass over the batch, then checks each
+    relationship with two dict lookups: O(N + R) for N objects and R
+    relationships, however the batch is composed. Endpoints not in the
+    batch are typed by their STIX ID prefix.
+
+    Args:
+        objects: Validated objects (combined bundles are fine)
+        allowed: Allowed (source_type, relationship_type, target_type)
+            triples
+
+    Returns:
+        Tuple of (objects without violating relationships, error
+        messages). Each error names the relationship ID and the
+        offending triple.
+    """
+    allowed_targets = targets_by_source(allowed)
+
+    objects = list(objects)
+    types_by_id: dict[str, str] = {}
+    relationships: list[Mapping[str, Any]] = []
+    for obj in objects:
+        obj_type = obj.get("type")
+        if obj_type == "relationship":
+            relationships.append(obj)
+        types_by_id[obj.get("id")] = obj_type
+
+    errors: list[str] = []
+    rejected: set[int] = set()
+    for rel in relationships:
+        error = relationship_error(rel, allowed_targets, types_by_id)
+        if error is not None:
+            errors.append(error)
+            rejected.add(id(rel))
+
+    if rejected:
+        objects = [obj for obj in objects if id(obj) not in rejected]
+    return objects, errors
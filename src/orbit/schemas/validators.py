@@ -0,0 +1,461 @@
+"""
+Compiled full-body validators
+
+Declarative per-type field specs for STIX objects, compiled once into
+specialized Python functions. Each generated function checks identity,
+timestamps, references, kill-chain phases, external references and the
+known ``x_mitre_*`` fields of one type with straight-line code: no
+per-field dispatch or spec interpretation happens at validation time.
+"""
+
+import re
+from dataclasses import dataclass
+from datetime import date
+from typing import Any, Callable, Mapping
+
+from .base import ValidationError
+from .stix import STIX_ID_PATTERN
+
+# STIX 2.1 timestamp: RFC 3339, UTC, optional fractional seconds. Leap
+# seconds are rejected (as by datetime); day-of-month is checked against
+# the calendar by _is_timestamp().
+TIMESTAMP_PATTERN = re.compile(
+    r"^\d{4}-(0[1-9]|1[0-2])-(0[1-9]|[12]\d|3[01])T([01]\d|2[0-3]):[0-5]\d:[0-5]\d(\.\d+)?Z$"
+)
+
+Validator = Callable[[Mapping[str, Any]], None]
+
+# Validated IDs and timestamps are remembered, so each distinct value is
+# matched once (an object's ID again as every ref to it). Memos are
+# scoped to one ingest run (``ingestion.ingest()`` calls clear_memos()
+# when it returns) and cleared early if they reach this size.
+MEMO_LIMIT = 1 << 20
+
+# Field kinds understood by the compiler, with the check each compiles to.
+# ``v`` is the field value; helpers are bound into the generated module.
+_KIND_CHECKS = {
+    "string": "v.__class__ is str",
+    "boolean": "v.__class__ is bool",
+    "integer": "v.__class__ is int",
+    "object": "v.__class__ is dict",
+    "timestamp": "v.__class__ is str and (v in _known_timestamps or _is_timestamp(v))",
+    "stix_id": "v.__class__ is str and (v in _known_ids or _is_stix_id(v))",
+    "string_list": "v.__class__ is list and _is_string_list(v)",
+    "stix_id_list": "v.__class__ is list and _is_stix_id_list(v)",
+    "kill_chain_phases": "v.__class__ is list and _is_kill_chain_phases(v)",
+    "external_references": "v.__class__ is list and _is_external_references(v)",
+}
+
+_KIND_DESCRIPTIONS = {
+    "string": "a string",
+    "boolean": "a boolean",
+    "integer": "an integer",
+    "object": "an object",
+    "timestamp": "a STIX timestamp (YYYY-MM-DDTHH:MM:SS[.s]Z)",
+    "stix_id": "a STIX ID",
+    "string_list": "a list of strings",
+    "stix_id_list": "a list of STIX IDs",
+    "kill_chain_phases": "a list of {kill_chain_name, phase_name} objects",
+    "external_references": "a list of {source_name, ...} objects with a description, url or external_id",
+}
+
+
+@dataclass(frozen=True)
+class FieldSpec:
+    """
+    One checked field of a STIX type.
+
+    Attributes:
+        name: Property name
+        kind: Value kind (see ``_KIND_CHECKS``)
+        required: Field must be present. Required fields other than
+            identity/timestamps/endpoints are only enforced on full
+            objects (plain dicts), since projection may drop them.
+    """
+
+    name: str
+    kind: str
+    required: bool = False
+
+    def __post_init__(self):
+        if self.kind not in _KIND_CHECKS:
+            raise ValueError(f"Unknown field kind '{self.kind}' for field '{self.name}'")
+
+
+# Fields a projection never drops (see adapters.projection.ALWAYS_KEPT)
+_STRUCTURAL_FIELDS = frozenset(
+    {"created", "modified", "spec_version", "source_ref", "target_ref", "relationship_type"}
+)
+
+
+def _fields(*specs: tuple) -> tuple[FieldSpec, ...]:
+    return tuple(FieldSpec(*spec) for spec in specs)
+
+
+# Common properties of every ATT&CK object (STIX common + ATT&CK extensions)
+COMMON_FIELDS = _fields(
+    ("spec_version", "string"),
+    ("created", "timestamp", True),
+    ("modified", "timestamp", True),
+    ("created_by_ref", "stix_id"),
+    ("revoked", "boolean"),
+    ("labels", "string_list"),
+    ("confidence", "integer"),
+    ("lang", "string"),
+    ("external_references", "external_references"),
+    ("object_marking_refs", "stix_id_list"),
+    ("x_mitre_version", "string"),
+    ("x_mitre_attack_spec_version", "string"),
+    ("x_mitre_deprecated", "boolean"),
+    ("x_mitre_domains", "string_list"),
+    ("x_mitre_modified_by_ref", "stix_id"),
+    ("x_mitre_contributors", "string_list"),
+)
+
+_NAMED = _fields(("name", "string", True), ("description", "string"))
+
+# Per-type fields in addition to COMMON_FIELDS
+TYPE_FIELDS: dict[str, tuple[FieldSpec, ...]] = {
+    "attack-pattern": _NAMED
+    + _fields(
+        ("kill_chain_phases", "kill_chain_phases"),
+        ("aliases", "string_list"),
+        ("x_mitre_platforms", "string_list"),
+        ("x_mitre_is_subtechnique", "boolean"),
+        ("x_mitre_detection", "string"),
+        ("x_mitre_data_sources", "string_list"),
+        ("x_mitre_permissions_required", "string_list"),
+        ("x_mitre_effective_permissions", "string_list"),
+        ("x_mitre_defense_bypassed", "string_list"),
+        ("x_mitre_system_requirements", "string_list"),
+        ("x_mitre_impact_type", "string_list"),
+        ("x_mitre_tactic_type", "string_list"),
+        ("x_mitre_remote_support", "boolean"),
+        ("x_mitre_network_requirements", "boolean"),
+    ),
+    "campaign": _NAMED
+    + _fields(
+        ("aliases", "string_list"),
+        ("first_seen", "timestamp"),
+        ("last_seen", "timestamp"),
+        ("x_mitre_first_seen_citation", "string"),
+        ("x_mitre_last_seen_citation", "string"),
+    ),
+    "course-of-action": _NAMED,
+    "identity": _NAMED + _fields(("identity_class", "string"), ("sectors", "string_list")),
+    "intrusion-set": _NAMED
+    + _fields(
+        ("aliases", "string_list"),
+        ("goals", "string_list"),
+        ("first_seen", "timestamp"),
+        ("last_seen", "timestamp"),
+    ),
+    "malware": _NAMED
+    + _fields(
+        ("is_family", "boolean"),
+        ("x_mitre_aliases", "string_list"),
+        ("x_mitre_platforms", "string_list"),
+    ),
+    "tool": _NAMED
+    + _fields(
+        ("x_mitre_aliases", "string_list"),
+        ("x_mitre_platforms", "string_list"),
+    ),
+    "x-mitre-data-component": _NAMED + _fields(("x_mitre_data_source_ref", "stix_id")),
+    "x-mitre-data-source": _NAMED
+    + _fields(
+        ("x_mitre_platforms", "string_list"),
+        ("x_mitre_collection_layers", "string_list"),
+    ),
+    "x-mitre-matrix": _NAMED + _fields(("tactic_refs", "stix_id_list")),
+    "x-mitre-tactic": _NAMED + _fields(("x_mitre_shortname", "string", True)),
+    # NIST CSF 2.0 core (see adapters.csf)
+    "csf-function": _NAMED,
+    "csf-category": _NAMED,
+    "csf-subcategory": _NAMED
+    + _fields(
+        ("x_nist_csf_attack_mitigations", "string_list"),
+        ("x_nist_csf_d3fend_techniques", "string_list"),
+    ),
+}
+
+# Marking definitions have no 'modified' and a different shape
+MARKING_DEFINITION_FIELDS = _fields(
+    ("spec_version", "string"),
+    ("created", "timestamp", True),
+    ("created_by_ref", "stix_id"),
+    ("name", "string"),
+    ("definition_type", "string"),
+    ("definition", "object"),
+    ("x_mitre_attack_spec_version", "string"),
+    ("x_mitre_domains", "string_list"),
+)
+
+RELATIONSHIP_FIELDS = _fields(
+    ("relationship_type", "string", True),
+    ("source_ref", "stix_id", True),
+    ("target_ref", "stix_id", True),
+    ("description", "string"),
+    ("start_time", "timestamp"),
+    ("stop_time", "timestamp"),
+)
+
+
+def type_specs() -> dict[str, tuple[FieldSpec, ...]]:
+    """Full field specs (common + type-specific) for every known type."""
+    specs = {stix_type: COMMON_FIELDS + fields for stix_type, fields in TYPE_FIELDS.items()}
+    specs["marking-definition"] = MARKING_DEFINITION_FIELDS
+    specs["relationship"] = COMMON_FIELDS + RELATIONSHIP_FIELDS
+    return specs
+
+
+# -- Helpers bound into generated validators ---------------------------------
+
+
+_known_ids: set[str] = set()
+_known_timestamps: set[str] = set()
+
+
+def _remember(memo: set[str], value: str) -> bool:
+    if len(memo) >= MEMO_LIMIT:
+        memo.clear()
+    memo.add(value)
+    return True
+
+
+def _is_stix_id(value: str) -> bool:
+    return STIX_ID_PATTERN.match(value) is not None and _remember(_known_ids, value)
+
+
+def _is_calendar_date(value: str) -> bool:
+    try:
+        date(int(value[:4]), int(value[5:7]), int(value[8:10]))
+    except ValueError:
+        return False
+    return True
+
+
+def _is_timestamp(value: str) -> bool:
+    return (
+        TIMESTAMP_PATTERN.match(value) is not None
+        and _is_calendar_date(value)
+        and _remember(_known_timestamps, value)
+    )
+
+
+def _is_string_list(values: list) -> bool:
+    for value in values:
+        if value.__class__ is not str:
+            return False
+    return True
+
+
+def _is_stix_id_list(values: list) -> bool:
+    for value in values:
+        if value.__class__ is not str or (value not in _known_ids and not _is_stix_id(value)):
+            return False
+    return True
+
+
+def _is_kill_chain_phases(phases: list) -> bool:
+    for phase in phases:
+        if phase.__class__ is not dict:
+            return False
+        name = phase.get("kill_chain_name")
+        phase_name = phase.get("phase_name")
+        if name.__class__ is not str or phase_name.__class__ is not str or not name or not phase_name:
+            return False
+    return True
+
+
+def _is_external_references(references: list) -> bool:
+    for reference in references:
+        if reference.__class__ is not dict:
+            return False
+        source_name = reference.get("source_name")
+        if source_name.__class__ is not str or not source_name:
+            return False
+        present = False
+        for key in ("description", "url", "external_id"):
+            value = reference.get(key)
+            if value is not None:
+                if value.__class__ is not str:
+                    return False
+                present = True
+        if not present:
+            return False
+    return True
+
+
+def _timestamp_key(value: str) -> tuple[str, str]:
+    # Whole seconds, then fractional digits without trailing zeros: both
+    # order lexicographically, at any precision
+    return value[:19], value[20:-1].rstrip("0")
+
+
+def _modified_before_created(modified: str, created: str) -> bool:
+    # Same-precision timestamps order lexicographically; compare keys otherwise.
+    # Never raises, so a malformed pair fails only its own object.
+    if len(modified) == len(created):
+        return modified < created
+    return _timestamp_key(modified) < _timestamp_key(created)
+
+
+_HELPERS = {
+    "ValidationError": ValidationError,
+    "_MISSING": object(),
+    "_known_ids": _known_ids,
+    "_known_timestamps": _known_timestamps,
+    "_is_stix_id": _is_stix_id,
+    "_is_timestamp": _is_timestamp,
+    "_is_string_list": _is_string_list,
+    "_is_stix_id_list": _is_stix_id_list,
+    "_is_kill_chain_phases": _is_kill_chain_phases,
+    "_is_external_references": _is_external_references,
+    "_modified_before_created": _modified_before_created,
+}
+
+
+# -- Compiler -----------------------------------------------------------------
+
+
+def _identity_source(stix_type: str) -> list[str]:
+    """Statements checking 'id' format and its type prefix."""
+    prefix = f"{stix_type}--"
+    return [
+        "    stix_id = get('id', _MISSING)",
+        "    if stix_id is _MISSING:",
+        "        raise ValidationError(\"STIX object missing 'id' field\")",
+        "    if stix_id.__class__ is not str or (stix_id not in _known_ids and not _is_stix_id(stix_id)):",
+        "        raise ValidationError(",
+        "            f'Invalid STIX ID format: {stix_id}. Expected pattern: <type>--<uuid>'",
+        "        )",
+        f"    if not stix_id.startswith({prefix!r}):",
+        "        raise ValidationError(",
+        "            f\"STIX ID type mismatch: ID has '{stix_id.split('--')[0]}', \"",
+        f"            \"but type field is {stix_type!r}\"",
+        "        )",
+    ]
+
+
+def generate_source(stix_type: str, fields: tuple[FieldSpec, ...]) -> str:
+    """
+    Generate the Python source of the validator for one type.
+
+    Exposed for inspection and debugging; see ``compile_validator()``.
+    """
+    func_name = "validate_" + re.sub(r"\W", "_", stix_type)
+    lines = [f"def {func_name}(obj):", "    get = obj.get", "    partial = obj.__class__ is not dict"]
+    lines += _identity_source(stix_type)
+
+    names = {spec.name for spec in fields}
+    for spec in fields:
+        check = _KIND_CHECKS[spec.kind]
+        invalid = f"Invalid '{spec.name}': expected {_KIND_DESCRIPTIONS[spec.kind]}, got "
+        lines.append(f"    v = get({spec.name!r}, _MISSING)")
+        if spec.required:
+            missing = f"raise ValidationError({'Missing required field ' + repr(spec.name)!r})"
+            lines.append("    if v is _MISSING:")
+            if spec.name in _STRUCTURAL_FIELDS:
+                lines.append(f"        {missing}")
+            else:
+                lines.append(f"        if not partial: {missing}")
+            lines.append(f"    elif not ({check}):")
+        else:
+            lines.append(f"    if v is not _MISSING and not ({check}):")
+        lines.append(f"        raise ValidationError({invalid!r} + repr(v))")
+
+    if "created" in names and "modified" in names:
+        lines += [
+            "    created = get('created')",
+            "    modified = get('modified')",
+            "    if created.__class__ is str and modified.__class__ is str "
+            "and _modified_before_created(modified, created):",
+            "        raise ValidationError(f\"'modified' ({modified}) is earlier than 'created' ({created})\")",
+        ]
+    if "source_ref" in names and "target_ref" in names:
+        lines += [
+            "    if get('source_ref') == get('target_ref'):",
+            "        raise ValidationError(f\"Self-referential edge not allowed: {get('source_ref')}\")",
+        ]
+    return "\n".join(lines) + "\n"
+
+
+def kind_checks() -> dict[str, Callable[[Any], bool]]:
+    """
+    Per-kind value checks, each compiled on its own.
+
+    These are the checks the generated validators inline; calling them
+    one field at a time gives an interpreted baseline (see
+    ``benchmarks/validation.py``).
+
+    Returns:
+        Mapping of field kind to a predicate over the field value
+    """
+    return {
+        kind: eval(f"lambda v: {check}", dict(_HELPERS))
+        for kind, check in _KIND_CHECKS.items()
+    }
+
+
+def compile_validator(stix_type: str, fields: tuple[FieldSpec, ...]) -> Validator:
+    """
+    Compile a field spec into a specialized validator function.
+
+    Args:
+        stix_type: STIX type the validator accepts
+        fields: Checked fields (see ``type_specs()``)
+
+    Returns:
+        Function raising ValidationError on the first invalid field
+    """
+    source = generate_source(stix_type, fields)
+    namespace = dict(_HELPERS)
+    exec(compile(source, f"<orbit validator {stix_type}>", "exec"), namespace)
+    return namespace[source[4 : source.index("(")]]
+
+
+def compile_validators(
+    specs: Mapping[str, tuple[FieldSpec, ...]] | None = None,
+) -> dict[str, Validator]:
+    """Compile validators for every type in ``specs`` (default: ``type_specs()``)."""
+    if specs is None:
+        specs = type_specs()
+    return {stix_type: compile_validator(stix_type, fields) for stix_type, fields in specs.items()}
+
+
+_VALIDATORS: dict[str, Validator] | None = None
+
+
+def clear_memos() -> None:
+    """Forget remembered valid IDs and timestamps."""
+    _known_ids.clear()
+    _known_timestamps.clear()
+
+
+def validate_object(obj: Mapping[str, Any]) -> None:
+    """
+    Validate the full body of a STIX object with its compiled validator.
+
+    Accepts plain dicts and projected mappings; required descriptive
+    fields (e.g. ``name``) are only enforced on plain dicts.
+
+    Raises:
+        ValidationError: If validation fails
+    """
+    global _VALIDATORS
+    if _VALIDATORS is None:
+        _VALIDATORS = compile_validators()
+
+    stix_type = obj.get("type")
+    if stix_type is None:
+        raise ValidationError("STIX object missing 'type' field")
+    validator = _VALIDATORS.get(stix_type) if stix_type.__class__ is str else None
+    if validator is None:
+        if "id" not in obj:
+            raise ValidationError("STIX object missing 'id' field")
+        raise ValidationError(
+            f"Unknown STIX type: {stix_type}. "
+            f"Known types: {', '.join(sorted(_VALIDATORS))}"
+        )
+    validator(obj)
@@ -0,0 +1,12 @@
+"""
+Query Service
+
+Read-only lookups over persisted ingestion output, served over HTTP
+from indexed in-memory snapshots with a result cache and hot reload.
+"""
+
+from .cache import ResultCache
+from .server import QueryService
+from .snapshot import QuerySnapshot, attack_id
+
+__all__ = ["QueryService", "QuerySnapshot", "ResultCache", "attack_id"]
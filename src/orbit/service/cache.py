@@ -0,0 +1,68 @@
+"""
+Result cache
+
+Bounded LRU cache with per-entry expiry for encoded query responses.
+"""
+
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable
+
+
+class ResultCache:
+    """
+    Least-recently-used cache whose entries also expire after ``ttl``.
+
+    Not thread-safe: the query service only touches it from the event
+    loop.
+
+    Args:
+        maxsize: Maximum number of entries (0 disables caching)
+        ttl: Seconds an entry stays valid (None = until evicted)
+        clock: Monotonic time source (injectable for tests)
+    """
+
+    def __init__(
+        self,
+        maxsize: int = 4096,
+        ttl: float | None = 300.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        if maxsize < 0:
+            raise ValueError("maxsize must not be negative")
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._clock = clock
+        self._entries: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Cached value for key, or default if missing or expired."""
+        entry = self._entries.get(key)
+        if entry is not None:
+            expires, value = entry
+            if expires >= self._clock():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return value
+            del self._entries[key]
+        self.misses += 1
+        return default
+
+    def put(self, key: Hashable, value: Any) -> None:
+        """Store a value, evicting the least recently used entry if full."""
+        if self.maxsize == 0:
+            return
+        expires = self._clock() + self.ttl if self.ttl is not None else float("inf")
+        self._entries[key] = (expires, value)
+        self._entries.move_to_end(key)
+        if len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        """Drop every entry (hit/miss counters are kept)."""
+        self._entries.clear()
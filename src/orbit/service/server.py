@@ -0,0 +1,275 @@
+"""
+Read-only HTTP query service
+
+Serves lookups over an ingest output directory from an in-memory
+``QuerySnapshot``, with encoded responses held in a ``ResultCache``.
+The output directory is polled for a new ``objects.ndjson``; a changed
+file is loaded off the event loop and swapped in with a single
+assignment, so every request sees exactly one snapshot.
+
+Routes (GET only, JSON responses)::
+
+    /health
+    /objects/{external_id or url-encoded reference URL}
+    /techniques/{attack_id}
+    /techniques/{attack_id}/groups[?subtechniques=true]
+    /techniques/{attack_id}/mitigations[?inherited=true]
+
+The HTTP layer is a minimal HTTP/1.1 implementation on asyncio streams
+(keep-alive, no request bodies), enough for internal clients and load
+balancer health checks without a web framework dependency.
+"""
+
+import asyncio
+import json
+from pathlib import Path
+from typing import Any
+from urllib.parse import parse_qs, unquote, urlsplit
+
+from ..ingestion.output import OBJECTS_FILENAME, file_signature
+from ..schemas import ValidationError
+from .cache import ResultCache
+from .snapshot import QuerySnapshot
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8080
+
+# Seconds between checks for a new objects.ndjson
+DEFAULT_RELOAD_INTERVAL = 2.0
+
+_REASONS = {
+    200: "OK",
+    400: "Bad Request",
+    404: "Not Found",
+    405: "Method Not Allowed",
+}
+
+_TRUE = {"1", "true", "yes"}
+_FALSE = {"", "0", "false", "no"}
+
+
+def _encode(payload: Any) -> bytes:
+    return json.dumps(payload, sort_keys=True, ensure_ascii=False, separators=(",", ":")).encode(
+        "utf-8"
+    )
+
+
+class _BadRequest(Exception):
+    pass
+
+
+def _flag(params: dict[str, list[str]], name: str) -> bool:
+    value = params.get(name, [""])[-1].lower()
+    if value in _TRUE:
+        return True
+    if value in _FALSE:
+        return False
+    raise _BadRequest(f"Invalid value for {name}: {value!r}")
+
+
+class QueryService:
+    """
+    Query service over one ingest output directory.
+
+    Example:
+        service = QueryService(Path("out"))
+        server = await service.start(port=8080)
+        async with server:
+            await server.serve_forever()
+
+    Args:
+        output_dir: Directory written by ``ingest`` (``--output-dir``)
+        cache: Response cache (default: ``ResultCache()``)
+        reload_interval: Seconds between change checks (None or 0
+            disables hot reload)
+
+    Raises:
+        FileNotFoundError: If the directory has no ``objects.ndjson``
+    """
+
+    def __init__(
+        self,
+        output_dir: Path,
+        cache: ResultCache | None = None,
+        reload_interval: float | None = DEFAULT_RELOAD_INTERVAL,
+    ):
+        self.output_dir = output_dir
+        self.cache = cache if cache is not None else ResultCache()
+        self.reload_interval = reload_interval
+        self.snapshot = QuerySnapshot.load(output_dir)
+        self.generation = 1
+        self.reload_error: str | None = None
+        self._watcher: asyncio.Task | None = None
+
+    # ----- Reload -----
+
+    def swap(self, snapshot: QuerySnapshot) -> None:
+        """Serve a new snapshot; cached responses of the old one are dropped."""
+        self.snapshot = snapshot
+        self.generation += 1
+        self.cache.clear()
+
+    async def check_reload(self) -> bool:
+        """
+        Load and swap in ``objects.ndjson`` if it changed since the last load.
+
+        A file that fails to load leaves the current snapshot in service;
+        the error is reported by ``/health`` until a later load succeeds.
+
+        Returns:
+            True if a new snapshot was swapped in
+        """
+        try:
+            if file_signature(self.output_dir / OBJECTS_FILENAME) == self.snapshot.signature:
+                return False
+        except FileNotFoundError:
+            return False
+
+        loop = asyncio.get_running_loop()
+        try:
+            snapshot = await loop.run_in_executor(None, QuerySnapshot.load, self.output_dir)
+        except (OSError, ValueError, ValidationError) as e:
+            self.reload_error = f"{type(e).__name__}: {e}"
+            return False
+        self.reload_error = None
+        self.swap(snapshot)
+        return True
+
+    async def _watch(self) -> None:
+        while True:
+            await asyncio.sleep(self.reload_interval)
+            await self.check_reload()
+
+    # ----- Queries -----
+
+    def _route(self, path: str, params: dict[str, list[str]]) -> tuple[int, Any]:
+        parts = [unquote(part) for part in path.strip("/").split("/")]
+        snapshot = self.snapshot
+        if parts[0] == "objects" and len(parts) == 2:
+            try:
+                return 200, snapshot.resolve(parts[1])
+            except KeyError as e:
+                return 404, {"error": e.args[0]}
+        if parts[0] != "techniques" or not 2 <= len(parts) <= 3:
+            return 404, {"error": f"Unknown route: {path}"}
+        try:
+            technique = snapshot.technique(parts[1])
+            if len(parts) == 2:
+                return 200, technique
+            if parts[2] == "groups":
+                results = snapshot.groups_using(parts[1], _flag(params, "subtechniques"))
+            elif parts[2] == "mitigations":
+                results = snapshot.mitigations(parts[1], _flag(params, "inherited"))
+            else:
+                return 404, {"error": f"Unknown route: {path}"}
+        except KeyError as e:
+            return 404, {"error": e.args[0]}
+        return 200, {"technique": technique["id"], parts[2]: results}
+
+    def health(self) -> dict[str, Any]:
+        """Snapshot, reload and cache status."""
+        return {
+            "objects": len(self.snapshot),
+            "generation": self.generation,
+            "reload_error": self.reload_error,
+            "cache": {
+                "entries": len(self.cache),
+                "hits": self.cache.hits,
+                "misses": self.cache.misses,
+            },
+        }
+
+    def respond(self, target: str) -> tuple[int, bytes]:
+        """
+        Status and encoded JSON body for a GET request target.
+
+        Responses other than ``/health`` are cached per target until the
+        next snapshot swap (or their TTL).
+        """
+        split = urlsplit(target)
+        if split.path == "/health":
+            return 200, _encode(self.health())
+
+        cached = self.cache.get(target)
+        if cached is not None:
+            return cached
+        try:
+            status, payload = self._route(split.path, parse_qs(split.query, keep_blank_values=True))
+        except _BadRequest as e:
+            return 400, _encode({"error": str(e)})
+        response = (status, _encode(payload))
+        self.cache.put(target, response)
+        return response
+
+    # ----- HTTP -----
+
+    async def _handle_connection(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                headers: dict[str, str] = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip().lower()
+
+                parts = request_line.decode("latin-1").split()
+                if len(parts) != 3 or not parts[2].startswith("HTTP/"):
+                    method, keep_alive = "", False
+                    status, body = 400, _encode({"error": "Malformed request"})
+                else:
+                    method, target, version = parts
+                    connection = headers.get("connection", "")
+                    keep_alive = connection == "keep-alive" or (
+                        version == "HTTP/1.1" and connection != "close"
+                    )
+                    if method in ("GET", "HEAD"):
+                        status, body = self.respond(target)
+                    else:
+                        status, body = 405, _encode({"error": f"Method not allowed: {method}"})
+                        keep_alive = False  # an unread request body may follow
+
+                head = self._head(status, len(body), keep_alive)
+                writer.write(head if method == "HEAD" else head + body)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, ValueError):
+            pass  # client went away, or a request line over the stream limit
+        finally:
+            writer.close()
+
+    @staticmethod
+    def _head(status: int, length: int, keep_alive: bool) -> bytes:
+        return (
+            f"HTTP/1.1 {status} {_REASONS[status]}\r\n"
+            "Content-Type: application/json\r\n"
+            f"Content-Length: {length}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n"
+            "\r\n"
+        ).encode("ascii")
+
+    async def start(self, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT) -> asyncio.Server:
+        """
+        Start listening (port 0 picks a free port) and, if enabled, watching
+        for new output.
+
+        Returns:
+            The listening ``asyncio.Server``; the watcher stops with ``close()``
+        """
+        server = await asyncio.start_server(self._handle_connection, host, port)
+        if self.reload_interval:
+            self._watcher = asyncio.create_task(self._watch())
+        return server
+
+    def close(self) -> None:
+        """Stop watching for new output."""
+        if self._watcher is not None:
+            self._watcher.cancel()
+            self._watcher = None
@@ -0,0 +1,196 @@
+"""
+Query snapshot
+
+Immutable, indexed view of one ingest's persisted output (see
+``ingestion.output``), answering the lookups the query service exposes.
+A snapshot is never mutated after it is built; reloading builds a new
+one and swaps the reference.
+"""
+
+from pathlib import Path
+from typing import Any, Iterable
+
+from ..indexes.crosswalk import Crosswalk, external_id
+from ..indexes.external_ids import ExternalIdIndex
+from ..indexes.hierarchy import TECHNIQUE_TYPE, HierarchyIndex, is_inactive, stix_type_of
+from ..ingestion.output import (
+    CROSSWALK_FILENAME,
+    EXTERNAL_ID_INDEX_FILENAME,
+    OBJECTS_FILENAME,
+    Signature,
+    file_signature,
+    read_objects,
+)
+
+# external_references source naming ATT&CK IDs (T1059, T1059.001, ...)
+ATTACK_SOURCE_NAME = "mitre-attack"
+
+GROUP_TYPE = "intrusion-set"
+MITIGATION_TYPE = "course-of-action"
+
+
+def attack_id(obj: dict[str, Any]) -> str | None:
+    """ATT&CK ID (e.g. ``T1059.001``) from an object's external references."""
+    return external_id(obj, ATTACK_SOURCE_NAME)
+
+
+class QuerySnapshot:
+    """
+    Lookup tables over validated objects.
+
+    Any object can be resolved by an external ID or reference URL (see
+    ``indexes.ExternalIdIndex``). Techniques are addressed by ATT&CK ID
+    (case-insensitive). Where
+    several techniques carry the same ID (a revoked technique and its
+    replacement), the active one wins. Relationship lookups follow the
+    ``HierarchyIndex`` rules: revoked and deprecated relationships are
+    ignored and revoked endpoints are redirected to their replacement.
+
+    Args:
+        objects: Validated objects (e.g. read back from ``objects.ndjson``)
+        signature: ``ingestion.output.file_signature()`` of the source file, if any
+        external_ids: Persisted external ID index for the same objects
+            (built from them if None)
+        crosswalk: Persisted CSF crosswalk for the same objects, if any
+
+    Attributes:
+        crosswalk: CSF coverage tables (``indexes.Crosswalk``), or None
+            if the output has no CSF subcategories
+    """
+
+    def __init__(
+        self,
+        objects: Iterable[dict[str, Any]],
+        signature: Signature | None = None,
+        external_ids: ExternalIdIndex | None = None,
+        crosswalk: Crosswalk | None = None,
+    ):
+        objects = list(objects)
+        self.signature = signature
+        self.crosswalk = crosswalk
+        self._objects = {obj["id"]: obj for obj in objects}
+        self._hierarchy = HierarchyIndex.build(objects)
+        self._external_ids = external_ids if external_ids is not None else ExternalIdIndex.build(objects)
+
+        self._techniques: dict[str, str] = {}
+        for obj in objects:
+            if obj.get("type") != TECHNIQUE_TYPE:
+                continue
+            external_id = attack_id(obj)
+            if external_id is None:
+                continue
+            key = external_id.upper()
+            current = self._techniques.get(key)
+            if current is None or (is_inactive(self._objects[current]) and not is_inactive(obj)):
+                self._techniques[key] = obj["id"]
+
+        # (relationship_type, target, source_type) -> source IDs
+        resolve = self._hierarchy.resolve
+        sources: dict[tuple[str, str, str], set[str]] = {}
+        for obj in objects:
+            if obj.get("type") != "relationship" or is_inactive(obj):
+                continue
+            source = resolve(obj["source_ref"])
+            key = (obj["relationship_type"], resolve(obj["target_ref"]), stix_type_of(source))
+            sources.setdefault(key, set()).add(source)
+        self._sources = {key: tuple(sorted(ids)) for key, ids in sources.items()}
+
+    @classmethod
+    def load(cls, output_dir: Path) -> "QuerySnapshot":
+        """
+        Build a snapshot from an ingest output directory.
+
+        The persisted external ID index is used when present (output
+        written before it existed has none), as is the CSF crosswalk
+        (written only for output including CSF subcategories).
+
+        Raises:
+            FileNotFoundError: If the directory has no ``objects.ndjson``
+            ValueError: If ``external_ids.json`` or ``crosswalk.json`` has
+                an unsupported format
+        """
+        path = output_dir / OBJECTS_FILENAME
+        signature = file_signature(path)
+        external_ids_path = output_dir / EXTERNAL_ID_INDEX_FILENAME
+        external_ids = ExternalIdIndex.load(external_ids_path) if external_ids_path.exists() else None
+        crosswalk_path = output_dir / CROSSWALK_FILENAME
+        crosswalk = Crosswalk.load(crosswalk_path) if crosswalk_path.exists() else None
+        return cls(read_objects(path), signature, external_ids, crosswalk)
+
+    def __len__(self) -> int:
+        return len(self._objects)
+
+    def get(self, stix_id: str) -> dict[str, Any] | None:
+        """Object by STIX ID, or None."""
+        return self._objects.get(stix_id)
+
+    def resolve(self, external_id: str) -> dict[str, Any]:
+        """
+        Object by external ID (``G0016``, ``CAPEC-13``, ``D3-PA``) or reference URL.
+
+        Where several objects carry the key, the active one wins, then
+        the lowest STIX ID.
+
+        Raises:
+            KeyError: If no object carries this key
+        """
+        for stix_id in self._external_ids.lookup(external_id):
+            if stix_id in self._objects:
+                return self._objects[stix_id]
+        raise KeyError(f"Unknown external ID: {external_id}")
+
+    def technique(self, external_id: str) -> dict[str, Any]:
+        """
+        Technique by ATT&CK ID.
+
+        Raises:
+            KeyError: If no technique has this ID
+        """
+        stix_id = self._techniques.get(external_id.upper())
+        if stix_id is None:
+            raise KeyError(f"Unknown technique: {external_id}")
+        return self._objects[stix_id]
+
+    def _related(
+        self,
+        external_id: str,
+        relationship_type: str,
+        source_type: str,
+        hierarchy: str | None,
+    ) -> list[dict[str, Any]]:
+        technique_id = self._hierarchy.resolve(self.technique(external_id)["id"])
+        if hierarchy == "up":
+            ids = sorted(self._hierarchy.roll_up(technique_id, relationship_type, source_type))
+        elif hierarchy == "down":
+            ids = sorted(self._hierarchy.roll_down(technique_id, relationship_type, source_type))
+        else:
+            ids = self._sources.get((relationship_type, technique_id, source_type), ())
+        return [self._objects[i] for i in ids if i in self._objects]
+
+    def groups_using(self, external_id: str, subtechniques: bool = False) -> list[dict[str, Any]]:
+        """
+        Groups (intrusion sets) using a technique, ordered by STIX ID.
+
+        Args:
+            external_id: ATT&CK technique ID
+            subtechniques: Also include groups using any sub-technique
+
+        Raises:
+            KeyError: If no technique has this ID
+        """
+        return self._related(external_id, "uses", GROUP_TYPE, "up" if subtechniques else None)
+
+    def mitigations(self, external_id: str, inherited: bool = False) -> list[dict[str, Any]]:
+        """
+        Mitigations (courses of action) for a technique, ordered by STIX ID.
+
+        Args:
+            external_id: ATT&CK technique ID
+            inherited: Also include mitigations of parent techniques
+
+        Raises:
+            KeyError: If no technique has this ID
+        """
+        return self._related(
+            external_id, "mitigates", MITIGATION_TYPE, "down" if inherited else None
+        )
@@ -0,0 +1,10 @@
+"""
+Release Store
+
+Versioned, content-addressed storage for validated objects across
+source releases.
+"""
+
+from .releases import ReleaseStore, ReleaseSummary, object_hash
+
+__all__ = ["ReleaseStore", "ReleaseSummary", "object_hash"]
@@ -0,0 +1,295 @@
+"""
+Multi-release object store
+
+Validated objects are stored once, addressed by the SHA-256 of their
+canonical JSON (see ``ingestion.output.dump_object``). Each release is a
+manifest mapping STIX ID to object hash, so consecutive releases share
+every unchanged object on disk, and a store instance shares them in
+memory across loaded releases.
+
+Layout::
+
+    root/
+    ├── packs/<name>.ndjson     # objects first stored by release <name>
+    ├── releases/<name>.json    # manifest: [[stix_id, hash, pack, offset, length], ...]
+    ├── index.json              # hash -> [pack, byte offset, byte length]
+    └── releases.json           # release names in the order added
+"""
+
+import hashlib
+import json
+import mmap
+import re
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Iterable, Mapping
+
+from ..ingestion.output import dump_object, replace_atomically
+
+FORMAT_NAME = "orbit-release"
+FORMAT_VERSION = 1
+
+RELEASES_FILENAME = "releases.json"
+INDEX_FILENAME = "index.json"
+
+_RELEASE_NAME = re.compile(r"^[A-Za-z0-9][A-Za-z0-9._-]*$")
+
+
+def object_hash(obj: Mapping[str, Any]) -> str:
+    """SHA-256 hex digest of an object's canonical JSON."""
+    return hashlib.sha256(dump_object(obj).encode("utf-8")).hexdigest()
+
+
+def _write_json(path: Path, payload: Any) -> None:
+    replace_atomically(
+        path,
+        lambda tmp: tmp.write_text(json.dumps(payload, separators=(",", ":")), encoding="utf-8"),
+    )
+
+
+@dataclass(frozen=True)
+class ReleaseSummary:
+    """Outcome of adding a release."""
+
+    name: str
+    object_count: int
+    new_objects: int  # objects not already stored by an earlier release
+
+
+class ReleaseStore:
+    """
+    Content-addressed store of object releases.
+
+    Example:
+        store = ReleaseStore(Path("releases"))
+        store.add_release("v14.1", ingest(config_v14).objects)
+        store.add_release("v15.0", ingest(config_v15).objects)
+        store.get("attack-pattern--...", release="v14.1")
+        store.diff("v14.1", "v15.0")["changed"]
+
+    Loaded objects are cached by hash and shared between releases; treat
+    them as read-only.
+    """
+
+    def __init__(self, root: Path):
+        self.root = root
+        self._packs_dir = root / "packs"
+        self._releases_dir = root / "releases"
+        self._index: dict[str, tuple[str, int, int]] | None = None
+        self._locations: dict[str, tuple[str, int, int]] = {}
+        self._objects: dict[str, Mapping[str, Any]] = {}
+        self._manifests: dict[str, dict[str, str]] = {}
+        self._hashes: dict[str, str] = {}
+
+    def _manifest_path(self, name: str) -> Path:
+        return self._releases_dir / f"{name}.json"
+
+    def _pack_path(self, name: str) -> Path:
+        return self._packs_dir / f"{name}.ndjson"
+
+    def _load_index(self) -> dict[str, tuple[str, int, int]]:
+        if self._index is None:
+            path = self.root / INDEX_FILENAME
+            entries = json.loads(path.read_text(encoding="utf-8")) if path.exists() else {}
+            self._index = {digest: tuple(location) for digest, location in entries.items()}
+        return self._index
+
+    # -- Writing --------------------------------------------------------------
+
+    def add_release(self, name: str, objects: Iterable[Mapping[str, Any]]) -> ReleaseSummary:
+        """
+        Store a release of validated objects.
+
+        Objects whose canonical JSON is already stored are only
+        referenced; new ones are appended to the release's pack. The
+        manifest and release list are written last, so a release becomes
+        visible only once complete.
+
+        Args:
+            name: Release name (letters, digits, '.', '_', '-')
+            objects: Validated objects (IDs must be unique)
+
+        Returns:
+            ReleaseSummary with object and new-object counts
+
+        Raises:
+            ValueError: If the name is invalid, already used, or an ID repeats
+        """
+        if not _RELEASE_NAME.match(name):
+            raise ValueError(f"Invalid release name: {name!r}")
+        names = self.releases()
+        if name in names:
+            raise ValueError(f"Release already exists: {name}")
+
+        index = dict(self._load_index())
+        manifest: dict[str, str] = {}
+        new_objects = 0
+
+        self._packs_dir.mkdir(parents=True, exist_ok=True)
+        pack_path = self._pack_path(name)
+        tmp_pack = pack_path.with_name(pack_path.name + ".tmp")
+        try:
+            with tmp_pack.open("wb") as pack:
+                for obj in objects:
+                    stix_id = obj["id"]
+                    if stix_id in manifest:
+                        raise ValueError(f"Duplicate object ID in release {name}: {stix_id}")
+                    data = dump_object(obj).encode("utf-8")
+                    digest = hashlib.sha256(data).hexdigest()
+                    location = index.get(digest)
+                    if location is None:
+                        index[digest] = (name, pack.tell(), len(data))
+                        pack.write(data + b"\n")
+                        new_objects += 1
+                    digest = self._share(digest)
+                    if digest not in self._objects:
+                        # A private copy, as loaded: the caller may mutate obj
+                        self._objects[digest] = json.loads(data)
+                    manifest[stix_id] = digest
+        except BaseException:
+            tmp_pack.unlink(missing_ok=True)
+            raise
+
+        if new_objects:
+            tmp_pack.replace(pack_path)
+        else:
+            tmp_pack.unlink()
+
+        self._releases_dir.mkdir(parents=True, exist_ok=True)
+        _write_json(self.root / INDEX_FILENAME, index)
+        _write_json(
+            self._manifest_path(name),
+            {
+                "format": FORMAT_NAME,
+                "version": FORMAT_VERSION,
+                "name": name,
+                "objects": [
+                    [stix_id, digest, *index[digest]] for stix_id, digest in sorted(manifest.items())
+                ],
+            },
+        )
+        _write_json(self.root / RELEASES_FILENAME, names + [name])
+
+        self._index = index
+        for digest in manifest.values():
+            self._locations.setdefault(digest, index[digest])
+        self._manifests[name] = manifest
+        return ReleaseSummary(name=name, object_count=len(manifest), new_objects=new_objects)
+
+    # -- Reading --------------------------------------------------------------
+
+    def _share(self, digest: str) -> str:
+        """One hash string instance per object across all manifests."""
+        return self._hashes.setdefault(digest, digest)
+
+    def releases(self) -> list[str]:
+        """Release names in the order they were added."""
+        path = self.root / RELEASES_FILENAME
+        if not path.exists():
+            return []
+        return json.loads(path.read_text(encoding="utf-8"))
+
+    def manifest(self, release: str) -> dict[str, str]:
+        """
+        STIX ID -> object hash for a release.
+
+        Raises:
+            KeyError: If the release doesn't exist
+            ValueError: If the manifest is not a supported format
+        """
+        manifest = self._manifests.get(release)
+        if manifest is not None:
+            return manifest
+
+        path = self._manifest_path(release)
+        if not _RELEASE_NAME.match(release) or not path.exists():
+            raise KeyError(f"Unknown release: {release}")
+        payload = json.loads(path.read_text(encoding="utf-8"))
+        if payload.get("format") != FORMAT_NAME or payload.get("version") != FORMAT_VERSION:
+            raise ValueError(f"Unsupported release manifest format: {path}")
+
+        share = self._share
+        locations = self._locations
+        manifest = {}
+        for stix_id, digest, pack, offset, length in payload["objects"]:
+            digest = manifest[stix_id] = share(digest)
+            if digest not in locations:
+                locations[digest] = (pack, offset, length)
+        self._manifests[release] = manifest
+        return manifest
+
+    def _load_objects(self, digests: Iterable[str]) -> dict[str, Mapping[str, Any]]:
+        """
+        Objects by hash: cached ones from memory, others sliced from packs.
+
+        Raises:
+            ValueError: If a stored object doesn't match its hash
+        """
+        loaded: dict[str, Mapping[str, Any]] = {}
+        missing: dict[str, list[tuple[int, int, str]]] = {}
+        for digest in digests:
+            obj = self._objects.get(digest)
+            if obj is not None:
+                loaded[digest] = obj
+            else:
+                pack, offset, length = self._locations[digest]
+                missing.setdefault(pack, []).append((offset, length, digest))
+
+        for pack, spans in missing.items():
+            spans.sort()
+            with self._pack_path(pack).open("rb") as f, mmap.mmap(
+                f.fileno(), 0, access=mmap.ACCESS_READ
+            ) as data:
+                for offset, length, digest in spans:
+                    text = data[offset : offset + length]
+                    if hashlib.sha256(text).hexdigest() != digest:
+                        raise ValueError(f"Corrupt stored object: {digest}")
+                    loaded[digest] = self._objects[digest] = json.loads(text)
+        return loaded
+
+    def load(self, release: str) -> list[Mapping[str, Any]]:
+        """
+        Load all objects of a release, sorted by STIX ID.
+
+        Objects unchanged since an already-loaded release are returned
+        from memory rather than re-read.
+
+        Raises:
+            KeyError: If the release doesn't exist
+        """
+        manifest = self.manifest(release)
+        loaded = self._load_objects(manifest.values())
+        return [loaded[manifest[stix_id]] for stix_id in sorted(manifest)]
+
+    def get(self, stix_id: str, release: str) -> Mapping[str, Any] | None:
+        """
+        Object as of a release, or None if the release doesn't contain it.
+
+        Reads the release manifest and one object span, never the whole
+        release or the store index.
+
+        Raises:
+            KeyError: If the release doesn't exist
+        """
+        digest = self.manifest(release).get(stix_id)
+        if digest is None:
+            return None
+        return self._load_objects([digest])[digest]
+
+    def diff(self, old: str, new: str) -> dict[str, list[str]]:
+        """
+        STIX IDs added, removed and changed between two releases.
+
+        Computed from manifests alone; no objects are read.
+
+        Returns:
+            {"added": [...], "removed": [...], "changed": [...]}, each sorted
+        """
+        before, after = self.manifest(old), self.manifest(new)
+        return {
+            "added": sorted(after.keys() - before.keys()),
+            "removed": sorted(before.keys() - after.keys()),
+            "changed": sorted(
+                stix_id for stix_id in before.keys() & after.keys() if before[stix_id] != after[stix_id]
+            ),
+        }
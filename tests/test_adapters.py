@@ -2,12 +2,38 @@
 Tests for source adapters
 """
 
+import gzip
 import json
+import lzma
 import pytest
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 from pathlib import Path
+from urllib.parse import parse_qs, urlparse
 
-from orbit.adapters import get_adapter, AttackAdapter
+from orbit.adapters import (
+    get_adapter,
+    AttackAdapter,
+    CSFAdapter,
+    CompactObject,
+    InternPool,
+    ObjectFilter,
+    Projection,
+    STRUCTURE_ONLY,
+    TaxiiAdapter,
+)
 from orbit.adapters.base import SourceAdapter
+from orbit.adapters.bundle import iter_bundle_objects, iter_bundle_spans, split_bundle
+from orbit.adapters.streams import detect_compression, open_source
+from orbit.adapters.taxii import default_state_path
+
+FIXTURE_PATH = Path(__file__).parent / "fixtures" / "attack_sample.json"
+CSF_FIXTURE_PATH = Path(__file__).parent / "fixtures" / "csf_sample.json"
+CSF_MAPPINGS_PATH = Path(__file__).parent / "fixtures" / "csf_mappings.json"
 
 
 class TestAttackAdapter:
@@ -103,6 +129,465 @@ class TestAttackAdapter:
         assert result1 == result2
 
 
+class TestBundleParsing:
+    """Tests for incremental bundle parsing."""
+
+    def test_iter_bundle_objects_matches_json_load(self):
+        """Test element-wise parsing yields the same objects as json.load."""
+        text = FIXTURE_PATH.read_text()
+        envelope = {}
+        objects = list(iter_bundle_objects(text, envelope))
+        bundle = json.loads(text)
+        assert objects == bundle["objects"]
+        assert envelope == {"type": "bundle", "id": bundle["id"]}
+
+    def test_objects_before_envelope_fields(self):
+        """Test member order does not matter."""
+        text = '{"objects": [{"id": "a"}, {"id": "b"}], "type": "bundle"}'
+        envelope = {}
+        assert [o["id"] for o in iter_bundle_objects(text, envelope)] == ["a", "b"]
+        assert envelope == {"type": "bundle"}
+
+    def test_empty_objects(self):
+        """Test empty objects array."""
+        assert list(iter_bundle_objects(' { "objects" : [ ] } ')) == []
+
+    def test_missing_objects_raises(self):
+        """Test that a bundle without objects fails."""
+        with pytest.raises(ValueError, match="missing 'objects' field"):
+            list(iter_bundle_objects('{"type": "bundle"}'))
+
+    def test_streamed_parsing_with_small_chunks(self):
+        """Test chunked stream parsing matches whole-text parsing."""
+        text = FIXTURE_PATH.read_text()
+        expected = json.loads(text)["objects"]
+        for chunk_size in (1, 7, 4096):
+            with FIXTURE_PATH.open(encoding="utf-8", newline="") as f:
+                assert list(iter_bundle_objects(f, chunk_size=chunk_size)) == expected
+
+    def test_byte_spans_with_non_ascii(self, tmp_path):
+        """Test byte offsets stay exact across multi-byte characters."""
+        path = tmp_path / "bundle.json"
+        path.write_text(
+            '{"objects": [{"name": "Fancy Bear \u2603"}, {"name": "caf\u00e9 \u00e9t\u00e9"}]}',
+            encoding="utf-8",
+        )
+        raw = path.read_bytes()
+        with path.open(encoding="utf-8", newline="") as f:
+            spans = list(iter_bundle_spans(f, byte_offsets=True, chunk_size=5))
+        assert [o["name"] for o, _, _ in spans] == ["Fancy Bear \u2603", "caf\u00e9 \u00e9t\u00e9"]
+        for obj, start, end in spans:
+            assert json.loads(raw[start:end]) == obj
+
+    def test_split_bundle_into_byte_ranges(self):
+        """Test byte ranges cover every object once and parse on their own."""
+        with FIXTURE_PATH.open(encoding="utf-8", newline="") as f:
+            ranges = split_bundle(f, 4096)
+        assert len(ranges) > 1
+        assert all(end <= next_start for (_, end), (next_start, _) in zip(ranges, ranges[1:]))
+
+        adapter = AttackAdapter(object_filter=ObjectFilter(exclude_revoked=True))
+        dropped = set()
+        expected = list(adapter.iter_objects(FIXTURE_PATH, dropped))
+        sharded, sharded_dropped = [], set()
+        for byte_range in ranges:
+            sharded.extend(adapter.iter_objects(FIXTURE_PATH, sharded_dropped, byte_range=byte_range))
+        assert sharded == expected
+        assert sharded_dropped == dropped
+
+    def test_byte_range_rejects_lazy_projection(self):
+        """Test lazy offsets cannot be recorded for a byte range."""
+        adapter = AttackAdapter(projection=Projection({}, lazy=True))
+        with pytest.raises(ValueError, match="byte range"):
+            list(adapter.iter_objects(FIXTURE_PATH, set(), byte_range=(0, 10)))
+
+    def test_malformed_json_raises(self):
+        """Test that truncated JSON raises JSONDecodeError."""
+        with pytest.raises(json.JSONDecodeError):
+            list(iter_bundle_objects('{"objects": [{"id": "a"},'))
+        with pytest.raises(json.JSONDecodeError, match="Extra data"):
+            list(iter_bundle_objects('{"objects": []} []'))
+
+
+class TestCompressedSources:
+    """Tests for transparent decompression of source files."""
+
+    @pytest.fixture
+    def plain(self):
+        return FIXTURE_PATH.read_bytes()
+
+    @pytest.mark.parametrize(
+        "compress, name",
+        [(gzip.compress, "gzip"), (lzma.compress, "xz")],
+    )
+    def test_fetch_matches_plain_file(self, compress, name, plain, tmp_path):
+        """Test compression is detected by magic bytes, not the extension."""
+        path = tmp_path / "bundle.json"  # deliberately no .gz/.xz suffix
+        path.write_bytes(compress(plain))
+        assert detect_compression(path) == name
+        assert AttackAdapter().fetch(path) == AttackAdapter().fetch(FIXTURE_PATH)
+
+        adapter = AttackAdapter(object_filter=ObjectFilter(exclude_revoked=True))
+        expected = list(adapter.iter_objects(FIXTURE_PATH, set()))
+        assert list(adapter.iter_objects(path, set())) == expected
+
+    def test_concatenated_members(self, plain, tmp_path):
+        """Test multi-member gzip files decode as one stream."""
+        half = len(plain) // 2
+        path = tmp_path / "bundle.json.gz"
+        path.write_bytes(gzip.compress(plain[:half]) + gzip.compress(plain[half:]))
+        with open_source(path) as f:
+            assert f.read() == plain.decode("utf-8")
+
+    def test_plain_file_untouched(self):
+        """Test uncompressed files open as ordinary text files."""
+        assert detect_compression(FIXTURE_PATH) is None
+        with open_source(FIXTURE_PATH) as f:
+            assert json.load(f)["type"] == "bundle"
+
+    @pytest.mark.parametrize("compress", [gzip.compress, lzma.compress])
+    def test_truncated_archive_raises(self, compress, plain, tmp_path):
+        """Test a cut-off archive fails instead of yielding partial data."""
+        path = tmp_path / "bundle.json.z"
+        data = compress(plain)
+        path.write_bytes(data[: len(data) // 2])
+        with pytest.raises(ValueError, match="Corrupt or truncated compressed input"):
+            AttackAdapter().fetch(path)
+
+    @pytest.mark.parametrize("compress", [gzip.compress, lzma.compress])
+    def test_corrupt_archive_raises(self, compress, plain, tmp_path):
+        """Test damaged compressed data raises ValueError, not a codec error."""
+        data = bytearray(compress(plain))
+        for i in range(len(data) // 3, len(data) // 3 + 64):
+            data[i] ^= 0xFF
+        path = tmp_path / "bundle.json.z"
+        path.write_bytes(bytes(data))
+        with pytest.raises(ValueError, match="Corrupt or truncated compressed input"):
+            AttackAdapter().fetch(path)
+
+    def test_missing_zstd_codec(self, tmp_path, monkeypatch):
+        """Test zstd input without a zstd implementation names the package."""
+        monkeypatch.setitem(sys.modules, "zstandard", None)
+        monkeypatch.setitem(sys.modules, "compression", None)
+        path = tmp_path / "bundle.json.zst"
+        path.write_bytes(b"\x28\xb5\x2f\xfd" + bytes(16))
+        assert detect_compression(path) == "zstd"
+        with pytest.raises(ValueError, match="zstandard"):
+            AttackAdapter().fetch(path)
+
+    def test_offsets_unavailable_when_compressed(self, plain, tmp_path):
+        """Test lazy projection and byte ranges need an uncompressed file."""
+        path = tmp_path / "bundle.json.gz"
+        path.write_bytes(gzip.compress(plain))
+        adapter = AttackAdapter(projection=Projection({}, lazy=True))
+        with pytest.raises(ValueError, match="compressed"):
+            list(adapter.iter_objects(path, set()))
+        with pytest.raises(ValueError, match="compressed"):
+            list(AttackAdapter().iter_objects(path, set(), byte_range=(0, 10)))
+
+
+class TestObjectFilterPushdown:
+    """Tests for parse-time filtering in AttackAdapter."""
+
+    def fetch(self, **kwargs):
+        adapter = AttackAdapter(object_filter=ObjectFilter(**kwargs))
+        return adapter.normalize(adapter.fetch(FIXTURE_PATH))
+
+    def test_inactive_filter_returns_everything(self):
+        """Test that an empty filter keeps the unfiltered fast path."""
+        assert AttackAdapter(object_filter=ObjectFilter()).object_filter is None
+        assert len(self.fetch()) == 40
+
+    def test_type_filter(self):
+        """Test keeping only techniques and relationships."""
+        objects = self.fetch(types=frozenset({"attack-pattern", "relationship"}))
+        assert {o["type"] for o in objects} == {"attack-pattern", "relationship"}
+        assert len(objects) == 7 + 19
+
+    def test_exclude_revoked_prunes_relationships(self):
+        """Test revoked objects and edges pointing at them are dropped."""
+        objects = self.fetch(exclude_revoked=True)
+        ids = {o["id"] for o in objects}
+        assert not any(o.get("revoked") for o in objects)
+        for rel in (o for o in objects if o["type"] == "relationship"):
+            assert rel["source_ref"] in ids or not rel["source_ref"].startswith("attack-pattern")
+            assert rel["target_ref"] in ids
+        # revoked T1193, its revoked-by edge, APT28's use of it, revoked use of T1086
+        assert len(objects) == 40 - 4
+
+    def test_exclude_deprecated(self):
+        """Test deprecated objects are dropped."""
+        objects = self.fetch(exclude_deprecated=True)
+        assert not any(o.get("x_mitre_deprecated") for o in objects)
+        assert len(objects) == 40 - 2
+
+    def test_domain_filter_keeps_objects_without_domains(self):
+        """Test domain filter keeps domain-less objects such as relationships."""
+        objects = self.fetch(domains=frozenset({"mobile-attack"}))
+        typed = [o for o in objects if "x_mitre_domains" in o]
+        assert [o["name"] for o in typed] == ["Command and Scripting Interpreter"]
+        # Relationships among enterprise-only objects are pruned
+        assert all(o["type"] != "relationship" for o in objects)
+        assert {o["type"] for o in objects} == {"identity", "marking-definition", "attack-pattern"}
+
+    def test_normalize_applies_filter_to_unfiltered_bundle(self):
+        """Test normalize filters bundles that were not fetched through the adapter."""
+        adapter = AttackAdapter(object_filter=ObjectFilter(types=frozenset({"malware"})))
+        bundle = json.loads(FIXTURE_PATH.read_text())
+        assert [o["name"] for o in adapter.normalize(bundle)] == ["Cobalt Strike"]
+
+    def test_filtered_fetch_matches_post_filtering(self):
+        """Test pushdown gives the same result as filtering afterwards."""
+        object_filter = ObjectFilter(exclude_revoked=True, exclude_deprecated=True)
+        pushed = AttackAdapter(object_filter=object_filter).fetch(FIXTURE_PATH)["objects"]
+        afterwards = object_filter.apply(AttackAdapter().fetch(FIXTURE_PATH)["objects"])
+        assert pushed == afterwards
+
+
+class TestProjection:
+    """Tests for parse-time field projection."""
+
+    def test_projects_listed_fields(self):
+        """Test per-type field lists plus always-kept fields."""
+        projection = Projection({"attack-pattern": frozenset({"name"})})
+        adapter = AttackAdapter(projection=projection)
+        objects = adapter.normalize(adapter.fetch(FIXTURE_PATH))
+
+        technique = next(o for o in objects if o["type"] == "attack-pattern")
+        assert isinstance(technique, CompactObject)
+        assert "description" not in technique
+        assert "external_references" not in technique
+        assert set(technique) == {
+            "type", "id", "created", "modified", "spec_version",
+            "created_by_ref", "object_marking_refs", "name",
+        }
+        # Unlisted types are kept whole
+        group = next(o for o in objects if o["type"] == "intrusion-set")
+        assert isinstance(group, dict)
+        assert "description" in group
+
+    def test_structure_only(self):
+        """Test the structure-only preset keeps graph fields for every type."""
+        adapter = AttackAdapter(projection=STRUCTURE_ONLY)
+        objects = adapter.normalize(adapter.fetch(FIXTURE_PATH))
+        assert len(objects) == 40
+        assert all(isinstance(o, CompactObject) for o in objects)
+        assert not any("description" in o for o in objects)
+        rel = next(o for o in objects if o["type"] == "relationship")
+        assert rel["source_ref"] and rel["target_ref"] and rel["relationship_type"]
+
+    def test_compact_objects_share_key_tuples(self):
+        """Test same-shaped objects share one key tuple."""
+        adapter = AttackAdapter(projection=STRUCTURE_ONLY)
+        techniques = [
+            o for o in adapter.fetch(FIXTURE_PATH)["objects"]
+            if o["type"] == "attack-pattern" and "revoked" not in o and "x_mitre_deprecated" not in o
+        ]
+        assert len({id(o._keys) for o in techniques}) == 1
+
+    def test_compact_object_mapping_behaviour(self):
+        """Test CompactObject reads like a dict."""
+        obj = CompactObject(("id", "type"), ("tool--1", "tool"))
+        assert obj == {"id": "tool--1", "type": "tool"}
+        assert obj.get("name") is None
+        assert obj.to_dict() == {"id": "tool--1", "type": "tool"}
+        with pytest.raises(KeyError):
+            obj["name"]
+
+    def test_normalize_projects_raw_bundle(self):
+        """Test projection also applies to bundles passed to normalize."""
+        adapter = AttackAdapter(projection=STRUCTURE_ONLY)
+        objects = adapter.normalize(json.loads(FIXTURE_PATH.read_text()))
+        assert not any("description" in o for o in objects)
+
+    def test_lazy_fields_from_source(self):
+        """Test dropped fields are loaded lazily by STIX ID."""
+        projection = Projection(STRUCTURE_ONLY.fields, lazy=True)
+        adapter = AttackAdapter(projection=projection)
+        objects = adapter.fetch(FIXTURE_PATH)["objects"]
+        original = {o["id"]: o for o in json.loads(FIXTURE_PATH.read_text())["objects"]}
+
+        offsets = adapter.source_offsets
+        assert len(offsets) == 40
+        technique = next(o for o in objects if o.get("name") == "PowerShell")
+        assert offsets.get(technique["id"], "description") == original[technique["id"]]["description"]
+        loaded = offsets.load_many(original)
+        assert loaded == original
+
+    def test_lazy_fields_detect_changed_source(self, tmp_path):
+        """Test lazy loading refuses a modified source file."""
+        path = tmp_path / "bundle.json"
+        path.write_text(FIXTURE_PATH.read_text())
+        adapter = AttackAdapter(projection=Projection(STRUCTURE_ONLY.fields, lazy=True))
+        stix_id = adapter.fetch(path)["objects"][0]["id"]
+
+        path.write_text(FIXTURE_PATH.read_text() + "\n")
+        with pytest.raises(ValueError, match="changed since ingestion"):
+            adapter.source_offsets.load(stix_id)
+
+    def test_no_offsets_without_lazy(self):
+        """Test offsets are only recorded for lazy projections."""
+        adapter = AttackAdapter(projection=STRUCTURE_ONLY)
+        adapter.fetch(FIXTURE_PATH)
+        assert adapter.source_offsets is None
+
+
+class TestInterning:
+    """Tests for shared strings and sub-objects across ingested objects."""
+
+    def test_interned_objects_equal_originals(self):
+        """Test interning changes identity only, never values."""
+        expected = json.loads(FIXTURE_PATH.read_text())["objects"]
+        adapter = AttackAdapter(intern_values=True)
+        assert adapter.normalize(adapter.fetch(FIXTURE_PATH)) == expected
+
+    def test_repeated_strings_stored_once(self):
+        """Test equal strings are the same object across objects."""
+        adapter = AttackAdapter(intern_values=True)
+        objects = adapter.normalize(adapter.fetch(FIXTURE_PATH))
+        assert len({id(o["created_by_ref"]) for o in objects if "created_by_ref" in o}) == 1
+        assert len({id(o["spec_version"]) for o in objects}) == 1
+
+    def test_small_sub_objects_shared(self):
+        """Test identical small lists and dicts are shared."""
+        adapter = AttackAdapter(intern_values=True)
+        objects = adapter.normalize(adapter.fetch(FIXTURE_PATH))
+        markings = [o["object_marking_refs"] for o in objects if "object_marking_refs" in o]
+        assert len({id(m) for m in markings}) == 1
+
+        phases = [
+            phase
+            for o in objects
+            for phase in o.get("kill_chain_phases", [])
+            if phase["phase_name"] == "execution"
+        ]
+        assert len(phases) > 1
+        assert len({id(p) for p in phases}) == 1
+
+    def test_large_and_mixed_values_not_shared(self):
+        """Test long strings and oversized containers stay unshared."""
+        pool = InternPool(max_string_length=8, max_shared_items=2)
+        long_text, same_text = "x" * 9, "".join(["x"] * 9)
+        a = pool.intern({"text": long_text, "items": [1, 2, 3], "pair": [1, 2]})
+        b = pool.intern({"text": same_text, "items": [1, 2, 3], "pair": [1, 2]})
+        assert a == b
+        assert a["text"] is long_text and b["text"] is same_text
+        assert a["items"] is not b["items"]
+        assert a["pair"] is b["pair"]
+
+    def test_scalar_types_kept_apart(self):
+        """Test 1, 1.0 and True never collapse into one shared value."""
+        pool = InternPool()
+        values = [pool.intern([1]), pool.intern([1.0]), pool.intern([True])]
+        assert [type(v[0]) for v in values] == [int, float, bool]
+
+    def test_interning_projected_objects(self):
+        """Test projected objects are interned in place of dicts."""
+        adapter = AttackAdapter(projection=STRUCTURE_ONLY, intern_values=True)
+        objects = adapter.normalize(adapter.fetch(FIXTURE_PATH))
+        assert all(isinstance(o, CompactObject) for o in objects)
+        domains = [o["x_mitre_domains"] for o in objects if o.get("x_mitre_domains") == ["enterprise-attack"]]
+        assert len(domains) > 1
+        assert len({id(d) for d in domains}) == 1
+
+    def test_normalize_interns_raw_bundle(self):
+        """Test interning also applies to bundles passed to normalize."""
+        adapter = AttackAdapter(intern_values=True)
+        objects = adapter.normalize(json.loads(FIXTURE_PATH.read_text()))
+        assert len({id(o["spec_version"]) for o in objects}) == 1
+
+
+class TestCSFAdapter:
+    """Tests for CSFAdapter."""
+
+    @pytest.fixture
+    def objects(self):
+        adapter = CSFAdapter(mappings_path=CSF_MAPPINGS_PATH)
+        return adapter.normalize(adapter.fetch(CSF_FIXTURE_PATH))
+
+    @staticmethod
+    def by_csf_id(objects):
+        return {
+            obj["external_references"][0]["external_id"]: obj
+            for obj in objects
+            if obj["type"] != "relationship"
+        }
+
+    def test_core_elements(self, objects):
+        """Test functions, categories and subcategories become CSF objects."""
+        elements = self.by_csf_id(objects)
+        assert elements["PR"]["type"] == "csf-function"
+        assert elements["PR"]["name"] == "PROTECT"
+        assert elements["PR.PS"]["type"] == "csf-category"
+        subcategory = elements["PR.PS-05"]
+        assert subcategory["type"] == "csf-subcategory"
+        assert subcategory["name"] == "PR.PS-05"
+        assert subcategory["description"].startswith("Installation and execution")
+        assert "PR.PS-05.001" not in elements  # implementation example
+        assert elements["ID.AM-06"]["revoked"] is True
+        assert [obj["id"] for obj in objects] == sorted(obj["id"] for obj in objects)
+
+    def test_hierarchy_relationships(self, objects):
+        """Test every category and subcategory is part-of its parent."""
+        elements = self.by_csf_id(objects)
+        edges = {
+            (obj["source_ref"], obj["target_ref"])
+            for obj in objects
+            if obj["type"] == "relationship" and obj["relationship_type"] == "part-of"
+        }
+        assert (elements["PR.PS-05"]["id"], elements["PR.PS"]["id"]) in edges
+        assert (elements["PR.PS"]["id"], elements["PR"]["id"]) in edges
+        assert len(edges) == len(elements) - 4  # all but the four functions
+
+    def test_mappings(self, objects):
+        """Test crosswalk rows land on their subcategories, sorted."""
+        subcategory = self.by_csf_id(objects)["PR.PS-05"]
+        assert subcategory["x_nist_csf_attack_mitigations"] == ["M1038"]
+        assert subcategory["x_nist_csf_d3fend_techniques"] == ["D3-EAL"]
+        assert "x_nist_csf_attack_mitigations" not in self.by_csf_id(objects)["GV.OC-01"]
+
+    def test_ids_are_deterministic(self, objects):
+        """Test STIX IDs depend only on the CSF identifiers."""
+        adapter = CSFAdapter(mappings_path=CSF_MAPPINGS_PATH)
+        assert adapter.normalize(adapter.fetch(CSF_FIXTURE_PATH)) == objects
+
+    def test_unknown_mapping_target_raises(self, tmp_path):
+        """Test mappings naming unknown subcategories or sources are rejected."""
+        adapter = CSFAdapter()
+        raw = {"elements": json.loads(CSF_FIXTURE_PATH.read_text())["response"]["elements"]["elements"]}
+        raw["mappings"] = [{"csf_id": "PR.PS-99", "target_source": "d3fend", "target_id": "D3-EAL"}]
+        with pytest.raises(ValueError, match="PR.PS-99"):
+            adapter.normalize(raw)
+        raw["mappings"] = [{"csf_id": "PR.PS-05", "target_source": "capec", "target_id": "CAPEC-1"}]
+        with pytest.raises(ValueError, match="capec"):
+            adapter.normalize(raw)
+
+    def test_ingest_validates_csf(self, monkeypatch):
+        """Test CSF objects pass full-body validation and relationship checks."""
+        import orbit.config
+        from orbit.ingestion import IngestConfig, ingest
+
+        monkeypatch.setattr(orbit.config, "CSF_MAPPINGS_PATH", CSF_MAPPINGS_PATH)
+        result = ingest(IngestConfig(source="csf", data_path=CSF_FIXTURE_PATH))
+        assert result.is_valid
+        assert result.object_count == 28
+        assert any("x_nist_csf_d3fend_techniques" in obj for obj in result.objects)
+
+    def test_csf_settings_are_independent_of_d3fend(self, monkeypatch):
+        """Test CSF environment variables only set the CSF paths."""
+        import orbit.config
+        from orbit.config import IngestSettings
+
+        for name in ("UNIFIED_INGEST_D3FEND_JSONLD_PATH", "D3FEND_JSONLD_PATH", "UNIFIED_INGEST_CSF_FILE"):
+            monkeypatch.delenv(name, raising=False)
+        monkeypatch.setenv("CSF_FILE", "/tmp/csf.json")
+        monkeypatch.setenv("CSF_MAPPINGS_PATH", "/tmp/csf-mappings.json")
+        settings = IngestSettings.from_env()
+        assert settings.csf_file == Path("/tmp/csf.json")
+        assert settings.d3fend_jsonld_path == IngestSettings.DEFAULT_D3FEND_JSONLD
+        assert {"CSF_FILE", "CSF_MAPPINGS_PATH"} <= set(orbit.config.__all__)
+
+
 class TestAdapterRegistry:
     """Tests for adapter registry and get_adapter."""
 
@@ -111,6 +596,10 @@ class TestAdapterRegistry:
         adapter = get_adapter("attack")
         assert isinstance(adapter, AttackAdapter)
 
+    def test_get_adapter_returns_taxii_adapter(self):
+        """Test that get_adapter returns TaxiiAdapter for 'taxii'."""
+        assert isinstance(get_adapter("taxii"), TaxiiAdapter)
+
     def test_get_adapter_raises_on_unknown_source(self):
         """Test that get_adapter raises ValueError for unknown source."""
         with pytest.raises(ValueError, match="Unknown source"):
@@ -120,3 +609,329 @@ class TestAdapterRegistry:
         """Test that error message lists available sources."""
         with pytest.raises(ValueError, match="Available:"):
             get_adapter("invalid")
+
+
+class TaxiiStandIn:
+    """
+    Local TAXII 2.1 server over in-memory collections.
+
+    Serves ``/api/collections/<id>/objects/`` with ``limit``/``next``
+    paging, ``added_after`` and ``match[type]`` filtering and the
+    ``X-TAXII-Date-Added-*`` headers. Each object is added one second
+    after the previous one. Requests are recorded as (collection, params).
+    """
+
+    BASE_DATE = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+    def __init__(self, delay: float = 0.0, honor_type_filter: bool = True):
+        self.delay = delay
+        self.honor_type_filter = honor_type_filter
+        self.collections: dict[str, list[tuple[datetime, dict]]] = {}
+        self.requests: list[tuple[str, dict[str, str]]] = []
+        self.in_flight = self.max_in_flight = 0
+        self._lock = threading.Lock()
+        self._added = 0
+        self._server: ThreadingHTTPServer | None = None
+
+    def add(self, collection: str, objects: list[dict]) -> None:
+        for obj in objects:
+            self._added += 1
+            date_added = self.BASE_DATE + timedelta(seconds=self._added)
+            self.collections.setdefault(collection, []).append((date_added, obj))
+
+    def url(self, collection: str) -> str:
+        host, port = self._server.server_address
+        return f"http://{host}:{port}/api/collections/{collection}/"
+
+    def requests_for(self, collection: str) -> list[dict[str, str]]:
+        return [params for name, params in self.requests if name == collection]
+
+    @staticmethod
+    def timestamp(moment: datetime) -> str:
+        return moment.strftime("%Y-%m-%dT%H:%M:%S.000Z")
+
+    def page(self, collection: str, params: dict[str, str]) -> tuple[dict, list[datetime]]:
+        items = self.collections[collection]
+        if "added_after" in params:
+            after = datetime.fromisoformat(params["added_after"].replace("Z", "+00:00"))
+            items = [item for item in items if item[0] > after]
+        if "match[type]" in params and self.honor_type_filter:
+            types = set(params["match[type]"].split(","))
+            items = [item for item in items if item[1]["type"] in types]
+        offset, limit = int(params.get("next", 0)), int(params.get("limit", 100))
+        page = items[offset : offset + limit]
+        envelope: dict = {"more": offset + limit < len(items), "objects": [obj for _, obj in page]}
+        if envelope["more"]:
+            envelope["next"] = str(offset + limit)
+        return envelope, [date_added for date_added, _ in page]
+
+    @contextmanager
+    def running(self):
+        stand_in = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                url = urlparse(self.path)
+                parts = url.path.strip("/").split("/")
+                params = {key: values[0] for key, values in parse_qs(url.query).items()}
+                if len(parts) != 4 or parts[3] != "objects" or parts[2] not in stand_in.collections:
+                    self.send_error(404)
+                    return
+                with stand_in._lock:
+                    stand_in.requests.append((parts[2], params))
+                    stand_in.in_flight += 1
+                    stand_in.max_in_flight = max(stand_in.max_in_flight, stand_in.in_flight)
+                try:
+                    time.sleep(stand_in.delay)
+                    envelope, dates = stand_in.page(parts[2], params)
+                finally:
+                    with stand_in._lock:
+                        stand_in.in_flight -= 1
+                body = json.dumps(envelope).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/taxii+json;version=2.1")
+                self.send_header("Content-Length", str(len(body)))
+                if dates:
+                    self.send_header("X-TAXII-Date-Added-First", stand_in.timestamp(dates[0]))
+                    self.send_header("X-TAXII-Date-Added-Last", stand_in.timestamp(dates[-1]))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._server.daemon_threads = True
+        thread = threading.Thread(target=self._server.serve_forever, args=(0.05,), daemon=True)
+        thread.start()
+        try:
+            yield self
+        finally:
+            self._server.shutdown()
+            self._server.server_close()
+            thread.join()
+
+
+@pytest.fixture
+def taxii_server():
+    """Running TAXII stand-in with the ATT&CK fixture as collection 'enterprise'."""
+    server = TaxiiStandIn()
+    server.add("enterprise", json.loads(FIXTURE_PATH.read_text())["objects"])
+    with server.running():
+        yield server
+
+
+def write_descriptor(path: Path, server: TaxiiStandIn, collections: list[str], page_size: int = 100) -> Path:
+    path.write_text(json.dumps({"collections": [server.url(c) for c in collections], "page_size": page_size}))
+    return path
+
+
+class TestTaxiiAdapter:
+    """Tests for TaxiiAdapter against a local TAXII stand-in."""
+
+    @staticmethod
+    def poll(descriptor: Path, **kwargs) -> list[dict]:
+        adapter = TaxiiAdapter(**kwargs)
+        return adapter.normalize(adapter.fetch(descriptor))
+
+    def test_fetch_downloads_every_page(self, taxii_server, tmp_path):
+        """Test that fetch follows the next cursor through every page."""
+        descriptor = write_descriptor(tmp_path / "taxii.json", taxii_server, ["enterprise"], page_size=7)
+        objects = self.poll(descriptor)
+
+        expected = json.loads(FIXTURE_PATH.read_text())["objects"]
+        assert sorted(obj["id"] for obj in objects) == sorted(obj["id"] for obj in expected)
+        pages = taxii_server.requests_for("enterprise")
+        assert len(pages) == -(-len(expected) // 7)
+        assert [params.get("next") for params in pages[1:]] == [str(7 * i) for i in range(1, len(pages))]
+        assert all("added_after" not in params for params in pages)
+
+    def test_committed_poll_only_downloads_new_objects(self, taxii_server, tmp_path):
+        """Test that the committed mark becomes the next poll's added_after."""
+        descriptor = write_descriptor(tmp_path / "taxii.json", taxii_server, ["enterprise"])
+        adapter = TaxiiAdapter()
+        first = adapter.normalize(adapter.fetch(descriptor))
+        adapter.commit()
+        last_added = TaxiiStandIn.timestamp(taxii_server.collections["enterprise"][-1][0])
+        assert adapter.high_water_marks(descriptor) == {taxii_server.url("enterprise"): last_added}
+
+        assert len(first) == 40
+        assert self.poll(descriptor) == []
+        new = {"type": "identity", "id": "identity--00000000-0000-4000-8000-000000000001", "name": "New"}
+        taxii_server.add("enterprise", [new])
+        assert self.poll(descriptor) == [new]
+        assert taxii_server.requests_for("enterprise")[-1]["added_after"] == last_added
+
+    def test_uncommitted_poll_is_repeated(self, taxii_server, tmp_path):
+        """Test that marks only advance on commit()."""
+        descriptor = write_descriptor(tmp_path / "taxii.json", taxii_server, ["enterprise"])
+        adapter = TaxiiAdapter()
+        adapter.fetch(descriptor)
+
+        assert adapter.pending_marks
+        assert not default_state_path(descriptor).exists()
+        assert len(self.poll(descriptor)) == 40
+
+    def test_repeated_passes_of_one_adapter_see_the_same_objects(self, taxii_server, tmp_path):
+        """Test that an adapter keeps polling from the marks it started with."""
+        descriptor = write_descriptor(tmp_path / "taxii.json", taxii_server, ["enterprise"])
+        adapter = TaxiiAdapter(state_path=tmp_path / "marks.json")
+        first = list(adapter.iter_objects(descriptor, set()))
+        TaxiiAdapter(state_path=tmp_path / "marks.json").fetch(descriptor)
+        other = TaxiiAdapter(state_path=tmp_path / "marks.json")
+        other.fetch(descriptor)
+        other.commit()
+
+        assert (tmp_path / "marks.json").exists()
+        assert list(adapter.iter_objects(descriptor, set())) == first
+
+    def test_marks_are_kept_per_collection(self, taxii_server, tmp_path):
+        """Test that each collection advances its own mark."""
+        taxii_server.add("mobile", [{"type": "identity", "id": "identity--mobile", "name": "Mobile"}])
+        descriptor = write_descriptor(tmp_path / "taxii.json", taxii_server, ["enterprise", "mobile"])
+        adapter = TaxiiAdapter()
+        adapter.fetch(descriptor)
+        adapter.commit()
+
+        state = json.loads(default_state_path(descriptor).read_text())
+        assert state["marks"] == [
+            {"collection": taxii_server.url(name), "filter": None, "added_after": TaxiiStandIn.timestamp(items[-1][0])}
+            for name, items in sorted(taxii_server.collections.items())
+        ]
+        taxii_server.add("enterprise", [{"type": "identity", "id": "identity--late", "name": "Late"}])
+        assert [obj["id"] for obj in self.poll(descriptor)] == ["identity--late"]
+
+    def test_filtered_poll_does_not_advance_unfiltered_marks(self, taxii_server, tmp_path):
+        """Test that a filtered poll's marks don't hide the objects it skipped."""
+        descriptor = write_descriptor(tmp_path / "taxii.json", taxii_server, ["enterprise"])
+        object_filter = ObjectFilter(types=frozenset({"intrusion-set"}))
+        filtered = TaxiiAdapter(object_filter=object_filter)
+        assert len(filtered.fetch(descriptor)["objects"]) == 2
+        filtered.commit()
+
+        assert TaxiiAdapter().high_water_marks(descriptor) == {}
+        assert len(self.poll(descriptor)) == 40
+        assert self.poll(descriptor, object_filter=object_filter) == []
+
+    def test_marks_are_kept_per_filter(self, taxii_server, tmp_path):
+        """Test that each filter advances its own mark."""
+        descriptor = write_descriptor(tmp_path / "taxii.json", taxii_server, ["enterprise"])
+        for object_filter in (None, ObjectFilter(types=frozenset({"malware"})), ObjectFilter(exclude_revoked=True)):
+            adapter = TaxiiAdapter(object_filter=object_filter)
+            adapter.fetch(descriptor)
+            adapter.commit()
+        taxii_server.add("enterprise", [{"type": "malware", "id": "malware--late", "name": "Late", "is_family": True}])
+
+        for object_filter in (None, ObjectFilter(types=frozenset({"malware"})), ObjectFilter(exclude_revoked=True)):
+            assert [obj["id"] for obj in self.poll(descriptor, object_filter=object_filter)] == ["malware--late"]
+        state = json.loads(default_state_path(descriptor).read_text())
+        assert [entry["filter"] for entry in state["marks"]] == [
+            None,
+            {"domains": None, "exclude_deprecated": False, "exclude_revoked": False, "types": ["malware"]},
+            {"domains": None, "exclude_deprecated": False, "exclude_revoked": True, "types": None},
+        ]
+
+    def test_reads_version_1_state(self, taxii_server, tmp_path):
+        """Test that marks written before per-filter marks apply to unfiltered polls."""
+        descriptor = write_descriptor(tmp_path / "taxii.json", taxii_server, ["enterprise"])
+        last_added = TaxiiStandIn.timestamp(taxii_server.collections["enterprise"][-1][0])
+        default_state_path(descriptor).write_text(json.dumps({
+            "format": "orbit-taxii-state",
+            "version": 1,
+            "collections": {taxii_server.url("enterprise"): {"added_after": last_added}},
+        }))
+
+        assert self.poll(descriptor) == []
+        assert len(self.poll(descriptor, object_filter=ObjectFilter(types=frozenset({"malware"})))) == 1
+
+    def test_collections_are_paged_concurrently(self, tmp_path):
+        """Test that independent collection queries are in flight together."""
+        server = TaxiiStandIn(delay=0.05)
+        objects = json.loads(FIXTURE_PATH.read_text())["objects"]
+        server.add("enterprise", objects[:20])
+        server.add("ics", objects[20:])
+        with server.running():
+            descriptor = write_descriptor(tmp_path / "taxii.json", server, ["enterprise", "ics"], page_size=5)
+            polled = self.poll(descriptor)
+
+        assert sorted(obj["id"] for obj in polled) == sorted(obj["id"] for obj in objects)
+        assert server.max_in_flight == 2
+
+    def test_objects_stream_before_the_last_page(self, taxii_server, tmp_path):
+        """Test that objects are yielded while later pages are still unfetched."""
+        descriptor = write_descriptor(tmp_path / "taxii.json", taxii_server, ["enterprise"], page_size=2)
+        stream = TaxiiAdapter().iter_objects(descriptor, set())
+        next(stream)
+        time.sleep(0.2)
+        requested = len(taxii_server.requests)
+        stream.close()
+
+        assert requested < 20
+        assert not TaxiiAdapter().high_water_marks(descriptor)
+
+    def test_type_filter_is_pushed_down(self, taxii_server, tmp_path):
+        """Test that a type filter becomes one match[type] query per type."""
+        descriptor = write_descriptor(tmp_path / "taxii.json", taxii_server, ["enterprise"])
+        objects = self.poll(descriptor, object_filter=ObjectFilter(types=frozenset({"intrusion-set", "malware"})))
+
+        assert sorted(obj["type"] for obj in objects) == ["intrusion-set", "intrusion-set", "malware"]
+        assert sorted(params["match[type]"] for params in taxii_server.requests_for("enterprise")) == ["intrusion-set", "malware"]
+
+    def test_type_filter_survives_servers_ignoring_it(self, tmp_path):
+        """Test that results are still correct when match[type] is ignored."""
+        server = TaxiiStandIn(honor_type_filter=False)
+        server.add("enterprise", json.loads(FIXTURE_PATH.read_text())["objects"])
+        with server.running():
+            descriptor = write_descriptor(tmp_path / "taxii.json", server, ["enterprise"])
+            objects = self.poll(descriptor, object_filter=ObjectFilter(types=frozenset({"intrusion-set", "malware"})))
+
+        assert sorted(obj["type"] for obj in objects) == ["intrusion-set", "intrusion-set", "malware"]
+
+    def test_same_object_in_several_collections_is_yielded_once(self, taxii_server, tmp_path):
+        """Test that an identical object version served twice is deduplicated."""
+        shared = json.loads(FIXTURE_PATH.read_text())["objects"][:3]
+        taxii_server.add("mobile", shared)
+        descriptor = write_descriptor(tmp_path / "taxii.json", taxii_server, ["enterprise", "mobile"])
+
+        assert len(self.poll(descriptor)) == 40
+
+    def test_projection_and_lifecycle_filter_apply(self, taxii_server, tmp_path):
+        """Test that filters and projections apply to polled objects."""
+        descriptor = write_descriptor(tmp_path / "taxii.json", taxii_server, ["enterprise"])
+        objects = self.poll(
+            descriptor,
+            object_filter=ObjectFilter(exclude_revoked=True),
+            projection=STRUCTURE_ONLY,
+        )
+
+        by_id = {obj["id"]: obj for obj in objects}
+        assert not any(obj.get("revoked") for obj in objects)
+        assert all("description" not in obj for obj in objects)
+        assert all(
+            obj["source_ref"] in by_id and obj["target_ref"] in by_id
+            for obj in objects
+            if obj["type"] == "relationship" and obj["relationship_type"] == "revoked-by"
+        )
+
+    def test_http_error_raises_oserror(self, taxii_server, tmp_path):
+        """Test that a failing collection aborts the poll without new marks."""
+        descriptor = write_descriptor(tmp_path / "taxii.json", taxii_server, ["enterprise"])
+        data = json.loads(descriptor.read_text())
+        data["collections"].append(data["collections"][0].replace("enterprise", "missing"))
+        descriptor.write_text(json.dumps(data))
+        adapter = TaxiiAdapter()
+
+        with pytest.raises(OSError, match="404"):
+            adapter.fetch(descriptor)
+        adapter.commit()
+        assert not default_state_path(descriptor).exists()
+
+    def test_invalid_descriptor_raises(self, tmp_path):
+        """Test that descriptors must list collection URLs."""
+        descriptor = tmp_path / "taxii.json"
+        descriptor.write_text(json.dumps({"collections": []}))
+
+        with pytest.raises(ValueError, match="collections"):
+            TaxiiAdapter().fetch(descriptor)
+        with pytest.raises(FileNotFoundError):
+            TaxiiAdapter().fetch(tmp_path / "missing.json")
@@ -0,0 +1,222 @@
+"""
+Tests for the orbit command-line interface
+"""
+
+import gzip
+import io
+import json
+import pstats
+import pytest
+from pathlib import Path
+
+import orbit.graph
+from orbit.cli import main
+from orbit.ingestion.output import OBJECTS_FILENAME
+from tests.test_graph import FakeGraph
+
+FIXTURE_PATH = Path(__file__).parent / "fixtures" / "attack_sample.json"
+
+
+def run(*argv: str) -> tuple[int, str, str]:
+    """Run the CLI and capture (exit code, stdout, stderr)."""
+    stdout, stderr = io.StringIO(), io.StringIO()
+    code = main(list(argv), stdout=stdout, stderr=stderr)
+    return code, stdout.getvalue(), stderr.getvalue()
+
+
+class TestIngestCommand:
+    """Tests for `orbit ingest`."""
+
+    def test_writes_ndjson_to_stdout(self):
+        """Test that validated objects are written as NDJSON, in ID order."""
+        code, out, err = run("ingest", "--source", "attack", "--data-path", str(FIXTURE_PATH))
+        assert code == 0
+        lines = out.splitlines()
+        assert len(lines) == 40
+        ids = [json.loads(line)["id"] for line in lines]
+        assert ids == sorted(ids)
+        assert "ingested 40 object(s)" in err
+
+    def test_writes_output_file_and_dir(self, tmp_path):
+        """Test --output and --output-dir produce identical NDJSON."""
+        out_file = tmp_path / "objects.ndjson"
+        code, out, _ = run(
+            "ingest", "--source", "attack", "--data-path", str(FIXTURE_PATH),
+            "--output", str(out_file), "--output-dir", str(tmp_path / "out"),
+        )
+        assert code == 0
+        assert out == ""
+        assert out_file.read_bytes() == (tmp_path / "out" / OBJECTS_FILENAME).read_bytes()
+
+    def test_memory_budget(self, tmp_path):
+        """Test --memory-budget streams the same NDJSON as an in-memory run."""
+        _, expected, _ = run("ingest", "--source", "attack", "--data-path", str(FIXTURE_PATH))
+        code, out, err = run(
+            "ingest", "--source", "attack", "--data-path", str(FIXTURE_PATH),
+            "--memory-budget", "1", "--spill-dir", str(tmp_path),
+        )
+        assert code == 0
+        assert out == expected
+        assert "ingested 40 object(s)" in err
+
+    def test_sharded_ingest(self, tmp_path):
+        """Test --shard-dir streams the same NDJSON as a single-process run."""
+        _, expected, _ = run("ingest", "--source", "attack", "--data-path", str(FIXTURE_PATH))
+        code, out, err = run(
+            "ingest", "--source", "attack", "--data-path", str(FIXTURE_PATH),
+            "--data-path", str(FIXTURE_PATH), "--shard-dir", str(tmp_path), "--workers", "0",
+        )
+        assert code == 0
+        assert out == expected
+        assert "merged 2 shard(s) (2 processed here, 40 duplicate(s) dropped)" in err
+
+        code, _, err = run("shard-worker", "--shard-dir", str(tmp_path))
+        assert code == 0
+        assert "processed 0 shard(s)" in err
+
+    def test_several_inputs_need_shard_dir(self):
+        """Test repeating --data-path without --shard-dir fails."""
+        code, _, err = run(
+            "ingest", "--source", "attack",
+            "--data-path", str(FIXTURE_PATH), "--data-path", str(FIXTURE_PATH),
+        )
+        assert code == 1
+        assert "--shard-dir" in err
+
+    def test_timings(self):
+        """Test --timings reports each stage."""
+        _, _, err = run("ingest", "--source", "attack", "--data-path", str(FIXTURE_PATH), "--timings")
+        for stage in ("fetch", "normalize", "validate", "total"):
+            assert stage in err
+
+    def test_trace_memory(self):
+        """Test --trace-memory reports per-stage peaks."""
+        _, _, err = run(
+            "ingest", "--source", "attack", "--data-path", str(FIXTURE_PATH), "--trace-memory", "3"
+        )
+        assert "[fetch] peak" in err
+        assert "[validate] peak" in err
+
+    def test_profile_dumps_pstats(self, tmp_path):
+        """Test --profile writes a loadable pstats file."""
+        profile_path = tmp_path / "ingest.prof"
+        code, _, err = run(
+            "ingest", "--source", "attack", "--data-path", str(FIXTURE_PATH),
+            "--profile", str(profile_path),
+        )
+        assert code == 0
+        assert "cumulative" in err
+        stats = pstats.Stats(str(profile_path))
+        assert any(func[2] == "ingest" for func in stats.stats)
+
+    def test_neo4j_load_with_checkpoint(self, tmp_path, monkeypatch):
+        """Test --neo4j loads in batches and resumes after a failure."""
+        graph = FakeGraph(fail_after=3)
+        monkeypatch.setattr(orbit.graph, "connect", lambda: graph)
+        args = (
+            "ingest", "--source", "attack", "--data-path", str(FIXTURE_PATH),
+            "--neo4j", "--batch-size", "5", "--checkpoint-dir", str(tmp_path),
+        )
+        code, _, err = run(*args)
+        assert code == 1
+        assert "rerun to resume" in err
+
+        graph.fail_after = None
+        code, _, err = run(*args)
+        assert code == 0
+        assert "(3 already loaded before resuming)" in err
+
+    def test_missing_file_fails(self, tmp_path):
+        """Test that a missing data file exits with code 1."""
+        code, out, err = run("ingest", "--source", "attack", "--data-path", str(tmp_path / "missing.json"))
+        assert code == 1
+        assert out == ""
+        assert "not found" in err
+
+    def test_taxii_needs_data_path(self):
+        """Test that a source without a configured path asks for --data-path."""
+        code, out, err = run("ingest", "--source", "taxii")
+        assert code == 1
+        assert out == ""
+        assert "orbit: ingest failed: No default data path for source 'taxii'" in err
+
+    def test_unreachable_taxii_server_fails(self, tmp_path):
+        """Test that network errors exit 1 instead of crashing."""
+        descriptor = tmp_path / "taxii.json"
+        descriptor.write_text(json.dumps({"collections": ["http://127.0.0.1:9/collections/enterprise/"]}))
+        code, out, err = run("ingest", "--source", "taxii", "--data-path", str(descriptor))
+        assert code == 1
+        assert out == ""
+        assert "orbit: ingest failed:" in err
+
+    def test_truncated_archive_fails(self, tmp_path):
+        """Test that a truncated compressed source exits 1 instead of crashing."""
+        data = gzip.compress(FIXTURE_PATH.read_bytes())
+        data_path = tmp_path / "bundle.json.gz"
+        data_path.write_bytes(data[: len(data) // 2])
+        code, _, err = run("ingest", "--source", "attack", "--data-path", str(data_path))
+        assert code == 1
+        assert "orbit: ingest failed: Corrupt or truncated compressed input" in err
+
+    def test_invalid_object_fails_unless_keep_going(self, tmp_path):
+        """Test validation failures exit 1, or are reported with --keep-going."""
+        bundle = json.loads(FIXTURE_PATH.read_text())
+        bundle["objects"].append({"id": "not-a-stix-id", "type": "attack-pattern"})
+        data_path = tmp_path / "invalid.json"
+        data_path.write_text(json.dumps(bundle))
+
+        code, out, err = run("ingest", "--source", "attack", "--data-path", str(data_path))
+        assert code == 1
+        assert out == ""
+        assert "not-a-stix-id" in err
+
+        code, out, err = run("ingest", "--source", "attack", "--data-path", str(data_path), "--keep-going")
+        assert code == 0
+        assert len(out.splitlines()) == 40
+        assert "invalid object: not-a-stix-id" in err
+
+    def test_unknown_source_is_usage_error(self):
+        """Test that unknown sources are rejected by argument parsing."""
+        with pytest.raises(SystemExit) as exc:
+            run("ingest", "--source", "unknown")
+        assert exc.value.code == 2
+
+
+class TestServeCommand:
+    """Tests for `orbit serve`."""
+
+    def test_missing_output_dir_fails(self, tmp_path):
+        """Test serving a directory without ingest output exits with an error."""
+        code, _, err = run("serve", "--output-dir", str(tmp_path), "--port", "0")
+        assert code == 1
+        assert "serve failed" in err
+
+
+class TestWatchCommand:
+    """Tests for `orbit watch`."""
+
+    def test_once_publishes_and_exits(self, tmp_path):
+        """Test --once ingests each source, reports the snapshot and exits."""
+        out = tmp_path / "out"
+        code, _, err = run("watch", "--output-root", str(out), "--watch", f"attack={FIXTURE_PATH}", "--once")
+        assert code == 0
+        assert "published attack snapshot 000001 (40 object(s): 40 added" in err
+        assert (out / "attack" / "current" / "objects.ndjson").exists()
+
+        code, _, err = run("watch", "--output-root", str(out), "--watch", f"attack={FIXTURE_PATH}", "--once")
+        assert code == 0
+        assert err == ""
+
+    def test_once_reports_failed_ingest(self, tmp_path):
+        """Test --once exits non-zero when a source fails to ingest."""
+        bad = tmp_path / "bad.json"
+        bad.write_text("{not json")
+        code, _, err = run("watch", "--output-root", str(tmp_path / "out"), "--watch", f"attack={bad}", "--once")
+        assert code == 1
+        assert "attack ingest failed" in err
+
+    def test_unknown_source(self, tmp_path):
+        """Test an unknown --watch source is a usage error."""
+        code, _, err = run("watch", "--output-root", str(tmp_path), "--watch", "nope=x.json", "--once")
+        assert code == 2
+        assert "Unknown source" in err
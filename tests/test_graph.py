@@ -0,0 +1,184 @@
+"""
+Tests for the Neo4j graph writer and resumable graph loads
+"""
+
+import json
+import pytest
+from contextlib import nullcontext
+from pathlib import Path
+
+from neo4j.exceptions import ServiceUnavailable
+
+from orbit.graph import GraphWriter, graph_properties
+from orbit.graph.writer import CONSTRAINT_QUERY, node_label, relationship_label
+from orbit.ingestion import IngestConfig, ingest
+from orbit.ingestion.checkpoint import CHECKPOINT_FILENAME
+
+FIXTURE_PATH = Path(__file__).parent / "fixtures" / "attack_sample.json"
+
+
+class ConnectionLost(ServiceUnavailable):
+    """Driver error raised mid-load (DB restart, pod eviction)."""
+
+
+class FakeGraph:
+    """In-memory graph applying the writer's MERGE semantics by STIX ID."""
+
+    def __init__(self, fail_after: int | None = None):
+        self.nodes: dict[str, dict] = {}
+        self.edges: dict[str, tuple[str, str, dict]] = {}
+        self.batches: list[str] = []  # first row's stix_id of each committed batch
+        self.fail_after = fail_after
+
+    def session(self, database=None):
+        return FakeSession(self)
+
+    def close(self):
+        pass
+
+    def apply(self, query: str, rows: list[dict]) -> None:
+        if self.fail_after is not None and len(self.batches) >= self.fail_after:
+            raise ConnectionLost("connection lost")
+        for row in rows:
+            if "MERGE (n:" in query:
+                self.nodes[row["stix_id"]] = row["properties"]
+            elif row["source"] in self.nodes and row["target"] in self.nodes:
+                self.edges[row["stix_id"]] = (row["source"], row["target"], row["properties"])
+        self.batches.append(rows[0]["stix_id"])
+
+
+class FakeResult:
+    def consume(self):
+        return None
+
+
+class FakeTransaction:
+    def __init__(self, graph: FakeGraph):
+        self.graph = graph
+
+    def run(self, query, rows=None):
+        self.graph.apply(query, rows)
+        return FakeResult()
+
+
+class FakeSession:
+    def __init__(self, graph: FakeGraph):
+        self.graph = graph
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def run(self, query):
+        assert query == CONSTRAINT_QUERY
+        return FakeResult()
+
+    def execute_write(self, work, *args):
+        return work(FakeTransaction(self.graph), *args)
+
+
+@pytest.fixture(scope="module")
+def objects():
+    return json.loads(FIXTURE_PATH.read_text())["objects"]
+
+
+class TestGraphWriter:
+    """Tests for GraphWriter."""
+
+    def test_labels(self):
+        """Test STIX types map to Neo4j labels and relationship types."""
+        assert node_label("attack-pattern") == "AttackPattern"
+        assert node_label("x-mitre-data-component") == "XMitreDataComponent"
+        assert relationship_label("subtechnique-of") == "SUBTECHNIQUE_OF"
+        assert relationship_label("uses") == "USES"
+
+    def test_properties(self, objects):
+        """Test nested values are stored as JSON and id as stix_id."""
+        technique = next(o for o in objects if o["type"] == "attack-pattern")
+        properties = graph_properties(technique)
+        assert properties["stix_id"] == technique["id"]
+        assert "id" not in properties
+        assert json.loads(properties["external_references"]) == technique["external_references"]
+        assert properties["name"] == technique["name"]
+
+    def test_plan_is_deterministic(self, objects):
+        """Test nodes precede edges and batches don't depend on input order."""
+        writer = GraphWriter(FakeGraph(), batch_size=3)
+        plan = writer.plan(objects)
+        assert plan == writer.plan(list(reversed(objects)))
+        assert all(len(batch.rows) <= 3 for batch in plan)
+        kinds = ["MERGE (n:" in batch.query for batch in plan]
+        assert kinds == sorted(kinds, reverse=True)
+        assert sum(len(batch.rows) for batch in plan) == len(objects)
+
+    def test_write_is_idempotent(self, objects):
+        """Test writing the same objects twice leaves the graph unchanged."""
+        graph = FakeGraph()
+        writer = GraphWriter(graph, batch_size=7)
+        writer.write(objects)
+        nodes, edges = dict(graph.nodes), dict(graph.edges)
+        writer.write(objects)
+        assert (graph.nodes, graph.edges) == (nodes, edges)
+        relationships = [o for o in objects if o["type"] == "relationship"]
+        assert len(edges) == len(relationships)
+        assert len(nodes) == len(objects) - len(relationships)
+
+    def test_write_skips_committed_batches(self, objects):
+        """Test skip resumes at the given batch."""
+        graph = FakeGraph()
+        writer = GraphWriter(graph, batch_size=5)
+        committed = []
+        written = writer.write(objects, skip=2, on_batch=committed.append)
+        total = len(writer.plan(objects))
+        assert written == total - 2
+        assert committed == list(range(3, total + 1))
+
+
+class TestResumableLoad:
+    """Tests for checkpointed ingest + graph load."""
+
+    def test_crashed_load_resumes_from_checkpoint(self, objects, tmp_path):
+        """Test a rerun skips validation and every committed batch."""
+        config = IngestConfig(source="attack", data_path=FIXTURE_PATH, checkpoint_dir=tmp_path)
+        graph = FakeGraph(fail_after=4)
+        with pytest.raises(ConnectionLost):
+            ingest(config, graph=GraphWriter(graph, batch_size=5))
+        assert len(graph.batches) == 4
+        assert (tmp_path / CHECKPOINT_FILENAME).exists()
+
+        stages = []
+
+        def record(name):
+            stages.append(name)
+            return nullcontext()
+
+        graph.fail_after = None
+        result = ingest(config, stage_hook=record, graph=GraphWriter(graph, batch_size=5))
+        assert "validate" not in stages and "resume" in stages
+        assert result.metadata["resumed"] is True
+        assert result.metadata["graph"]["batches_skipped"] == 4
+        assert len(graph.batches) == len(GraphWriter(graph, batch_size=5).plan(objects))
+        assert len(graph.nodes) + len(graph.edges) == len(objects)
+        assert not (tmp_path / CHECKPOINT_FILENAME).exists()  # cleared on success
+
+    def test_resumed_result_matches_fresh_run(self, tmp_path):
+        """Test objects restored from a checkpoint equal a fresh ingest."""
+        config = IngestConfig(source="attack", data_path=FIXTURE_PATH, checkpoint_dir=tmp_path)
+        with pytest.raises(ConnectionLost):
+            ingest(config, graph=GraphWriter(FakeGraph(fail_after=0)))
+        resumed = ingest(config, graph=GraphWriter(FakeGraph()))
+        fresh = ingest(IngestConfig(source="attack", data_path=FIXTURE_PATH))
+        assert resumed.objects == fresh.objects
+
+    def test_checkpoint_ignored_for_different_run(self, tmp_path):
+        """Test a checkpoint from other options or batch size is discarded."""
+        config = IngestConfig(source="attack", data_path=FIXTURE_PATH, checkpoint_dir=tmp_path)
+        with pytest.raises(ConnectionLost):
+            ingest(config, graph=GraphWriter(FakeGraph(fail_after=2), batch_size=5))
+
+        graph = FakeGraph()
+        result = ingest(config, graph=GraphWriter(graph, batch_size=10))
+        assert result.metadata["resumed"] is False
+        assert result.metadata["graph"]["batches_skipped"] == 0
@@ -0,0 +1,946 @@
+"""
+Tests for derived indexes
+"""
+
+import json
+import pytest
+from pathlib import Path
+
+import numpy as np
+
+from orbit.adapters import CSFAdapter
+from orbit.indexes import (
+    Crosswalk,
+    DetectionCoverage,
+    ExternalIdIndex,
+    HashingEmbedder,
+    HierarchyIndex,
+    Hop,
+    IncidenceIndex,
+    MinHashIndex,
+    PathGraph,
+    TextIndex,
+    VectorIndex,
+    tokenize,
+)
+from orbit.config import D3FEND_ID_IRI
+from orbit.schemas import ValidationError
+
+FIXTURE_PATH = Path(__file__).parent / "fixtures" / "attack_sample.json"
+CSF_FIXTURE_PATH = Path(__file__).parent / "fixtures" / "csf_sample.json"
+CSF_MAPPINGS_PATH = Path(__file__).parent / "fixtures" / "csf_mappings.json"
+
+
+def load_fixture_objects() -> list[dict]:
+    """Load objects from the ATT&CK sample bundle."""
+    return json.loads(FIXTURE_PATH.read_text())["objects"]
+
+
+def ids_by_external_id(objects: list[dict]) -> dict[str, str]:
+    """Map ATT&CK external IDs (T1059, G0016, ...) to STIX IDs."""
+    return {
+        ref["external_id"]: obj["id"]
+        for obj in objects
+        for ref in obj.get("external_references", [])
+        if "external_id" in ref
+    }
+
+
+@pytest.fixture(scope="module")
+def objects():
+    return load_fixture_objects()
+
+
+@pytest.fixture(scope="module")
+def ext(objects):
+    return ids_by_external_id(objects)
+
+
+@pytest.fixture(scope="module")
+def hierarchy(objects):
+    return HierarchyIndex.build(objects)
+
+
+class TestHierarchyIndex:
+    """Tests for HierarchyIndex."""
+
+    def test_parent_and_children(self, hierarchy, ext):
+        """Test parent/child navigation from subtechnique-of relationships."""
+        assert hierarchy.parent(ext["T1059.001"]) == ext["T1059"]
+        assert hierarchy.parent(ext["T1059"]) is None
+        assert hierarchy.children(ext["T1059"]) == sorted(
+            [ext["T1059.001"], ext["T1059.003"]]
+        )
+        assert hierarchy.children(ext["T1059.001"]) == []
+
+    def test_closure(self, hierarchy, ext):
+        """Test ancestor/descendant closure via interval labels."""
+        assert sorted(hierarchy.descendants(ext["T1059"])) == sorted(
+            [ext["T1059.001"], ext["T1059.003"]]
+        )
+        assert hierarchy.ancestors(ext["T1059.003"]) == [ext["T1059"]]
+        assert hierarchy.is_descendant(ext["T1059.001"], ext["T1059"])
+        assert not hierarchy.is_descendant(ext["T1059"], ext["T1059.001"])
+        assert not hierarchy.is_descendant(ext["T1566.001"], ext["T1059"])
+
+    def test_revoked_redirect(self, hierarchy, ext):
+        """Test that revoked techniques resolve to their replacement."""
+        assert hierarchy.is_revoked(ext["T1193"])
+        assert hierarchy.resolve(ext["T1193"]) == ext["T1566.001"]
+        assert hierarchy.parent(ext["T1193"]) == ext["T1566"]
+
+    def test_deprecated(self, hierarchy, ext):
+        """Test deprecated objects are flagged."""
+        assert hierarchy.is_deprecated(ext["T1086"])
+        assert not hierarchy.is_deprecated(ext["T1059"])
+
+    def test_roll_up_groups_using_subtechniques(self, hierarchy, ext):
+        """Test 'all groups using any sub-technique of T1059'."""
+        groups = hierarchy.roll_up(ext["T1059"], "uses", "intrusion-set")
+        assert groups == {ext["G0016"]}
+
+        users = hierarchy.roll_up(ext["T1059"], "uses")
+        assert users == {ext["G0016"], ext["S0154"], ext["S0002"], ext["C0024"]}
+
+    def test_roll_up_follows_revoked_targets(self, hierarchy, ext):
+        """Test relationships to revoked techniques count for the replacement."""
+        groups = hierarchy.roll_up(ext["T1566"], "uses", "intrusion-set")
+        assert groups == {ext["G0007"]}
+
+    def test_roll_up_skips_revoked_relationships(self, hierarchy, ext):
+        """Test that revoked relationships are not indexed."""
+        assert hierarchy.roll_up(ext["T1086"], "uses") == frozenset()
+
+    def test_roll_down_inherits_parent_mitigations(self, hierarchy, ext):
+        """Test mitigations on a parent apply to its sub-techniques."""
+        assert hierarchy.roll_down(ext["T1059.001"], "mitigates") == {ext["M1038"]}
+        assert hierarchy.roll_up(ext["T1059.001"], "mitigates") == frozenset()
+
+    def test_unknown_technique_raises(self, hierarchy):
+        """Test that unknown IDs raise KeyError."""
+        with pytest.raises(KeyError, match="Unknown technique"):
+            hierarchy.parent("attack-pattern--00000000-0000-0000-0000-000000000000")
+
+    def test_multiple_parents_raises(self, objects, ext):
+        """Test that a sub-technique with two parents fails loudly."""
+        extra = {
+            "type": "relationship",
+            "id": "relationship--00000000-0000-0000-0000-000000000001",
+            "relationship_type": "subtechnique-of",
+            "source_ref": ext["T1059.001"],
+            "target_ref": ext["T1566"],
+        }
+        with pytest.raises(ValidationError, match="more than one parent"):
+            HierarchyIndex.build(objects + [extra])
+
+    def test_revocation_cycle_raises(self, objects, ext):
+        """Test that cyclic revoked-by chains fail loudly."""
+        extra = {
+            "type": "relationship",
+            "id": "relationship--00000000-0000-0000-0000-000000000002",
+            "relationship_type": "revoked-by",
+            "source_ref": ext["T1566.001"],
+            "target_ref": ext["T1193"],
+        }
+        with pytest.raises(ValidationError, match="Cycle"):
+            HierarchyIndex.build(objects + [extra])
+
+    def test_determinism(self, objects, ext):
+        """Test that index build is independent of input order."""
+        forward = HierarchyIndex.build(objects)
+        backward = HierarchyIndex.build(list(reversed(objects)))
+        assert forward.descendants(ext["T1059"]) == backward.descendants(ext["T1059"])
+        assert forward.roll_up(ext["T1059"]) == backward.roll_up(ext["T1059"])
+
+
+@pytest.fixture(scope="module")
+def text_index(objects):
+    return TextIndex.build(objects)
+
+
+class TestTextIndex:
+    """Tests for TextIndex."""
+
+    def test_tokenize(self):
+        """Test tokenization lowercases and drops stopwords."""
+        assert tokenize("Abuse of the PowerShell, T1059.001") == [
+            "abuse", "powershell", "t1059", "001"
+        ]
+
+    def test_indexes_only_searchable_types(self, text_index, ext):
+        """Test that relationships and markings are not indexed."""
+        assert ext["T1059"] in text_index
+        assert ext["G0016"] in text_index
+        assert ext["DS0017"] not in text_index
+        assert len(text_index) == 14
+
+    def test_search_ranks_name_matches_first(self, text_index, ext):
+        """Test BM25 ranking favours name matches."""
+        results = text_index.search("powershell commands")
+        assert {stix_id for stix_id, _ in results[:2]} == {ext["T1059.001"], ext["T1086"]}
+        assert results[2][0] == ext["T1059"]  # description match only
+        assert results[0][1] > results[2][1] > 0
+
+    def test_search_matches_aliases(self, text_index, ext):
+        """Test group aliases are searchable."""
+        assert text_index.search("cozy bear")[0][0] == ext["G0016"]
+
+    def test_search_type_filter_and_limit(self, text_index):
+        """Test restricting results by type and count."""
+        results = text_index.search("adversaries", limit=2, types={"attack-pattern"})
+        assert len(results) == 2
+        assert all(stix_id.startswith("attack-pattern--") for stix_id, _ in results)
+
+    def test_search_unknown_terms(self, text_index):
+        """Test that unmatched queries return no results."""
+        assert text_index.search("zzzz") == []
+        assert text_index.search("") == []
+
+    def test_update_reindexes_changed_objects(self, objects, ext):
+        """Test incremental update of a changed object."""
+        index = TextIndex.build(objects)
+        changed = dict(next(o for o in objects if o["id"] == ext["S0002"]))
+        changed["description"] = "Credential dumper for lsass memory."
+        changed["modified"] = "2025-01-01T00:00:00.000Z"
+
+        assert index.update([changed]) == 1
+        assert index.update([changed]) == 0  # unchanged modified -> skipped
+        assert index.search("lsass")[0][0] == ext["S0002"]
+        assert index.search("plaintext") == []
+
+    def test_update_removes_objects_no_longer_wanted(self, objects, ext):
+        """Test an indexed object outside the update's types is dropped, not left stale."""
+        index = TextIndex.build(objects)
+        changed = dict(next(o for o in objects if o["id"] == ext["S0002"]))
+        changed["modified"] = "2025-01-01T00:00:00.000Z"
+
+        assert index.update([changed], types={"intrusion-set"}) == 1
+        assert ext["S0002"] not in index
+        assert index.search("mimikatz") == []
+        assert index.update([changed], types={"intrusion-set"}) == 0
+
+    def test_remove(self, objects, ext):
+        """Test removing documents."""
+        index = TextIndex.build(objects)
+        assert index.remove([ext["T1059.001"], "unknown"]) == 1
+        assert ext["T1059.001"] not in index
+        assert ext["T1059.001"] not in [i for i, _ in index.search("powershell")]
+
+    def test_save_load_roundtrip(self, objects, text_index, tmp_path):
+        """Test persisted index answers queries identically."""
+        path = tmp_path / "text_index.json"
+        text_index.save(path)
+        loaded = TextIndex.load(path)
+        for query in ("powershell", "phishing attachment", "apt28"):
+            assert loaded.search(query) == text_index.search(query)
+
+    def test_save_is_independent_of_update_history(self, objects, ext, tmp_path):
+        """Test that an updated index persists identically to a fresh build."""
+        index = TextIndex.build(objects)
+        index.remove([ext["T1566"]])
+        index.update(objects)
+
+        fresh_path, updated_path = tmp_path / "fresh.json", tmp_path / "updated.json"
+        TextIndex.build(objects).save(fresh_path)
+        index.save(updated_path)
+        assert fresh_path.read_bytes() == updated_path.read_bytes()
+
+    def test_load_rejects_unknown_format(self, tmp_path):
+        """Test that loading a foreign file fails loudly."""
+        path = tmp_path / "other.json"
+        path.write_text("{}")
+        with pytest.raises(ValueError, match="Unsupported text index format"):
+            TextIndex.load(path)
+
+
+@pytest.fixture(scope="module")
+def incidence(objects, hierarchy):
+    return IncidenceIndex.build(objects, hierarchy=hierarchy)
+
+
+class TestIncidenceIndex:
+    """Tests for IncidenceIndex."""
+
+    def test_matrices_are_binary_csr(self, incidence):
+        """Test each kind has a binary CSR matrix over shared columns."""
+        for kind in ("groups", "software", "campaigns"):
+            matrix = incidence.matrix(kind)
+            assert matrix.format == "csr"
+            assert matrix.shape == (len(incidence.rows(kind)), len(incidence.columns))
+            assert set(matrix.data.tolist()) <= {1}
+
+    def test_techniques_resolve_revoked_targets(self, incidence, ext):
+        """Test uses of a revoked technique count toward its replacement."""
+        assert incidence.techniques(ext["G0007"]) == [ext["T1566.001"]]
+        assert ext["T1193"] not in incidence.columns
+        assert sorted(incidence.techniques(ext["S0154"])) == sorted(
+            [ext["T1059.001"], ext["T1059.003"]]
+        )
+
+    def test_co_occurring(self, incidence, ext):
+        """Test techniques used together are ranked by shared rows."""
+        assert incidence.co_occurring(ext["T1059.001"], "software") == [(ext["T1059.003"], 1)]
+        assert incidence.co_occurring(ext["T1059.001"], "groups") == []
+        counts = incidence.co_occurrence("software")
+        col = incidence.columns.index(ext["T1059.001"])
+        assert counts[col, col] == 2  # diagonal: software using T1059.001
+
+    def test_prevalence(self, incidence, ext):
+        """Test unweighted and campaign-weighted technique prevalence."""
+        assert incidence.most_prevalent("groups") == sorted(
+            [(ext["T1059.001"], 0.5), (ext["T1566.001"], 0.5)]
+        )
+        assert incidence.campaign_counts() == {ext["G0016"]: 1}
+        weighted = incidence.most_prevalent("groups", weights=incidence.campaign_counts())
+        assert weighted == [(ext["T1059.001"], 1.0)]
+
+    def test_similar(self, incidence, ext):
+        """Test cosine similarity over technique sets."""
+        [(stix_id, score)] = incidence.similar(ext["S0154"])
+        assert stix_id == ext["S0002"]
+        assert score == pytest.approx(2**-0.5)
+        assert incidence.similar(ext["G0016"]) == []
+        similarity = incidence.similarity("software")
+        assert similarity.shape == (len(incidence.rows("software")),) * 2
+
+    def test_roll_up_subtechniques(self, objects, ext):
+        """Test sub-technique use counts toward the top-level technique."""
+        rolled = IncidenceIndex.build(objects, roll_up_subtechniques=True)
+        assert sorted(rolled.columns) == sorted([ext["T1059"], ext["T1566"]])
+        assert rolled.techniques(ext["G0007"]) == [ext["T1566"]]
+        assert rolled.techniques(ext["S0154"]) == [ext["T1059"]]
+
+    def test_unknown_lookups_raise(self, incidence, ext):
+        """Test unknown kinds, rows and techniques raise KeyError."""
+        with pytest.raises(KeyError, match="Unknown incidence kind"):
+            incidence.matrix("mitigations")
+        with pytest.raises(KeyError, match="Unknown group"):
+            incidence.similar(ext["T1059"])
+        with pytest.raises(KeyError, match="Unknown technique"):
+            incidence.co_occurring(ext["G0016"])
+
+
+@pytest.fixture(scope="module")
+def vector_index(objects):
+    return VectorIndex.build(objects)
+
+
+class WordCountEmbedder:
+    """Minimal custom embedder: counts of a few fixed words."""
+
+    name = "word-count"
+    words = ("powershell", "phishing", "command", "attachment")
+    dim = len(words)
+
+    def embed(self, texts):
+        return np.array(
+            [[tokenize(text).count(word) for word in self.words] for text in texts], dtype=float
+        )
+
+
+class TestVectorIndex:
+    """Tests for VectorIndex."""
+
+    def test_vectors_are_normalized_float32(self, vector_index):
+        """Test vectors are unit-length float32 rows, one per technique."""
+        vectors = np.stack([vector_index.vector(stix_id) for stix_id in vector_index.ids])
+        assert vectors.dtype == np.float32
+        assert np.allclose(np.linalg.norm(vectors, axis=1), 1.0, atol=1e-6)
+        assert all(stix_id.startswith("attack-pattern--") for stix_id in vector_index.ids)
+
+    def test_search_ranks_matching_technique_first(self, vector_index, ext):
+        """Test free-text queries map to the expected technique."""
+        assert vector_index.search("Windows cmd.exe command shell", k=1)[0][0] == ext["T1059.003"]
+        assert vector_index.search("spearphishing email with malicious attachment", k=1)[0][0] in {
+            ext["T1566.001"],
+            ext["T1193"],
+        }
+        assert vector_index.search("zzzz qqqq") == []
+
+    def test_batch_matches_single_queries(self, vector_index):
+        """Test batched search returns the same results as one-by-one search."""
+        queries = ["powershell scripts", "phishing", "command interpreter", ""]
+        batched = vector_index.search_batch(queries, k=3)
+        assert batched == [vector_index.search(query, k=3) for query in queries]
+
+    def test_update_reembeds_only_changed(self, objects, ext):
+        """Test update() skips objects whose modified timestamp is unchanged."""
+        index = VectorIndex.build(objects)
+        assert index.update(objects) == 0
+
+        changed = dict(next(o for o in objects if o["id"] == ext["T1059.001"]))
+        changed.update(modified="2030-01-01T00:00:00.000Z", description="Abuse of BITS jobs")
+        added = {
+            "type": "attack-pattern",
+            "id": "attack-pattern--11111111-1111-4111-8111-111111111111",
+            "name": "Kerberoasting",
+            "modified": "2030-01-01T00:00:00.000Z",
+        }
+        assert index.update([changed, added]) == 2
+        assert index.search("bits jobs", k=1)[0][0] == ext["T1059.001"]
+        assert index.search("kerberoasting", k=1)[0][0] == added["id"]
+
+    def test_failed_update_is_retried(self, objects, ext):
+        """Test an object whose embedding failed is re-embedded by the next update."""
+
+        class FlakyEmbedder(WordCountEmbedder):
+            fail = False
+
+            def embed(self, texts):
+                if self.fail:
+                    raise RuntimeError("embedding backend unavailable")
+                return super().embed(texts)
+
+        embedder = FlakyEmbedder()
+        index = VectorIndex.build(objects, embedder=embedder)
+        before = index.vector(ext["T1059.001"]).copy()
+        changed = dict(next(o for o in objects if o["id"] == ext["T1059.001"]))
+        changed.update(modified="2030-01-01T00:00:00.000Z", description="Phishing attachment")
+
+        embedder.fail = True
+        with pytest.raises(RuntimeError):
+            index.update([changed])
+        embedder.fail = False
+        assert index.update([changed]) == 1
+        assert not np.array_equal(index.vector(ext["T1059.001"]), before)
+
+    def test_remove(self, objects, ext):
+        """Test removed documents are no longer returned."""
+        index = VectorIndex.build(objects)
+        assert index.remove([ext["T1059.003"], "unknown"]) == 1
+        assert ext["T1059.003"] not in index
+        assert ext["T1059.003"] not in [i for i, _ in index.search("windows command shell")]
+
+    def test_save_load_roundtrip(self, vector_index, tmp_path):
+        """Test a loaded index is memory-mapped and answers identically."""
+        vector_index.save(tmp_path)
+        loaded = VectorIndex.load(tmp_path)
+        assert isinstance(loaded._vectors, np.memmap)
+        for query in ("powershell", "phishing attachment", "command shell"):
+            assert loaded.search(query) == vector_index.search(query)
+
+    def test_loaded_index_updates_without_touching_file(self, objects, ext, tmp_path):
+        """Test updating a loaded index leaves the saved vectors intact."""
+        VectorIndex.build(objects).save(tmp_path)
+        before = (tmp_path / "vectors.npy").read_bytes()
+        loaded = VectorIndex.load(tmp_path)
+        changed = dict(next(o for o in objects if o["id"] == ext["T1059"]), modified="2030")
+        assert loaded.update([changed]) == 1
+        assert (tmp_path / "vectors.npy").read_bytes() == before
+
+    def test_custom_embedder(self, objects, ext, tmp_path):
+        """Test pluggable embedders and the load-time embedder check."""
+        index = VectorIndex.build(objects, embedder=WordCountEmbedder())
+        assert index.search("powershell", k=1)[0][0] in {ext["T1059.001"], ext["T1086"]}
+
+        index.save(tmp_path)
+        assert len(VectorIndex.load(tmp_path, embedder=WordCountEmbedder())) == len(index)
+        with pytest.raises(ValueError, match="pass it to load"):
+            VectorIndex.load(tmp_path)
+        with pytest.raises(ValueError, match="Embedder mismatch"):
+            VectorIndex.load(tmp_path, embedder=HashingEmbedder())
+
+    def test_hashing_embedder_is_deterministic(self, objects):
+        """Test hashing and fitted IDF survive a config round trip."""
+        texts = [o.get("description", "") for o in objects]
+        embedder = HashingEmbedder(dim=64).fit(texts)
+        restored = HashingEmbedder.from_dict(embedder.to_dict())
+        assert np.array_equal(embedder.embed(texts), restored.embed(texts))
+
+
+@pytest.fixture(scope="module")
+def crosswalk(objects):
+    adapter = CSFAdapter(mappings_path=CSF_MAPPINGS_PATH)
+    return Crosswalk.build(adapter.normalize(adapter.fetch(CSF_FIXTURE_PATH)) + objects)
+
+
+class TestCrosswalk:
+    """Tests for Crosswalk."""
+
+    def test_subcategory_targets(self, crosswalk):
+        """Test subcategories list their mapped mitigations and D3FEND techniques."""
+        assert "PR.PS-05" in crosswalk
+        assert "ID.AM-06" not in crosswalk  # withdrawn
+        assert crosswalk.mitigations("PR.PS-05") == ["M1038"]
+        assert crosswalk.d3fend_techniques("PR.PS-05") == ["D3-EAL"]
+        assert crosswalk.d3fend_techniques("PR.PS-01") == ["D3-ACH"]
+        with pytest.raises(KeyError, match="PR.PS-99"):
+            crosswalk.mitigations("PR.PS-99")
+
+    def test_targets_to_subcategories(self, crosswalk):
+        """Test the reverse lookup from mapping targets."""
+        assert crosswalk.subcategories_for("D3-EAL") == ["PR.PS-05"]
+        assert crosswalk.subcategories_for("M1049") == ["DE.CM-09"]
+        assert crosswalk.subcategories_for("M9999") == []
+
+    def test_techniques_inherit_parent_mitigations(self, crosswalk, ext):
+        """Test a subcategory addresses sub-techniques of mitigated techniques."""
+        techniques = crosswalk.techniques("PR.PS-05")
+        assert ext["T1059"] in techniques
+        assert ext["T1059.001"] in techniques
+        assert techniques == sorted(techniques)
+        assert crosswalk.techniques("PR.PS-01") == []  # D3FEND-only mapping
+
+    def test_outcomes(self, crosswalk, ext):
+        """Test outcomes union every subcategory addressing any technique."""
+        assert crosswalk.outcomes([ext["T1059.001"]]) == ["PR.PS-05"]
+        assert crosswalk.outcomes([ext["T1059.001"], ext["T1566.001"]]) == ["DE.CM-09", "PR.PS-05"]
+        assert crosswalk.outcomes(["attack-pattern--unknown"]) == []
+
+    def test_coverage(self, crosswalk, ext):
+        """Test per-outcome coverage with uncovered and unknown techniques."""
+        report = crosswalk.coverage(
+            [ext["T1059.001"], ext["T1566.001"], ext["T1566"], "attack-pattern--unknown"]
+        )
+        assert report.outcomes == {
+            "DE.CM-09": [ext["T1566.001"]],
+            "PR.PS-05": [ext["T1059.001"]],
+        }
+        assert report.uncovered == [ext["T1566"]]
+        assert report.unknown == ["attack-pattern--unknown"]
+
+    def test_revoked_technique_redirects(self, crosswalk, ext):
+        """Test revoked technique IDs answer for their replacement."""
+        assert crosswalk.outcomes([ext["T1193"]]) == crosswalk.outcomes([ext["T1566.001"]])
+        assert crosswalk.coverage([ext["T1193"]]).outcomes == {"DE.CM-09": [ext["T1566.001"]]}
+
+    def test_save_load_roundtrip(self, crosswalk, ext, tmp_path):
+        """Test a loaded crosswalk answers identically and saves the same bytes."""
+        crosswalk.save(tmp_path / "crosswalk.json")
+        loaded = Crosswalk.load(tmp_path / "crosswalk.json")
+        techniques = [ext["T1059.001"], ext["T1566.001"], ext["T1566"], ext["T1193"], "attack-pattern--unknown"]
+        assert loaded.subcategories == crosswalk.subcategories
+        assert loaded.outcomes(techniques) == crosswalk.outcomes(techniques)
+        assert loaded.coverage(techniques) == crosswalk.coverage(techniques)
+        assert loaded.subcategories_for("D3-EAL") == ["PR.PS-05"]
+        loaded.save(tmp_path / "again.json")
+        assert (tmp_path / "again.json").read_bytes() == (tmp_path / "crosswalk.json").read_bytes()
+
+        (tmp_path / "bad.json").write_text('{"format": "other"}')
+        with pytest.raises(ValueError, match="Unsupported crosswalk format"):
+            Crosswalk.load(tmp_path / "bad.json")
+
+
+@pytest.fixture(scope="module")
+def detection(objects, hierarchy):
+    return DetectionCoverage.build(objects, hierarchy=hierarchy)
+
+
+@pytest.fixture(scope="module")
+def components(detection):
+    return {detection.label(stix_id).split(": ")[1]: stix_id for stix_id in detection.components}
+
+
+class TestDetectionCoverage:
+    """Tests for DetectionCoverage."""
+
+    def test_components_and_labels(self, detection, components):
+        """Test rows are active data components labelled by their data source."""
+        assert detection.components == sorted(detection.components)
+        assert set(components) == {"Command Execution", "Network Traffic Content"}
+        assert detection.label(components["Command Execution"]) == "Command: Command Execution"
+        with pytest.raises(KeyError):
+            detection.label("x-mitre-data-component--unknown")
+
+    def test_detects(self, detection, components, ext):
+        """Test per-component technique sets from detects relationships."""
+        assert detection.detects(components["Command Execution"]) == sorted(
+            [ext["T1059.001"], ext["T1059.003"]]
+        )
+        assert detection.detects(components["Network Traffic Content"]) == [ext["T1566.001"]]
+        assert ext["T1193"] not in detection.techniques
+        assert ext["T1086"] not in detection.techniques
+
+    def test_profile_entries(self, detection, components):
+        """Test profiles accept component IDs/labels and data source IDs/names."""
+        everything = np.ones(len(detection.components), dtype=bool)
+        assert detection.profile_mask(["DS0017"]).tolist() == everything.tolist()
+        assert detection.profile_mask(["command"]).tolist() == everything.tolist()
+        one = detection.profile_mask(["Command: Network Traffic Content"])
+        assert one.tolist() == detection.profile_mask([components["Network Traffic Content"]]).tolist()
+        assert one.sum() == 1
+        with pytest.raises(KeyError):
+            detection.profile_mask(["Process: Process Creation"])
+
+    def test_covered_and_gaps(self, detection, ext):
+        """Test coverage is the union of component bitsets and gaps its complement."""
+        profile = ["Command: Command Execution"]
+        assert detection.covered(profile) == sorted([ext["T1059.001"], ext["T1059.003"]])
+        assert detection.gaps(profile) == sorted(
+            [ext["T1059"], ext["T1566"], ext["T1566.001"]]
+        )
+        assert detection.gaps(profile, [ext["T1059.001"], ext["T1193"]]) == [ext["T1566.001"]]
+        assert detection.covered([]) == []
+        with pytest.raises(KeyError):
+            detection.gaps(profile, ["attack-pattern--unknown"])
+
+    def test_best_next(self, detection, components, ext):
+        """Test components are ranked by uncovered techniques they would add."""
+        assert detection.best_next([]) == [
+            (components["Command Execution"], 2.0),
+            (components["Network Traffic Content"], 1.0),
+        ]
+        assert detection.best_next(["Command: Command Execution"]) == [
+            (components["Network Traffic Content"], 1.0)
+        ]
+        assert detection.best_next(["DS0017"]) == []
+        weights = {ext["T1566.001"]: 5.0, ext["T1059.001"]: 1.0}
+        assert detection.best_next([], k=1, weights=weights) == [
+            (components["Network Traffic Content"], 5.0)
+        ]
+
+    def test_batch_queries_match_single_profile(self, detection, components):
+        """Test vectorized batch answers agree with per-profile queries."""
+        profiles = [[], ["DS0017"], ["Command: Network Traffic Content"], ["Command: Command Execution"]]
+        matrix = detection.coverage_matrix(profiles)
+        assert matrix.shape == (len(profiles), len(detection.techniques))
+        for row, profile in zip(matrix, profiles):
+            assert [detection.techniques[t] for t in np.flatnonzero(row)] == detection.covered(profile)
+        assert detection.coverage_counts(profiles).tolist() == [0, 3, 1, 2]
+        masks = np.array([detection.profile_mask(profile) for profile in profiles])
+        assert detection.coverage_counts(masks).tolist() == [0, 3, 1, 2]
+        assert detection.best_next_many(profiles) == [
+            (components["Command Execution"], 2.0),
+            None,
+            (components["Command Execution"], 2.0),
+            (components["Network Traffic Content"], 1.0),
+        ]
+
+    def test_word_boundaries(self):
+        """Test bitsets spanning several 64-bit words."""
+        techniques = [
+            {"type": "attack-pattern", "id": f"attack-pattern--{i:04d}"} for i in range(130)
+        ]
+        component = {"type": "x-mitre-data-component", "id": "x-mitre-data-component--a", "name": "A"}
+        detects = [
+            {
+                "type": "relationship",
+                "id": f"relationship--{i:04d}",
+                "relationship_type": "detects",
+                "source_ref": component["id"],
+                "target_ref": techniques[i]["id"],
+            }
+            for i in (0, 63, 64, 129)
+        ]
+        detection = DetectionCoverage.build(techniques + [component] + detects)
+        assert detection.covered(["A"]) == [techniques[i]["id"] for i in (0, 63, 64, 129)]
+        assert len(detection.gaps(["A"])) == 126
+        assert detection.coverage_counts([["A"], []]).tolist() == [4, 0]
+
+
+def d3fend_objects(technique_id: str) -> list[dict]:
+    """A D3FEND artifact produced by a technique and a countermeasure detecting it."""
+    artifact = {"type": "d3fend-artifact", "id": "d3fend-artifact--process"}
+    countermeasure = {"type": "d3fend-technique", "id": "d3fend-technique--process-analysis"}
+    return [
+        artifact,
+        countermeasure,
+        {
+            "type": "relationship",
+            "id": "relationship--d3f-produces",
+            "relationship_type": "produces",
+            "source_ref": technique_id,
+            "target_ref": artifact["id"],
+        },
+        {
+            "type": "relationship",
+            "id": "relationship--d3f-detects",
+            "relationship_type": "detects",
+            "source_ref": countermeasure["id"],
+            "target_ref": artifact["id"],
+        },
+    ]
+
+
+@pytest.fixture(scope="module")
+def path_graph(objects, ext):
+    return PathGraph.build(objects + d3fend_objects(ext["T1059.003"]))
+
+
+class TestPathGraph:
+    """Tests for PathGraph."""
+
+    def test_nodes_and_edges(self, path_graph, ext):
+        """Test nodes are active objects and edges are typed relationships."""
+        assert ext["G0016"] in path_graph
+        assert ext["T1193"] not in path_graph  # revoked
+        assert ext["T1086"] not in path_graph  # deprecated
+        assert path_graph.type_of(ext["S0154"]) == "malware"
+        assert "revoked-by" not in path_graph.edge_types
+        assert {"uses", "mitigates", "produces", "x_mitre_data_source_ref"} <= set(path_graph.edge_types)
+        with pytest.raises(KeyError):
+            path_graph.node("attack-pattern--unknown")
+
+    def test_neighbors_resolve_revoked_endpoints(self, path_graph, ext):
+        """Test edges to revoked objects point at their replacement."""
+        assert path_graph.neighbors(ext["G0007"]) == [ext["T1566.001"]]
+        assert path_graph.neighbors(ext["G0016"], edge_types=["uses"]) == sorted(
+            [ext["T1059.001"], ext["S0154"]]
+        )
+        assert path_graph.neighbors(ext["T1059"], direction="in", edge_types=["mitigates"]) == [
+            ext["M1038"]
+        ]
+
+    def test_follow_typed_hops(self, path_graph, ext):
+        """Test technique -> artifact -> countermeasure and group -> software -> technique."""
+        defences = path_graph.follow(
+            ext["S0154"],
+            [
+                Hop(frozenset({"uses"})),
+                Hop(frozenset({"produces", "accesses", "modifies"})),
+                Hop(frozenset({"detects", "deprives"}), direction="in"),
+            ],
+        )
+        assert defences == ["d3fend-technique--process-analysis"]
+        techniques = path_graph.follow(
+            ext["G0016"],
+            [
+                Hop(frozenset({"uses"}), node_types=frozenset({"malware", "tool"})),
+                Hop(frozenset({"uses"}), node_types=frozenset({"attack-pattern"})),
+            ],
+        )
+        assert techniques == sorted([ext["T1059.001"], ext["T1059.003"]])
+        assert path_graph.follow(ext["G0016"], [Hop(frozenset({"no-such-type"}))]) == []
+
+    def test_distances_and_within(self, path_graph, ext):
+        """Test BFS hop distances and k-hop neighbourhoods."""
+        distance = path_graph.distances(ext["G0016"], edge_types=["uses"])
+        assert distance[path_graph.node(ext["G0016"])] == 0
+        assert distance[path_graph.node(ext["T1059.001"])] == 1
+        assert distance[path_graph.node(ext["T1059.003"])] == 2
+        assert distance[path_graph.node(ext["M1038"])] == -1
+        assert path_graph.within(ext["G0016"], 1, edge_types=["uses"]) == sorted(
+            [ext["T1059.001"], ext["S0154"]]
+        )
+        assert path_graph.within(
+            ext["DS0017"], 2, direction="both", node_types=["attack-pattern"]
+        ) == sorted([ext["T1059.001"], ext["T1059.003"], ext["T1566.001"]])
+        with pytest.raises(ValueError):
+            path_graph.distances(ext["G0016"], direction="sideways")
+
+    def test_shortest_path(self, path_graph, ext):
+        """Test fewest-hop paths and reachability."""
+        path = path_graph.shortest_path(ext["G0016"], "d3fend-technique--process-analysis", "both")
+        assert path[0] == ext["G0016"] and len(path) == 5
+        assert path_graph.shortest_path(ext["G0016"], "d3fend-technique--process-analysis") is None
+        assert path_graph.shortest_path(ext["G0016"], ext["G0016"]) == [ext["G0016"]]
+        assert path_graph.shortest_path(ext["G0016"], ext["T1059.003"], max_hops=1) is None
+
+    def test_save_and_load_memory_maps(self, path_graph, ext, tmp_path):
+        """Test a saved graph loads read-only memory-mapped and answers the same."""
+        path_graph.save(tmp_path)
+        loaded = PathGraph.load(tmp_path)
+        assert isinstance(loaded._out[1], np.memmap)
+        assert not loaded._out[1].flags.writeable
+        assert len(loaded) == len(path_graph)
+        assert loaded.edge_count == path_graph.edge_count
+        assert loaded.within(ext["G0016"], 3, "both") == path_graph.within(ext["G0016"], 3, "both")
+        assert ext["G0016"] in PathGraph.load(tmp_path, mmap=False)
+
+    def test_load_rejects_other_formats(self, tmp_path):
+        """Test loading a directory without a path graph fails clearly."""
+        (tmp_path / "graph.json").write_text('{"format": "other"}')
+        with pytest.raises(ValueError):
+            PathGraph.load(tmp_path)
+
+
+@pytest.fixture(scope="module")
+def minhash(objects):
+    return MinHashIndex.build(objects)
+
+
+class TestMinHashIndex:
+    """Tests for MinHashIndex."""
+
+    def test_build_indexes_groups_and_software(self, minhash, ext):
+        """Test build() indexes group and software technique profiles."""
+        assert ext["G0016"] in minhash
+        assert ext["S0154"] in minhash
+        assert ext["C0024"] not in minhash  # campaigns not indexed by default
+        assert len(minhash) == 4
+
+    def test_similar_profiles(self, minhash, ext):
+        """Test identical profiles score 1 and partial overlaps near exact Jaccard."""
+        # G0016 and S0002 both use only T1059.001; S0154 adds T1059.003
+        hits = dict(minhash.similar(ext["G0016"]))
+        assert hits[ext["S0002"]] == 1.0
+        assert abs(minhash.estimate(ext["G0016"], ext["S0154"]) - 0.5) < 0.15
+        assert minhash.similar(ext["G0016"])[0] == (ext["S0002"], 1.0)
+        assert ext["G0016"] not in hits
+        assert minhash.similar(ext["G0007"]) == []  # T1566.001 only
+        with pytest.raises(KeyError):
+            minhash.similar("intrusion-set--unknown")
+
+    def test_signatures_are_stable(self, ext):
+        """Test signatures depend only on the techniques and the seed."""
+        first = MinHashIndex().signature([ext["T1059.001"], ext["T1059.003"]])
+        second = MinHashIndex().signature([ext["T1059.003"], ext["T1059.001"], ext["T1059.001"]])
+        assert first.dtype == np.uint32 and len(first) == 128
+        assert first.tolist() == second.tolist()
+        assert first.tolist() != MinHashIndex(seed=2).signature([ext["T1059.001"]]).tolist()
+
+    def test_incremental_insert_replace_and_remove(self):
+        """Test profiles can be added, replaced and removed without a rebuild."""
+        index = MinHashIndex(num_perm=64, bands=16)
+        techniques = [f"attack-pattern--{i:03d}" for i in range(40)]
+        index.add("cluster-a", techniques[:20])
+        index.add("cluster-b", techniques[:19] + techniques[30:31])
+        index.add("cluster-c", techniques[20:40])
+        assert [key for key, _ in index.query(techniques[:20], k=2)] == ["cluster-a", "cluster-b"]
+        assert index.similar("cluster-c") == []
+
+        index.add("cluster-c", techniques[:20])  # replaced in place
+        assert len(index) == 3
+        assert index.similar("cluster-a")[0] == ("cluster-c", 1.0)
+
+        assert index.remove(["cluster-c", "cluster-z"]) == 1
+        assert "cluster-c" not in index
+        assert [key for key, _ in index.similar("cluster-a")] == ["cluster-b"]
+        index.add("cluster-d", techniques[:20])  # reuses the freed slot
+        assert index.similar("cluster-a")[0] == ("cluster-d", 1.0)
+
+    def test_empty_profiles_never_match(self):
+        """Test empty profiles are stored but neither match nor are matched."""
+        index = MinHashIndex()
+        index.add("empty", [])
+        index.add("other", ["attack-pattern--1"])
+        assert "empty" in index
+        assert index.similar("empty") == []
+        assert index.query([]) == []
+        assert index.estimate("empty", "other") == 0.0
+
+    def test_min_similarity_and_parameters(self):
+        """Test the similarity floor and band/permutation validation."""
+        index = MinHashIndex(num_perm=64, bands=32)
+        index.add("a", ["t1", "t2", "t3", "t4"])
+        index.add("b", ["t1", "t2", "t3", "t4", "t5", "t6", "t7", "t8"])
+        assert index.query(["t1", "t2", "t3", "t4"], min_similarity=0.99) == [("a", 1.0)]
+        assert 0 < index.threshold < 1
+        with pytest.raises(ValueError):
+            MinHashIndex(num_perm=100, bands=32)
+
+
+@pytest.fixture(scope="module")
+def external_ids(objects):
+    return ExternalIdIndex.build(objects)
+
+
+def d3fend_technique(stix_id: str, d3fend_id) -> dict:
+    """A D3FEND technique carrying its ID as an expanded JSON-LD property."""
+    return {"type": "d3fend-technique", "id": stix_id, D3FEND_ID_IRI: d3fend_id}
+
+
+class TestExternalIdIndex:
+    """Tests for ExternalIdIndex."""
+
+    def test_resolves_attack_ids(self, external_ids, ext):
+        """Test ATT&CK IDs of every object kind resolve, case-insensitively."""
+        for external_id in ("T1059.001", "G0016", "M1038", "S0154", "C0024", "DS0017"):
+            assert external_ids.resolve(external_id) == ext[external_id]
+        assert external_ids.resolve(" t1059.001 ") == ext["T1059.001"]
+        assert "g0016" in external_ids
+
+    def test_resolves_reference_urls(self, external_ids, ext):
+        """Test reference URLs resolve, ignoring case and a trailing slash."""
+        assert external_ids.resolve("https://attack.mitre.org/techniques/T1059/001") == ext["T1059.001"]
+        assert external_ids.resolve("HTTPS://attack.mitre.org/techniques/T1059/001/") == ext["T1059.001"]
+
+    def test_unknown_key(self, external_ids):
+        """Test unknown keys raise KeyError from resolve() and default from get()."""
+        with pytest.raises(KeyError, match="T9999"):
+            external_ids.resolve("T9999")
+        assert external_ids.get("T9999") is None
+        assert external_ids.get("T9999", "fallback") == "fallback"
+        assert external_ids.lookup("T9999") == ()
+
+    def test_shared_keys_prefer_active_objects(self, objects, ext):
+        """Test that an active object wins over a revoked one with the same key."""
+        reused = {
+            "type": "attack-pattern",
+            "id": "attack-pattern--00000000-0000-4000-8000-000000000000",
+            "external_references": [{"source_name": "mitre-attack", "external_id": "T1193"}],
+        }
+        index = ExternalIdIndex.build(objects + [reused])
+        assert index.lookup("T1193") == (reused["id"], ext["T1193"])
+        assert index.resolve("T1193") == reused["id"]
+
+    def test_capec_and_d3fend_ids(self):
+        """Test CAPEC references and D3FEND ID properties in their JSON-LD forms."""
+        objects = [
+            {
+                "type": "attack-pattern",
+                "id": "attack-pattern--1",
+                "external_references": [
+                    {"source_name": "mitre-attack", "external_id": "T1000"},
+                    {
+                        "source_name": "capec",
+                        "external_id": "CAPEC-13",
+                        "url": "https://capec.mitre.org/data/definitions/13.html",
+                    },
+                ],
+            },
+            d3fend_technique("d3fend-technique--pa", "D3-PA"),
+            d3fend_technique("d3fend-technique--al", [{"@value": "D3-AL"}]),
+            {"type": "d3fend-technique", "id": "d3fend-technique--fa", "d3f:d3fend-id": "D3-FA"},
+        ]
+        index = ExternalIdIndex.build(objects)
+        assert index.resolve("capec-13") == "attack-pattern--1"
+        assert index.resolve("https://capec.mitre.org/data/definitions/13.html") == "attack-pattern--1"
+        assert index.resolve("D3-PA") == "d3fend-technique--pa"
+        assert index.resolve("d3-al") == "d3fend-technique--al"
+        assert index.resolve("D3-FA") == "d3fend-technique--fa"
+        assert index.keys_of("attack-pattern--1") == (
+            "capec-13",
+            "https://capec.mitre.org/data/definitions/13.html",
+            "t1000",
+        )
+
+    def test_relationships_are_not_indexed(self, objects):
+        """Test that relationship citations don't become keys."""
+        cited = {
+            "type": "relationship",
+            "id": "relationship--cited",
+            "relationship_type": "uses",
+            "source_ref": "intrusion-set--x",
+            "target_ref": "attack-pattern--y",
+            "external_references": [{"source_name": "Report", "url": "https://example.com/report"}],
+        }
+        index = ExternalIdIndex.build(objects + [cited])
+        assert "https://example.com/report" not in index
+        assert len(index) == len(ExternalIdIndex.build(objects))
+
+    def test_incremental_update_matches_rebuild(self, objects, ext, tmp_path):
+        """Test remove() and update() produce the index a rebuild would."""
+        changed = dict(next(obj for obj in objects if obj["id"] == ext["G0016"]))
+        changed["modified"] = "2099-01-01T00:00:00.000Z"
+        changed["external_references"] = [{"source_name": "mitre-attack", "external_id": "G9999"}]
+        removed = ext["S0002"]
+        after = [changed if obj["id"] == changed["id"] else obj for obj in objects if obj["id"] != removed]
+
+        index = ExternalIdIndex.build(objects)
+        assert index.remove([removed, "tool--unknown"]) == 1
+        assert index.update(after) == 1  # only the changed object is re-indexed
+        assert index.resolve("G9999") == ext["G0016"]
+        assert "G0016" not in index and "S0002" not in index
+
+        index.save(tmp_path / "incremental.json")
+        ExternalIdIndex.build(after).save(tmp_path / "rebuilt.json")
+        assert (tmp_path / "incremental.json").read_bytes() == (tmp_path / "rebuilt.json").read_bytes()
+
+    def test_save_load_roundtrip(self, external_ids, ext, tmp_path):
+        """Test the persisted index answers identically after loading."""
+        path = tmp_path / "external_ids.json"
+        external_ids.save(path)
+        loaded = ExternalIdIndex.load(path)
+
+        assert len(loaded) == len(external_ids)
+        for key in ("T1059.001", "T1193", "https://attack.mitre.org/techniques/T1059/001"):
+            assert loaded.lookup(key) == external_ids.lookup(key)
+        assert loaded.update(load_fixture_objects()) == 0
+
+    def test_load_rejects_unknown_format(self, tmp_path):
+        """Test that loading another format raises ValueError."""
+        path = tmp_path / "external_ids.json"
+        path.write_text(json.dumps({"format": "other", "version": 1}))
+        with pytest.raises(ValueError, match="Unsupported"):
+            ExternalIdIndex.load(path)
@@ -2,10 +2,48 @@
 Tests for ingestion pipeline orchestration
 """
 
+import asyncio
+import gzip
+import json
+import os
 import pytest
+import socket
+import subprocess
+import time
+from contextlib import contextmanager
 from pathlib import Path
 
-from orbit.ingestion import ingest, IngestConfig, IngestResult
+from orbit.adapters import Projection, STRUCTURE_ONLY
+from orbit.graph import GraphWriter
+from orbit.indexes import ExternalIdIndex, HierarchyIndex, TextIndex
+from orbit.ingestion import ingest, ingest_sharded, IngestConfig, IngestResult
+from orbit.ingestion.checkpoint import Checkpoint, CheckpointStore, checkpoint_key
+from orbit.ingestion.output import (
+    CROSSWALK_FILENAME,
+    EXTERNAL_ID_INDEX_FILENAME,
+    OBJECTS_FILENAME,
+    TEXT_INDEX_FILENAME,
+    read_objects,
+)
+from orbit.ingestion.shards import CLAIMS_DIRNAME, plan_shards, run_worker
+from orbit.ingestion.spill import ObjectSpool, SpilledObjects
+from orbit.ingestion.watch import (
+    CURRENT_LINK,
+    METADATA_FILENAME,
+    SNAPSHOTS_DIRNAME,
+    default_sources,
+    SnapshotPublisher,
+    Watcher,
+    WatchedSource,
+)
+from orbit.service import QuerySnapshot, attack_id
+from orbit.schemas import ValidationError, validators
+from tests.test_adapters import taxii_server, write_descriptor  # noqa: F401 (fixture)
+from tests.test_graph import ConnectionLost, FakeGraph
+
+FIXTURE_PATH = Path(__file__).parent / "fixtures" / "attack_sample.json"
+CSF_FIXTURE_PATH = Path(__file__).parent / "fixtures" / "csf_sample.json"
+CSF_MAPPINGS_PATH = Path(__file__).parent / "fixtures" / "csf_mappings.json"
 
 
 class TestIngestConfig:
@@ -20,6 +58,25 @@ class TestIngestConfig:
         assert config.source == "attack"
         assert config.validate is True  # Default
         assert config.fail_on_invalid is True  # Default
+        assert config.intern_values is False  # Default
+
+    def test_config_without_filters_has_no_object_filter(self):
+        """Test that filters are off by default."""
+        config = IngestConfig(source="attack", data_path=Path("/path/to/data.json"))
+        assert config.object_filter() is None
+
+    def test_config_builds_object_filter(self):
+        """Test filter options map onto an ObjectFilter."""
+        config = IngestConfig(
+            source="attack",
+            data_path=Path("/path/to/data.json"),
+            types={"attack-pattern"},
+            exclude_revoked=True,
+        )
+        object_filter = config.object_filter()
+        assert object_filter.types == frozenset({"attack-pattern"})
+        assert object_filter.exclude_revoked is True
+        assert object_filter.domains is None
 
     def test_config_with_custom_options(self):
         """Test configuration with custom options."""
@@ -54,40 +111,777 @@ class TestIngestResult:
         assert result.object_count == 2
 
 
-class TestIngestPipeline:
-    """Tests for ingest() function."""
+class TestCheckpointStore:
+    """Tests for ingestion checkpoints."""
 
-    @pytest.mark.skip(reason="Pipeline not yet implemented")
-    def test_ingest_with_attack_source(self, tmp_path):
-        """Test ingestion with ATT&CK source."""
-        # This test will be implemented when pipeline is complete
+    def test_round_trip(self, tmp_path):
+        """Test validated objects and progress survive a reload."""
+        store = CheckpointStore(tmp_path)
+        checkpoint = store.load("key")
+        assert checkpoint == Checkpoint(key="key")
+
+        objects = json.loads(FIXTURE_PATH.read_text())["objects"]
+        store.save_validated(checkpoint, objects, ["bad: reason"])
+        checkpoint.written_batches = 3
+        store.save(checkpoint)
+
+        reloaded = CheckpointStore(tmp_path).load("key")
+        assert reloaded == Checkpoint(key="key", validated=True, errors=["bad: reason"], written_batches=3)
+        assert store.validated_objects() == objects
+
+    def test_other_key_discards_checkpoint(self, tmp_path):
+        """Test a checkpoint for a different run is removed, not resumed."""
+        store = CheckpointStore(tmp_path)
+        store.save_validated(store.load("old"), [], [])
+        assert store.load("new") == Checkpoint(key="new")
+        assert list(tmp_path.iterdir()) == []
+
+    def test_key_tracks_input_and_options(self, tmp_path):
+        """Test the run key changes with the input file or options."""
+        data = tmp_path / "bundle.json"
+        data.write_text(FIXTURE_PATH.read_text())
+        key = checkpoint_key(data, {"types": None})
+        assert checkpoint_key(data, {"types": None}) == key
+        assert checkpoint_key(data, {"types": ["tool"]}) != key
+        data.write_text(FIXTURE_PATH.read_text() + " ")
+        assert checkpoint_key(data, {"types": None}) != key
+
+    def test_resume_keeps_source_offsets(self, tmp_path):
+        """Test a resumed lazy projection can still load dropped fields."""
         config = IngestConfig(
             source="attack",
-            data_path=tmp_path / "attack.json",
+            data_path=FIXTURE_PATH,
+            projection=Projection(STRUCTURE_ONLY.fields, lazy=True),
+            checkpoint_dir=tmp_path,
         )
+        graph = FakeGraph(fail_after=1)
+        with pytest.raises(ConnectionLost):
+            ingest(config, graph=GraphWriter(graph, batch_size=5))
+
+        graph.fail_after = None
+        resumed = ingest(config, graph=GraphWriter(graph, batch_size=5))
+        assert resumed.metadata["resumed"] is True
+
+        expected = ingest(IngestConfig(source="attack", data_path=FIXTURE_PATH, projection=config.projection))
+        assert resumed.objects == expected.objects
+        assert resumed.source_offsets.to_dict() == expected.source_offsets.to_dict()
+        stix_ids = [obj["id"] for obj in expected.objects]
+        assert resumed.source_offsets.load_many(stix_ids) == expected.source_offsets.load_many(stix_ids)
+
+    def test_ingest_clears_checkpoint_on_success(self, tmp_path):
+        """Test a completed ingest leaves no checkpoint behind."""
+        config = IngestConfig(source="attack", data_path=FIXTURE_PATH, checkpoint_dir=tmp_path)
+        result = ingest(config)
+        assert result.metadata["resumed"] is False
+        assert list(tmp_path.iterdir()) == []
+
+
+class TestIngestPipeline:
+    """Tests for ingest() function."""
+
+    def test_ingest_with_attack_source(self):
+        """Test ingestion with ATT&CK source."""
+        config = IngestConfig(source="attack", data_path=FIXTURE_PATH)
         result = ingest(config)
         assert result.is_valid
+        assert result.object_count == 40
+        assert result.metadata["source"] == "attack"
 
-    @pytest.mark.skip(reason="Pipeline not yet implemented")
-    def test_ingest_determinism(self, tmp_path):
+    def test_ingest_determinism(self):
         """Test that ingestion produces deterministic results."""
-        # This test ensures same input → same output
-        # Will be implemented when pipeline is complete
-        pass
+        config = IngestConfig(source="attack", data_path=FIXTURE_PATH)
+        result1 = ingest(config)
+        result2 = ingest(config)
+        assert result1.objects == result2.objects
+        ids = [obj["id"] for obj in result1.objects]
+        assert ids == sorted(ids)
+
+    def test_ingest_results_are_independent_by_default(self):
+        """Test objects share no sub-objects unless interning is requested."""
+        result = ingest(IngestConfig(source="attack", data_path=FIXTURE_PATH))
+        first, second = [obj for obj in result.objects if obj.get("object_marking_refs")][:2]
+        assert first["object_marking_refs"] == second["object_marking_refs"]
+        assert first["object_marking_refs"] is not second["object_marking_refs"]
+
+        interned = ingest(IngestConfig(source="attack", data_path=FIXTURE_PATH, intern_values=True))
+        first, second = [obj for obj in interned.objects if obj.get("object_marking_refs")][:2]
+        assert first["object_marking_refs"] is second["object_marking_refs"]
+
+    def test_ingest_clears_validator_memos(self, tmp_path):
+        """Test remembered IDs and timestamps do not outlive the run."""
+        bundle = json.loads(FIXTURE_PATH.read_text())
+        bundle["objects"].append({"id": "not-a-stix-id", "type": "attack-pattern"})
+        data_path = tmp_path / "invalid.json"
+        data_path.write_text(json.dumps(bundle))
+
+        ingest(IngestConfig(source="attack", data_path=FIXTURE_PATH, memory_budget=10))
+        assert not validators._known_ids and not validators._known_timestamps
+        with pytest.raises(ValidationError):
+            ingest(IngestConfig(source="attack", data_path=data_path))
+        assert not validators._known_ids and not validators._known_timestamps
+
+    def test_ingest_with_filters(self):
+        """Test filters are pushed down into the adapter."""
+        result = ingest(
+            IngestConfig(
+                source="attack",
+                data_path=FIXTURE_PATH,
+                types={"attack-pattern"},
+                exclude_revoked=True,
+                exclude_deprecated=True,
+            )
+        )
+        assert result.object_count == 5
+        assert {obj["type"] for obj in result.objects} == {"attack-pattern"}
+
+    def test_ingest_with_projection(self, tmp_path):
+        """Test projected ingest validates and persists compact objects."""
+        projection = Projection(STRUCTURE_ONLY.fields, lazy=True)
+        result = ingest(
+            IngestConfig(
+                source="attack",
+                data_path=FIXTURE_PATH,
+                projection=projection,
+                output_dir=tmp_path,
+            )
+        )
+        assert result.is_valid
+        assert result.object_count == 40
+        assert not any("description" in obj for obj in result.objects)
+        assert list(read_objects(tmp_path / OBJECTS_FILENAME)) == result.objects
+
+        technique = next(obj for obj in result.objects if obj.get("name") == "Phishing")
+        assert "phishing messages" in result.source_offsets.get(technique["id"], "description")
+
+    def test_ingest_stage_hook(self, tmp_path):
+        """Test that the stage hook wraps each stage in order."""
+        seen = []
+
+        @contextmanager
+        def hook(name):
+            seen.append(name)
+            yield
+
+        config = IngestConfig(source="attack", data_path=FIXTURE_PATH, output_dir=tmp_path)
+        assert ingest(config, stage_hook=hook).objects == ingest(config).objects
+        assert seen == ["fetch", "normalize", "validate", "write"]
+
+    def test_ingest_writes_output_dir(self, tmp_path):
+        """Test that validated output and indexes are persisted."""
+        config = IngestConfig(
+            source="attack", data_path=FIXTURE_PATH, output_dir=tmp_path / "out"
+        )
+        result = ingest(config)
+
+        objects_path = tmp_path / "out" / OBJECTS_FILENAME
+        assert list(read_objects(objects_path)) == result.objects
+        assert result.metadata["outputs"]["objects"] == str(objects_path)
+
+        index = TextIndex.load(tmp_path / "out" / TEXT_INDEX_FILENAME)
+        assert len(index) == 14
+
+        external_ids = ExternalIdIndex.load(tmp_path / "out" / EXTERNAL_ID_INDEX_FILENAME)
+        technique = next(obj for obj in result.objects if attack_id(obj) == "T1059.001")
+        assert external_ids.resolve("T1059.001") == technique["id"]
+        assert result.metadata["outputs"]["external_ids"] == str(tmp_path / "out" / EXTERNAL_ID_INDEX_FILENAME)
+
+    def test_csf_output_includes_crosswalk(self, tmp_path, monkeypatch):
+        """Test CSF output persists the crosswalk and snapshots load it; ATT&CK output has none."""
+        import orbit.config
+
+        monkeypatch.setattr(orbit.config, "CSF_MAPPINGS_PATH", CSF_MAPPINGS_PATH)
+        result = ingest(IngestConfig(source="csf", data_path=CSF_FIXTURE_PATH, output_dir=tmp_path / "csf"))
+        assert result.metadata["outputs"]["crosswalk"] == str(tmp_path / "csf" / CROSSWALK_FILENAME)
+        snapshot = QuerySnapshot.load(tmp_path / "csf")
+        assert snapshot.crosswalk.d3fend_techniques("PR.PS-05") == ["D3-EAL"]
+        assert snapshot.crosswalk.subcategories_for("M1049") == ["DE.CM-09"]
+
+        ingest(IngestConfig(source="attack", data_path=FIXTURE_PATH, output_dir=tmp_path / "csf"))
+        assert not (tmp_path / "csf" / CROSSWALK_FILENAME).exists()
+        assert QuerySnapshot.load(tmp_path / "csf").crosswalk is None
+
+    def test_ingest_output_is_byte_identical(self, tmp_path):
+        """Test that repeated runs write byte-identical output."""
+        for name in ("a", "b"):
+            ingest(IngestConfig(source="attack", data_path=FIXTURE_PATH, output_dir=tmp_path / name))
+        for filename in (OBJECTS_FILENAME, TEXT_INDEX_FILENAME, EXTERNAL_ID_INDEX_FILENAME):
+            assert (tmp_path / "a" / filename).read_bytes() == (tmp_path / "b" / filename).read_bytes()
 
-    @pytest.mark.skip(reason="Pipeline not yet implemented")
     def test_ingest_validation_failure(self, tmp_path):
         """Test that invalid data fails validation."""
-        # Will be implemented when pipeline is complete
-        pass
+        bundle = json.loads(FIXTURE_PATH.read_text())
+        bundle["objects"].append({"id": "not-a-stix-id", "type": "attack-pattern"})
+        data_path = tmp_path / "invalid.json"
+        data_path.write_text(json.dumps(bundle))
+
+        with pytest.raises(ValidationError, match="not-a-stix-id"):
+            ingest(IngestConfig(source="attack", data_path=data_path))
+
+    def test_ingest_collects_errors_when_not_failing(self, tmp_path):
+        """Test that fail_on_invalid=False reports errors and keeps valid objects."""
+        bundle = json.loads(FIXTURE_PATH.read_text())
+        bundle["objects"].append({"id": "not-a-stix-id", "type": "attack-pattern"})
+        data_path = tmp_path / "invalid.json"
+        data_path.write_text(json.dumps(bundle))
+
+        result = ingest(
+            IngestConfig(source="attack", data_path=data_path, fail_on_invalid=False)
+        )
+        assert not result.is_valid
+        assert result.object_count == 40
+        assert result.errors[0].startswith("not-a-stix-id:")
+
+    def test_ingest_reports_relationship_violations(self, tmp_path):
+        """Test disallowed relationship triples are reported and dropped."""
+        bundle = json.loads(FIXTURE_PATH.read_text())
+        mitigates = next(
+            o for o in bundle["objects"]
+            if o["type"] == "relationship" and o["relationship_type"] == "mitigates"
+        )
+        mitigates["source_ref"], mitigates["target_ref"] = mitigates["target_ref"], mitigates["source_ref"]
+        data_path = tmp_path / "invalid.json"
+        data_path.write_text(json.dumps(bundle))
+
+        with pytest.raises(ValidationError, match="Relationship not allowed"):
+            ingest(IngestConfig(source="attack", data_path=data_path))
+
+        result = ingest(
+            IngestConfig(source="attack", data_path=data_path, fail_on_invalid=False)
+        )
+        assert result.errors == [
+            f"{mitigates['id']}: Relationship not allowed: "
+            "attack-pattern -[mitigates]-> course-of-action"
+        ]
+        assert mitigates["id"] not in {o["id"] for o in result.objects}
+
+    def test_ingest_reports_full_body_errors(self, tmp_path):
+        """Test field-level errors beyond id/type are reported per object."""
+        bundle = json.loads(FIXTURE_PATH.read_text())
+        technique = next(o for o in bundle["objects"] if o["type"] == "attack-pattern")
+        technique["kill_chain_phases"] = [{"phase_name": "execution"}]
+        data_path = tmp_path / "invalid.json"
+        data_path.write_text(json.dumps(bundle))
+
+        result = ingest(
+            IngestConfig(source="attack", data_path=data_path, fail_on_invalid=False)
+        )
+        assert len(result.errors) == 1
+        assert result.errors[0].startswith(f"{technique['id']}: Invalid 'kill_chain_phases'")
+        assert result.object_count == 39
+
+
+class TestMemoryBudget:
+    """Tests for memory-budgeted ingestion with spill-to-disk."""
+
+    @pytest.mark.parametrize(
+        "options",
+        [
+            {},
+            {"exclude_revoked": True, "exclude_deprecated": True},
+            {"domains": {"mobile-attack"}},
+            {"types": {"attack-pattern", "relationship"}},
+            {"projection": STRUCTURE_ONLY},
+            {"validate": False},
+        ],
+    )
+    def test_matches_in_memory_ingest(self, options, tmp_path):
+        """Test budgeted results equal the in-memory path, spilled or not."""
+        expected = ingest(IngestConfig(source="attack", data_path=FIXTURE_PATH, **options))
+        for budget in (1, 4000, 1 << 30):
+            config = IngestConfig(
+                source="attack",
+                data_path=FIXTURE_PATH,
+                memory_budget=budget,
+                spill_dir=tmp_path,
+                **options,
+            )
+            result = ingest(config)
+            assert list(result.objects) == expected.objects
+            assert result.object_count == expected.object_count
+            assert result.errors == expected.errors
+
+    def test_spills_runs_and_cleans_up(self, tmp_path):
+        """Test a small budget spills sorted runs that are removed on close."""
+        result = ingest(
+            IngestConfig(source="attack", data_path=FIXTURE_PATH, memory_budget=4000, spill_dir=tmp_path)
+        )
+        assert result.metadata["spilled_runs"] > 1
+        assert list(tmp_path.iterdir())
+        result.objects.close()
+        assert list(tmp_path.iterdir()) == []
+
+    def test_errors_match_in_memory_ingest(self, tmp_path):
+        """Test body and relationship errors keep the in-memory order."""
+        bundle = json.loads(FIXTURE_PATH.read_text())
+        mitigates = next(
+            o for o in bundle["objects"]
+            if o["type"] == "relationship" and o["relationship_type"] == "mitigates"
+        )
+        mitigates["source_ref"], mitigates["target_ref"] = mitigates["target_ref"], mitigates["source_ref"]
+        bundle["objects"].append({"id": "not-a-stix-id", "type": "attack-pattern"})
+        data_path = tmp_path / "invalid.json"
+        data_path.write_text(json.dumps(bundle))
+
+        with pytest.raises(ValidationError, match="Relationship not allowed"):
+            ingest(IngestConfig(source="attack", data_path=data_path, memory_budget=1))
+
+        expected = ingest(IngestConfig(source="attack", data_path=data_path, fail_on_invalid=False))
+        result = ingest(
+            IngestConfig(source="attack", data_path=data_path, fail_on_invalid=False, memory_budget=1)
+        )
+        assert len(result.errors) == 2
+        assert result.errors == expected.errors
+        assert list(result.objects) == expected.objects
+
+    def test_output_is_byte_identical(self, tmp_path):
+        """Test persisted output doesn't depend on the budget."""
+        for name, budget in (("memory", None), ("spilled", 1)):
+            ingest(
+                IngestConfig(
+                    source="attack",
+                    data_path=FIXTURE_PATH,
+                    output_dir=tmp_path / name,
+                    memory_budget=budget,
+                )
+            )
+        for filename in (OBJECTS_FILENAME, TEXT_INDEX_FILENAME, EXTERNAL_ID_INDEX_FILENAME):
+            assert (tmp_path / "memory" / filename).read_bytes() == (
+                tmp_path / "spilled" / filename
+            ).read_bytes()
+
+    def test_resume_under_budget(self, tmp_path):
+        """Test objects restored from a checkpoint are budgeted too."""
+        config = IngestConfig(
+            source="attack", data_path=FIXTURE_PATH, checkpoint_dir=tmp_path, memory_budget=4000
+        )
+        graph = FakeGraph(fail_after=1)
+        with pytest.raises(ConnectionLost):
+            ingest(config, graph=GraphWriter(graph, batch_size=5))
+
+        graph.fail_after = None
+        result = ingest(config, graph=GraphWriter(graph, batch_size=5))
+        assert result.metadata["resumed"] is True
+        assert result.metadata["spilled_runs"] > 0
+        expected = ingest(IngestConfig(source="attack", data_path=FIXTURE_PATH)).objects
+        assert list(result.objects) == expected
+        assert len(graph.nodes) + len(graph.edges) == len(expected)
+
+    def test_spilled_objects_merge_in_arrival_order(self, tmp_path):
+        """Test equal IDs across runs come back in the order they were added."""
+        spilled = SpilledObjects(1, tmp_path)
+        for i, stix_id in enumerate(["b", "a", "b", "a", "c"]):
+            spilled.add({"id": stix_id, "n": i})
+        spilled.finish()
+        assert spilled.run_count == 5
+        assert [obj["n"] for obj in spilled] == [1, 3, 0, 2, 4]
+        assert len(spilled) == 5
+        with pytest.raises(ValueError):
+            spilled.add({"id": "d"})
+
+    def test_object_spool_replays_in_arrival_order(self, tmp_path):
+        """Test a spool can be read repeatedly, unsorted, and is removed on close."""
+        spool = ObjectSpool(tmp_path)
+        for i, stix_id in enumerate(["b", "a", "c"]):
+            spool.add({"id": stix_id, "n": i})
+        spool.finish()
+        assert [obj["id"] for obj in spool] == ["b", "a", "c"]
+        assert list(spool) == list(spool) and len(spool) == 3
+        with pytest.raises(ValueError):
+            spool.add({"id": "d"})
+        spool.close()
+        assert not list(tmp_path.iterdir())
+
+
+class TestShardedIngest:
+    """Tests for sharded ingestion through a shared work directory."""
+
+    @pytest.mark.parametrize(
+        "options",
+        [
+            {},
+            {"exclude_revoked": True, "exclude_deprecated": True},
+            {"domains": {"mobile-attack"}},
+            {"types": {"attack-pattern", "relationship"}},
+            {"projection": STRUCTURE_ONLY},
+            {"validate": False},
+        ],
+    )
+    def test_matches_single_process_ingest(self, options, tmp_path):
+        """Test merged shards equal the single-process result."""
+        expected = ingest(IngestConfig(source="attack", data_path=FIXTURE_PATH, **options))
+        config = IngestConfig(source="attack", data_path=FIXTURE_PATH, **options)
+        result = ingest_sharded(config, tmp_path, workers=0, shard_bytes=2048)
+        assert result.metadata["shards"]["count"] > 5
+        assert result.objects == [dict(obj) for obj in expected.objects]
+        assert result.errors == expected.errors
+
+    def test_worker_processes_and_errors(self, tmp_path):
+        """Test local worker processes share shards and errors keep pipeline order."""
+        bundle = json.loads(FIXTURE_PATH.read_text())
+        mitigates = next(
+            o for o in bundle["objects"]
+            if o["type"] == "relationship" and o["relationship_type"] == "mitigates"
+        )
+        mitigates["source_ref"], mitigates["target_ref"] = mitigates["target_ref"], mitigates["source_ref"]
+        bundle["objects"].append({"id": "not-a-stix-id", "type": "attack-pattern"})
+        data_path = tmp_path / "invalid.json"
+        data_path.write_text(json.dumps(bundle, indent=2))
+
+        config = IngestConfig(source="attack", data_path=data_path, fail_on_invalid=False)
+        expected = ingest(config)
+        result = ingest_sharded(config, tmp_path / "work", workers=2, shard_bytes=1024)
+        assert len(result.errors) == 2
+        assert result.errors == expected.errors
+        assert result.objects == expected.objects
+
+        with pytest.raises(ValidationError, match="2 invalid object"):
+            strict = IngestConfig(source="attack", data_path=data_path)
+            ingest_sharded(strict, tmp_path / "work", workers=0, shard_bytes=1024)
+
+    def test_completed_shards_are_reused(self, tmp_path):
+        """Test a rerun merges finished shards without processing them again."""
+        config = IngestConfig(source="attack", data_path=FIXTURE_PATH)
+        first = ingest_sharded(config, tmp_path, workers=0, shard_bytes=2048)
+        assert first.metadata["shards"]["processed_here"] == first.metadata["shards"]["count"]
+        again = ingest_sharded(config, tmp_path, workers=0, shard_bytes=2048)
+        assert again.metadata["shards"]["processed_here"] == 0
+        assert again.objects == first.objects
+
+        other = IngestConfig(source="attack", data_path=FIXTURE_PATH, exclude_revoked=True)
+        rerun = ingest_sharded(other, tmp_path, workers=0, shard_bytes=2048)
+        assert rerun.metadata["shards"]["processed_here"] == rerun.metadata["shards"]["count"]
+
+    def test_abandoned_claims_are_taken_over(self, tmp_path):
+        """Test claims of exited local processes and expired leases are taken over."""
+        plan = plan_shards(IngestConfig(source="attack", data_path=FIXTURE_PATH), tmp_path, shard_bytes=2048)
+        exited = subprocess.Popen(["true"])
+        exited.wait()
+        claims = tmp_path / CLAIMS_DIRNAME
+        (claims / "shard-00000.json").write_text(
+            json.dumps({"worker": f"{socket.gethostname()}:{exited.pid}", "claimed_at": time.time()})
+        )
+        (claims / "shard-00001.json").write_text(
+            json.dumps({"worker": "other-host:1", "claimed_at": time.time()})
+        )
+
+        processed = run_worker(tmp_path)
+        assert 0 in processed
+        assert 1 not in processed
+        assert len(processed) == len(plan.shards) - 1
+        assert run_worker(tmp_path, lease_seconds=0) == [1]
+
+    def test_multiple_inputs_merge_by_id(self, tmp_path):
+        """Test objects repeated across inputs are kept once, newest first."""
+        bundle = json.loads(FIXTURE_PATH.read_text())
+        technique = next(o for o in bundle["objects"] if o["type"] == "attack-pattern")
+        technique["modified"] = "2099-01-01T00:00:00.000Z"
+        newer = tmp_path / "newer.json"
+        newer.write_text(json.dumps(bundle))
+
+        config = IngestConfig(source="attack", data_path=FIXTURE_PATH)
+        result = ingest_sharded(config, tmp_path / "work", data_paths=[FIXTURE_PATH, newer], workers=0)
+        assert result.metadata["shards"] == {"count": 2, "processed_here": 2, "duplicates": 40}
+        assert result.object_count == 40
+        merged = next(o for o in result.objects if o["id"] == technique["id"])
+        assert merged["modified"] == "2099-01-01T00:00:00.000Z"
+
+    def test_rejects_unshardable_source(self, tmp_path):
+        """Test sources that are not STIX bundles cannot be sharded."""
+        with pytest.raises(ValueError, match="cannot be sharded"):
+            ingest_sharded(IngestConfig(source="csf", data_path=FIXTURE_PATH), tmp_path)
+
+
+class TestTaxiiIngest:
+    """Tests for polling TAXII collections through ingest()."""
+
+    def test_successful_ingest_commits_marks(self, taxii_server, tmp_path):
+        """Test that a run advances added_after so the next poll is empty."""
+        descriptor = write_descriptor(tmp_path / "taxii.json", taxii_server, ["enterprise"], page_size=9)
+        config = IngestConfig(source="taxii", data_path=descriptor)
+
+        first = ingest(config)
+        expected = ingest(IngestConfig(source="attack", data_path=FIXTURE_PATH))
+        assert first.metadata["source"] == "taxii"
+        assert first.objects == expected.objects
+        assert ingest(config).object_count == 0
+
+    def test_filtered_ingest_keeps_unfiltered_marks(self, taxii_server, tmp_path):
+        """Test that a filtered run doesn't make an unfiltered run skip objects."""
+        descriptor = write_descriptor(tmp_path / "taxii.json", taxii_server, ["enterprise"])
+
+        filtered = ingest(IngestConfig(source="taxii", data_path=descriptor, domains=["mobile-attack"]))
+        unfiltered = ingest(IngestConfig(source="taxii", data_path=descriptor))
+        assert filtered.object_count < unfiltered.object_count == 40
+        assert ingest(IngestConfig(source="taxii", data_path=descriptor)).object_count == 0
+
+    def test_failed_ingest_keeps_marks(self, taxii_server, tmp_path):
+        """Test that objects of a failed run are downloaded again."""
+        descriptor = write_descriptor(tmp_path / "taxii.json", taxii_server, ["enterprise"])
+        taxii_server.add("enterprise", [{"type": "attack-pattern", "id": "attack-pattern--broken"}])
+        config = IngestConfig(source="taxii", data_path=descriptor)
+
+        with pytest.raises(ValidationError):
+            ingest(config)
+        with pytest.raises(ValidationError):
+            ingest(config)
+        assert len(taxii_server.requests) == 2
+        assert "added_after" not in taxii_server.requests[-1][1]
+
+    def test_memory_budget_streams_pages(self, taxii_server, tmp_path):
+        """Test that the budgeted path streams polled pages like the in-memory one."""
+        descriptor = write_descriptor(tmp_path / "taxii.json", taxii_server, ["enterprise"], page_size=4)
+        expected = ingest(IngestConfig(source="attack", data_path=FIXTURE_PATH, exclude_revoked=True))
+        result = ingest(
+            IngestConfig(
+                source="taxii",
+                data_path=descriptor,
+                exclude_revoked=True,
+                memory_budget=4000,
+                spill_dir=tmp_path,
+            )
+        )
+
+        assert list(result.objects) == expected.objects
+        assert len(taxii_server.requests) == 10  # one poll, spooled for the pruning pass
+        assert not list(tmp_path.glob("orbit-spool-*"))
+
+    def test_memory_budget_replays_projected_poll(self, taxii_server, tmp_path):
+        """Test spooled objects are re-projected, so projected objects still validate."""
+        descriptor = write_descriptor(tmp_path / "taxii.json", taxii_server, ["enterprise"])
+        options = {"exclude_deprecated": True, "projection": STRUCTURE_ONLY}
+        expected = ingest(IngestConfig(source="attack", data_path=FIXTURE_PATH, **options))
+        result = ingest(
+            IngestConfig(source="taxii", data_path=descriptor, memory_budget=4000, spill_dir=tmp_path, **options)
+        )
+
+        assert result.is_valid
+        assert list(result.objects) == [dict(obj) for obj in expected.objects]
+
+    def test_taxii_cannot_be_sharded(self, tmp_path):
+        """Test that sharded ingest rejects polled sources."""
+        descriptor = tmp_path / "taxii.json"
+        descriptor.write_text(json.dumps({"collections": ["http://127.0.0.1:9/api/collections/x/"]}))
+
+        with pytest.raises(ValueError, match="cannot be sharded"):
+            plan_shards(IngestConfig(source="taxii", data_path=descriptor), tmp_path / "work")
+
+
+class FakeClock:
+    """Monotonic clock advanced by hand."""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def replace_bundle(path: Path, objects: list[dict]) -> None:
+    """Write a bundle the way a sync job would: to a temp file, then rename."""
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_text(json.dumps({"type": "bundle", "id": "bundle--watch", "objects": objects}))
+    os.replace(tmp, path)
+
+
+class TestWatcher:
+    """Tests for watch mode snapshots."""
+
+    @pytest.fixture
+    def bundle(self, tmp_path):
+        path = tmp_path / "enterprise-attack.json"
+        replace_bundle(path, json.loads(FIXTURE_PATH.read_text())["objects"])
+        return path
+
+    def watcher(self, bundle, tmp_path, **kwargs) -> Watcher:
+        kwargs.setdefault("debounce", 0)
+        kwargs.setdefault("reload_on_change", True)
+        kwargs.setdefault("refresh", False)
+        return Watcher(tmp_path / "out", [WatchedSource("attack", bundle)], **kwargs)
+
+    def test_first_poll_publishes_snapshot(self, bundle, tmp_path):
+        """Test a source without a snapshot is ingested and published."""
+        watcher = self.watcher(bundle, tmp_path)
+        (publication,) = watcher.poll()
+        current = tmp_path / "out" / "attack" / CURRENT_LINK
+        assert current.is_symlink()
+        assert current.resolve() == publication.path
+        assert publication.object_count == 40
+        assert len(publication.added) == 40
+        assert len(QuerySnapshot.load(current)) == 40
+        metadata = json.loads((current / METADATA_FILENAME).read_text())
+        assert metadata["source"] == "attack"
+        assert tuple(metadata["signature"]) == watcher.publisher("attack").signature()
+        assert watcher.poll() == []
+
+    def test_restart_skips_unchanged_sources(self, bundle, tmp_path):
+        """Test a restarted watcher does not re-ingest a file it already published."""
+        self.watcher(bundle, tmp_path).poll()
+        assert self.watcher(bundle, tmp_path).poll() == []
+        refreshed = self.watcher(bundle, tmp_path, refresh=True)
+        assert refreshed.poll() == []  # re-ingested, but identical: nothing published
+        assert refreshed.publisher("attack").current.name == "000001"
+
+    def test_change_publishes_delta(self, bundle, tmp_path):
+        """Test a changed file publishes only its delta and keeps the old snapshot."""
+        watcher = self.watcher(bundle, tmp_path)
+        (first,) = watcher.poll()
+        objects = json.loads(FIXTURE_PATH.read_text())["objects"]
+        technique = next(o for o in objects if o["type"] == "attack-pattern")
+        technique["name"] = "Renamed Technique"
+        technique["modified"] = "2099-01-01T00:00:00.000Z"
+        group = next(o for o in objects if o["type"] == "intrusion-set")
+        kept = [
+            o
+            for o in objects
+            if group["id"] not in (o["id"], o.get("source_ref"), o.get("target_ref"))
+        ]
+        replace_bundle(bundle, kept)
+
+        (second,) = watcher.poll()
+        assert second.changed == [technique["id"]]
+        assert group["id"] in second.removed
+        assert second.added == []
+        assert second.object_count == len(kept)
+        assert first.path.exists()  # previous snapshot stays on disk
+        assert (tmp_path / "out" / "attack" / CURRENT_LINK).resolve() == second.path
+
+        # The incrementally updated text index equals a fresh build
+        fresh = tmp_path / "fresh.json"
+        TextIndex.build(list(read_objects(second.path / OBJECTS_FILENAME))).save(fresh)
+        assert (second.path / TEXT_INDEX_FILENAME).read_bytes() == fresh.read_bytes()
+        assert TextIndex.load(second.path / TEXT_INDEX_FILENAME).search("renamed")[0][0] == technique["id"]
+
+        # So does the external ID index
+        ExternalIdIndex.build(read_objects(second.path / OBJECTS_FILENAME)).save(fresh)
+        assert (second.path / EXTERNAL_ID_INDEX_FILENAME).read_bytes() == fresh.read_bytes()
+        external_ids = ExternalIdIndex.load(second.path / EXTERNAL_ID_INDEX_FILENAME)
+        assert group["external_references"][0]["external_id"] not in external_ids
+
+    def test_query_service_follows_current_snapshot(self, bundle, tmp_path):
+        """Test a service over `current` keeps the old snapshot until the swap, then reloads."""
+        from orbit.service import QueryService
+
+        watcher = self.watcher(bundle, tmp_path)
+        watcher.poll()
+
+        async def run():
+            service = QueryService(tmp_path / "out" / "attack" / CURRENT_LINK, reload_interval=None)
+            before = len(service.snapshot)
+            assert await service.check_reload() is False
+            objects = json.loads(FIXTURE_PATH.read_text())["objects"]
+            replace_bundle(bundle, objects[:-1])
+            watcher.poll()
+            assert await service.check_reload() is True
+            return before, len(service.snapshot)
+
+        assert asyncio.run(run()) == (40, 39)
+
+    def test_debounce_waits_for_stable_file(self, bundle, tmp_path):
+        """Test a change is only ingested once its signature is stable for the debounce period."""
+        clock = FakeClock()
+        watcher = self.watcher(bundle, tmp_path, debounce=5, clock=clock)
+        assert watcher.poll() == []  # first sighting starts the timer
+        clock.now = 5
+        assert len(watcher.poll()) == 1
+
+        objects = json.loads(FIXTURE_PATH.read_text())["objects"]
+        replace_bundle(bundle, objects[:-1])
+        clock.now = 6
+        assert watcher.poll() == []
+        replace_bundle(bundle, objects[:-2])  # still being written: timer restarts
+        clock.now = 10
+        assert watcher.poll() == []
+        clock.now = 15
+        (publication,) = watcher.poll()
+        assert publication.object_count == 38
+
+    def test_failed_ingest_keeps_previous_snapshot(self, bundle, tmp_path):
+        """Test an invalid file is reported and leaves the current snapshot serving."""
+        errors = []
+        watcher = self.watcher(bundle, tmp_path, on_error=lambda source, message: errors.append(source))
+        (first,) = watcher.poll()
+        bundle.write_text("{not json")
+        os.utime(bundle, ns=(0, 0))
+        assert watcher.poll() == []
+        assert "attack" in watcher.errors
+        assert errors == ["attack"]
+        assert watcher.publisher("attack").current == first.path
+        assert watcher.poll() == []  # not retried until the file changes again
+        assert errors == ["attack"]
+
+        replace_bundle(bundle, json.loads(FIXTURE_PATH.read_text())["objects"][:-1])
+        (second,) = watcher.poll()
+        assert watcher.errors == {}
+        assert second.path.name == "000002"
+
+    def test_truncated_compressed_file_keeps_previous_snapshot(self, tmp_path):
+        """Test a half-written gzip source is reported, not raised, and the snapshot keeps serving."""
+        bundle = tmp_path / "enterprise-attack.json.gz"
+        data = gzip.compress(FIXTURE_PATH.read_bytes())
+        bundle.write_bytes(data)
+        watcher = self.watcher(bundle, tmp_path)
+        (first,) = watcher.poll()
+        bundle.write_bytes(data[: len(data) // 2])
+        os.utime(bundle, ns=(0, 0))
+        assert watcher.poll() == []
+        assert watcher.errors["attack"].startswith("ValueError: Corrupt or truncated compressed input")
+        assert watcher.publisher("attack").current == first.path
+
+    def test_default_sources_are_implemented(self):
+        """Test only sources with a working adapter are watched by default."""
+        assert [watched.source for watched in default_sources()] == ["attack"]
+
+    def test_reload_on_change_off_only_bootstraps(self, bundle, tmp_path):
+        """Test with FORCE_RELOAD_ON_CHANGE off, changes are not re-ingested."""
+        watcher = self.watcher(bundle, tmp_path, reload_on_change=False)
+        assert len(watcher.poll()) == 1
+        replace_bundle(bundle, json.loads(FIXTURE_PATH.read_text())["objects"][:-1])
+        assert watcher.poll() == []
+
+    def test_old_snapshots_are_pruned(self, bundle, tmp_path):
+        """Test only `keep` snapshots stay on disk."""
+        watcher = self.watcher(bundle, tmp_path, keep=2)
+        objects = json.loads(FIXTURE_PATH.read_text())["objects"]
+        for count in (40, 39, 38):
+            replace_bundle(bundle, objects[:count])
+            assert len(watcher.poll()) == 1
+        snapshots = sorted(p.name for p in (tmp_path / "out" / "attack" / SNAPSHOTS_DIRNAME).iterdir())
+        assert snapshots == ["000002", "000003"]
+
+    def test_missing_file_is_skipped(self, tmp_path):
+        """Test a source whose file does not exist yet is waited for, not failed."""
+        watcher = self.watcher(tmp_path / "missing.json", tmp_path)
+        assert watcher.poll() == []
+        assert watcher.errors == {}
+
+    def test_publisher_reloads_state_from_disk(self, tmp_path):
+        """Test a new publisher diffs against the snapshot already on disk."""
+        objects = list(ingest(IngestConfig(source="attack", data_path=FIXTURE_PATH)).objects)
+        SnapshotPublisher(tmp_path).publish(objects)
+        publisher = SnapshotPublisher(tmp_path)
+        assert publisher.publish(objects) is None
+        publication = publisher.publish(objects[1:])
+        assert publication.removed == [objects[0]["id"]]
+
+    def test_snapshot_without_external_id_index_is_upgraded(self, tmp_path):
+        """Test a snapshot written before external_ids.json gets one on the next publish."""
+        objects = list(ingest(IngestConfig(source="attack", data_path=FIXTURE_PATH)).objects)
+        first = SnapshotPublisher(tmp_path).publish(objects)
+        (first.path / EXTERNAL_ID_INDEX_FILENAME).unlink()
+
+        second = SnapshotPublisher(tmp_path).publish(objects[1:])
+        fresh = tmp_path / "fresh.json"
+        ExternalIdIndex.build(objects[1:]).save(fresh)
+        assert (second.path / EXTERNAL_ID_INDEX_FILENAME).read_bytes() == fresh.read_bytes()
 
 
-# Placeholder for future integration tests
 class TestEndToEndIngestion:
     """End-to-end ingestion tests."""
 
-    @pytest.mark.skip(reason="Requires full pipeline implementation")
     def test_full_attack_ingestion(self):
         """Test complete ATT&CK ingestion workflow."""
-        # Will test: fetch → normalize → validate → output
-        pass
+        result = ingest(IngestConfig(source="attack", data_path=FIXTURE_PATH))
+        hierarchy = HierarchyIndex.build(result.objects)
+        types = {obj["type"] for obj in result.objects}
+        assert {"attack-pattern", "relationship", "intrusion-set"} <= types
+        assert len(hierarchy) == 7
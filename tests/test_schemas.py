@@ -2,16 +2,43 @@
 Tests for schema validation
 """
 
+import json
 import pytest
+from pathlib import Path
 
+from orbit.adapters import CompactObject
 from orbit.schemas import (
     BaseNode,
     BaseEdge,
     ValidationError,
     STIXObject,
     STIXRelationship,
+    FieldSpec,
+    compile_validator,
+    validate_object,
+    ALLOWED_RELATIONSHIPS,
+    check_relationships,
 )
+from orbit.ingestion.pipeline import validate_objects
 from orbit.schemas.stix import validate_stix_object
+from orbit.schemas.validators import generate_source, kind_checks
+
+FIXTURE_PATH = Path(__file__).parent / "fixtures" / "attack_sample.json"
+
+TECHNIQUE = {
+    "type": "attack-pattern",
+    "id": "attack-pattern--12345678-1234-1234-1234-123456789abc",
+    "created": "2023-01-01T00:00:00.000Z",
+    "modified": "2023-06-01T12:30:00.000Z",
+    "spec_version": "2.1",
+    "name": "Command and Scripting Interpreter",
+    "kill_chain_phases": [{"kill_chain_name": "mitre-attack", "phase_name": "execution"}],
+    "external_references": [
+        {"source_name": "mitre-attack", "external_id": "T1059", "url": "https://attack.mitre.org/techniques/T1059"}
+    ],
+    "x_mitre_is_subtechnique": False,
+    "x_mitre_domains": ["enterprise-attack"],
+}
 
 
 class TestBaseNode:
@@ -182,3 +209,218 @@ class TestValidateSTIXObject:
         obj_dict = {"type": "attack-pattern"}
         with pytest.raises(ValidationError, match="missing 'id' field"):
             validate_stix_object(obj_dict)
+
+
+class TestCompiledValidators:
+    """Tests for compiled full-body validators."""
+
+    def test_fixture_objects_validate(self):
+        """Test every fixture object passes full-body validation."""
+        for obj in json.loads(FIXTURE_PATH.read_text())["objects"]:
+            validate_object(obj)
+
+    def test_valid_technique(self):
+        """Test a complete technique passes."""
+        validate_object(TECHNIQUE)
+
+    @pytest.mark.parametrize(
+        "field, value, message",
+        [
+            ("created", "2023-01-01", "Invalid 'created'"),
+            ("modified", "2023-13-01T00:00:00Z", "Invalid 'modified'"),
+            ("modified", "2022-12-31T00:00:00.000Z", "earlier than 'created'"),
+            ("modified", "2023-02-30T00:00:00Z", "Invalid 'modified'"),
+            ("modified", "2023-06-30T23:59:60.5Z", "Invalid 'modified'"),
+            ("kill_chain_phases", [{"kill_chain_name": "mitre-attack"}], "Invalid 'kill_chain_phases'"),
+            ("external_references", [{"url": "https://example.com"}], "Invalid 'external_references'"),
+            ("external_references", [{"source_name": "mitre-attack"}], "Invalid 'external_references'"),
+            ("x_mitre_is_subtechnique", "false", "Invalid 'x_mitre_is_subtechnique'"),
+            ("x_mitre_domains", "enterprise-attack", "Invalid 'x_mitre_domains'"),
+            ("created_by_ref", "identity--bad", "Invalid 'created_by_ref'"),
+            ("name", None, "Invalid 'name'"),
+        ],
+    )
+    def test_invalid_field_raises(self, field, value, message):
+        """Test each field kind rejects malformed values."""
+        with pytest.raises(ValidationError, match=message):
+            validate_object({**TECHNIQUE, field: value})
+
+    @pytest.mark.parametrize(
+        "modified, earlier",
+        [
+            ("2023-01-01T00:00:00.5Z", False),
+            ("2023-01-01T00:00:00.000Z", False),
+            ("2022-12-31T23:59:59.999999999Z", True),
+            ("2023-01-01T00:00:00Z", False),
+        ],
+    )
+    def test_mixed_precision_timestamps_compare(self, modified, earlier):
+        """Test 'modified' and 'created' of different precision compare by instant."""
+        obj = {**TECHNIQUE, "created": "2023-01-01T00:00:00Z", "modified": modified}
+        if earlier:
+            with pytest.raises(ValidationError, match="earlier than 'created'"):
+                validate_object(obj)
+        else:
+            validate_object(obj)
+
+    def test_bad_timestamps_fail_only_their_object(self):
+        """Test a leap second or impossible date is reported per object, not raised."""
+        objects = [
+            {**TECHNIQUE, "modified": "2020-06-30T23:59:60.5Z"},
+            {**TECHNIQUE, "modified": "2020-02-30T00:00:00Z"},
+            TECHNIQUE,
+        ]
+        valid, errors = validate_objects(objects)
+        assert valid == [TECHNIQUE]
+        assert len(errors) == 2
+        assert all("Invalid 'modified'" in error for error in errors)
+
+    def test_missing_required_field_raises(self):
+        """Test required fields must be present on full objects."""
+        for field in ("created", "modified", "name"):
+            obj = {k: v for k, v in TECHNIQUE.items() if k != field}
+            with pytest.raises(ValidationError, match=f"Missing required field '{field}'"):
+                validate_object(obj)
+
+    def test_projected_object_may_omit_descriptive_fields(self):
+        """Test projected objects only need identity and structural fields."""
+        keys = ("type", "id", "created", "modified")
+        validate_object(CompactObject(keys, tuple(TECHNIQUE[k] for k in keys)))
+
+        keys = ("type", "id", "created")
+        with pytest.raises(ValidationError, match="Missing required field 'modified'"):
+            validate_object(CompactObject(keys, tuple(TECHNIQUE[k] for k in keys)))
+
+    def test_identity_errors_match_stix_object(self):
+        """Test ID and type errors use the schema layer's messages."""
+        with pytest.raises(ValidationError, match="missing 'type' field"):
+            validate_object({"id": TECHNIQUE["id"]})
+        with pytest.raises(ValidationError, match="Invalid STIX ID format"):
+            validate_object({**TECHNIQUE, "id": "attack-pattern--123"})
+        with pytest.raises(ValidationError, match="STIX ID type mismatch"):
+            validate_object({**TECHNIQUE, "type": "malware"})
+        with pytest.raises(ValidationError, match="Unknown STIX type"):
+            validate_object({**TECHNIQUE, "type": "x-unknown"})
+
+    def test_relationship_endpoints(self):
+        """Test relationship endpoints are validated."""
+        rel = {
+            "type": "relationship",
+            "id": "relationship--12345678-1234-1234-1234-123456789abc",
+            "created": "2023-01-01T00:00:00.000Z",
+            "modified": "2023-01-01T00:00:00.000Z",
+            "relationship_type": "uses",
+            "source_ref": "intrusion-set--aaaaaaaa-1234-1234-1234-123456789abc",
+            "target_ref": TECHNIQUE["id"],
+        }
+        validate_object(rel)
+        with pytest.raises(ValidationError, match="Invalid 'target_ref'"):
+            validate_object({**rel, "target_ref": "invalid-id"})
+        with pytest.raises(ValidationError, match="Self-referential"):
+            validate_object({**rel, "target_ref": rel["source_ref"]})
+        with pytest.raises(ValidationError, match="Missing required field 'relationship_type'"):
+            validate_object({k: v for k, v in rel.items() if k != "relationship_type"})
+
+    def test_compile_custom_spec(self):
+        """Test specs compile to straight-line functions without spec lookups."""
+        fields = (FieldSpec("x_custom_score", "integer", True),)
+        source = generate_source("x-custom", fields)
+        assert "x_custom_score" in source and "for " not in source
+
+        validate = compile_validator("x-custom", fields)
+        obj = {"type": "x-custom", "id": "x-custom--12345678-1234-1234-1234-123456789abc"}
+        with pytest.raises(ValidationError, match="Missing required field 'x_custom_score'"):
+            validate(obj)
+        validate({**obj, "x_custom_score": 3})
+
+    def test_kind_checks(self):
+        """Test per-kind checks agree with the compiled validators."""
+        checks = kind_checks()
+        assert checks["stix_id"](TECHNIQUE["id"])
+        assert not checks["stix_id"]("invalid-id")
+        assert checks["timestamp"]("2023-01-01T00:00:00.000Z")
+        assert not checks["timestamp"]("2023-02-30T00:00:00Z")
+        assert not checks["integer"]("3")
+
+    def test_unknown_field_kind_rejected(self):
+        """Test specs fail fast on unknown kinds."""
+        with pytest.raises(ValueError, match="Unknown field kind"):
+            FieldSpec("name", "text")
+
+
+def _relationship(n, source_ref, relationship_type, target_ref):
+    return {
+        "type": "relationship",
+        "id": f"relationship--{n:08x}-0000-0000-0000-000000000000",
+        "relationship_type": relationship_type,
+        "source_ref": source_ref,
+        "target_ref": target_ref,
+    }
+
+
+class TestRelationshipConstraints:
+    """Tests for the allowed-triple relationship table."""
+
+    GROUP = "intrusion-set--00000000-0000-0000-0000-000000000001"
+    TECHNIQUE = "attack-pattern--00000000-0000-0000-0000-000000000002"
+    MITIGATION = "course-of-action--00000000-0000-0000-0000-000000000003"
+
+    def nodes(self):
+        return [
+            {"type": "intrusion-set", "id": self.GROUP},
+            {"type": "attack-pattern", "id": self.TECHNIQUE},
+            {"type": "course-of-action", "id": self.MITIGATION},
+        ]
+
+    def test_fixture_relationships_allowed(self):
+        """Test every fixture relationship matches an allowed triple."""
+        objects = json.loads(FIXTURE_PATH.read_text())["objects"]
+        kept, errors = check_relationships(objects)
+        assert errors == []
+        assert kept == objects
+
+    def test_table_covers_attack_d3fend_and_csf(self):
+        """Test the table holds ATT&CK, D3FEND and CSF triples."""
+        assert ("intrusion-set", "uses", "attack-pattern") in ALLOWED_RELATIONSHIPS
+        assert ("course-of-action", "mitigates", "attack-pattern") in ALLOWED_RELATIONSHIPS
+        assert ("d3fend-technique", "enables", "d3fend-tactic") in ALLOWED_RELATIONSHIPS
+        assert ("csf-subcategory", "part-of", "csf-category") in ALLOWED_RELATIONSHIPS
+
+    def test_violations_reported_in_bulk(self):
+        """Test all violating relationships are reported and removed."""
+        good = _relationship(1, self.GROUP, "uses", self.TECHNIQUE)
+        reversed_uses = _relationship(2, self.TECHNIQUE, "uses", self.GROUP)
+        bad_mitigates = _relationship(3, self.MITIGATION, "mitigates", self.GROUP)
+        unknown_type = _relationship(4, self.GROUP, "likes", self.TECHNIQUE)
+        objects = self.nodes() + [good, reversed_uses, bad_mitigates, unknown_type]
+
+        kept, errors = check_relationships(objects)
+        assert kept == self.nodes() + [good]
+        assert errors == [
+            f"{reversed_uses['id']}: Relationship not allowed: attack-pattern -[uses]-> intrusion-set",
+            f"{bad_mitigates['id']}: Relationship not allowed: course-of-action -[mitigates]-> intrusion-set",
+            f"{unknown_type['id']}: Relationship not allowed: intrusion-set -[likes]-> attack-pattern",
+        ]
+
+    def test_endpoint_types_from_batch(self):
+        """Test endpoint types come from the batch, not the ID text."""
+        d3fend_technique = {"type": "d3fend-technique", "id": "d3f:NetworkTrafficFiltering"}
+        d3fend_tactic = {"type": "d3fend-tactic", "id": "d3f:Isolate"}
+        rel = _relationship(1, d3fend_technique["id"], "enables", d3fend_tactic["id"])
+        assert check_relationships([d3fend_technique, d3fend_tactic, rel])[1] == []
+
+    def test_endpoints_outside_batch_typed_by_prefix(self):
+        """Test refs to objects outside the batch use the STIX ID prefix."""
+        rel = _relationship(1, self.GROUP, "uses", self.TECHNIQUE)
+        assert check_relationships([rel]) == ([rel], [])
+
+        unresolved = _relationship(2, "d3f:Unknown", "enables", "d3f:Isolate")
+        assert check_relationships([unresolved])[1] == [
+            f"{unresolved['id']}: Relationship not allowed: None -[enables]-> None"
+        ]
+
+    def test_custom_table(self):
+        """Test a caller-supplied table replaces the default."""
+        rel = _relationship(1, self.GROUP, "uses", self.TECHNIQUE)
+        _, errors = check_relationships(self.nodes() + [rel], allowed=[])
+        assert len(errors) == 1
@@ -0,0 +1,210 @@
+"""
+Tests for the read-only query service
+"""
+
+import asyncio
+import json
+import os
+import pytest
+from pathlib import Path
+
+from orbit.ingestion.output import EXTERNAL_ID_INDEX_FILENAME, OBJECTS_FILENAME, write_output
+from orbit.service import QueryService, QuerySnapshot, ResultCache, attack_id
+
+FIXTURE_PATH = Path(__file__).parent / "fixtures" / "attack_sample.json"
+
+APT28 = "intrusion-set--7517ff6c-6d7d-5319-b85f-c34759d8a30b"
+APT29 = "intrusion-set--0987aef7-287a-5dce-bbd5-b50d8cc897e4"
+
+
+@pytest.fixture(scope="module")
+def objects():
+    return sorted(json.loads(FIXTURE_PATH.read_text())["objects"], key=lambda obj: obj["id"])
+
+
+@pytest.fixture
+def output_dir(objects, tmp_path):
+    write_output(objects, tmp_path)
+    return tmp_path
+
+
+def ids(objects):
+    return [obj["id"] for obj in objects]
+
+
+async def fetch(port: int, *targets: str, method: str = "GET") -> list[tuple[int, dict]]:
+    """Send requests over one keep-alive connection; returns (status, JSON body) each."""
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    responses = []
+    for target in targets:
+        writer.write(f"{method} {target} HTTP/1.1\r\nHost: test\r\n\r\n".encode())
+        status = int((await reader.readline()).split()[1])
+        length = 0
+        while (line := await reader.readline()) != b"\r\n":
+            if line.lower().startswith(b"content-length:"):
+                length = int(line.split(b":")[1])
+        body = await reader.readexactly(length)
+        responses.append((status, json.loads(body)))
+    writer.close()
+    return responses
+
+
+class TestQuerySnapshot:
+    """Tests for QuerySnapshot lookups."""
+
+    def test_technique_by_attack_id(self, objects):
+        """Test techniques are found by ATT&CK ID, case-insensitively."""
+        snapshot = QuerySnapshot(objects)
+        technique = snapshot.technique("t1059.001")
+        assert technique["name"] == "PowerShell"
+        assert attack_id(technique) == "T1059.001"
+        with pytest.raises(KeyError, match="T9999"):
+            snapshot.technique("T9999")
+
+    def test_groups_using_technique(self, objects):
+        """Test direct and sub-technique roll-up group lookups."""
+        snapshot = QuerySnapshot(objects)
+        assert ids(snapshot.groups_using("T1059")) == []
+        assert ids(snapshot.groups_using("T1059.001")) == [APT29]
+        assert ids(snapshot.groups_using("T1059", subtechniques=True)) == [APT29]
+        assert ids(snapshot.groups_using("T1566", subtechniques=True)) == [APT28]
+
+    def test_revoked_technique_redirects(self, objects):
+        """Test lookups on a revoked technique answer for its replacement."""
+        snapshot = QuerySnapshot(objects)
+        assert snapshot.technique("T1193")["revoked"] is True
+        assert snapshot.groups_using("T1193") == snapshot.groups_using("T1566.001")
+
+    def test_resolve_by_external_id_or_url(self, objects):
+        """Test any object resolves by external ID or reference URL."""
+        snapshot = QuerySnapshot(objects)
+        assert snapshot.resolve("g0016")["id"] == APT29
+        assert snapshot.resolve("https://attack.mitre.org/groups/G0016")["id"] == APT29
+        assert snapshot.resolve("T1193")["revoked"] is True
+        with pytest.raises(KeyError, match="X0000"):
+            snapshot.resolve("X0000")
+
+    def test_load_uses_persisted_external_ids(self, output_dir):
+        """Test loading an output directory reuses its external ID index."""
+        snapshot = QuerySnapshot.load(output_dir)
+        assert snapshot.resolve("G0016")["id"] == APT29
+        (output_dir / EXTERNAL_ID_INDEX_FILENAME).unlink()
+        assert QuerySnapshot.load(output_dir).resolve("G0016")["id"] == APT29
+
+    def test_inherited_mitigations(self, objects):
+        """Test mitigations of parent techniques apply to sub-techniques."""
+        snapshot = QuerySnapshot(objects)
+        parent = snapshot.mitigations("T1059")
+        assert [obj["name"] for obj in parent] == ["Execution Prevention"]
+        assert snapshot.mitigations("T1059.001") == []
+        assert snapshot.mitigations("T1059.001", inherited=True) == parent
+
+
+class TestResultCache:
+    """Tests for ResultCache."""
+
+    def test_evicts_least_recently_used(self):
+        """Test the oldest untouched entry is evicted first."""
+        cache = ResultCache(maxsize=2, ttl=None)
+        cache.put("a", 1)
+        cache.put("b", 2)
+        assert cache.get("a") == 1
+        cache.put("c", 3)
+        assert cache.get("b") is None
+        assert (cache.get("a"), cache.get("c")) == (1, 3)
+        assert (cache.hits, cache.misses) == (3, 1)
+
+    def test_entries_expire(self):
+        """Test entries are dropped once their TTL passes."""
+        now = [0.0]
+        cache = ResultCache(maxsize=10, ttl=5.0, clock=lambda: now[0])
+        cache.put("a", 1)
+        now[0] = 5.0
+        assert cache.get("a") == 1
+        now[0] = 5.1
+        assert cache.get("a") is None
+        assert len(cache) == 0
+
+    def test_zero_size_disables_caching(self):
+        """Test maxsize=0 never stores anything."""
+        cache = ResultCache(maxsize=0)
+        cache.put("a", 1)
+        assert cache.get("a") is None
+
+
+class TestQueryService:
+    """Tests for QueryService over HTTP."""
+
+    def test_routes(self, output_dir, objects):
+        """Test lookups, errors and caching over one keep-alive connection."""
+
+        async def run():
+            service = QueryService(output_dir, reload_interval=None)
+            server = await service.start(port=0)
+            port = server.sockets[0].getsockname()[1]
+            async with server:
+                responses = await fetch(
+                    port,
+                    "/techniques/T1059.001",
+                    "/techniques/T1059.001/groups",
+                    "/techniques/T1059.001/groups",
+                    "/techniques/T1059/mitigations?inherited=true",
+                    "/techniques/T9999",
+                    "/techniques/T1059/groups?subtechniques=maybe",
+                    "/nope",
+                    "/objects/G0016",
+                    "/objects/https%3A%2F%2Fattack.mitre.org%2Fgroups%2FG0016",
+                    "/objects/X0000",
+                    "/health",
+                )
+                (post,) = await fetch(port, "/health", method="POST")
+            return responses, post
+
+        responses, post = asyncio.run(run())
+        statuses = [status for status, _ in responses]
+        assert statuses == [200, 200, 200, 200, 404, 400, 404, 200, 200, 404, 200]
+        assert responses[0][1]["name"] == "PowerShell"
+        assert ids(responses[1][1]["groups"]) == [APT29]
+        assert responses[1] == responses[2]
+        assert "T9999" in responses[4][1]["error"]
+        assert responses[7][1]["id"] == responses[8][1]["id"] == APT29
+        assert "X0000" in responses[9][1]["error"]
+        health = responses[-1][1]
+        assert health["objects"] == len(objects)
+        assert health["cache"]["hits"] == 1
+        assert post[0] == 405
+
+    def test_hot_reload_swaps_snapshot(self, output_dir, objects):
+        """Test a new ingest is picked up and invalidates cached responses."""
+
+        async def run():
+            service = QueryService(output_dir, reload_interval=None)
+            before = service.respond("/techniques/T1059.001/groups")
+            assert await service.check_reload() is False
+
+            kept = [obj for obj in objects if obj["id"] != APT29]
+            write_output(kept, output_dir)
+            path = output_dir / OBJECTS_FILENAME
+            os.utime(path, ns=(0, 0))  # a fresh mtime isn't guaranteed on coarse clocks
+            assert await service.check_reload() is True
+            after = service.respond("/techniques/T1059.001/groups")
+            return service, before, after
+
+        service, before, after = asyncio.run(run())
+        assert service.generation == 2
+        assert json.loads(before[1])["groups"] != []
+        assert json.loads(after[1])["groups"] == []
+
+    def test_failed_reload_keeps_serving(self, output_dir):
+        """Test an unreadable new output leaves the old snapshot in service."""
+
+        async def run():
+            service = QueryService(output_dir, reload_interval=None)
+            (output_dir / OBJECTS_FILENAME).write_text("{not json\n")
+            assert await service.check_reload() is False
+            return service
+
+        service = asyncio.run(run())
+        assert service.generation == 1
+        assert service.health()["reload_error"].startswith("JSONDecodeError")
+        assert service.respond("/techniques/T1059")[0] == 200
@@ -0,0 +1,153 @@
+"""
+Tests for the multi-release object store
+"""
+
+import copy
+import json
+import pytest
+from pathlib import Path
+
+from orbit.store import ReleaseStore, object_hash
+
+FIXTURE_PATH = Path(__file__).parent / "fixtures" / "attack_sample.json"
+
+
+@pytest.fixture
+def v1():
+    return json.loads(FIXTURE_PATH.read_text())["objects"]
+
+
+@pytest.fixture
+def v2(v1):
+    """Next release: one object changed, one removed, one added."""
+    objects = copy.deepcopy(v1)
+    changed = next(o for o in objects if o["type"] == "attack-pattern")
+    changed["description"] = "Updated description."
+    changed["modified"] = "2024-01-01T00:00:00.000Z"
+    removed = objects.pop(next(i for i, o in enumerate(objects) if o["type"] == "tool"))
+    added = {
+        "type": "course-of-action",
+        "id": "course-of-action--99999999-9999-4999-8999-999999999999",
+        "created": "2024-01-01T00:00:00.000Z",
+        "modified": "2024-01-01T00:00:00.000Z",
+        "name": "New Mitigation",
+    }
+    objects.append(added)
+    return objects, changed["id"], removed["id"], added["id"]
+
+
+def stored_objects(root: Path) -> int:
+    return sum(len(path.read_bytes().splitlines()) for path in (root / "packs").glob("*.ndjson"))
+
+
+class TestReleaseStore:
+    """Tests for ReleaseStore."""
+
+    def test_round_trip(self, tmp_path, v1):
+        """Test a stored release loads back equal, sorted by ID."""
+        store = ReleaseStore(tmp_path)
+        summary = store.add_release("v1", v1)
+        assert (summary.object_count, summary.new_objects) == (40, 40)
+
+        loaded = ReleaseStore(tmp_path).load("v1")
+        assert loaded == sorted(v1, key=lambda o: o["id"])
+
+    def test_unchanged_objects_stored_once(self, tmp_path, v1, v2):
+        """Test consecutive releases share unchanged objects on disk."""
+        objects, *_ = v2
+        store = ReleaseStore(tmp_path)
+        store.add_release("v1", v1)
+        summary = store.add_release("v2", objects)
+        assert summary.new_objects == 2  # changed + added
+        assert stored_objects(tmp_path) == 42
+
+    def test_releases_share_loaded_objects(self, tmp_path, v1, v2):
+        """Test loading N after N-1 reuses unchanged objects in memory."""
+        objects, changed_id, _, _ = v2
+        ReleaseStore(tmp_path).add_release("v1", v1)
+        ReleaseStore(tmp_path).add_release("v2", objects)
+
+        store = ReleaseStore(tmp_path)
+        old = {o["id"]: o for o in store.load("v1")}
+        new = {o["id"]: o for o in store.load("v2")}
+        shared = [stix_id for stix_id in old.keys() & new.keys() if old[stix_id] is new[stix_id]]
+        assert len(shared) == 38
+        assert old[changed_id] is not new[changed_id]
+
+    def test_stored_objects_are_copies(self, tmp_path, v1):
+        """Test mutating an object after storing it doesn't change the release."""
+        store = ReleaseStore(tmp_path)
+        store.add_release("v1", v1)
+        stored = store.get(v1[0]["id"], "v1")
+        assert stored == v1[0] and stored is not v1[0]
+
+        v1[0]["name"] = "Changed by the caller"
+        assert store.get(v1[0]["id"], "v1") == ReleaseStore(tmp_path).get(v1[0]["id"], "v1")
+
+    def test_as_of_lookup(self, tmp_path, v1, v2):
+        """Test objects are retrievable as of any stored release."""
+        objects, changed_id, removed_id, added_id = v2
+        store = ReleaseStore(tmp_path)
+        store.add_release("v1", v1)
+        store.add_release("v2", objects)
+
+        store = ReleaseStore(tmp_path)
+        assert store.get(changed_id, "v1")["description"] != "Updated description."
+        assert store.get(changed_id, "v2")["description"] == "Updated description."
+        assert store.get(removed_id, "v2") is None
+        assert store.get(added_id, "v1") is None
+
+    def test_diff(self, tmp_path, v1, v2):
+        """Test diffs come from manifests."""
+        objects, changed_id, removed_id, added_id = v2
+        store = ReleaseStore(tmp_path)
+        store.add_release("v1", v1)
+        store.add_release("v2", objects)
+        assert store.diff("v1", "v2") == {
+            "added": [added_id],
+            "removed": [removed_id],
+            "changed": [changed_id],
+        }
+
+    def test_releases_listed_in_order(self, tmp_path, v1):
+        """Test release names are listed in the order added."""
+        store = ReleaseStore(tmp_path)
+        assert store.releases() == []
+        for name in ("v2.0", "v10.0", "v9.1"):
+            store.add_release(name, v1)
+        assert ReleaseStore(tmp_path).releases() == ["v2.0", "v10.0", "v9.1"]
+
+    def test_invalid_releases_rejected(self, tmp_path, v1):
+        """Test bad names, duplicates and unknown releases raise."""
+        store = ReleaseStore(tmp_path)
+        store.add_release("v1", v1)
+        with pytest.raises(ValueError, match="already exists"):
+            store.add_release("v1", v1)
+        with pytest.raises(ValueError, match="Invalid release name"):
+            store.add_release("../v2", v1)
+        with pytest.raises(ValueError, match="Duplicate object ID"):
+            store.add_release("v3", v1 + v1[:1])
+        with pytest.raises(KeyError, match="Unknown release"):
+            store.load("v4")
+
+    def test_corruption_detected(self, tmp_path, v1):
+        """Test stored objects are verified against their hash."""
+        ReleaseStore(tmp_path).add_release("v1", v1)
+        path = tmp_path / "packs" / "v1.ndjson"
+        path.write_bytes(path.read_bytes().replace(b"Cobalt Strike", b"Cobalt Strikf"))
+        cobalt_strike = next(o for o in v1 if o.get("name") == "Cobalt Strike")
+        with pytest.raises(ValueError, match="Corrupt stored object"):
+            ReleaseStore(tmp_path).get(cobalt_strike["id"], "v1")
+
+    def test_release_without_new_objects_has_no_pack(self, tmp_path, v1):
+        """Test re-releasing identical content writes only a manifest."""
+        store = ReleaseStore(tmp_path)
+        store.add_release("v1", v1)
+        assert store.add_release("v1-rerun", v1).new_objects == 0
+        assert not (tmp_path / "packs" / "v1-rerun.ndjson").exists()
+        assert ReleaseStore(tmp_path).load("v1-rerun") == store.load("v1")
+
+    def test_hash_is_canonical(self, v1):
+        """Test key order does not change an object's hash."""
+        obj = v1[0]
+        assert object_hash(obj) == object_hash(dict(reversed(list(obj.items()))))